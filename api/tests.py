@@ -1,4 +1,122 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Tests will be added here
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
 
+from core.models import Company, CompanyUser, CompanyUserToken, Project, Subtask, Task
+from marketing_agent.models import Campaign, CampaignContact, EmailSequence, EmailSequenceStep, EmailTemplate, Lead
+
+
+class CompanyDashboardQueryTests(TestCase):
+    """The company dashboard and projects list run a fixed number of queries, however many projects and tasks."""
+
+    def setUp(self):
+        self.owner = User.objects.create_user(username='owner', password='x')
+        self.assignee = User.objects.create_user(username='dev', password='x', first_name='Dev')
+        company = Company.objects.create(name='Acme', email='info@acme.test')
+        self.company_user = CompanyUser.objects.create(
+            company=company, email='pm@acme.test', password_hash='x', full_name='PM', role='project_manager',
+        )
+        token = CompanyUserToken.objects.create(company_user=self.company_user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    def _make_projects(self, count, tasks_per_project=3):
+        for p in range(count):
+            project = Project.objects.create(
+                name=f'Project {p}', owner=self.owner, created_by_company_user=self.company_user,
+                status='active' if p % 2 else 'completed',
+            )
+            for t in range(tasks_per_project):
+                task = Task.objects.create(
+                    project=project, title=f'Task {p}.{t}', assignee=self.assignee,
+                    status=['todo', 'in_progress', 'done'][t % 3],
+                )
+                Subtask.objects.create(task=task, title=f'Subtask {p}.{t}')
+
+    def _queries(self, url_name):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse(f'api:{url_name}'))
+        self.assertEqual(response.status_code, 200)
+        return len(ctx), response.data['data']
+
+    def test_dashboard_query_count_is_constant(self):
+        self._make_projects(2)
+        few, _ = self._queries('pm_dashboard')
+        self._make_projects(12, tasks_per_project=5)
+        many, data = self._queries('pm_dashboard')
+        self.assertEqual(few, many)
+        self.assertEqual(len(data['projects']), 10)
+
+    def test_projects_list_query_count_is_constant(self):
+        self._make_projects(2)
+        few, _ = self._queries('get_company_user_projects')
+        self._make_projects(12, tasks_per_project=5)
+        many, data = self._queries('get_company_user_projects')
+        self.assertEqual(few, many)
+        self.assertEqual(len(data), 14)
+        task = data[0]['tasks'][0]
+        self.assertEqual(task['assignee_name'], 'Dev')
+        self.assertEqual(len(task['subtasks']), 1)
+
+    def test_dashboard_stats(self):
+        self._make_projects(3)
+        _, data = self._queries('pm_dashboard')
+        self.assertEqual(data['stats'], {
+            'total_projects': 3, 'active_projects': 1, 'completed_projects': 2,
+            'total_tasks': 9, 'completed_tasks': 3, 'in_progress_tasks': 3, 'todo_tasks': 3,
+        })
+        self.assertEqual(data['projects'][0]['tasks_count'], 3)
+
+    @override_settings(
+        COMPANY_DASHBOARD_CACHE_TTL=60,
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'dashboard-tests'}},
+    )
+    def test_cached_dashboard_is_invalidated_on_task_write(self):
+        self._make_projects(1)
+        uncached, _ = self._queries('pm_dashboard')
+        cached, _ = self._queries('pm_dashboard')
+        self.assertLess(cached, uncached)
+        task = Task.objects.first()
+        task.status = 'done'
+        task.save()
+        _, data = self._queries('pm_dashboard')
+        self.assertEqual(data['stats']['completed_tasks'], 2)
+        Subtask.objects.first().delete()
+        _, data = self._queries('pm_dashboard')
+        self.assertEqual(sum(len(t['subtasks']) for t in data['projects'][0]['tasks']), 2)
+
+
+class MarketingSequenceUpdateTests(TestCase):
+    """Editing a sequence's steps through the API moves its contacts' next send time."""
+
+    def test_update_sequence_reschedules_contacts(self):
+        company = Company.objects.create(name='Acme', email='info@acme.test')
+        company_user = CompanyUser.objects.create(
+            company=company, email='mk@acme.test', password_hash='x', full_name='Mark Eting', role='project_manager',
+        )
+        user = User.objects.create_user(username='mk', email='mk@acme.test', password='x')
+        campaign = Campaign.objects.create(name='Outreach', owner=user, status='active')
+        template = EmailTemplate.objects.create(campaign=campaign, name='Intro', subject='Hi', html_content='<p>Hi</p>')
+        sequence = EmailSequence.objects.create(campaign=campaign, name='Intro')
+        EmailSequenceStep.objects.create(sequence=sequence, template=template, step_order=1, delay_days=1)
+        lead = Lead.objects.create(owner=user, email='lead@example.com')
+        started_at = timezone.now()
+        contact = CampaignContact.objects.create(campaign=campaign, lead=lead, sequence=sequence, started_at=started_at)
+        self.assertEqual(contact.next_send_at, started_at + timedelta(days=1))
+
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {CompanyUserToken.objects.create(company_user=company_user).key}')
+        response = client.put(
+            reverse('api:marketing_update_sequence', args=[campaign.id, sequence.id]),
+            {'steps': [{'template_id': template.id, 'delay_days': 3}]}, format='json',
+        )
+
+        self.assertEqual(response.status_code, 200)
+        contact.refresh_from_db()
+        self.assertEqual(contact.next_send_at, started_at + timedelta(days=3))
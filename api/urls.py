@@ -33,13 +33,14 @@ from api.views import user_project_manager
 from api.views import recruitment_agent
 from api.views import marketing_agent
 from api.views import module_purchase
-from api.views.health import health_check
+from api.views.health import health_check, llm_pool_metrics
 
 app_name = 'api'
 
 urlpatterns = [
     # Health check
     re_path(r'^health/?$', health_check, name='health_check'),
+    re_path(r'^health/llm-pool/?$', llm_pool_metrics, name='llm_pool_metrics'),
     
     # Authentication endpoints
     re_path(r'^auth/register/?$', auth.register, name='register'),
@@ -209,6 +210,7 @@ urlpatterns = [
     
     # Recruitment Agent endpoints (Company User)
     re_path(r'^recruitment/process-cvs/?$', recruitment_agent.process_cvs, name='recruitment_process_cvs'),  # POST
+    re_path(r'^recruitment/cv-jobs/(?P<job_id>[0-9a-f-]+)/?$', recruitment_agent.cv_job_status, name='recruitment_cv_job_status'),  # GET
     re_path(r'^recruitment/job-descriptions/?$', recruitment_agent.list_job_descriptions, name='recruitment_list_job_descriptions'),  # GET
     re_path(r'^recruitment/job-descriptions/generate/?$', recruitment_agent.generate_job_description, name='recruitment_generate_job_description'),  # POST
     re_path(r'^recruitment/job-descriptions/create/?$', recruitment_agent.create_job_description, name='recruitment_create_job_description'),  # POST
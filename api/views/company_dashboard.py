@@ -4,9 +4,10 @@ Company Dashboard API Views
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes, authentication_classes
 from rest_framework.response import Response
-from django.db.models import Q, Count
+from django.db.models import Q, Count, Prefetch
 import logging
 
+from core import dashboard_cache
 from core.models import Project, Task, CompanyUser, Subtask
 from api.authentication import CompanyUserTokenAuthentication
 from api.permissions import IsCompanyUserOnly
@@ -14,6 +15,39 @@ from api.permissions import IsCompanyUserOnly
 logger = logging.getLogger(__name__)
 
 
+def _project_stats(projects):
+    """Project and task counts for a project queryset in one conditional-aggregate query"""
+    return projects.aggregate(
+        total_projects=Count('id', distinct=True),
+        active_projects=Count('id', filter=Q(status='active'), distinct=True),
+        completed_projects=Count('id', filter=Q(status='completed'), distinct=True),
+        total_tasks=Count('tasks'),
+        completed_tasks=Count('tasks', filter=Q(tasks__status='done')),
+        in_progress_tasks=Count('tasks', filter=Q(tasks__status='in_progress')),
+        todo_tasks=Count('tasks', filter=Q(tasks__status='todo')),
+    )
+
+
+def _with_tasks(projects, with_assignee=False):
+    """Projects with their tasks and subtasks prefetched (one query per level)"""
+    tasks = Task.objects.select_related('assignee') if with_assignee else Task.objects.all()
+    return projects.prefetch_related(Prefetch('tasks', queryset=tasks), 'tasks__subtasks')
+
+
+def _subtasks_data(task):
+    return [
+        {
+            'id': st.id,
+            'title': st.title,
+            'description': st.description,
+            'status': st.status,
+            'order': st.order,
+            'created_at': st.created_at.isoformat() if st.created_at else None,
+        }
+        for st in task.subtasks.all()
+    ]
+
+
 @api_view(['GET'])
 @authentication_classes([CompanyUserTokenAuthentication])
 @permission_classes([IsCompanyUserOnly])
@@ -55,61 +89,42 @@ def project_manager_dashboard(request):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
         
-        # Get projects created by this company user
-        projects = Project.objects.filter(created_by_company_user=company_user)
-        tasks = Task.objects.filter(project__created_by_company_user=company_user)
-        
-        # Calculate statistics
-        stats = {
-            'total_projects': projects.count(),
-            'active_projects': projects.filter(status='active').count(),
-            'completed_projects': projects.filter(status='completed').count(),
-            'total_tasks': tasks.count(),
-            'completed_tasks': tasks.filter(status='done').count(),
-            'in_progress_tasks': tasks.filter(status='in_progress').count(),
-            'todo_tasks': tasks.filter(status='todo').count(),
-        }
-        
-        # Get recent projects with tasks and subtasks
-        recent_projects = projects.order_by('-created_at')[:10]
-        projects_data = []
-        for p in recent_projects:
-            # Get all tasks for this project
-            project_tasks = Task.objects.filter(project=p)
-            tasks_data = []
-            for task in project_tasks:
-                # Get all subtasks for this task
-                subtasks = task.subtasks.all()
-                tasks_data.append({
-                    'id': task.id,
-                    'title': task.title,
-                    'description': task.description,
-                    'status': task.status,
-                    'priority': task.priority,
-                    'due_date': task.due_date.isoformat() if task.due_date else None,
-                    'subtasks': [
-                        {
-                            'id': st.id,
-                            'title': st.title,
-                            'description': st.description,
-                            'status': st.status,
-                            'order': st.order,
-                            'created_at': st.created_at.isoformat() if st.created_at else None,
-                        }
-                        for st in subtasks
-                    ],
+        def build():
+            # Get projects created by this company user
+            projects = Project.objects.filter(created_by_company_user=company_user)
+            stats = _project_stats(projects)
+
+            # Get recent projects with tasks and subtasks
+            recent_projects = _with_tasks(projects.order_by('-created_at'))[:10]
+            projects_data = []
+            for p in recent_projects:
+                project_tasks = p.tasks.all()
+                tasks_data = [
+                    {
+                        'id': task.id,
+                        'title': task.title,
+                        'description': task.description,
+                        'status': task.status,
+                        'priority': task.priority,
+                        'due_date': task.due_date.isoformat() if task.due_date else None,
+                        'subtasks': _subtasks_data(task),
+                    }
+                    for task in project_tasks
+                ]
+                projects_data.append({
+                    'id': p.id,
+                    'name': p.name,
+                    'description': p.description,
+                    'status': p.status,
+                    'priority': p.priority,
+                    'tasks_count': len(project_tasks),
+                    'tasks': tasks_data,
+                    'created_at': p.created_at.isoformat() if p.created_at else None,
                 })
-            
-            projects_data.append({
-                'id': p.id,
-                'name': p.name,
-                'description': p.description,
-                'status': p.status,
-                'priority': p.priority,
-                'tasks_count': project_tasks.count(),
-                'tasks': tasks_data,
-                'created_at': p.created_at.isoformat() if p.created_at else None,
-            })
+            return {'stats': stats, 'projects': projects_data}
+
+        data = dashboard_cache.get_or_build('dashboard', company_user.id, build)
+        stats, projects_data = data['stats'], data['projects']
         
         return Response({
             'status': 'success',
@@ -148,53 +163,47 @@ def get_company_user_projects(request):
     try:
         company_user = request.user
         
-        # Get projects created by this company user
-        projects = Project.objects.filter(created_by_company_user=company_user).order_by('-created_at')
-        
-        projects_data = []
-        for p in projects:
-            # Get all tasks for this project
-            project_tasks = Task.objects.filter(project=p)
-            tasks_data = []
-            for task in project_tasks:
-                # Get all subtasks for this task
-                subtasks = task.subtasks.all()
-                tasks_data.append({
-                    'id': task.id,
-                    'title': task.title,
-                    'description': task.description,
-                    'status': task.status,
-                    'priority': task.priority,
-                    'due_date': task.due_date.isoformat() if task.due_date else None,
-                    'created_at': task.created_at.isoformat() if task.created_at else None,
-                    'assignee_id': task.assignee.id if task.assignee else None,
-                    'assignee_name': task.assignee.get_full_name() if task.assignee and (task.assignee.first_name or task.assignee.last_name) else (task.assignee.username if task.assignee else None),
-                    'assignee_email': task.assignee.email if task.assignee else None,
-                    'subtasks': [
-                        {
-                            'id': st.id,
-                            'title': st.title,
-                            'description': st.description,
-                            'status': st.status,
-                            'order': st.order,
-                            'created_at': st.created_at.isoformat() if st.created_at else None,
-                        }
-                        for st in subtasks
-                    ],
+        def build():
+            # Get projects created by this company user
+            projects = _with_tasks(
+                Project.objects.filter(created_by_company_user=company_user).order_by('-created_at'),
+                with_assignee=True,
+            )
+            projects_data = []
+            for p in projects:
+                project_tasks = p.tasks.all()
+                tasks_data = []
+                for task in project_tasks:
+                    assignee = task.assignee
+                    tasks_data.append({
+                        'id': task.id,
+                        'title': task.title,
+                        'description': task.description,
+                        'status': task.status,
+                        'priority': task.priority,
+                        'due_date': task.due_date.isoformat() if task.due_date else None,
+                        'created_at': task.created_at.isoformat() if task.created_at else None,
+                        'assignee_id': assignee.id if assignee else None,
+                        'assignee_name': assignee.get_full_name() if assignee and (assignee.first_name or assignee.last_name) else (assignee.username if assignee else None),
+                        'assignee_email': assignee.email if assignee else None,
+                        'subtasks': _subtasks_data(task),
+                    })
+
+                projects_data.append({
+                    'id': p.id,
+                    'name': p.name,
+                    'description': p.description,
+                    'status': p.status,
+                    'priority': p.priority,
+                    'project_type': p.project_type,
+                    'tasks_count': len(project_tasks),
+                    'tasks': tasks_data,
+                    'created_at': p.created_at.isoformat() if p.created_at else None,
+                    'updated_at': p.updated_at.isoformat() if p.updated_at else None,
                 })
-            
-            projects_data.append({
-                'id': p.id,
-                'name': p.name,
-                'description': p.description,
-                'status': p.status,
-                'priority': p.priority,
-                'project_type': p.project_type,
-                'tasks_count': project_tasks.count(),
-                'tasks': tasks_data,
-                'created_at': p.created_at.isoformat() if p.created_at else None,
-                'updated_at': p.updated_at.isoformat() if p.updated_at else None,
-            })
+            return projects_data
+
+        projects_data = dashboard_cache.get_or_build('projects', company_user.id, build)
         
         return Response({
             'status': 'success',
@@ -1,6 +1,6 @@
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAdminUser
 from django.db import connection
 from django.utils import timezone
 
@@ -28,3 +28,17 @@ def health_check(request):
             'error': str(e),
         }, status=500)
 
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def llm_pool_metrics(request):
+    """Shared LLM client pool and response cache metrics"""
+    from core.llm_cache import get_llm_cache
+    from core.llm_pool import get_llm_pool
+    return Response({
+        'status': 'ok',
+        'llm_pool': get_llm_pool().stats(),
+        'llm_cache': get_llm_cache().stats(),
+        'timestamp': timezone.now().isoformat(),
+    }, status=200)
@@ -26,6 +26,7 @@ from marketing_agent.models import (
     EmailSendHistory, EmailAccount, CampaignContact, MarketingNotification,
     MarketResearch
 )
+from marketing_agent.services.sequence_schedule import reschedule_sequence_contacts
 from project_manager_agent.ai_agents.agents_registry import AgentRegistry
 
 logger = logging.getLogger(__name__)
@@ -1537,6 +1538,8 @@ def update_sequence(request, campaign_id, sequence_id):
                     delay_hours=step_data.get('delay_hours', 0),
                     delay_minutes=step_data.get('delay_minutes', 0),
                 )
+            # Steps/delays changed: move existing contacts' next send time accordingly
+            reschedule_sequence_contacts(sequence)
         return Response({
             'status': 'success',
             'data': {'message': 'Sequence updated successfully.'},
@@ -8,6 +8,7 @@ from django.shortcuts import get_object_or_404
 
 from core.models import Project, Task, Subtask, TeamMember, UserProfile
 from project_manager_agent.ai_agents import AgentRegistry
+from project_manager_agent.ai_agents.context_manager import ContextManager
 from api.authentication import CompanyUserTokenAuthentication
 from api.permissions import IsCompanyUserOnly
 
@@ -56,26 +57,15 @@ def _build_available_users(project_id=None, project=None):
     available_users = []
 
     if project_id and project is not None:
-        team_members = TeamMember.objects.filter(project_id=project_id).select_related("user")
-        for member in team_members:
-            available_users.append(
-                {
-                    "id": member.user.id,
-                    "username": member.user.username,
-                    "name": member.user.get_full_name() or member.user.username,
-                    "role": member.role,
-                }
-            )
-
-        # Include owner if not in team list
-        team_user_ids = {m.user.id for m in team_members}
-        if project.owner_id and project.owner_id not in team_user_ids:
+        # Team members, plus the owner if not in the team (role "owner")
+        team = ContextManager.get_project_context(project.id, include_tasks=False).get("team", [])
+        for member in team:
             available_users.append(
                 {
-                    "id": project.owner.id,
-                    "username": project.owner.username,
-                    "name": project.owner.get_full_name() or project.owner.username,
-                    "role": "owner",
+                    "id": member["user_id"],
+                    "username": member["username"],
+                    "name": member["name"],
+                    "role": member["role"],
                 }
             )
     else:
@@ -183,7 +173,6 @@ def project_pilot(request):
 
         if project_id:
             project = get_object_or_404(Project, id=project_id, created_by_company_user=company_user)
-            tasks = Task.objects.filter(project=project).select_related("assignee")
             context = {
                 "project": {
                     "id": project.id,
@@ -191,18 +180,11 @@ def project_pilot(request):
                     "description": project.description,
                     "status": project.status,
                     "priority": project.priority,
-                "tasks": [
-                    {
-                        "id": t.id,
-                        "title": t.title,
-                        "status": t.status,
-                        "priority": t.priority,
-                        "description": t.description,
-                        "assignee_id": t.assignee.id if t.assignee else None,
-                        "assignee_username": t.assignee.username if t.assignee else None,
-                    }
-                    for t in tasks
-                ],
+                "tasks": ContextManager.get_project_tasks(
+                    project.id,
+                    fields=("id", "title", "status", "priority", "description", "assignee_id", "assignee_username"),
+                    include_dependencies=False,
+                ),
                 },
                 "all_projects": [
                     {
@@ -749,29 +731,33 @@ def task_prioritization(request):
 
         if project_id:
             project = get_object_or_404(Project, id=project_id, created_by_company_user=company_user)
-            tasks_queryset = Task.objects.filter(project_id=project_id, project__created_by_company_user=company_user)
+            tasks = ContextManager.get_project_tasks(project.id, fields=(
+                "id", "title", "description", "status", "priority", "due_date", "estimated_hours", "actual_hours",
+                "assignee_id", "assignee_name", "dependencies", "dependent_count", "created_at", "progress_percentage",
+            ))
         else:
-            tasks_queryset = Task.objects.filter(project__created_by_company_user=company_user)[:50]
-
-        tasks = [
-            {
-                "id": t.id,
-                "title": t.title,
-                "description": t.description,
-                "status": t.status,
-                "priority": t.priority,
-                "due_date": t.due_date.isoformat() if t.due_date else None,
-                "estimated_hours": float(t.estimated_hours) if t.estimated_hours else None,
-                "actual_hours": float(t.actual_hours) if t.actual_hours else None,
-                "assignee_id": t.assignee.id if t.assignee else None,
-                "assignee_name": t.assignee.get_full_name() or t.assignee.username if t.assignee else None,
-                "dependencies": [dep.id for dep in t.depends_on.all()],
-                "dependent_count": t.dependent_tasks.count(),
-                "created_at": t.created_at.isoformat() if t.created_at else None,
-                "progress_percentage": t.progress_percentage,
-            }
-            for t in tasks_queryset
-        ]
+            tasks_queryset = Task.objects.filter(project__created_by_company_user=company_user).select_related(
+                "assignee"
+            ).prefetch_related("depends_on", "dependent_tasks")[:50]
+            tasks = [
+                {
+                    "id": t.id,
+                    "title": t.title,
+                    "description": t.description,
+                    "status": t.status,
+                    "priority": t.priority,
+                    "due_date": t.due_date.isoformat() if t.due_date else None,
+                    "estimated_hours": float(t.estimated_hours) if t.estimated_hours else None,
+                    "actual_hours": float(t.actual_hours) if t.actual_hours else None,
+                    "assignee_id": t.assignee.id if t.assignee else None,
+                    "assignee_name": t.assignee.get_full_name() or t.assignee.username if t.assignee else None,
+                    "dependencies": [dep.id for dep in t.depends_on.all()],
+                    "dependent_count": len(t.dependent_tasks.all()),
+                    "created_at": t.created_at.isoformat() if t.created_at else None,
+                    "progress_percentage": t.progress_percentage,
+                }
+                for t in tasks_queryset
+            ]
 
         if project_id:
             members = TeamMember.objects.filter(project_id=project_id, project__created_by_company_user=company_user).select_related("user")
@@ -943,29 +929,27 @@ def generate_subtasks(request):
         # Get company from company_user
         company = company_user.company
         
-        get_object_or_404(Project, id=project_id, created_by_company_user=company_user)
+        project = get_object_or_404(Project, id=project_id, created_by_company_user=company_user)
 
-        tasks_queryset = Task.objects.filter(project_id=project_id, project__created_by_company_user=company_user)
+        project_tasks = ContextManager.get_project_tasks(project.id, include_dependencies=False)
         
-        # Filter out tasks that already have subtasks
-        from core.models import Subtask
+        # Filter out tasks that already have subtasks (read directly: the project context may lag
+        # behind a concurrent request that just saved subtasks)
         tasks_with_subtasks = set(
-            Subtask.objects.filter(task__project_id=project_id, task__project__created_by_company_user=company_user)
-            .values_list('task_id', flat=True)
-            .distinct()
+            Subtask.objects.filter(task__project_id=project.id).values_list('task_id', flat=True).distinct()
         )
         
         tasks = [
             {
-                "id": t.id,
-                "title": t.title,
-                "description": t.description or "",
-                "status": t.status,
-                "priority": t.priority,
-                "estimated_hours": float(t.estimated_hours) if t.estimated_hours else None,
+                "id": t["id"],
+                "title": t["title"],
+                "description": t["description"] or "",
+                "status": t["status"],
+                "priority": t["priority"],
+                "estimated_hours": t["estimated_hours"],
             }
-            for t in tasks_queryset
-            if t.id not in tasks_with_subtasks  # Only include tasks without existing subtasks
+            for t in project_tasks
+            if t["id"] not in tasks_with_subtasks  # Only include tasks without existing subtasks
         ]
         
         if not tasks:
@@ -1105,40 +1089,22 @@ def timeline_gantt(request):
             )
 
         project = get_object_or_404(Project, id=project_id, created_by_company_user=company_user)
-        tasks_queryset = Task.objects.filter(project=project, project__created_by_company_user=company_user).prefetch_related('depends_on', 'assignee')
+        project_context = ContextManager.get_project_context(project.id)
+        task_fields = (
+            "id", "title", "status", "priority", "due_date", "estimated_hours", "actual_hours", "dependencies",
+            "assignee_id",
+        )
+        tasks = [{field: t[field] for field in task_fields} for t in project_context["tasks"]]
         
         # Get team size (unique assignees or team members)
-        from core.models import TeamMember
-        unique_assignees = set()
-        for task in tasks_queryset:
-            if task.assignee:
-                unique_assignees.add(task.assignee.id)
-        team_members_count = TeamMember.objects.filter(project=project, removed_at__isnull=True).count()
+        unique_assignees = {t["assignee_id"] for t in tasks if t["assignee_id"]}
+        team_members_count = sum(1 for m in project_context["team"] if m["is_member"] and m["active"])
         team_size = max(len(unique_assignees), team_members_count, 1)
 
-        tasks = [
-                {
-                    "id": t.id,
-                    "title": t.title,
-                    "status": t.status,
-                    "priority": t.priority,
-                    "due_date": t.due_date.isoformat() if t.due_date else None,
-                    "estimated_hours": float(t.estimated_hours) if t.estimated_hours else None,
-                    "actual_hours": float(t.actual_hours) if t.actual_hours else None,
-                    "dependencies": [dep.id for dep in t.depends_on.all()],
-                    "assignee_id": t.assignee.id if t.assignee else None,
-                }
-            for t in tasks_queryset
-        ]
-
         context = {
             "project": {
-                "id": project.id,
-                "name": project.name,
-                "status": project.status,
-                "start_date": project.start_date.isoformat() if project.start_date else None,
-                "end_date": project.end_date.isoformat() if project.end_date else None,
-                "deadline": project.deadline.isoformat() if project.deadline else None,
+                field: project_context["project"][field]
+                for field in ("id", "name", "status", "start_date", "end_date", "deadline")
             },
             "tasks": tasks,
         }
@@ -1299,7 +1265,6 @@ def knowledge_qa(request):
 
         if project_id:
             project = get_object_or_404(Project, id=project_id, created_by_company_user=company_user)
-            tasks = Task.objects.filter(project=project).select_related("assignee")
             context = {
                 "project": {
                     "id": project.id,
@@ -1307,18 +1272,11 @@ def knowledge_qa(request):
                     "description": project.description,
                     "status": project.status,
                     "priority": project.priority,
-                "tasks": [
-                    {
-                        "id": t.id,
-                        "title": t.title,
-                        "status": t.status,
-                        "priority": t.priority,
-                        "description": t.description,
-                        "assignee_id": t.assignee.id if t.assignee else None,
-                        "assignee_username": t.assignee.username if t.assignee else None,
-                    }
-                    for t in tasks
-                ],
+                "tasks": ContextManager.get_project_tasks(
+                    project.id,
+                    fields=("id", "title", "status", "priority", "description", "assignee_id", "assignee_username"),
+                    include_dependencies=False,
+                ),
                 },
                 "all_projects": [
                     {
@@ -1886,7 +1844,6 @@ def project_pilot_from_file(request):
                 project = None
 
         if project:
-            tasks = Task.objects.filter(project=project).select_related("assignee")
             context = {
                 "project": {
                     "id": project.id,
@@ -1896,17 +1853,11 @@ def project_pilot_from_file(request):
                     "description": project.description,
                     "deadline": project.deadline.isoformat() if project.deadline else None,
                 },
-                "tasks": [
-                    {
-                        "id": t.id,
-                        "title": t.title,
-                        "status": t.status,
-                        "priority": t.priority,
-                        "description": t.description,
-                        "due_date": t.due_date.isoformat() if t.due_date else None,
-                    }
-                    for t in tasks
-                ],
+                "tasks": ContextManager.get_project_tasks(
+                    project.id,
+                    fields=("id", "title", "status", "priority", "description", "due_date"),
+                    include_dependencies=False,
+                ),
             }
         else:
             context = {
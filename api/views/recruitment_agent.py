@@ -15,17 +15,13 @@ from django.db.models import Q
 from django.core.mail import send_mail
 from django.template.loader import render_to_string
 from django.conf import settings
+from django.core.exceptions import ValidationError
 
-from recruitment_agent.agents.cv_parser import CVParserAgent
-from recruitment_agent.agents.summarization import SummarizationAgent
-from recruitment_agent.agents.lead_enrichment import LeadResearchEnrichmentAgent
-from recruitment_agent.agents.lead_qualification import LeadQualificationAgent
-from recruitment_agent.agents.job_description_parser import JobDescriptionParserAgent
-from recruitment_agent.agents.interview_scheduling import InterviewSchedulingAgent
-from recruitment_agent.core import GroqClient
-from recruitment_agent.log_service import LogService
-from recruitment_agent.django_repository import DjangoRepository
-from recruitment_agent.models import Interview, CVRecord, JobDescription, RecruiterEmailSettings, RecruiterInterviewSettings, RecruiterQualificationSettings
+from recruitment_agent.batch import run_batch
+from recruitment_agent.cv_pipeline import (
+    create_cv_job, get_agents, load_qualification_thresholds, process_cv_file, rank_and_schedule, serialize_cv_job,
+)
+from recruitment_agent.models import Interview, CVProcessingJob, CVRecord, JobDescription, RecruiterEmailSettings, RecruiterInterviewSettings, RecruiterQualificationSettings
 
 from api.authentication import CompanyUserTokenAuthentication
 from api.permissions import IsCompanyUserOnly
@@ -33,32 +29,6 @@ from core.models import CompanyUser
 
 logger = logging.getLogger(__name__)
 
-# Initialize agents (singleton pattern for efficiency)
-_agents_cache = None
-
-def get_agents():
-    """Get initialized agents (singleton pattern)"""
-    global _agents_cache
-    
-    if _agents_cache is None:
-        log_service = LogService()
-        groq_client = GroqClient()
-        django_repo = DjangoRepository()
-        
-        _agents_cache = {
-            'log_service': log_service,
-            'groq_client': groq_client,
-            'cv_agent': CVParserAgent(groq_client=groq_client, log_service=log_service),
-            'sum_agent': SummarizationAgent(groq_client=groq_client, log_service=log_service),
-            'enrich_agent': LeadResearchEnrichmentAgent(log_service=log_service, sql_repository=django_repo),
-            'qualify_agent': LeadQualificationAgent(log_service=log_service, sql_repository=django_repo),
-            'job_desc_agent': JobDescriptionParserAgent(groq_client=groq_client, log_service=log_service),
-            'interview_agent': InterviewSchedulingAgent(log_service=log_service),
-            'django_repo': django_repo,
-        }
-    
-    return _agents_cache
-
 
 @api_view(['POST'])
 @authentication_classes([CompanyUserTokenAuthentication])
@@ -93,6 +63,7 @@ def process_cvs(request):
         top_n = request.data.get('top_n')
         top_n = int(top_n) if top_n else None
         parse_only = request.data.get('parse_only', False)
+        run_async = str(request.data.get('run_async', '')).lower() in ('1', 'true', 'yes')
         
         # Initialize job_kw_list
         job_kw_list = None
@@ -183,11 +154,32 @@ def process_cvs(request):
         if not job_kw_list and job_keywords:
             job_kw_list = [kw.strip() for kw in job_keywords.split(",") if kw.strip()]
         
+        # Large batches: queue a background job and let the client poll for progress
+        if run_async:
+            from recruitment_agent.tasks import process_cv_job_task
+            interview_threshold, hold_threshold = (None, None) if parse_only else load_qualification_thresholds(company_user)
+            job = create_cv_job(company_user, files, job_desc, options={
+                'job_kw_list': job_kw_list,
+                'job_description_text': job_description_text,
+                'top_n': top_n,
+                'parse_only': bool(parse_only),
+                'interview_threshold': interview_threshold,
+                'hold_threshold': hold_threshold,
+            })
+            process_cv_job_task.delay(str(job.job_id))
+            return Response({
+                'status': 'accepted',
+                'job_id': str(job.job_id),
+                'total': job.total_count,
+                'status_url': f'/api/recruitment/cv-jobs/{job.job_id}/',
+            }, status=status.HTTP_202_ACCEPTED)
+        
         # Process CV files
-        parsed_results = []
         temp_paths = []
         
         try:
+            # Spool uploads to disk in the request thread; parsing runs on the batch pool
+            uploads = []
             for uploaded_file in files:
                 suffix = Path(uploaded_file.name).suffix
                 with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
@@ -195,40 +187,21 @@ def process_cvs(request):
                         tmp.write(chunk)
                     temp_path = Path(tmp.name)
                     temp_paths.append(temp_path)
-                
-                try:
-                    parsed = cv_agent.parse_file(str(temp_path))
-                except Exception as parse_exc:
-                    # Check if it's an API key expiration error
-                    from recruitment_agent.core import GroqClientError
-                    if isinstance(parse_exc, GroqClientError) and parse_exc.is_auth_error:
-                        logger.error(f"Groq API key expired during CV parsing for {uploaded_file.name}")
-                        return Response({
-                            'status': 'error',
-                            'message': 'Groq API key expired or invalid. Please update GROQ_REC_API_KEY in environment variables and try again.',
-                            'error_type': 'api_key_expired'
-                        }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
-                    else:
-                        raise  # Re-raise other errors
-                
-                record_id = django_repo.store_parsed(uploaded_file.name, parsed) if django_repo else None
-                
-                # Link to company_user and job description if provided
-                if record_id:
-                    try:
-                        cv_record = CVRecord.objects.get(id=record_id)
-                        cv_record.company_user = company_user
-                        if job_desc:
-                            cv_record.job_description = job_desc
-                        cv_record.save()
-                    except CVRecord.DoesNotExist:
-                        pass
-                
-                parsed_results.append({
-                    'file_name': uploaded_file.name,
-                    'parsed': parsed,
-                    'record_id': record_id,
-                })
+                uploads.append((uploaded_file.name, temp_path))
+            
+            # Get qualification settings for company user (fetch once, use for all CVs)
+            interview_threshold, hold_threshold = (None, None) if parse_only else load_qualification_thresholds(company_user)
+            
+            # Parse, summarize, enrich and qualify CVs concurrently (input order preserved,
+            # per-CV failures isolated, Groq 429s retried after Retry-After)
+            outcomes = run_batch(
+                uploads,
+                lambda upload: process_cv_file(
+                    agents, upload[0], upload[1], job_desc, job_kw_list,
+                    interview_threshold, hold_threshold, parse_only,
+                ),
+                log_service=log_service,
+            )
             
             # Clean up temp files
             for temp_path in temp_paths:
@@ -237,184 +210,41 @@ def process_cvs(request):
                 except Exception:
                     pass
             
+            if any(outcome['is_auth_error'] for outcome in outcomes):
+                logger.error("Groq API key expired during CV processing")
+                return Response({
+                    'status': 'error',
+                    'message': 'Groq API key expired or invalid. Please update GROQ_REC_API_KEY in environment variables and try again.',
+                    'error_type': 'api_key_expired'
+                }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+            
+            all_results = [outcome['result'] for outcome in outcomes if outcome['ok']]
+            failed = [
+                {'file_name': uploads[outcome['index']][0], 'error': outcome['error']}
+                for outcome in outcomes if not outcome['ok']
+            ]
+            if failed and not all_results:
+                raise Exception(failed[0]['error'])
+            
             # If parse_only, return parsed results
             if parse_only:
                 return Response({
                     'status': 'success',
-                    'results': parsed_results,
+                    'results': all_results,
+                    'errors': failed,
                     'parse_only': True
                 })
             
-            # Get qualification settings for company user (fetch once, use for all CVs)
-            interview_threshold = None
-            hold_threshold = None
-            try:
-                qual_settings = RecruiterQualificationSettings.objects.filter(company_user=company_user).first()
-                if qual_settings and qual_settings.use_custom_thresholds:
-                    interview_threshold = qual_settings.interview_threshold
-                    hold_threshold = qual_settings.hold_threshold
-            except Exception as e:
-                logger.warning(f"Error fetching qualification settings: {e}")
-            
-            # Summarize, enrich, and qualify
-            all_results = []
-            import time
-            for idx, result in enumerate(parsed_results):
-                parsed = result['parsed']
-                
-                # Add small delay between CVs to avoid rate limits (except for first one)
-                if idx > 0:
-                    time.sleep(0.5)  # 500ms delay between CVs
-                
-                # Summarize
-                summary = sum_agent.summarize(parsed, job_kw_list)
-                # Ensure summary is a dict
-                if not isinstance(summary, dict):
-                    summary = summary[0] if isinstance(summary, list) and len(summary) > 0 else {}
-                
-                # Enrich
-                enriched = enrich_agent.enrich(parsed, summary)
-                # Ensure enriched is a dict
-                if not isinstance(enriched, dict):
-                    enriched = enriched[0] if isinstance(enriched, list) and len(enriched) > 0 else {}
-                
-                # Qualify - correct parameter order: (parsed_cv, candidate_insights, job_keywords, enriched_data, interview_threshold, hold_threshold)
-                qualified = qualify_agent.qualify(parsed, summary, job_kw_list, enriched, interview_threshold, hold_threshold)
-                # Ensure qualified is a dict
-                if not isinstance(qualified, dict):
-                    qualified = qualified[0] if isinstance(qualified, list) and len(qualified) > 0 else {}
-                
-                all_results.append({
-                    'file_name': result['file_name'],
-                    'record_id': result['record_id'],
-                    'parsed': parsed,
-                    'summary': summary,
-                    'enriched': enriched,
-                    'qualified': qualified,
-                })
-            
-            # Rank results - use role_fit_score from summary, not qualified
-            ranked = sorted(
-                all_results,
-                key=lambda x: x['summary'].get('role_fit_score', 0) if isinstance(x.get('summary'), dict) else 0,
-                reverse=True
+            # Rank, persist qualification data and auto-schedule interviews
+            ranked = rank_and_schedule(
+                agents, all_results, company_user, job_desc,
+                job_description_text, job_kw_list, top_n,
             )
             
-            # Apply top_n limit
-            if top_n:
-                ranked = ranked[:top_n]
-            
-            # Get interview agent for auto-scheduling
-            interview_agent = agents.get('interview_agent')
-            
-            # Use job's default interview type (Online/Onsite) for auto-scheduled invitations
-            auto_interview_type = 'ONLINE'
-            if job_desc:
-                job_int_settings = RecruiterInterviewSettings.objects.filter(
-                    company_user=company_user,
-                    job=job_desc
-                ).first()
-                if job_int_settings and getattr(job_int_settings, 'default_interview_type', None):
-                    auto_interview_type = job_int_settings.default_interview_type
-            
-            # Get company user email settings for interview defaults
-            try:
-                email_settings_obj = RecruiterEmailSettings.objects.get(company_user=company_user)
-                email_settings = {
-                    'followup_delay_hours': email_settings_obj.followup_delay_hours,
-                    'reminder_hours_before': email_settings_obj.reminder_hours_before,
-                    'max_followup_emails': email_settings_obj.max_followup_emails,
-                    'min_hours_between_followups': email_settings_obj.min_hours_between_followups,
-                }
-                followup_delay = email_settings_obj.followup_delay_hours
-                reminder_hours = email_settings_obj.reminder_hours_before
-                max_followups = email_settings_obj.max_followup_emails
-                min_between = email_settings_obj.min_hours_between_followups
-            except RecruiterEmailSettings.DoesNotExist:
-                email_settings = None
-                followup_delay = 48
-                reminder_hours = 24
-                max_followups = 3
-                min_between = 24
-            
-            # Update CV records with qualification data and auto-schedule interviews
-            for idx, result in enumerate(ranked):
-                if result['record_id']:
-                    try:
-                        cv_record = CVRecord.objects.get(id=result['record_id'])
-                        cv_record.insights_json = json.dumps(result['summary'])
-                        cv_record.enriched_json = json.dumps(result['enriched'])
-                        cv_record.qualification_json = json.dumps(result['qualified'])
-                        # role_fit_score comes from summary, not qualified
-                        cv_record.role_fit_score = result['summary'].get('role_fit_score') if isinstance(result.get('summary'), dict) else None
-                        cv_record.qualification_decision = result['qualified'].get('decision') if isinstance(result.get('qualified'), dict) else None
-                        # qualified has confidence_score, not confidence
-                        cv_record.qualification_confidence = result['qualified'].get('confidence_score') if isinstance(result.get('qualified'), dict) else None
-                        cv_record.qualification_priority = result['qualified'].get('priority') if isinstance(result.get('qualified'), dict) else None
-                        cv_record.rank = idx + 1
-                        cv_record.save()
-                    except CVRecord.DoesNotExist:
-                        pass
-                
-                # Auto-schedule interview if decision is INTERVIEW
-                qual_decision = result.get('qualified', {}).get('decision', '') if isinstance(result.get('qualified'), dict) else ''
-                if qual_decision == "INTERVIEW" and interview_agent:
-                    parsed_cv = result.get('parsed', {})
-                    candidate_name = parsed_cv.get('name', 'Candidate') if isinstance(parsed_cv, dict) else 'Candidate'
-                    candidate_email = parsed_cv.get('email') if isinstance(parsed_cv, dict) else None
-                    candidate_phone = parsed_cv.get('phone') if isinstance(parsed_cv, dict) else None
-                    
-                    # Get job role from job description or use default
-                    job_role = "Position"
-                    if job_description_text:
-                        import re
-                        job_role = job_description_text.split('\n')[0][:100] if job_description_text else "Position"
-                        job_role = re.sub(r'[\r\n\t]+', ' ', job_role)
-                        job_role = re.sub(r'\s+', ' ', job_role).strip()
-                    elif job_kw_list and len(job_kw_list) > 0:
-                        job_role = job_kw_list[0]
-                    
-                    if candidate_email:
-                        logger.info(f"Auto-scheduling interview for approved candidate: {candidate_name} ({candidate_email})")
-                        try:
-                            interview_result = interview_agent.schedule_interview(
-                                candidate_name=candidate_name,
-                                candidate_email=candidate_email,
-                                job_role=job_role,
-                                interview_type=auto_interview_type,  # From job's interview settings
-                                candidate_phone=candidate_phone,
-                                cv_record_id=result.get('record_id'),
-                                recruiter_id=None,  # Not using Django User
-                                company_user_id=company_user.id,
-                                email_settings=email_settings,
-                                custom_slots=None,
-                            )
-                            
-                            if interview_result.get('invitation_sent'):
-                                logger.info(f"Interview invitation sent successfully for {candidate_email}")
-                                result['interview_scheduled'] = True
-                                result['interview_id'] = interview_result.get('interview_id')
-                            else:
-                                logger.warning(f"Interview created but email failed for {candidate_email}")
-                                result['interview_scheduled'] = False
-                                result['interview_error'] = interview_result.get('message', 'Unknown error')
-                        except Exception as interview_exc:
-                            logger.error(f"Failed to schedule interview for {candidate_email}: {str(interview_exc)}")
-                            log_service.log_error("auto_interview_scheduling_error", {
-                                "record_id": result.get('record_id'),
-                                "candidate_email": candidate_email,
-                                "error": str(interview_exc),
-                            })
-                            result['interview_scheduled'] = False
-                            result['interview_error'] = str(interview_exc)
-                    else:
-                        logger.warning(f"Skipping interview scheduling - no email found for {candidate_name}")
-                        result['interview_scheduled'] = False
-                        result['interview_error'] = "No email address found"
-            
             return Response({
                 'status': 'success',
                 'results': ranked,
+                'errors': failed,
                 'total': len(ranked)
             })
             
@@ -440,6 +270,37 @@ def process_cvs(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['GET'])
+@authentication_classes([CompanyUserTokenAuthentication])
+@permission_classes([IsCompanyUserOnly])
+def cv_job_status(request, job_id):
+    """Get progress and partial results of a background CV processing job"""
+    try:
+        try:
+            job = CVProcessingJob.objects.filter(
+                job_id=job_id,
+                company_user=request.user
+            ).prefetch_related('items').first()
+        except (ValueError, ValidationError):
+            job = None  # malformed job id
+        if not job:
+            return Response({
+                'status': 'error',
+                'message': 'CV processing job not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        return Response({
+            'status': 'success',
+            'data': serialize_cv_job(job)
+        })
+    except Exception as e:
+        logger.error(f"Error fetching CV job status: {e}")
+        return Response({
+            'status': 'error',
+            'message': f'Failed to fetch job status: {str(e)}'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 # Shorter prompt = fewer input tokens. Output is plain text with section labels, not JSON.
 # Skills appear in both DESCRIPTION (full text) and REQUIREMENTS (bullet list).
 GENERATE_JOB_SYSTEM_PROMPT = """Generate a job posting from the user's prompt. Reply with ONLY the following sections. Use the exact labels.
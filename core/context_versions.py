@@ -0,0 +1,76 @@
+"""
+Project Context Versions
+Per-project version numbers for the agents' cached project context
+(project_manager_agent/ai_agents/context_manager.py).
+
+core/signals.py bumps a project's version once a change to the project or
+its tasks, subtasks, task dependencies or team members commits. The version
+is part of the context cache keys, so context cached before a change is
+never served after it and entries can live for a long PM_CONTEXT_CACHE_TTL.
+Bulk queryset updates send no signals; call bump() after them. Versions live
+in the default cache: only a shared backend (Redis, Memcached, database)
+carries a bump to every worker. With a per-process cache (the LocMemCache
+Django uses when CACHES is not configured) another process keeps serving its
+own entries, so context_cache_timeout() falls back to a short TTL there.
+"""
+import logging
+import time
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = "pm_context_version_"
+SHARED_CACHE_TTL = 86400  # a day: versions keep entries fresh, the TTL only bounds memory
+LOCAL_CACHE_TTL = 300  # 5 minutes: bounds how long other processes can miss a bump
+PROCESS_LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def _key(project_id: int) -> str:
+    return f"{CACHE_PREFIX}{project_id}"
+
+
+def is_shared() -> bool:
+    """Whether the default cache is seen by every process (so bumps reach them all)."""
+    backend = getattr(settings, 'CACHES', {}).get('default', {}).get(
+        'BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+    )
+    return backend not in PROCESS_LOCAL_BACKENDS
+
+
+def context_cache_timeout() -> int:
+    """TTL for versioned context entries: PM_CONTEXT_CACHE_TTL, else by cache backend."""
+    ttl = getattr(settings, 'PM_CONTEXT_CACHE_TTL', None)
+    if ttl is not None:
+        return int(ttl)
+    return SHARED_CACHE_TTL if is_shared() else LOCAL_CACHE_TTL
+
+
+def current(project_id: int) -> int:
+    """The project's context version, started from the clock when it isn't cached yet."""
+    key = _key(project_id)
+    version = cache.get(key)
+    if version is None:
+        # Microseconds since the epoch: a version evicted from the cache restarts
+        # past every number it reached, so old entries can't be served again
+        version = time.time_ns() // 1000
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def bump(project_id: Optional[int]) -> None:
+    """Move a project to a new context version."""
+    if project_id is None:
+        return
+    try:
+        cache.incr(_key(project_id))
+    except ValueError:
+        pass  # not cached: current() starts a new version
+    except Exception as e:
+        logger.warning(f"Project context version bump failed: {str(e)}")
@@ -0,0 +1,66 @@
+"""
+Company Dashboard Cache
+Optional response cache for the company user's project manager dashboard and
+projects list (api/views/company_dashboard.py), keyed per company user.
+
+Disabled unless COMPANY_DASHBOARD_CACHE_TTL > 0. Entries are dropped when a
+Project, Task or Subtask of that company user is saved or deleted (see
+core/signals.py). Bulk queryset updates send no signals, so the TTL bounds
+how stale a response can get; use a shared cache (Redis/DB) for
+COMPANY_DASHBOARD_CACHE_ALIAS so invalidation reaches every worker.
+"""
+import logging
+from typing import Any, Callable, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = "company_dashboard_"
+VIEWS = ('dashboard', 'projects')
+
+
+def cache_ttl() -> int:
+    return int(getattr(settings, 'COMPANY_DASHBOARD_CACHE_TTL', 0))
+
+
+def enabled() -> bool:
+    return cache_ttl() > 0
+
+
+def _backend():
+    from django.core.cache import caches
+    return caches[getattr(settings, 'COMPANY_DASHBOARD_CACHE_ALIAS', 'default')]
+
+
+def _key(view: str, company_user_id: int) -> str:
+    return f"{CACHE_PREFIX}{view}_{company_user_id}"
+
+
+def get_or_build(view: str, company_user_id: int, build: Callable[[], Any]) -> Any:
+    """Cached response data for a company user's view, built (and stored) on a miss."""
+    if not enabled():
+        return build()
+    key = _key(view, company_user_id)
+    try:
+        data = _backend().get(key)
+    except Exception as e:
+        logger.warning(f"Dashboard cache read failed: {str(e)}")
+        return build()
+    if data is None:
+        data = build()
+        try:
+            _backend().set(key, data, cache_ttl())
+        except Exception as e:
+            logger.warning(f"Dashboard cache write failed: {str(e)}")
+    return data
+
+
+def invalidate(company_user_id: Optional[int]) -> None:
+    """Drop a company user's cached dashboard and projects list."""
+    if not company_user_id or not enabled():
+        return
+    try:
+        _backend().delete_many([_key(view, company_user_id) for view in VIEWS])
+    except Exception as e:
+        logger.warning(f"Dashboard cache invalidation failed: {str(e)}")
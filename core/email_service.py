@@ -259,7 +259,48 @@ Task URL: {self._get_task_url(task)}
                 related_object_type='Task',
                 related_object_id=task.id,
             )
-    
+
+    def send_task_assignment_digest(self, tasks, assignee) -> bool:
+        """
+        Send one email for several tasks assigned to a user at once.
+
+        Args:
+            tasks: Task instances (with project loaded)
+            assignee: User instance who is assigned the tasks
+
+        Returns:
+            True if email was sent successfully, False otherwise
+        """
+        if not self._check_email_preferences(assignee, 'task_assigned'):
+            return False
+
+        task_lines = []
+        for task in tasks:
+            due_date = task.due_date.strftime('%Y-%m-%d %H:%M') if task.due_date else 'Not set'
+            task_lines.append(
+                f"- {task.title} ({task.project.name})\n"
+                f"  Priority: {task.get_priority_display()} | Due Date: {due_date}\n"
+                f"  {self._get_task_url(task)}"
+            )
+        tasks_section = "\n\n".join(task_lines)
+        subject = f"{len(tasks)} New Tasks Assigned"
+        message_text = f"""
+Hello {assignee.get_full_name() or assignee.username},
+
+You have been assigned {len(tasks)} new tasks:
+
+{tasks_section}
+
+Please review and start working on these tasks.
+"""
+        return self.send_email(
+            recipient=assignee.email,
+            subject=subject,
+            message_text=message_text.strip(),
+            related_object_type='Task',
+            related_object_id=tasks[0].id,
+        )
+
     def _get_task_url(self, task) -> str:
         """Generate URL to task details page"""
         from django.urls import reverse
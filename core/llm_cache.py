@@ -0,0 +1,219 @@
+"""
+LLM Response Cache
+Content-addressed cache for chat completion responses, shared by BaseAgent,
+MarketingBaseAgent and the recruitment GroqClient.
+
+Keys are a SHA-256 of (provider, model, messages, temperature, max_tokens,
+response_format). Lookups go through a small in-process LRU first and then
+Django's cache framework, so repeated identical prompts (dashboard refreshes,
+re-parsed CVs) skip the network entirely. Local entries expire with the
+call's TTL too: an entry read from Django's cache is kept locally for at
+most that TTL, so a short-lived answer is never served past it.
+
+Cache policy:
+- Deterministic calls (temperature 0) are cached by default.
+- Non-deterministic calls are cached only when the caller opts in with a TTL.
+- use_cache=False bypasses the cache for a single call.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 3600  # 1 hour
+DEFAULT_LOCAL_MAX_ENTRIES = 512
+CACHE_PREFIX = "llm_response_"
+
+
+def _setting(name: str, default: Any) -> Any:
+    """Read a Django setting, falling back to default outside a configured project."""
+    try:
+        from django.conf import settings
+        return getattr(settings, name, default)
+    except Exception:
+        return default
+
+
+def make_cache_key(provider: str, model: str, messages: List[Dict], temperature: float = None,
+                   max_tokens: int = None, response_format: Dict = None) -> str:
+    """
+    Build a content-addressed key for an LLM request.
+
+    Returns:
+        str: Cache key (prefix + hex digest)
+    """
+    payload = json.dumps({
+        'provider': provider,
+        'model': model,
+        'messages': messages,
+        'temperature': temperature,
+        'max_tokens': max_tokens,
+        'response_format': response_format,
+    }, sort_keys=True, ensure_ascii=False, default=str)
+    return CACHE_PREFIX + hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    Two-tier response cache: in-process LRU in front of Django's cache.
+    Use get_llm_cache() to access the shared instance.
+    """
+
+    def __init__(self, max_entries: int = None):
+        self.max_entries = max_entries or int(_setting('LLM_CACHE_LOCAL_MAX_ENTRIES', DEFAULT_LOCAL_MAX_ENTRIES))
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.stores = 0
+
+    @staticmethod
+    def _backend():
+        try:
+            from django.core.cache import caches
+            return caches[_setting('LLM_CACHE_ALIAS', 'default')]
+        except Exception:
+            return None
+
+    @staticmethod
+    def enabled() -> bool:
+        return bool(_setting('LLM_CACHE_ENABLED', True))
+
+    def should_cache(self, temperature: Optional[float], ttl: Optional[int] = None,
+                     use_cache: Optional[bool] = None) -> bool:
+        """
+        Decide whether a call is cacheable.
+
+        Args:
+            temperature (float): Sampling temperature of the call
+            ttl (int): Per-agent TTL; 0 disables caching, a positive value opts
+                non-deterministic calls in
+            use_cache (bool): Per-call override (False = bypass, True = force)
+        """
+        if not self.enabled() or use_cache is False or ttl == 0:
+            return False
+        if use_cache is True or (ttl is not None and ttl > 0):
+            return True
+        return not temperature
+
+    @staticmethod
+    def _ttl(ttl: Optional[int]) -> int:
+        return ttl or int(_setting('LLM_CACHE_TTL', DEFAULT_TTL))
+
+    def get(self, key: str, ttl: Optional[int] = None) -> Optional[Any]:
+        """
+        Look a response up, local tier first.
+
+        Args:
+            key (str): Key from make_cache_key()
+            ttl (int): TTL of the call; bounds how long a response read from
+                Django's cache is kept locally (defaults to LLM_CACHE_TTL)
+        """
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > time.monotonic():
+                    self._local.move_to_end(key)
+                    self.local_hits += 1
+                    return value
+                del self._local[key]  # expired: fall through to the shared tier
+        backend = self._backend()
+        value = None
+        if backend is not None:
+            try:
+                value = backend.get(key)
+            except Exception as e:
+                logger.warning(f"LLM cache backend read failed: {e}")
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.shared_hits += 1
+                self._put_local(key, value, self._ttl(ttl))
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        if value is None:
+            return
+        ttl = self._ttl(ttl)
+        with self._lock:
+            self.stores += 1
+            self._put_local(key, value, ttl)
+        backend = self._backend()
+        if backend is not None:
+            try:
+                backend.set(key, value, ttl)
+            except Exception as e:
+                logger.warning(f"LLM cache backend write failed: {e}")
+
+    def _put_local(self, key: str, value: Any, ttl: int) -> None:
+        # Caller holds self._lock
+        self._local[key] = (value, time.monotonic() + ttl)
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_entries:
+            self._local.popitem(last=False)
+
+    def get_or_call(self, key: str, call: Callable[[], Any], cacheable: bool,
+                    ttl: Optional[int] = None) -> Any:
+        """
+        Return the cached response for key, or run call() and store its result.
+
+        Args:
+            key (str): Key from make_cache_key()
+            call (callable): Performs the real LLM request
+            cacheable (bool): Result of should_cache(); False always calls through
+            ttl (int): Seconds to keep the response (defaults to LLM_CACHE_TTL)
+        """
+        if not cacheable:
+            with self._lock:
+                self.bypassed += 1
+            return call()
+        cached = self.get(key, ttl)
+        if cached is not None:
+            return cached
+        result = call()
+        self.set(key, result, ttl)
+        return result
+
+    def clear_local(self) -> None:
+        with self._lock:
+            self._local.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = self.local_hits + self.shared_hits
+            lookups = hits + self.misses
+            return {
+                'enabled': self.enabled(),
+                'local_entries': len(self._local),
+                'local_max_entries': self.max_entries,
+                'local_hits': self.local_hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'bypassed': self.bypassed,
+                'stores': self.stores,
+                'hit_ratio': round(hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMResponseCache:
+    """Get the process-wide LLM response cache (singleton pattern)."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = LLMResponseCache()
+    return _cache
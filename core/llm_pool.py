@@ -0,0 +1,257 @@
+"""
+Shared LLM Client Pool
+Process-wide pool of Groq/OpenAI SDK clients and HTTP sessions used by
+BaseAgent, MarketingBaseAgent and the recruitment GroqClient.
+
+Clients are created once per (provider, API key) and reused, so every agent
+instance shares the same keep-alive connection pool. Each pool entry also
+carries a concurrency limit and request metrics (in-flight, queue wait,
+reuse ratio).
+
+The pool is process-local: forked children (gunicorn/Celery prefork workers)
+start with an empty registry, and entries already held by objects created
+before the fork rebuild their client on first use in the new process, so no
+keep-alive connection is shared between processes.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Defaults (overridable via Django settings)
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_MAX_KEEPALIVE = 20
+DEFAULT_KEEPALIVE_EXPIRY = 60.0
+DEFAULT_ACQUIRE_TIMEOUT = 120.0
+
+
+def _setting(name: str, default: Any) -> Any:
+    """Read a Django setting, falling back to default outside a configured project."""
+    try:
+        from django.conf import settings
+        return getattr(settings, name, default)
+    except Exception:
+        return default
+
+
+def _fingerprint(api_key: str) -> str:
+    """Short, non-reversible identifier for an API key (safe for logs/metrics)."""
+    return hashlib.sha256((api_key or '').encode('utf-8')).hexdigest()[:12]
+
+
+class PoolEntry:
+    """A pooled client plus its concurrency gate and metrics."""
+
+    def __init__(self, provider: str, api_key: str, factory: Callable[[], Any], max_concurrency: int):
+        self.provider = provider
+        self.key_fingerprint = _fingerprint(api_key)
+        self._factory = factory
+        self.client = factory()
+        self._pid = os.getpid()
+        self.max_concurrency = max_concurrency
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.total_requests = 0
+        self.total_queue_wait = 0.0
+        self.max_queue_wait = 0.0
+        self.models = set()
+
+    def _ensure_process(self):
+        """Rebuild the client and gates when used in a process forked after it was created."""
+        if self._pid == os.getpid():
+            return
+        # Locks may have been held by other threads at fork time; the parent's
+        # connections must not be reused (or closed) here
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._semaphore = threading.BoundedSemaphore(self.max_concurrency)
+        self.in_flight = 0
+        self.client = self._factory()
+        logger.info(f"LLM pool: rebuilt {self.provider} client after fork (key {self.key_fingerprint})")
+
+    @contextmanager
+    def acquire(self, model: Optional[str] = None, timeout: Optional[float] = None):
+        """
+        Reserve one concurrency slot for an outbound request.
+
+        Args:
+            model (str): Model name (recorded for metrics only)
+            timeout (float): Max seconds to wait for a slot
+
+        Yields:
+            The pooled client
+        """
+        self._ensure_process()
+        if timeout is None:
+            timeout = _setting('LLM_POOL_ACQUIRE_TIMEOUT', DEFAULT_ACQUIRE_TIMEOUT)
+        started = time.monotonic()
+        if not self._semaphore.acquire(timeout=timeout):
+            raise TimeoutError(
+                f"Timed out after {timeout}s waiting for a {self.provider} LLM slot "
+                f"(max concurrency {self.max_concurrency})"
+            )
+        waited = time.monotonic() - started
+        with self._lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            self.total_requests += 1
+            self.total_queue_wait += waited
+            self.max_queue_wait = max(self.max_queue_wait, waited)
+            if model:
+                self.models.add(model)
+        try:
+            yield self.client
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+            self._semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            reuses = max(self.checkouts - 1, 0)
+            return {
+                'provider': self.provider,
+                'key': self.key_fingerprint,
+                'models': sorted(self.models),
+                'max_concurrency': self.max_concurrency,
+                'in_flight': self.in_flight,
+                'peak_in_flight': self.peak_in_flight,
+                'total_requests': self.total_requests,
+                'avg_queue_wait_ms': round(1000 * self.total_queue_wait / self.total_requests, 2) if self.total_requests else 0.0,
+                'max_queue_wait_ms': round(1000 * self.max_queue_wait, 2),
+                'checkouts': self.checkouts,
+                'reuse_ratio': round(reuses / self.checkouts, 4) if self.checkouts else 0.0,
+            }
+
+
+class LLMClientPool:
+    """
+    Process-wide registry of pooled LLM clients keyed by (provider, API key).
+    Use get_llm_pool() to access the shared instance.
+    """
+
+    def __init__(self):
+        self._entries: Dict[Tuple[str, str], PoolEntry] = {}
+        self._lock = threading.Lock()
+
+    def _get_entry(self, provider: str, api_key: str, factory: Callable[[], Any]) -> PoolEntry:
+        key = (provider, api_key)
+        entry = self._entries.get(key)
+        if entry is None:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is None:
+                    max_concurrency = int(_setting('LLM_POOL_MAX_CONCURRENCY', DEFAULT_MAX_CONCURRENCY))
+                    entry = PoolEntry(provider, api_key, factory, max_concurrency)
+                    self._entries[key] = entry
+                    logger.info(f"LLM pool: created {provider} client (key {entry.key_fingerprint})")
+        with entry._lock:
+            entry.checkouts += 1
+        return entry
+
+    @staticmethod
+    def _http_client():
+        """Build an httpx client with keep-alive limits, or None if httpx is unavailable."""
+        try:
+            import httpx
+        except ImportError:
+            return None
+        limits = httpx.Limits(
+            max_connections=int(_setting('LLM_POOL_MAX_CONCURRENCY', DEFAULT_MAX_CONCURRENCY)) * 2,
+            max_keepalive_connections=int(_setting('LLM_POOL_MAX_KEEPALIVE', DEFAULT_MAX_KEEPALIVE)),
+            keepalive_expiry=float(_setting('LLM_POOL_KEEPALIVE_EXPIRY', DEFAULT_KEEPALIVE_EXPIRY)),
+        )
+        return httpx.Client(limits=limits, timeout=httpx.Timeout(60.0, connect=10.0))
+
+    def _build_sdk_client(self, client_class, api_key: str):
+        http_client = self._http_client()
+        if http_client is not None:
+            try:
+                return client_class(api_key=api_key, http_client=http_client)
+            except TypeError:
+                # Older SDKs don't accept http_client; fall back to their default pool
+                http_client.close()
+        return client_class(api_key=api_key)
+
+    def groq(self, api_key: str) -> PoolEntry:
+        """Pooled groq SDK client."""
+        from groq import Groq
+        return self._get_entry('groq', api_key, lambda: self._build_sdk_client(Groq, api_key))
+
+    def openai(self, api_key: str) -> PoolEntry:
+        """Pooled OpenAI SDK client."""
+        from openai import OpenAI
+        return self._get_entry('openai', api_key, lambda: self._build_sdk_client(OpenAI, api_key))
+
+    def http_session(self, provider: str, api_key: str) -> PoolEntry:
+        """Pooled requests.Session with a keep-alive adapter (for raw REST callers)."""
+        def factory():
+            import requests
+            from requests.adapters import HTTPAdapter
+            session = requests.Session()
+            size = int(_setting('LLM_POOL_MAX_KEEPALIVE', DEFAULT_MAX_KEEPALIVE))
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=size)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            return session
+        return self._get_entry(f'{provider}-http', api_key, factory)
+
+    def stats(self) -> Dict[str, Any]:
+        """Metrics for every pooled client."""
+        with self._lock:
+            entries = list(self._entries.values())
+        return {'clients': [entry.stats() for entry in entries]}
+
+    def reset(self, close: bool = True):
+        """
+        Drop all pooled clients (tests / after fork).
+        After a fork pass close=False: the clients' sockets belong to the parent.
+        """
+        if not close:
+            self._lock = threading.Lock()
+            self._entries = {}
+            return
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for entry in entries:
+            close = getattr(entry.client, 'close', None)
+            if callable(close):
+                try:
+                    close()
+                except Exception:
+                    pass
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_llm_pool() -> LLMClientPool:
+    """Get the process-wide LLM client pool (singleton pattern)."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = LLMClientPool()
+    return _pool
+
+
+def _reset_after_fork():
+    global _pool_lock
+    _pool_lock = threading.Lock()
+    if _pool is not None:
+        _pool.reset(close=False)
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -118,12 +118,38 @@ class Task(models.Model):
     depends_on = models.ManyToManyField('self', symmetrical=False, blank=True, related_name='dependent_tasks')
     tags = models.ManyToManyField('TaskTag', blank=True, related_name='tasks')
     
+    # Fields whose changes trigger activity logs, notifications and emails (see core/signals.py)
+    TRACKED_FIELDS = ('assignee_id', 'status', 'priority', 'due_date')
+    
     class Meta:
         ordering = ['priority', 'due_date', 'created_at']
     
     def __str__(self):
         return f"{self.title} - {self.project.name}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # State as loaded, so the save signals can diff without re-querying the row
+        instance._loaded_state = instance.tracked_state()
+        return instance
+    
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using=using, fields=fields)
+        # The row was re-read: later saves diff against it, not against the state first loaded
+        state = self.tracked_state()
+        if fields is not None:
+            refreshed = {self._meta.get_field(name).attname for name in fields}
+            state = {
+                **(getattr(self, '_loaded_state', None) or {}),
+                **{field: value for field, value in state.items() if field in refreshed},
+            }
+        self._loaded_state = state
+    
+    def tracked_state(self):
+        """Current values of TRACKED_FIELDS (deferred fields are left out rather than loaded)"""
+        return {field: self.__dict__[field] for field in self.TRACKED_FIELDS if field in self.__dict__}
+    
     def mark_complete(self):
         """Mark task as complete"""
         self.status = 'done'
@@ -1,13 +1,23 @@
 """
 Django signals for Project Manager Agent features
 Handles automatic email sending and notifications on model changes.
+
+The Task handlers only work out what changed and queue an event once the
+transaction commits; activity logs, notifications and emails are applied in
+batches by the task event dispatcher (core/task_events.py).
+
+Changes to a project's tasks, subtasks, dependencies and team bump its
+context version (core/context_versions.py) once they commit, which retires
+the agents' cached project context.
 """
 
-from django.db.models.signals import post_save, pre_save
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
 from django.dispatch import receiver
-from django.contrib.auth.models import User
-from .models import Task, TaskActivityLog, Notification
+from .models import Project, Subtask, Task, TeamMember
 from .email_service import EmailService
+from . import context_versions, dashboard_cache
+from .task_events import get_task_event_dispatcher
 
 
 # Initialize email service instance
@@ -21,31 +31,35 @@ def get_email_service():
     return _email_service
 
 
-# Store old task state before save to track changes
-_task_state_cache = {}
+# update_fields names that can change one of Task.TRACKED_FIELDS
+_TRACKED_UPDATE_FIELDS = frozenset(Task.TRACKED_FIELDS) | {'assignee'}
+
+
+def _tracks_changes(update_fields) -> bool:
+    """False for saves limited to fields that never produce task events"""
+    return update_fields is None or not _TRACKED_UPDATE_FIELDS.isdisjoint(update_fields)
+
 
 @receiver(pre_save, sender=Task)
 def task_pre_save_handler(sender, instance, **kwargs):
     """
-    Store old task state before save to track changes.
+    Remember the task's previous state to track changes.
+    Tasks loaded from the database carry it already; the row is only queried
+    for instances built by hand or loaded with tracked fields deferred.
     """
-    if instance.pk:
-        try:
-            old_task = Task.objects.get(pk=instance.pk)
-            _task_state_cache[instance.pk] = {
-                'assignee_id': old_task.assignee_id,
-                'status': old_task.status,
-                'priority': old_task.priority,
-                'due_date': old_task.due_date,
-            }
-        except Task.DoesNotExist:
-            _task_state_cache[instance.pk] = None
+    if kwargs.get('raw', False) or not instance.pk or not _tracks_changes(kwargs.get('update_fields')):
+        return
+    previous = getattr(instance, '_loaded_state', None)
+    if previous is None or len(previous) < len(Task.TRACKED_FIELDS):
+        previous = Task.objects.filter(pk=instance.pk).values(*Task.TRACKED_FIELDS).first()
+    instance._previous_state = previous
 
 
 @receiver(post_save, sender=Task)
 def task_post_save_handler(sender, instance, created, **kwargs):
     """
     Handle task creation and updates.
+    Queues an event for the dispatcher, which will:
     - Send email when task is assigned
     - Create activity log entries
     - Create in-app notifications
@@ -53,144 +67,94 @@ def task_post_save_handler(sender, instance, created, **kwargs):
     # Skip if this is a raw save (e.g., during fixtures loading)
     if kwargs.get('raw', False):
         return
-    
-    email_service = get_email_service()
-    
-    # Get old state from cache
-    old_state = _task_state_cache.pop(instance.pk, None) if instance.pk else None
-    assignee_changed = False
-    
-    if created:
-        assignee_changed = instance.assignee_id is not None
-    elif old_state:
-        assignee_changed = old_state['assignee_id'] != instance.assignee_id
-    
-    # Send email when task is assigned (new assignment or reassignment)
-    if instance.assignee and (created or assignee_changed):
-        # Send assignment email
-        try:
-            email_service.send_task_assignment_email(
-                task=instance,
-                assignee=instance.assignee
-            )
-        except Exception as e:
-            # Log error but don't fail the save
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.error(f"Failed to send task assignment email: {str(e)}")
-        
-        # Create in-app notification
-        try:
-            Notification.objects.create(
-                user=instance.assignee,
-                type='task_assigned',
-                notification_type='task_assigned',
-                title=f"New Task Assigned: {instance.title}",
-                message=f"You have been assigned a new task: {instance.title}",
-                link=f"/tasks/{instance.id}/",
-                action_url=f"/tasks/{instance.id}/",
-            )
-        except Exception as e:
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.error(f"Failed to create task assignment notification: {str(e)}")
-    
-    # Create activity log for new tasks
+    if not created and not _tracks_changes(kwargs.get('update_fields')):
+        return
+
+    old_state = None if created else instance.__dict__.pop('_previous_state', None)
+    new_state = {field: getattr(instance, field) for field in Task.TRACKED_FIELDS}
+    instance._loaded_state = new_state
+
     if created:
-        try:
-            TaskActivityLog.objects.create(
-                task=instance,
-                user=kwargs.get('request_user'),  # Passed via save() if available
-                action_type='created',
-                new_value=instance.title,
-                details={
-                    'title': instance.title,
-                    'status': instance.status,
-                    'priority': instance.priority,
-                    'project_id': instance.project_id,
-                }
-            )
-        except Exception:
-            pass  # Don't fail if activity log creation fails
-    
-    # Create activity log for status changes
-    elif instance.pk and old_state:
-        try:
-            # Status change
-            if old_state['status'] != instance.status:
-                TaskActivityLog.objects.create(
-                    task=instance,
-                    user=kwargs.get('request_user'),
-                    action_type='status_changed',
-                    old_value=old_state['status'],
-                    new_value=instance.status,
-                    details={
-                        'old_status': old_state['status'],
-                        'new_status': instance.status,
-                    }
-                )
-            
-            # Assignment change (already handled email/notification above, just log activity)
-            if assignee_changed:
-                old_assignee_id = old_state['assignee_id']
-                new_assignee_id = instance.assignee_id
-                try:
-                    if old_assignee_id:
-                        old_user = User.objects.get(pk=old_assignee_id)
-                        old_assignee_name = old_user.username
-                    else:
-                        old_assignee_name = "Unassigned"
-                    
-                    if new_assignee_id:
-                        new_user = User.objects.get(pk=new_assignee_id)
-                        new_assignee_name = new_user.username
-                    else:
-                        new_assignee_name = "Unassigned"
-                except User.DoesNotExist:
-                    old_assignee_name = str(old_assignee_id) if old_assignee_id else "Unassigned"
-                    new_assignee_name = str(new_assignee_id) if new_assignee_id else "Unassigned"
-                
-                TaskActivityLog.objects.create(
-                    task=instance,
-                    user=kwargs.get('request_user'),
-                    action_type='assigned' if instance.assignee else 'unassigned',
-                    old_value=old_assignee_name,
-                    new_value=new_assignee_name,
-                    details={
-                        'old_assignee_id': old_assignee_id,
-                        'new_assignee_id': new_assignee_id,
-                    }
-                )
-            
-            # Priority change
-            if old_state['priority'] != instance.priority:
-                TaskActivityLog.objects.create(
-                    task=instance,
-                    user=kwargs.get('request_user'),
-                    action_type='priority_changed',
-                    old_value=old_state['priority'],
-                    new_value=instance.priority,
-                )
-            
-            # Due date change
-            if old_state['due_date'] != instance.due_date:
-                old_due = old_state['due_date'].isoformat() if old_state['due_date'] else None
-                new_due = instance.due_date.isoformat() if instance.due_date else None
-                TaskActivityLog.objects.create(
-                    task=instance,
-                    user=kwargs.get('request_user'),
-                    action_type='due_date_changed',
-                    old_value=old_due,
-                    new_value=new_due,
-                )
-            
-        except Exception as e:
-            # Log error but don't fail
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.error(f"Error creating activity log: {str(e)}")
+        notify_assignee = instance.assignee_id is not None
+    elif old_state and old_state != new_state:
+        notify_assignee = instance.assignee_id is not None and old_state['assignee_id'] != instance.assignee_id
+    else:
+        return  # nothing tracked changed (or the previous state is unknown)
+
+    event = {
+        'task_id': instance.pk,
+        'created': created,
+        'old': old_state,
+        'new': new_state,
+        'title': instance.title,
+        'project_id': instance.project_id,
+        'notify_assignee': notify_assignee,
+    }
+    transaction.on_commit(lambda: get_task_event_dispatcher().record(event))
+
+
+@receiver([post_save, post_delete], sender=Project)
+@receiver([post_save, post_delete], sender=Task)
+@receiver([post_save, post_delete], sender=Subtask)
+def company_dashboard_cache_handler(sender, instance, **kwargs):
+    """
+    Drop the cached dashboard of the company user owning the changed project.
+    """
+    if kwargs.get('raw', False) or not dashboard_cache.enabled():
+        return
+    if sender is Project:
+        company_user_id = instance.created_by_company_user_id
+    elif sender is Task:
+        company_user_id = Project.objects.filter(pk=instance.project_id).values_list(
+            'created_by_company_user_id', flat=True
+        ).first()
+    else:
+        company_user_id = Task.objects.filter(pk=instance.task_id).values_list(
+            'project__created_by_company_user_id', flat=True
+        ).first()
+    dashboard_cache.invalidate(company_user_id)
+
+
+def _bump_context_versions(project_ids):
+    project_ids = {project_id for project_id in project_ids if project_id is not None}
+    if project_ids:
+        transaction.on_commit(lambda: [context_versions.bump(project_id) for project_id in project_ids])
+
+
+@receiver([post_save, post_delete], sender=Project)
+@receiver([post_save, post_delete], sender=Task)
+@receiver([post_save, post_delete], sender=Subtask)
+@receiver([post_save, post_delete], sender=TeamMember)
+def project_context_version_handler(sender, instance, **kwargs):
+    """
+    Retire the cached agent context of the changed object's project.
+    """
+    if kwargs.get('raw', False):
+        return
+    if sender is Project:
+        project_id = instance.pk
+    elif sender is Subtask:
+        if Subtask.task.is_cached(instance):
+            project_id = instance.task.project_id
+        else:
+            project_id = Task.objects.filter(pk=instance.task_id).values_list('project_id', flat=True).first()
+    else:
+        project_id = instance.project_id
+    _bump_context_versions([project_id])
+
+
+@receiver(m2m_changed, sender=Task.depends_on.through)
+def task_dependencies_context_version_handler(sender, instance, action, pk_set, **kwargs):
+    """
+    Dependency links appear on both tasks' context, which may be in different projects.
+    """
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    project_ids = [instance.project_id]
+    if pk_set:
+        project_ids += Task.objects.filter(pk__in=pk_set).values_list('project_id', flat=True).distinct()
+    _bump_context_versions(project_ids)
 
 
 # Note: We need to connect these signals in apps.py to ensure they're loaded
 # The signals will be connected in core/apps.py
-
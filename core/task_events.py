@@ -0,0 +1,303 @@
+"""
+Task Event Dispatcher
+Side effects of Task changes (activity log, in-app notifications, assignment
+emails) run off the request path. The Task save signals only record an
+event (after the transaction commits) and return; a daemon thread applies
+events in batches:
+
+- the batch's tasks and the users it mentions are loaded with one query each
+- activity log entries and notifications are written with one bulk_create each
+- assignment emails are grouped per assignee: a single task gets the usual
+  assignment email, several tasks assigned in the same batch get one digest
+
+Events are flushed every TASK_EVENTS_FLUSH_INTERVAL seconds (the batching
+window) and at interpreter exit. A batch that fails (e.g. the database is
+unreachable) goes back to the front of the queue and is retried on the next
+flush; after TASK_EVENTS_MAX_ATTEMPTS failures its events are dropped and
+logged with their task ids. Set TASK_EVENTS_ASYNC = False to apply them
+synchronously, e.g. in tests or management commands that exit immediately.
+"""
+import atexit
+import logging
+import os
+import threading
+from collections import deque
+from typing import Any, Dict, List
+
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FLUSH_INTERVAL = 2.0  # seconds
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_MAX_BUFFERED_EVENTS = 50000
+DEFAULT_MAX_ATTEMPTS = 3
+
+
+def _assignee_name(users: Dict[int, Any], user_id) -> str:
+    if not user_id:
+        return "Unassigned"
+    user = users.get(user_id)
+    return user.username if user else str(user_id)
+
+
+def build_activity_logs(event: Dict[str, Any], users: Dict[int, Any]) -> list:
+    """TaskActivityLog rows for one task event (unsaved)"""
+    from core.models import TaskActivityLog
+
+    task_id = event['task_id']
+    new = event['new']
+    if event['created']:
+        return [TaskActivityLog(
+            task_id=task_id,
+            action_type='created',
+            new_value=event['title'],
+            details={
+                'title': event['title'],
+                'status': new['status'],
+                'priority': new['priority'],
+                'project_id': event['project_id'],
+            },
+        )]
+
+    old = event['old']
+    if not old:
+        return []
+    logs = []
+    if old['status'] != new['status']:
+        logs.append(TaskActivityLog(
+            task_id=task_id,
+            action_type='status_changed',
+            old_value=old['status'],
+            new_value=new['status'],
+            details={'old_status': old['status'], 'new_status': new['status']},
+        ))
+    if old['assignee_id'] != new['assignee_id']:
+        logs.append(TaskActivityLog(
+            task_id=task_id,
+            action_type='assigned' if new['assignee_id'] else 'unassigned',
+            old_value=_assignee_name(users, old['assignee_id']),
+            new_value=_assignee_name(users, new['assignee_id']),
+            details={'old_assignee_id': old['assignee_id'], 'new_assignee_id': new['assignee_id']},
+        ))
+    if old['priority'] != new['priority']:
+        logs.append(TaskActivityLog(
+            task_id=task_id,
+            action_type='priority_changed',
+            old_value=old['priority'],
+            new_value=new['priority'],
+        ))
+    if old['due_date'] != new['due_date']:
+        logs.append(TaskActivityLog(
+            task_id=task_id,
+            action_type='due_date_changed',
+            old_value=old['due_date'].isoformat() if old['due_date'] else None,
+            new_value=new['due_date'].isoformat() if new['due_date'] else None,
+        ))
+    return logs
+
+
+class TaskEventDispatcher:
+    """
+    In-process queue of task events with a background dispatcher thread.
+    Use get_task_event_dispatcher() to access the shared instance.
+    """
+
+    def __init__(self):
+        self.flush_interval = float(getattr(settings, 'TASK_EVENTS_FLUSH_INTERVAL', DEFAULT_FLUSH_INTERVAL))
+        self.batch_size = max(1, int(getattr(settings, 'TASK_EVENTS_BATCH_SIZE', DEFAULT_BATCH_SIZE)))
+        self.max_buffered_events = int(getattr(
+            settings, 'TASK_EVENTS_MAX_BUFFERED_EVENTS', DEFAULT_MAX_BUFFERED_EVENTS
+        ))
+        self.max_attempts = max(1, int(getattr(settings, 'TASK_EVENTS_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS)))
+        self.dropped = 0
+        self.failed = 0
+        self.dispatched = 0
+        self._start()
+
+    def _start(self) -> None:
+        self._events: deque = deque()
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()  # one batch at a time (dispatcher thread vs explicit flush)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='task-event-dispatcher', daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def enabled() -> bool:
+        return bool(getattr(settings, 'TASK_EVENTS_ASYNC', True))
+
+    def record(self, event: Dict[str, Any]) -> None:
+        """Queue one task event. Applies it right away when async dispatch is disabled."""
+        if not self.enabled():
+            self._dispatch([event])
+            return
+        with self._cond:
+            if len(self._events) >= self.max_buffered_events:
+                self._events.popleft()
+                self.dropped += 1
+            self._events.append(event)
+
+    def flush(self) -> int:
+        """Apply everything queued so far. Returns the number of events applied."""
+        applied = 0
+        with self._flush_lock:
+            while True:
+                with self._cond:
+                    batch = [self._events.popleft() for _ in range(min(self.batch_size, len(self._events)))]
+                if not batch:
+                    return applied
+                try:
+                    self._dispatch(batch)
+                    applied += len(batch)
+                except Exception as e:
+                    self._retry_or_drop(batch, e)
+                    return applied
+
+    def close(self) -> None:
+        """Stop the dispatcher thread after applying what is queued."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+        self.flush()
+
+    def _retry_or_drop(self, batch: List[Dict[str, Any]], error: Exception) -> None:
+        """Requeue a failed batch at the front of the queue, dropping events out of attempts."""
+        retry, failed = [], []
+        for event in batch:
+            event['attempts'] = event.get('attempts', 0) + 1
+            (retry if event['attempts'] < self.max_attempts else failed).append(event)
+        with self._cond:
+            self._events.extendleft(reversed(retry))
+            self.failed += len(failed)
+        if retry:
+            logger.warning(f"Failed to dispatch {len(retry)} task event(s), will retry: {error}", exc_info=True)
+        if failed:
+            task_ids = sorted({event['task_id'] for event in failed})
+            logger.error(
+                f"Dropped {len(failed)} task event(s) after {self.max_attempts} failed attempts "
+                f"(tasks {task_ids}): {error}",
+                exc_info=True,
+            )
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if not self._closed:
+                    # Events arriving within the interval are dispatched together
+                    self._cond.wait(self.flush_interval)
+                if self._closed:
+                    return
+                pending = bool(self._events)
+            if pending:
+                close_old_connections()
+                try:
+                    self.flush()
+                finally:
+                    close_old_connections()
+
+    def _dispatch(self, events: List[Dict[str, Any]]) -> None:
+        from django.contrib.auth.models import User
+        from core.models import Notification, Task, TaskActivityLog
+
+        tasks = Task.objects.select_related('project').in_bulk({event['task_id'] for event in events})
+        user_ids = set()
+        for event in events:
+            user_ids.add(event['new']['assignee_id'])
+            if event['old']:
+                user_ids.add(event['old']['assignee_id'])
+        user_ids.discard(None)
+        users = User.objects.in_bulk(user_ids) if user_ids else {}
+
+        logs, notifications = [], []
+        assignments: Dict[int, Dict[int, Any]] = {}  # assignee id -> {task id: task}, in event order
+        for event in events:
+            task = tasks.get(event['task_id'])
+            if task is None:
+                continue  # deleted before its events were dispatched
+            logs.extend(build_activity_logs(event, users))
+            assignee_id = event['new']['assignee_id']
+            if event['notify_assignee'] and assignee_id in users:
+                notifications.append(Notification(
+                    user_id=assignee_id,
+                    type='task_assigned',
+                    notification_type='task_assigned',
+                    title=f"New Task Assigned: {event['title']}",
+                    message=f"You have been assigned a new task: {event['title']}",
+                    link=f"/tasks/{task.id}/",
+                    action_url=f"/tasks/{task.id}/",
+                ))
+                assignments.setdefault(assignee_id, {})[task.id] = task
+
+        try:
+            TaskActivityLog.objects.bulk_create(logs)
+        except Exception as e:
+            logger.error(f"Error creating activity log: {str(e)}")
+        try:
+            Notification.objects.bulk_create(notifications)
+        except Exception as e:
+            logger.error(f"Failed to create task assignment notification: {str(e)}")
+        self._send_assignment_emails(assignments, users)
+        with self._cond:
+            self.dispatched += len(events)
+
+    @staticmethod
+    def _send_assignment_emails(assignments: Dict[int, Dict[int, Any]], users: Dict[int, Any]) -> None:
+        from core.signals import get_email_service
+
+        email_service = get_email_service()
+        for assignee_id, assigned in assignments.items():
+            assignee = users[assignee_id]
+            assigned_tasks = list(assigned.values())
+            try:
+                if len(assigned_tasks) == 1:
+                    email_service.send_task_assignment_email(task=assigned_tasks[0], assignee=assignee)
+                else:
+                    email_service.send_task_assignment_digest(tasks=assigned_tasks, assignee=assignee)
+            except Exception as e:
+                logger.error(f"Failed to send task assignment email: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                'enabled': self.enabled(),
+                'buffered': len(self._events),
+                'dispatched': self.dispatched,
+                'dropped': self.dropped,
+                'failed': self.failed,
+            }
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_task_event_dispatcher() -> TaskEventDispatcher:
+    """Get the process-wide task event dispatcher (singleton pattern)."""
+    global _dispatcher
+    if _dispatcher is None:
+        with _dispatcher_lock:
+            if _dispatcher is None:
+                _dispatcher = TaskEventDispatcher()
+    return _dispatcher
+
+
+def flush_task_events() -> None:
+    """Apply queued task events (also runs at interpreter exit)."""
+    if _dispatcher is not None:
+        _dispatcher.flush()
+
+
+def _restart_after_fork() -> None:
+    # The dispatcher thread doesn't survive fork; the parent flushed before forking
+    global _dispatcher_lock
+    _dispatcher_lock = threading.Lock()
+    if _dispatcher is not None:
+        _dispatcher._start()
+
+
+atexit.register(flush_task_events)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(before=flush_task_events, after_in_child=_restart_after_fork)
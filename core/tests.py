@@ -1,3 +1,93 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.models import Notification, Project, Task, TaskActivityLog
+from core.task_events import TaskEventDispatcher
+
+
+class TaskEventDispatcherTests(TestCase):
+    """Task save signals queue events; the dispatcher applies them in batches."""
+
+    def setUp(self):
+        self.owner = User.objects.create_user(username='owner', password='x')
+        self.dev = User.objects.create_user(username='dev', password='x', email='dev@example.com')
+        self.project = Project.objects.create(name='Apollo', owner=self.owner)
+        with override_settings(TASK_EVENTS_FLUSH_INTERVAL=3600):
+            self.dispatcher = TaskEventDispatcher()
+        patcher = mock.patch('core.signals.get_task_event_dispatcher', return_value=self.dispatcher)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.dispatcher.close)
+
+    def _create_tasks(self, count, **fields):
+        with self.captureOnCommitCallbacks(execute=True):
+            return [Task.objects.create(project=self.project, title=f'Task {i}', **fields) for i in range(count)]
+
+    def test_events_are_queued_until_flushed(self):
+        task = self._create_tasks(1)[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            task.status = 'in_progress'
+            task.priority = 'high'
+            task.save()
+        # A save that touches no tracked field records nothing
+        with self.captureOnCommitCallbacks(execute=True):
+            task.save(update_fields=['description'])
+
+        self.assertEqual(self.dispatcher.stats()['buffered'], 2)
+        self.assertFalse(TaskActivityLog.objects.exists())
+
+        self.assertEqual(self.dispatcher.flush(), 2)
+        self.assertEqual(
+            sorted(TaskActivityLog.objects.filter(task=task).values_list('action_type', flat=True)),
+            ['created', 'priority_changed', 'status_changed'],
+        )
+        self.assertEqual(self.dispatcher.stats()['buffered'], 0)
+
+    def test_assignments_in_one_batch_are_sent_as_a_digest(self):
+        tasks = self._create_tasks(3, assignee=self.dev, due_date=timezone.now() + timedelta(days=2))
+        self._create_tasks(1, assignee=self.owner)  # no email address: notified in-app only
+
+        self.dispatcher.flush()
+
+        self.assertEqual(Notification.objects.filter(user=self.dev, type='task_assigned').count(), 3)
+        self.assertEqual(Notification.objects.filter(user=self.owner, type='task_assigned').count(), 1)
+        digests = [message for message in mail.outbox if message.to == ['dev@example.com']]
+        self.assertEqual(len(digests), 1)
+        self.assertEqual(digests[0].subject, '3 New Tasks Assigned')
+        for task in tasks:
+            self.assertIn(task.title, digests[0].body)
+
+    @override_settings(TASK_EVENTS_MAX_ATTEMPTS=2)
+    def test_failed_batch_is_retried_then_dropped(self):
+        with override_settings(TASK_EVENTS_FLUSH_INTERVAL=3600):
+            dispatcher = TaskEventDispatcher()
+        self.addCleanup(dispatcher.close)
+        with mock.patch('core.signals.get_task_event_dispatcher', return_value=dispatcher):
+            self._create_tasks(2)
+
+        with mock.patch.object(dispatcher, '_dispatch', side_effect=RuntimeError('database unavailable')):
+            self.assertEqual(dispatcher.flush(), 0)
+            self.assertEqual(dispatcher.stats()['buffered'], 2)  # back in the queue for the next flush
+            with self.assertLogs('core.task_events', level='ERROR'):
+                self.assertEqual(dispatcher.flush(), 0)
+        self.assertEqual((dispatcher.stats()['buffered'], dispatcher.stats()['failed']), (0, 2))
+
+        self._create_tasks(1)  # recorded by self.dispatcher, unaffected
+        self.assertEqual(self.dispatcher.flush(), 1)
+
+    def test_refresh_from_db_resets_the_change_baseline(self):
+        task = self._create_tasks(1)[0]
+        Task.objects.filter(pk=task.pk).update(status='done')
+        task.refresh_from_db()
+        with self.captureOnCommitCallbacks(execute=True):
+            task.status = 'todo'
+            task.save()
+
+        self.dispatcher.flush()
+        change = TaskActivityLog.objects.get(task=task, action_type='status_changed')
+        self.assertEqual((change.old_value, change.new_value), ('done', 'todo'))
@@ -1,5 +1,6 @@
 from django.contrib import admin
 from .models import Campaign, MarketResearch, CampaignPerformance, MarketingDocument, NotificationRule, Lead, CampaignContact
+from .services.sequence_schedule import reschedule_contacts
 
 
 @admin.register(Campaign)
@@ -139,5 +140,6 @@ class CampaignContactAdmin(admin.ModelAdmin):
     def reset_sequence(self, request, queryset):
         """Reset sequence progress for selected contacts"""
         count = queryset.update(current_step=0, last_sent_at=None, started_at=None, completed=False)
+        reschedule_contacts(queryset)
         self.message_user(request, f'{count} contact(s) sequence reset.')
     reset_sequence.short_description = 'Reset sequence progress'
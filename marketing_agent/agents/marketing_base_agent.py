@@ -18,6 +18,9 @@ import os
 from django.conf import settings
 import logging
 
+from core.llm_pool import get_llm_pool
+from core.llm_cache import get_llm_cache, make_cache_key
+
 logger = logging.getLogger(__name__)
 
 
@@ -30,8 +33,15 @@ class MarketingBaseAgent:
     - Reasoning/Q&A: Groq (llama-3.1-8b-instant or other Groq models)
     - Document Writing: OpenAI GPT-4.1 (optional, if API key provided)
     - Embeddings (RAG): OpenAI text-embedding-3-large (optional, if API key provided)
+    
+    Response caching (see core.llm_cache):
+        llm_cache_ttl = None  -> cache deterministic (temperature 0) calls only
+        llm_cache_ttl = 0     -> never cache this agent's calls
+        llm_cache_ttl = N     -> cache all calls for N seconds
     """
     
+    llm_cache_ttl = None
+    
     def __init__(self, model=None, use_embeddings=False):
         """
         Initialize the marketing base agent with Groq (for Q&A) and OpenAI (for advanced tasks).
@@ -47,9 +57,12 @@ class MarketingBaseAgent:
             or os.environ.get('GROQ_API_KEY') or os.environ.get('GROQ_REC_API_KEY') or ''
         ).strip()
         self.groq_client = None
+        self._groq_entry = None
         if self.groq_api_key:
             try:
-                self.groq_client = Groq(api_key=self.groq_api_key)
+                # Shared client per API key (see core.llm_pool)
+                self._groq_entry = get_llm_pool().groq(self.groq_api_key)
+                self.groq_client = self._groq_entry.client
             except TypeError as e:
                 error_msg = str(e)
                 if 'proxies' in error_msg or 'unexpected keyword' in error_msg:
@@ -70,9 +83,11 @@ class MarketingBaseAgent:
         
         # OpenAI API (Optional - for document writing and advanced tasks)
         self.openai_api_key = getattr(settings, 'OPENAI_API_KEY', None)
+        self._openai_entry = None
         if OpenAI and self.openai_api_key:
             try:
-                self.openai_client = OpenAI(api_key=self.openai_api_key)
+                self._openai_entry = get_llm_pool().openai(self.openai_api_key)
+                self.openai_client = self._openai_entry.client
             except Exception as e:
                 logger.warning(f"OpenAI client initialization failed: {e}. Will use Groq only.")
                 self.openai_client = None
@@ -92,7 +107,7 @@ class MarketingBaseAgent:
         
         self.agent_name = self.__class__.__name__
     
-    def _call_llm(self, prompt, system_prompt=None, temperature=0.7, max_tokens=2000, model=None):
+    def _call_llm(self, prompt, system_prompt=None, temperature=0.7, max_tokens=2000, model=None, use_cache=None):
         """
         Make a call to the LLM API (Groq for Q&A, OpenAI for advanced tasks).
         
@@ -102,18 +117,29 @@ class MarketingBaseAgent:
             temperature (float): Sampling temperature (0-2)
             max_tokens (int): Maximum tokens in response
             model (str): Override model for this call
+            use_cache (bool): False to bypass the response cache, True to force it
             
         Returns:
             str: LLM response text
         """
         # If OpenAI is available and GPT model specified, use it; otherwise use Groq
         if self.openai_client and model and 'gpt' in model.lower():
-            return self._call_openai(prompt, system_prompt, temperature, max_tokens, model)
+            return self._call_openai(prompt, system_prompt, temperature, max_tokens, model, use_cache=use_cache)
         else:
             # Default to Groq for Q&A
-            return self._call_groq_qa(prompt, system_prompt, temperature, max_tokens)
+            return self._call_groq_qa(prompt, system_prompt, temperature, max_tokens, use_cache=use_cache)
+    
+    def _cached_completion(self, provider, model, messages, temperature, max_tokens, call, use_cache=None):
+        """
+        Serve a chat completion from the shared response cache when the
+        agent's cache policy allows it, otherwise run call().
+        """
+        cache = get_llm_cache()
+        cache_key = make_cache_key(provider, model, messages, temperature, max_tokens)
+        cacheable = cache.should_cache(temperature, self.llm_cache_ttl, use_cache)
+        return cache.get_or_call(cache_key, call, cacheable, self.llm_cache_ttl)
     
-    def _call_openai(self, prompt, system_prompt=None, temperature=0.7, max_tokens=2000, model=None):
+    def _call_openai(self, prompt, system_prompt=None, temperature=0.7, max_tokens=2000, model=None, use_cache=None):
         """
         Make a call to the OpenAI LLM API (for document writing and advanced tasks).
         
@@ -123,6 +149,7 @@ class MarketingBaseAgent:
             temperature (float): Sampling temperature (0-2)
             max_tokens (int): Maximum tokens in response
             model (str): Override model for this call
+            use_cache (bool): False to bypass the response cache, True to force it
             
         Returns:
             str: LLM response text
@@ -147,14 +174,17 @@ class MarketingBaseAgent:
             # Use specified model or default
             model_to_use = model or getattr(settings, 'OPENAI_MODEL', 'gpt-4.1')
             
-            response = self.openai_client.chat.completions.create(
-                model=model_to_use,
-                messages=messages,
-                temperature=temperature,
-                max_tokens=max_tokens
-            )
+            def call():
+                with self._openai_entry.acquire(model_to_use) as client:
+                    response = client.chat.completions.create(
+                        model=model_to_use,
+                        messages=messages,
+                        temperature=temperature,
+                        max_tokens=max_tokens
+                    )
+                return response.choices[0].message.content
             
-            return response.choices[0].message.content
+            return self._cached_completion('openai', model_to_use, messages, temperature, max_tokens, call, use_cache)
             
         except Exception as e:
             logger.error(f"Error in {self.agent_name} OpenAI LLM call: {str(e)}")
@@ -181,10 +211,11 @@ class MarketingBaseAgent:
             if isinstance(text, str):
                 text = [text]
             
-            response = self.openai_client.embeddings.create(
-                model=model_to_use,
-                input=text
-            )
+            with self._openai_entry.acquire(model_to_use) as client:
+                response = client.embeddings.create(
+                    model=model_to_use,
+                    input=text
+                )
             
             # Return embeddings as list of vectors
             if len(text) == 1:
@@ -213,7 +244,7 @@ class MarketingBaseAgent:
         # Use Groq for Q&A
         return self._call_groq_qa(prompt, system_prompt, temperature, max_tokens)
     
-    def _call_groq_qa(self, prompt, system_prompt=None, temperature=0.3, max_tokens=2000):
+    def _call_groq_qa(self, prompt, system_prompt=None, temperature=0.3, max_tokens=2000, use_cache=None):
         """
         Call Groq API for Q&A tasks.
         
@@ -222,6 +253,7 @@ class MarketingBaseAgent:
             system_prompt (str): System prompt for context
             temperature (float): Sampling temperature
             max_tokens (int): Maximum tokens in response
+            use_cache (bool): False to bypass the response cache, True to force it
             
         Returns:
             str: LLM response text
@@ -245,14 +277,17 @@ class MarketingBaseAgent:
                 "content": prompt
             })
             
-            response = self.groq_client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=temperature,
-                max_tokens=max_tokens
-            )
+            def call():
+                with self._groq_entry.acquire(self.model) as client:
+                    response = client.chat.completions.create(
+                        model=self.model,
+                        messages=messages,
+                        temperature=temperature,
+                        max_tokens=max_tokens
+                    )
+                return response.choices[0].message.content
             
-            return response.choices[0].message.content
+            return self._cached_completion('groq', self.model, messages, temperature, max_tokens, call, use_cache)
             
         except Exception as e:
             logger.error(f"Error in {self.agent_name} Groq Q&A call: {str(e)}")
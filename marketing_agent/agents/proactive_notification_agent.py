@@ -10,6 +10,7 @@ from marketing_agent.models import (
     Campaign, Lead, EmailSendHistory, CampaignPerformance,
     MarketingNotification, NotificationRule, EmailSequence, Reply
 )
+from marketing_agent.services.campaign_snapshot import CampaignSnapshot, build_campaign_snapshots
 from django.contrib.auth.models import User
 from django.utils import timezone
 from datetime import datetime, timedelta
@@ -87,7 +88,10 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
         """
         try:
             user = User.objects.get(id=user_id)
-            campaigns = Campaign.objects.filter(owner=user, status__in=['active', 'scheduled', 'paused'])
+            campaigns = list(Campaign.objects.filter(owner=user, status__in=['active', 'scheduled', 'paused']))
+            
+            # Gather what every check needs for all campaigns at once (fixed number of queries)
+            snapshots = build_campaign_snapshots(campaigns)
             
             total_notifications_count = 0
             issues_found = []
@@ -95,7 +99,7 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             all_notifications_data = []
             
             for campaign in campaigns:
-                result = self.check_campaign(user_id, campaign.id)
+                result = self.run_campaign_checks(campaign, user, snapshots[campaign.id])
                 if result.get('success'):
                     # Sum up notification counts from each campaign (already counted correctly in check_campaign)
                     campaign_notification_count = result.get('notifications_created', 0)
@@ -110,14 +114,14 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             
             return {
                 'success': True,
-                'campaigns_monitored': campaigns.count(),
+                'campaigns_monitored': len(campaigns),
                 'notifications_created': total_notifications_count,  # Sum of counts from all campaigns
                 'issues_found': len(issues_found),
                 'opportunities_found': len(opportunities_found),
                 'notifications': all_notifications_data,
                 'issues': issues_found,
                 'opportunities': opportunities_found,
-                'message': f'Monitored {campaigns.count()} campaigns'
+                'message': f'Monitored {len(campaigns)} campaigns'
             }
         except User.DoesNotExist:
             return {'success': False, 'error': 'User not found'}
@@ -125,13 +129,15 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             self.log_action("Error monitoring campaigns", {"error": str(e)})
             return {'success': False, 'error': str(e)}
     
-    def check_campaign(self, user_id: int, campaign_id: int) -> Dict:
+    def check_campaign(self, user_id: int, campaign_id: int,
+                       snapshot: Optional[CampaignSnapshot] = None) -> Dict:
         """
         Check a specific campaign for issues and opportunities
         
         Args:
             user_id (int): User ID
             campaign_id (int): Campaign ID
+            snapshot (CampaignSnapshot): Prefetched campaign metrics (built here if omitted)
             
         Returns:
             Dict: Check results with notifications
@@ -139,44 +145,67 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
         try:
             user = User.objects.get(id=user_id)
             campaign = Campaign.objects.get(id=campaign_id, owner=user)
+        except User.DoesNotExist:
+            return {'success': False, 'error': 'User not found'}
+        except Campaign.DoesNotExist:
+            return {'success': False, 'error': 'Campaign not found'}
+        return self.run_campaign_checks(campaign, user, snapshot)
+    
+    def run_campaign_checks(self, campaign: Campaign, user: User,
+                            snapshot: Optional[CampaignSnapshot] = None) -> Dict:
+        """
+        Run every check for an already loaded campaign.
+        Monitoring loops pass the snapshot from build_campaign_snapshots() so the
+        checks don't query per campaign.
+        
+        Args:
+            campaign (Campaign): Campaign to check
+            user (User): Campaign owner (notification recipient)
+            snapshot (CampaignSnapshot): Prefetched campaign metrics (built here if omitted)
+            
+        Returns:
+            Dict: Check results with notifications
+        """
+        try:
+            snapshot = self._snapshot(campaign, snapshot)
             
             notifications_created = []
             issues = []
             opportunities = []
             
             # Check performance metrics
-            perf_result = self._check_performance_metrics(campaign, user)
+            perf_result = self._check_performance_metrics(campaign, user, snapshot)
             if perf_result:
                 notifications_created.extend(perf_result.get('notifications', []))
                 issues.extend(perf_result.get('issues', []))
                 opportunities.extend(perf_result.get('opportunities', []))
             
             # Check email delivery
-            delivery_result = self._check_email_delivery(campaign, user)
+            delivery_result = self._check_email_delivery(campaign, user, snapshot)
             if delivery_result:
                 notifications_created.extend(delivery_result.get('notifications', []))
                 issues.extend(delivery_result.get('issues', []))
             
             # Check milestones
-            milestone_result = self._check_milestones(campaign, user)
+            milestone_result = self._check_milestones(campaign, user, snapshot)
             if milestone_result:
                 notifications_created.extend(milestone_result.get('notifications', []))
                 opportunities.extend(milestone_result.get('opportunities', []))
             
             # Check anomalies
-            anomaly_result = self._check_anomalies(campaign, user)
+            anomaly_result = self._check_anomalies(campaign, user, snapshot)
             if anomaly_result:
                 notifications_created.extend(anomaly_result.get('notifications', []))
                 issues.extend(anomaly_result.get('issues', []))
             
             # Check campaign setup and actionable recommendations
-            setup_result = self._check_campaign_setup(campaign, user)
+            setup_result = self._check_campaign_setup(campaign, user, snapshot)
             if setup_result:
                 notifications_created.extend(setup_result.get('notifications', []))
                 issues.extend(setup_result.get('issues', []))
             
             # Check for actionable recommendations
-            recommendations_result = self._check_actionable_recommendations(campaign, user)
+            recommendations_result = self._check_actionable_recommendations(campaign, user, snapshot)
             if recommendations_result:
                 notifications_created.extend(recommendations_result.get('notifications', []))
                 opportunities.extend(recommendations_result.get('opportunities', []))
@@ -184,7 +213,7 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             # Comprehensive checks for ALL campaigns (active, scheduled, paused, draft)
             # Check all reply types (positive, negative, neutral, objections, unsubscribe)
             # Works for any campaign that has sent emails
-            all_replies_result = self._check_all_reply_types(campaign, user)
+            all_replies_result = self._check_all_reply_types(campaign, user, snapshot)
             if all_replies_result:
                 notifications_created.extend(all_replies_result.get('notifications', []))
                 opportunities.extend(all_replies_result.get('opportunities', []))
@@ -192,7 +221,7 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             
             # Check open/click rates and engagement metrics
             # Works for any campaign that has sent emails
-            engagement_result = self._check_active_campaign_engagement(campaign, user)
+            engagement_result = self._check_active_campaign_engagement(campaign, user, snapshot)
             if engagement_result:
                 notifications_created.extend(engagement_result.get('notifications', []))
                 opportunities.extend(engagement_result.get('opportunities', []))
@@ -200,7 +229,7 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             
             # Check sequence status and email sending
             # Works for all campaign statuses
-            sequence_status_result = self._check_active_campaign_sequences(campaign, user)
+            sequence_status_result = self._check_active_campaign_sequences(campaign, user, snapshot)
             if sequence_status_result:
                 notifications_created.extend(sequence_status_result.get('notifications', []))
                 issues.extend(sequence_status_result.get('issues', []))
@@ -208,25 +237,25 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             # Check campaign progress (weekly updates, milestones)
             # Only for active campaigns (they're the ones running)
             if campaign.status == 'active':
-                progress_result = self._check_campaign_progress(campaign, user)
+                progress_result = self._check_campaign_progress(campaign, user, snapshot)
                 if progress_result:
                     notifications_created.extend(progress_result.get('notifications', []))
                     opportunities.extend(progress_result.get('opportunities', []))
             
             # Recent activity summary (opens, clicks, replies) - any campaign with sends or replies
-            activity_result = self._check_recent_activity_summary(campaign, user)
+            activity_result = self._check_recent_activity_summary(campaign, user, snapshot)
             if activity_result:
                 notifications_created.extend(activity_result.get('notifications', []))
                 opportunities.extend(activity_result.get('opportunities', []))
             
             # First open / first click milestones (low threshold so new campaigns get feedback)
-            milestones_result = self._check_first_milestones(campaign, user)
+            milestones_result = self._check_first_milestones(campaign, user, snapshot)
             if milestones_result:
                 notifications_created.extend(milestones_result.get('notifications', []))
                 opportunities.extend(milestones_result.get('opportunities', []))
             
             # Sub-sequence triggered by reply (reply triggered a follow-up sequence)
-            subseq_result = self._check_sub_sequence_triggered(campaign, user)
+            subseq_result = self._check_sub_sequence_triggered(campaign, user, snapshot)
             if subseq_result:
                 notifications_created.extend(subseq_result.get('notifications', []))
                 opportunities.extend(subseq_result.get('opportunities', []))
@@ -252,7 +281,7 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             
             return {
                 'success': True,
-                'campaign_id': campaign_id,
+                'campaign_id': campaign.id,
                 'campaign_name': campaign.name,
                 'notifications_created': notification_count,  # Count of actual notifications created
                 'issues_found': len(issues),
@@ -261,10 +290,6 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
                 'issues': issues,
                 'opportunities': opportunities
             }
-        except User.DoesNotExist:
-            return {'success': False, 'error': 'User not found'}
-        except Campaign.DoesNotExist:
-            return {'success': False, 'error': 'Campaign not found'}
         except Exception as e:
             self.log_action("Error checking campaign", {"error": str(e)})
             return {'success': False, 'error': str(e)}
@@ -281,23 +306,25 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
         """
         return self.monitor_all_campaigns(user_id)
     
-    def _check_performance_metrics(self, campaign: Campaign, user: User) -> Optional[Dict]:
+    def _check_performance_metrics(self, campaign: Campaign, user: User,
+                                   snapshot: Optional[CampaignSnapshot] = None) -> Optional[Dict]:
         """Check campaign performance metrics for issues and opportunities"""
         notifications = []
         issues = []
         opportunities = []
         
-        # Get email statistics
-        email_sends = EmailSendHistory.objects.filter(campaign=campaign)
-        total_sent = email_sends.count()
+        # Get email statistics (from the campaign's rollup row)
+        snapshot = self._snapshot(campaign, snapshot)
+        metrics = snapshot.metrics
+        total_sent = metrics.total_sent
         
         if total_sent == 0:
             return None
         
-        emails_opened = email_sends.filter(status__in=['opened', 'clicked']).count()
-        emails_clicked = email_sends.filter(status='clicked').count()
-        emails_bounced = email_sends.filter(status='bounced').count()
-        emails_failed = email_sends.filter(status='failed').count()
+        emails_opened = metrics.opened
+        emails_clicked = metrics.clicked
+        emails_bounced = metrics.bounced
+        emails_failed = metrics.failed
         
         open_rate = (emails_opened / total_sent * 100) if total_sent > 0 else 0
         click_rate = (emails_clicked / total_sent * 100) if total_sent > 0 else 0
@@ -309,6 +336,7 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             notification = self._create_notification(
                 user=user,
                 campaign=campaign,
+                snapshot=snapshot,
                 notification_type='performance_alert',
                 priority='high',
                 title=f'Low Open Rate Alert: {campaign.name}',
@@ -335,6 +363,7 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             notification = self._create_notification(
                 user=user,
                 campaign=campaign,
+                snapshot=snapshot,
                 notification_type='email_delivery',
                 priority='high',
                 title=f'High Bounce Rate Alert: {campaign.name}',
@@ -361,6 +390,7 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             notification = self._create_notification(
                 user=user,
                 campaign=campaign,
+                snapshot=snapshot,
                 notification_type='email_delivery',
                 priority='critical',
                 title=f'Email Delivery Failures: {campaign.name}',
@@ -387,6 +417,7 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             notification = self._create_notification(
                 user=user,
                 campaign=campaign,
+                snapshot=snapshot,
                 notification_type='opportunity',
                 priority='low',
                 title=f'High Engagement Opportunity: {campaign.name}',
@@ -412,6 +443,7 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             notification = self._create_notification(
                 user=user,
                 campaign=campaign,
+                snapshot=snapshot,
                 notification_type='opportunity',
                 priority='low',
                 title=f'High Click-Through Rate: {campaign.name}',
@@ -435,22 +467,19 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
         
         # Check for zero engagement: All emails sent but no replies or clicks
         if total_sent >= 10:  # Only check if significant number of emails sent
-            emails_clicked = email_sends.filter(status='clicked').count()
-            emails_opened = email_sends.filter(status__in=['opened', 'clicked']).count()
-            
             # Check for replies (using Reply model)
-            replies_count = Reply.objects.filter(campaign=campaign).count()
+            replies_count = metrics.replies
             
             # If no clicks AND no replies after sending multiple emails
             if emails_clicked == 0 and replies_count == 0 and total_sent >= 5:
                 # Check if emails were sent at least 24 hours ago (give time for engagement)
-                oldest_email = email_sends.order_by('sent_at').first()
-                if oldest_email and oldest_email.sent_at:
-                    hours_since_first = (timezone.now() - oldest_email.sent_at).total_seconds() / 3600
+                if metrics.first_sent_at:
+                    hours_since_first = (timezone.now() - metrics.first_sent_at).total_seconds() / 3600
                     if hours_since_first >= 24:  # At least 24 hours since first email
                         notification = self._create_notification(
                             user=user,
                             campaign=campaign,
+                            snapshot=snapshot,
                             notification_type='engagement',
                             priority='high',
                             title=f'⚠️ No Engagement Detected: {campaign.name}',
@@ -477,13 +506,13 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             
             # If emails opened but no clicks and no replies
             elif emails_opened > 0 and emails_clicked == 0 and replies_count == 0 and total_sent >= 8:
-                oldest_email = email_sends.order_by('sent_at').first()
-                if oldest_email and oldest_email.sent_at:
-                    hours_since_first = (timezone.now() - oldest_email.sent_at).total_seconds() / 3600
+                if metrics.first_sent_at:
+                    hours_since_first = (timezone.now() - metrics.first_sent_at).total_seconds() / 3600
                     if hours_since_first >= 48:  # At least 48 hours since first email
                         notification = self._create_notification(
                             user=user,
                             campaign=campaign,
+                            snapshot=snapshot,
                             notification_type='engagement',
                             priority='medium',
                             title=f'📧 Emails Opened But No Clicks/Replies: {campaign.name}',
@@ -516,40 +545,38 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             }
         return None
     
-    def _check_email_delivery(self, campaign: Campaign, user: User) -> Optional[Dict]:
+    def _check_email_delivery(self, campaign: Campaign, user: User,
+                              snapshot: Optional[CampaignSnapshot] = None) -> Optional[Dict]:
         """Check email delivery issues"""
         notifications = []
         issues = []
         
         # Check recent email sends (last 24 hours)
-        recent_cutoff = timezone.now() - timedelta(hours=24)
-        recent_emails = EmailSendHistory.objects.filter(
-            campaign=campaign,
-            sent_at__gte=recent_cutoff
-        )
+        snapshot = self._snapshot(campaign, snapshot)
+        recent_count = snapshot.sent_24h
         
-        if recent_emails.count() == 0:
+        if recent_count == 0:
             return None
         
-        failed_emails = recent_emails.filter(status__in=['failed', 'bounced'])
-        failure_count = failed_emails.count()
-        failure_rate = (failure_count / recent_emails.count() * 100) if recent_emails.count() > 0 else 0
+        failure_count = snapshot.failed_24h
+        failure_rate = (failure_count / recent_count * 100) if recent_count > 0 else 0
         
         # Alert if high failure rate in last 24 hours
-        if failure_rate > 10 and recent_emails.count() >= 5:
+        if failure_rate > 10 and recent_count >= 5:
             notification = self._create_notification(
                 user=user,
                 campaign=campaign,
+                snapshot=snapshot,
                 notification_type='email_delivery',
                 priority='high',
                 title=f'Email Delivery Issues: {campaign.name}',
-                message=f'High email delivery failure rate ({failure_rate:.1f}%) in the last 24 hours. {failure_count} out of {recent_emails.count()} emails failed.',
+                message=f'High email delivery failure rate ({failure_rate:.1f}%) in the last 24 hours. {failure_count} out of {recent_count} emails failed.',
                 action_required=True,
                 action_url=f'/marketing/campaigns/{campaign.id}/',
                 metadata={
                     'failure_rate': failure_rate,
                     'failure_count': failure_count,
-                    'total_recent': recent_emails.count(),
+                    'total_recent': recent_count,
                     'timeframe': '24_hours'
                 }
             )
@@ -567,18 +594,20 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             }
         return None
     
-    def _check_milestones(self, campaign: Campaign, user: User) -> Optional[Dict]:
+    def _check_milestones(self, campaign: Campaign, user: User,
+                          snapshot: Optional[CampaignSnapshot] = None) -> Optional[Dict]:
         """Check if campaign milestones are reached"""
         notifications = []
         opportunities = []
         
         # Check lead targets
         if campaign.target_leads:
-            actual_leads = campaign.leads.count()
+            actual_leads = self._snapshot(campaign, snapshot).leads
             if actual_leads >= campaign.target_leads:
                 notification = self._create_notification(
                     user=user,
                     campaign=campaign,
+                    snapshot=snapshot,
                     notification_type='milestone',
                     priority='low',
                     title=f'Milestone Reached: {campaign.name}',
@@ -606,35 +635,26 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             }
         return None
     
-    def _check_anomalies(self, campaign: Campaign, user: User) -> Optional[Dict]:
+    def _check_anomalies(self, campaign: Campaign, user: User,
+                         snapshot: Optional[CampaignSnapshot] = None) -> Optional[Dict]:
         """Check for performance anomalies"""
         notifications = []
         issues = []
         
         # Get email statistics for last 7 days vs previous 7 days
-        now = timezone.now()
-        last_7_days = now - timedelta(days=7)
-        previous_7_days_start = last_7_days - timedelta(days=7)
+        snapshot = self._snapshot(campaign, snapshot)
+        recent_count = snapshot.sent_7d
+        previous_count = snapshot.sent_prev_7d
         
-        recent_emails = EmailSendHistory.objects.filter(
-            campaign=campaign,
-            sent_at__gte=last_7_days
-        )
-        previous_emails = EmailSendHistory.objects.filter(
-            campaign=campaign,
-            sent_at__gte=previous_7_days_start,
-            sent_at__lt=last_7_days
-        )
-        
-        if recent_emails.count() < 10 or previous_emails.count() < 10:
+        if recent_count < 10 or previous_count < 10:
             return None
         
         # Calculate open rates
-        recent_opened = recent_emails.filter(status__in=['opened', 'clicked']).count()
-        previous_opened = previous_emails.filter(status__in=['opened', 'clicked']).count()
+        recent_opened = snapshot.opened_7d
+        previous_opened = snapshot.opened_prev_7d
         
-        recent_open_rate = (recent_opened / recent_emails.count() * 100) if recent_emails.count() > 0 else 0
-        previous_open_rate = (previous_opened / previous_emails.count() * 100) if previous_emails.count() > 0 else 0
+        recent_open_rate = (recent_opened / recent_count * 100) if recent_count > 0 else 0
+        previous_open_rate = (previous_opened / previous_count * 100) if previous_count > 0 else 0
         
         # Detect significant drop (> 30% decrease)
         if previous_open_rate > 0 and recent_open_rate < (previous_open_rate * 0.7):
@@ -642,6 +662,7 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             notification = self._create_notification(
                 user=user,
                 campaign=campaign,
+                snapshot=snapshot,
                 notification_type='anomaly',
                 priority='high',
                 title=f'Performance Anomaly Detected: {campaign.name}',
@@ -670,22 +691,25 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             }
         return None
     
-    def _check_campaign_setup(self, campaign: Campaign, user: User) -> Optional[Dict]:
+    def _check_campaign_setup(self, campaign: Campaign, user: User,
+                              snapshot: Optional[CampaignSnapshot] = None) -> Optional[Dict]:
         """Check campaign setup and provide actionable recommendations"""
         notifications = []
         issues = []
+        snapshot = self._snapshot(campaign, snapshot)
+        metrics = snapshot.metrics
         
         # Check PAUSED campaigns - provide actionable steps
         if campaign.status == 'paused':
-            leads_count = campaign.leads.count()
-            sequences = EmailSequence.objects.filter(campaign=campaign)
-            emails_sent = EmailSendHistory.objects.filter(campaign=campaign).count()
+            leads_count = snapshot.leads
+            emails_sent = metrics.total_sent
             
             # If paused with no leads
             if leads_count == 0:
                 notification = self._create_notification(
                     user=user,
                     campaign=campaign,
+                    snapshot=snapshot,
                     notification_type='campaign_status',
                     priority='high',
                     title=f'👥 Generate Leads: {campaign.name}',
@@ -703,10 +727,11 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
                     issues.append({'type': 'paused_no_leads'})
             
             # If paused with leads but no sequences
-            elif leads_count > 0 and sequences.count() == 0:
+            elif leads_count > 0 and snapshot.sequences == 0:
                 notification = self._create_notification(
                     user=user,
                     campaign=campaign,
+                    snapshot=snapshot,
                     notification_type='campaign_status',
                     priority='high',
                     title=f'📧 Create Email Sequences: {campaign.name}',
@@ -724,21 +749,22 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
                     issues.append({'type': 'paused_no_sequences'})
             
             # If paused with leads and sequences - ready to launch
-            elif leads_count > 0 and sequences.count() > 0:
+            elif leads_count > 0 and snapshot.sequences > 0:
                 notification = self._create_notification(
                     user=user,
                     campaign=campaign,
+                    snapshot=snapshot,
                     notification_type='campaign_status',
                     priority='medium',
                     title=f'🚀 Launch Campaign: {campaign.name}',
-                    message=f'Campaign "{campaign.name}" is paused but ready to launch! It has {leads_count} leads and {sequences.count()} email sequence(s). Activate the campaign to start sending emails.',
+                    message=f'Campaign "{campaign.name}" is paused but ready to launch! It has {leads_count} leads and {snapshot.sequences} email sequence(s). Activate the campaign to start sending emails.',
                     action_required=True,
                     action_url=f'/marketing/campaigns/{campaign.id}/edit/',
                     metadata={
                         'action': 'launch_paused_campaign',
                         'status': 'paused',
                         'leads_count': leads_count,
-                        'sequences_count': sequences.count()
+                        'sequences_count': snapshot.sequences
                     }
                 )
                 if notification:
@@ -747,14 +773,14 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
         
         # Check SCHEDULED campaigns
         if campaign.status == 'scheduled':
-            leads_count = campaign.leads.count()
-            sequences = EmailSequence.objects.filter(campaign=campaign)
+            leads_count = snapshot.leads
             
             # Scheduled with no leads
             if leads_count == 0:
                 notification = self._create_notification(
                     user=user,
                     campaign=campaign,
+                    snapshot=snapshot,
                     notification_type='campaign_status',
                     priority='high',
                     title=f'👥 Generate Leads for Scheduled Campaign: {campaign.name}',
@@ -773,10 +799,11 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
                     issues.append({'type': 'scheduled_no_leads'})
             
             # Scheduled with leads but no sequences
-            elif leads_count > 0 and sequences.count() == 0:
+            elif leads_count > 0 and snapshot.sequences == 0:
                 notification = self._create_notification(
                     user=user,
                     campaign=campaign,
+                    snapshot=snapshot,
                     notification_type='campaign_status',
                     priority='high',
                     title=f'📧 Create Email Sequences: {campaign.name}',
@@ -795,23 +822,24 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
                     issues.append({'type': 'scheduled_no_sequences'})
             
             # Scheduled campaign ready to launch (has leads and sequences but not launched)
-            elif leads_count > 0 and sequences.count() > 0:
+            elif leads_count > 0 and snapshot.sequences > 0:
                 # Check if start date has passed but campaign is still scheduled
                 if campaign.start_date and campaign.start_date <= timezone.now().date():
                     notification = self._create_notification(
                         user=user,
                         campaign=campaign,
+                        snapshot=snapshot,
                         notification_type='campaign_status',
                         priority='high',
                         title=f'⏰ Scheduled Campaign Not Launched: {campaign.name}',
-                        message=f'Campaign "{campaign.name}" is scheduled with start date {campaign.start_date} but has NOT been launched yet! It has {leads_count} leads and {sequences.count()} sequence(s) ready. Launch the campaign now to start sending emails.',
+                        message=f'Campaign "{campaign.name}" is scheduled with start date {campaign.start_date} but has NOT been launched yet! It has {leads_count} leads and {snapshot.sequences} sequence(s) ready. Launch the campaign now to start sending emails.',
                         action_required=True,
                         action_url=f'/marketing/campaigns/{campaign.id}/edit/',
                         metadata={
                             'action': 'launch_scheduled_campaign',
                             'status': 'scheduled',
                             'leads_count': leads_count,
-                            'sequences_count': sequences.count(),
+                            'sequences_count': snapshot.sequences,
                             'start_date': campaign.start_date.isoformat(),
                             'days_past_start': (timezone.now().date() - campaign.start_date).days
                         }
@@ -826,17 +854,18 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
                         notification = self._create_notification(
                             user=user,
                             campaign=campaign,
+                            snapshot=snapshot,
                             notification_type='campaign_status',
                             priority='medium',
                             title=f'🚀 Campaign Ready to Launch: {campaign.name}',
-                            message=f'Campaign "{campaign.name}" is scheduled to start {campaign.start_date.strftime("%B %d, %Y")} ({days_until_start} day{"s" if days_until_start != 0 else ""} away). It has {leads_count} leads and {sequences.count()} sequence(s) ready. You can launch it now or wait for the scheduled date.',
+                            message=f'Campaign "{campaign.name}" is scheduled to start {campaign.start_date.strftime("%B %d, %Y")} ({days_until_start} day{"s" if days_until_start != 0 else ""} away). It has {leads_count} leads and {snapshot.sequences} sequence(s) ready. You can launch it now or wait for the scheduled date.',
                             action_required=False,
                             action_url=f'/marketing/campaigns/{campaign.id}/edit/',
                             metadata={
                                 'action': 'campaign_ready_to_launch',
                                 'status': 'scheduled',
                                 'leads_count': leads_count,
-                                'sequences_count': sequences.count(),
+                                'sequences_count': snapshot.sequences,
                                 'start_date': campaign.start_date.isoformat(),
                                 'days_until_start': days_until_start
                             }
@@ -848,22 +877,23 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
         # Check if campaign is in draft but ready to activate
         if campaign.status == 'draft':
             # Check if campaign has required setup
-            has_leads = campaign.leads.count() > 0
+            has_leads = snapshot.leads > 0
             has_dates = campaign.start_date is not None
             
             if has_leads and has_dates:
                 notification = self._create_notification(
                     user=user,
                     campaign=campaign,
+                    snapshot=snapshot,
                     notification_type='campaign_status',
                     priority='medium',
                     title=f'🚀 Activate Campaign: {campaign.name}',
-                    message=f'Your campaign "{campaign.name}" is ready to activate! It has {campaign.leads.count()} leads and dates configured. Click to activate and start sending emails.',
+                    message=f'Your campaign "{campaign.name}" is ready to activate! It has {snapshot.leads} leads and dates configured. Click to activate and start sending emails.',
                     action_required=True,
                     action_url=f'/marketing/campaigns/{campaign.id}/edit/',
                     metadata={
                         'action': 'activate_campaign',
-                        'leads_count': campaign.leads.count(),
+                        'leads_count': snapshot.leads,
                         'has_dates': has_dates
                     }
                 )
@@ -880,6 +910,7 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
                 notification = self._create_notification(
                     user=user,
                     campaign=campaign,
+                    snapshot=snapshot,
                     notification_type='campaign_status',
                     priority='high',
                     title=f'⏰ Campaign Start Date Passed: {campaign.name}',
@@ -899,20 +930,20 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
                     })
         
         # Check if campaign has no email sequences
-        sequences = EmailSequence.objects.filter(campaign=campaign)
-        if sequences.count() == 0 and campaign.status in ['active', 'scheduled']:
+        if snapshot.sequences == 0 and campaign.status in ['active', 'scheduled']:
             notification = self._create_notification(
                 user=user,
                 campaign=campaign,
+                snapshot=snapshot,
                 notification_type='campaign_status',
                 priority='high',
                 title=f'📧 Create Email Sequences: {campaign.name}',
-                message=f'Campaign "{campaign.name}" has no email sequences set up! Create follow-up email sequences to engage with your {campaign.leads.count()} leads. Click to create sequences.',
+                message=f'Campaign "{campaign.name}" has no email sequences set up! Create follow-up email sequences to engage with your {snapshot.leads} leads. Click to create sequences.',
                 action_required=True,
                 action_url=f'/marketing/campaigns/{campaign.id}/sequences/',
                 metadata={
                     'action': 'create_email_sequences',
-                    'leads_count': campaign.leads.count(),
+                    'leads_count': snapshot.leads,
                     'sequences_count': 0
                 }
             )
@@ -920,20 +951,20 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
                 notifications.append(notification)
                 issues.append({
                     'type': 'no_email_sequences',
-                    'leads_count': campaign.leads.count()
+                    'leads_count': snapshot.leads
                 })
         
         # Check ACTIVE campaigns - comprehensive analysis
         if campaign.status == 'active':
-            leads_count = campaign.leads.count()
-            sequences = EmailSequence.objects.filter(campaign=campaign)
-            emails_sent = EmailSendHistory.objects.filter(campaign=campaign).count()
+            leads_count = snapshot.leads
+            emails_sent = metrics.total_sent
             
             # Active campaign with no leads
             if leads_count == 0:
                 notification = self._create_notification(
                     user=user,
                     campaign=campaign,
+                    snapshot=snapshot,
                     notification_type='campaign_status',
                     priority='high',
                     title=f'👥 Increase Leads: {campaign.name}',
@@ -951,10 +982,11 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
                     issues.append({'type': 'active_no_leads'})
             
             # Active campaign with leads but no sequences
-            elif leads_count > 0 and sequences.count() == 0:
+            elif leads_count > 0 and snapshot.sequences == 0:
                 notification = self._create_notification(
                     user=user,
                     campaign=campaign,
+                    snapshot=snapshot,
                     notification_type='campaign_status',
                     priority='high',
                     title=f'📧 Create Email Sequences: {campaign.name}',
@@ -972,20 +1004,21 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
                     issues.append({'type': 'active_no_sequences'})
             
             # Active campaign with leads and sequences but no emails sent
-            elif leads_count > 0 and sequences.count() > 0 and emails_sent == 0:
+            elif leads_count > 0 and snapshot.sequences > 0 and emails_sent == 0:
                 notification = self._create_notification(
                     user=user,
                     campaign=campaign,
+                    snapshot=snapshot,
                     notification_type='campaign_status',
                     priority='high',
                     title=f'📬 Start Sending Emails: {campaign.name}',
-                    message=f'Campaign "{campaign.name}" is active with {leads_count} leads and {sequences.count()} sequence(s) but no emails have been sent yet! Trigger email sequences to start engaging with your leads.',
+                    message=f'Campaign "{campaign.name}" is active with {leads_count} leads and {snapshot.sequences} sequence(s) but no emails have been sent yet! Trigger email sequences to start engaging with your leads.',
                     action_required=True,
                     action_url=f'/marketing/campaigns/{campaign.id}/',
                     metadata={
                         'action': 'start_sending_emails',
                         'leads_count': leads_count,
-                        'sequences_count': sequences.count(),
+                        'sequences_count': snapshot.sequences,
                         'emails_sent': 0
                     }
                 )
@@ -999,14 +1032,14 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             # Active campaign with low lead count (needs more leads)
             elif leads_count > 0 and leads_count < 10 and emails_sent > 0:
                 # Check if campaign is performing well but needs more leads
-                email_sends = EmailSendHistory.objects.filter(campaign=campaign)
-                emails_opened = email_sends.filter(status__in=['opened', 'clicked']).count()
+                emails_opened = metrics.opened
                 open_rate = (emails_opened / emails_sent * 100) if emails_sent > 0 else 0
                 
                 if open_rate >= 20:  # Good engagement, can scale
                     notification = self._create_notification(
                         user=user,
                         campaign=campaign,
+                        snapshot=snapshot,
                         notification_type='opportunity',
                         priority='medium',
                         title=f'👥 Increase Lead Count: {campaign.name}',
@@ -1035,14 +1068,16 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             }
         return None
     
-    def _check_actionable_recommendations(self, campaign: Campaign, user: User) -> Optional[Dict]:
+    def _check_actionable_recommendations(self, campaign: Campaign, user: User,
+                                          snapshot: Optional[CampaignSnapshot] = None) -> Optional[Dict]:
         """Check for actionable recommendations to improve campaign"""
         notifications = []
         opportunities = []
         
         # Get email statistics
-        email_sends = EmailSendHistory.objects.filter(campaign=campaign)
-        total_sent = email_sends.count()
+        snapshot = self._snapshot(campaign, snapshot)
+        metrics = snapshot.metrics
+        total_sent = metrics.total_sent
         
         # For active campaigns, check even if no emails sent yet
         if total_sent == 0:
@@ -1050,13 +1085,13 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             if campaign.status != 'active':
                 return None
             # For active campaigns with no emails, provide setup recommendations
-            leads_count = campaign.leads.count()
-            sequences = EmailSequence.objects.filter(campaign=campaign)
+            leads_count = snapshot.leads
             
             if leads_count == 0:
                 notification = self._create_notification(
                     user=user,
                     campaign=campaign,
+                    snapshot=snapshot,
                     notification_type='engagement',
                     priority='high',
                     title=f'👥 Add Leads to Active Campaign: {campaign.name}',
@@ -1066,7 +1101,7 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
                     metadata={
                         'action': 'add_leads_to_active',
                         'leads_count': 0,
-                        'sequences_count': sequences.count()
+                        'sequences_count': snapshot.sequences
                     }
                 )
                 if notification:
@@ -1075,10 +1110,11 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
                         'type': 'add_leads_to_active',
                         'leads_count': 0
                     })
-            elif sequences.count() == 0:
+            elif snapshot.sequences == 0:
                 notification = self._create_notification(
                     user=user,
                     campaign=campaign,
+                    snapshot=snapshot,
                     notification_type='engagement',
                     priority='high',
                     title=f'📧 Create Email Sequences for Active Campaign: {campaign.name}',
@@ -1105,8 +1141,8 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
                 }
             return None
         
-        emails_opened = email_sends.filter(status__in=['opened', 'clicked']).count()
-        emails_clicked = email_sends.filter(status='clicked').count()
+        emails_opened = metrics.opened
+        emails_clicked = metrics.clicked
         open_rate = (emails_opened / total_sent * 100) if total_sent > 0 else 0
         click_rate = (emails_clicked / total_sent * 100) if total_sent > 0 else 0
         
@@ -1115,6 +1151,7 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             notification = self._create_notification(
                 user=user,
                 campaign=campaign,
+                snapshot=snapshot,
                 notification_type='engagement',
                 priority='medium',
                 title=f'✏️ Improve Email Content: {campaign.name}',
@@ -1144,6 +1181,7 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             notification = self._create_notification(
                 user=user,
                 campaign=campaign,
+                snapshot=snapshot,
                 notification_type='engagement',
                 priority='medium',
                 title=f'🎯 Optimize Call-to-Action: {campaign.name}',
@@ -1171,22 +1209,19 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
                 })
         
         # Check for follow-up email opportunities
-        sequences = EmailSequence.objects.filter(campaign=campaign)
         
         # Check if campaign needs follow-up emails (leads contacted but no follow-ups)
-        if sequences.count() > 0 and total_sent > 0:
+        if snapshot.sequences > 0 and total_sent > 0:
             # Check if there are leads that were contacted but haven't received follow-ups
-            contacted_leads = EmailSendHistory.objects.filter(
-                campaign=campaign,
-                status__in=['delivered', 'opened', 'clicked']
-            ).values('recipient_email').distinct().count()
+            contacted_leads = snapshot.contacted_leads
             
             # Check if follow-up sequences exist but haven't been triggered
-            followup_sequences = sequences.filter(name__icontains='follow').count()
+            followup_sequences = snapshot.followup_sequences
             if followup_sequences == 0 and contacted_leads > 0:
                 notification = self._create_notification(
                     user=user,
                     campaign=campaign,
+                    snapshot=snapshot,
                     notification_type='engagement',
                     priority='medium',
                     title=f'🔄 Create Follow-up Email Sequences: {campaign.name}',
@@ -1196,7 +1231,7 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
                     metadata={
                         'action': 'create_followup_sequences',
                         'contacted_leads': contacted_leads,
-                        'current_sequences': sequences.count()
+                        'current_sequences': snapshot.sequences
                     }
                 )
                 if notification:
@@ -1207,20 +1242,21 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
                     })
         
         # Recommendation: Add more follow-up sequences if campaign has good engagement
-        if open_rate >= 25 and sequences.count() < 3 and total_sent >= 20:
+        if open_rate >= 25 and snapshot.sequences < 3 and total_sent >= 20:
             notification = self._create_notification(
                 user=user,
                 campaign=campaign,
+                snapshot=snapshot,
                 notification_type='opportunity',
                 priority='low',
                 title=f'🔄 Add More Follow-up Sequences: {campaign.name}',
-                message=f'Great engagement ({open_rate:.1f}% open rate)! Consider adding more follow-up email sequences to nurture leads further. You currently have {sequences.count()} sequence(s).',
+                message=f'Great engagement ({open_rate:.1f}% open rate)! Consider adding more follow-up email sequences to nurture leads further. You currently have {snapshot.sequences} sequence(s).',
                 action_required=False,
                 action_url=f'/marketing/campaigns/{campaign.id}/sequences/',
                 metadata={
                     'action': 'add_followup_sequences',
                     'open_rate': open_rate,
-                    'current_sequences': sequences.count(),
+                    'current_sequences': snapshot.sequences,
                     'recommended_sequences': 3
                 }
             )
@@ -1233,15 +1269,13 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
         
         # Recommendation: Schedule more emails if campaign is performing well
         if open_rate >= 30 and click_rate >= 5 and campaign.status == 'active':
-            recent_emails = EmailSendHistory.objects.filter(
-                campaign=campaign,
-                sent_at__gte=timezone.now() - timedelta(days=7)
-            ).count()
+            recent_emails = snapshot.sent_7d
             
             if recent_emails < 5:
                 notification = self._create_notification(
                     user=user,
                     campaign=campaign,
+                    snapshot=snapshot,
                     notification_type='opportunity',
                     priority='low',
                     title=f'📅 Schedule More Emails: {campaign.name}',
@@ -1270,34 +1304,32 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             }
         return None
     
-    def _check_all_reply_types(self, campaign: Campaign, user: User) -> Optional[Dict]:
+    def _check_all_reply_types(self, campaign: Campaign, user: User,
+                               snapshot: Optional[CampaignSnapshot] = None) -> Optional[Dict]:
         """Check for ALL types of replies (positive, negative, neutral, objections, unsubscribe)"""
         notifications = []
         opportunities = []
         issues = []
         
         # Get recent replies (last 7 days)
-        recent_cutoff = timezone.now() - timedelta(days=7)
-        recent_replies = Reply.objects.filter(
-            campaign=campaign,
-            replied_at__gte=recent_cutoff
-        )
+        snapshot = self._snapshot(campaign, snapshot)
         
-        if recent_replies.exists():
+        if snapshot.total_replies_7d:
             # Positive replies
-            positive_replies = recent_replies.filter(interest_level='positive')
-            if positive_replies.exists():
-                reply_count = positive_replies.count()
-                latest_reply = positive_replies.first()
-                unique_leads = positive_replies.values('lead__email').distinct().count()
+            positive_replies = snapshot.replies_7d.get('positive', 0)
+            if positive_replies:
+                reply_count = positive_replies
+                latest_reply_from = snapshot.latest_positive_email
+                unique_leads = snapshot.reply_leads_7d.get('positive', 0)
                 
                 notification = self._create_notification(
                     user=user,
                     campaign=campaign,
+                    snapshot=snapshot,
                     notification_type='opportunity',
                     priority='medium',
                     title=f'🎉 Positive Replies: {campaign.name}',
-                    message=f'Campaign "{campaign.name}" received {reply_count} positive reply/replies from {unique_leads} lead(s) in the last 7 days! Latest from {latest_reply.lead.email}. Follow up to convert them.',
+                    message=f'Campaign "{campaign.name}" received {reply_count} positive reply/replies from {unique_leads} lead(s) in the last 7 days! Latest from {latest_reply_from}. Follow up to convert them.',
                     action_required=True,
                     action_url=f'/marketing/campaigns/{campaign.id}/',
                     metadata={'action': 'positive_replies', 'count': reply_count, 'unique_leads': unique_leads}
@@ -1307,12 +1339,13 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
                     opportunities.append({'type': 'positive_replies', 'count': reply_count})
             
             # Negative replies (not interested)
-            negative_replies = recent_replies.filter(interest_level='negative')
-            if negative_replies.exists():
-                reply_count = negative_replies.count()
+            negative_replies = snapshot.replies_7d.get('negative', 0)
+            if negative_replies:
+                reply_count = negative_replies
                 notification = self._create_notification(
                     user=user,
                     campaign=campaign,
+                    snapshot=snapshot,
                     notification_type='engagement',
                     priority='low',
                     title=f'📉 Negative Replies: {campaign.name}',
@@ -1326,12 +1359,13 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
                     issues.append({'type': 'negative_replies', 'count': reply_count})
             
             # Objections/Concerns
-            objection_replies = recent_replies.filter(interest_level='objection')
-            if objection_replies.exists():
-                reply_count = objection_replies.count()
+            objection_replies = snapshot.replies_7d.get('objection', 0)
+            if objection_replies:
+                reply_count = objection_replies
                 notification = self._create_notification(
                     user=user,
                     campaign=campaign,
+                    snapshot=snapshot,
                     notification_type='engagement',
                     priority='medium',
                     title=f'⚠️ Objections Received: {campaign.name}',
@@ -1345,12 +1379,13 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
                     issues.append({'type': 'objections', 'count': reply_count})
             
             # Unsubscribe requests
-            unsubscribe_replies = recent_replies.filter(interest_level='unsubscribe')
-            if unsubscribe_replies.exists():
-                reply_count = unsubscribe_replies.count()
+            unsubscribe_replies = snapshot.replies_7d.get('unsubscribe', 0)
+            if unsubscribe_replies:
+                reply_count = unsubscribe_replies
                 notification = self._create_notification(
                     user=user,
                     campaign=campaign,
+                    snapshot=snapshot,
                     notification_type='engagement',
                     priority='high',
                     title=f'🚫 Unsubscribe Requests: {campaign.name}',
@@ -1364,12 +1399,13 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
                     issues.append({'type': 'unsubscribes', 'count': reply_count})
             
             # Information requests
-            info_requests = recent_replies.filter(interest_level='requested_info')
-            if info_requests.exists():
-                reply_count = info_requests.count()
+            info_requests = snapshot.replies_7d.get('requested_info', 0)
+            if info_requests:
+                reply_count = info_requests
                 notification = self._create_notification(
                     user=user,
                     campaign=campaign,
+                    snapshot=snapshot,
                     notification_type='opportunity',
                     priority='medium',
                     title=f'📧 Information Requests: {campaign.name}',
@@ -1383,12 +1419,13 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
                     opportunities.append({'type': 'info_requests', 'count': reply_count})
             
             # Neutral replies
-            neutral_replies = recent_replies.filter(interest_level='neutral')
-            if neutral_replies.exists() and neutral_replies.count() >= 5:
-                reply_count = neutral_replies.count()
+            neutral_replies = snapshot.replies_7d.get('neutral', 0)
+            if neutral_replies >= 5:
+                reply_count = neutral_replies
                 notification = self._create_notification(
                     user=user,
                     campaign=campaign,
+                    snapshot=snapshot,
                     notification_type='engagement',
                     priority='low',
                     title=f'💬 Neutral Replies: {campaign.name}',
@@ -1408,22 +1445,24 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             }
         return None
     
-    def _check_active_campaign_engagement(self, campaign: Campaign, user: User) -> Optional[Dict]:
+    def _check_active_campaign_engagement(self, campaign: Campaign, user: User,
+                                          snapshot: Optional[CampaignSnapshot] = None) -> Optional[Dict]:
         """Check open/click rates and engagement metrics for ALL campaigns (active, scheduled, paused)"""
         notifications = []
         opportunities = []
         issues = []
         
         # Get email statistics
-        email_sends = EmailSendHistory.objects.filter(campaign=campaign)
-        total_sent = email_sends.count()
+        snapshot = self._snapshot(campaign, snapshot)
+        metrics = snapshot.metrics
+        total_sent = metrics.total_sent
         
         if total_sent == 0:
             return None
         
-        emails_opened = email_sends.filter(status__in=['opened', 'clicked']).count()
-        emails_clicked = email_sends.filter(status='clicked').count()
-        emails_delivered = email_sends.filter(status__in=['delivered', 'opened', 'clicked']).count()
+        emails_opened = metrics.opened
+        emails_clicked = metrics.clicked
+        emails_delivered = metrics.delivered
         
         open_rate = (emails_opened / total_sent * 100) if total_sent > 0 else 0
         click_rate = (emails_clicked / total_sent * 100) if total_sent > 0 else 0
@@ -1431,18 +1470,16 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
         
         # Check for excellent open rate (opportunity)
         if open_rate >= 30 and total_sent >= 20:
-            existing_notif = MarketingNotification.objects.filter(
-                user=user,
-                campaign=campaign,
-                notification_type='opportunity',
-                title__icontains='Excellent Open Rate',
-                created_at__gte=timezone.now() - timedelta(days=3)
-            ).exists()
+            existing_notif = snapshot.has_notification(
+                user.id, 'opportunity', title_contains='Excellent Open Rate',
+                since=timezone.now() - timedelta(days=3)
+            ) is not None
             
             if not existing_notif:
                 notification = self._create_notification(
                     user=user,
                     campaign=campaign,
+                    snapshot=snapshot,
                     notification_type='opportunity',
                     priority='low',
                     title=f'⭐ Excellent Open Rate: {campaign.name}',
@@ -1457,18 +1494,16 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
         
         # Check for good click rate (opportunity)
         if click_rate >= 5 and total_sent >= 20:
-            existing_notif = MarketingNotification.objects.filter(
-                user=user,
-                campaign=campaign,
-                notification_type='opportunity',
-                title__icontains='Good Click Rate',
-                created_at__gte=timezone.now() - timedelta(days=3)
-            ).exists()
+            existing_notif = snapshot.has_notification(
+                user.id, 'opportunity', title_contains='Good Click Rate',
+                since=timezone.now() - timedelta(days=3)
+            ) is not None
             
             if not existing_notif:
                 notification = self._create_notification(
                     user=user,
                     campaign=campaign,
+                    snapshot=snapshot,
                     notification_type='opportunity',
                     priority='low',
                     title=f'🎯 Good Click Rate: {campaign.name}',
@@ -1483,18 +1518,16 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
         
         # Check for low open rate (issue)
         if open_rate < 15 and total_sent >= 10:
-            existing_notif = MarketingNotification.objects.filter(
-                user=user,
-                campaign=campaign,
-                notification_type='performance_alert',
-                title__icontains='Low Open Rate',
-                created_at__gte=timezone.now() - timedelta(days=2)
-            ).exists()
+            existing_notif = snapshot.has_notification(
+                user.id, 'performance_alert', title_contains='Low Open Rate',
+                since=timezone.now() - timedelta(days=2)
+            ) is not None
             
             if not existing_notif:
                 notification = self._create_notification(
                     user=user,
                     campaign=campaign,
+                    snapshot=snapshot,
                     notification_type='performance_alert',
                     priority='high',
                     title=f'⚠️ Low Open Rate: {campaign.name}',
@@ -1509,18 +1542,16 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
         
         # Check for low click rate (issue)
         if open_rate >= 20 and click_rate < 2 and total_sent >= 15:
-            existing_notif = MarketingNotification.objects.filter(
-                user=user,
-                campaign=campaign,
-                notification_type='performance_alert',
-                title__icontains='Low Click Rate',
-                created_at__gte=timezone.now() - timedelta(days=2)
-            ).exists()
+            existing_notif = snapshot.has_notification(
+                user.id, 'performance_alert', title_contains='Low Click Rate',
+                since=timezone.now() - timedelta(days=2)
+            ) is not None
             
             if not existing_notif:
                 notification = self._create_notification(
                     user=user,
                     campaign=campaign,
+                    snapshot=snapshot,
                     notification_type='performance_alert',
                     priority='medium',
                     title=f'📉 Low Click Rate: {campaign.name}',
@@ -1541,20 +1572,21 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             }
         return None
     
-    def _check_active_campaign_sequences(self, campaign: Campaign, user: User) -> Optional[Dict]:
+    def _check_active_campaign_sequences(self, campaign: Campaign, user: User,
+                                         snapshot: Optional[CampaignSnapshot] = None) -> Optional[Dict]:
         """Check sequence status and email sending for ALL campaigns (active, scheduled, paused, draft)"""
         notifications = []
         issues = []
         
         # Check if campaign has sequences
-        sequences = EmailSequence.objects.filter(campaign=campaign)
-        sequences_count = sequences.count()
-        active_sequences = sequences.filter(is_active=True).count()
+        snapshot = self._snapshot(campaign, snapshot)
+        sequences_count = snapshot.sequences
+        active_sequences = snapshot.active_sequences
         
         # No sequences at all - use actual campaign status and actionable copy
         if sequences_count == 0:
             status_label = campaign.get_status_display()
-            leads_count = campaign.leads.count()
+            leads_count = snapshot.leads
             if campaign.status == 'draft':
                 if leads_count == 0:
                     title = f'📧 Setup draft campaign: {campaign.name}'
@@ -1587,6 +1619,7 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             notification = self._create_notification(
                 user=user,
                 campaign=campaign,
+                snapshot=snapshot,
                 notification_type='campaign_status',
                 priority='high',
                 title=title,
@@ -1605,6 +1638,7 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             notification = self._create_notification(
                 user=user,
                 campaign=campaign,
+                snapshot=snapshot,
                 notification_type='campaign_status',
                 priority='high',
                 title=f'⏸️ No Active Sequences: {campaign.name}',
@@ -1618,21 +1652,19 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
                 issues.append({'type': 'no_active_sequences', 'total': sequences_count})
         
         # Check if emails are being sent
-        total_emails_sent = EmailSendHistory.objects.filter(campaign=campaign).count()
-        recent_emails = EmailSendHistory.objects.filter(
-            campaign=campaign,
-            sent_at__gte=timezone.now() - timedelta(days=7)
-        ).count()
+        total_emails_sent = snapshot.metrics.total_sent
+        recent_emails = snapshot.sent_7d
         
         # Has active sequences but no emails sent (only for active/scheduled campaigns)
         if active_sequences > 0 and total_emails_sent == 0 and campaign.status in ['active', 'scheduled']:
             # Check if campaign has leads
-            leads_count = campaign.leads.count()
+            leads_count = snapshot.leads
             if leads_count > 0:
                 status_text = campaign.get_status_display()
                 notification = self._create_notification(
                     user=user,
                     campaign=campaign,
+                    snapshot=snapshot,
                     notification_type='campaign_status',
                     priority='high',
                     title=f'📬 No Emails Sent Yet: {campaign.name}',
@@ -1652,6 +1684,7 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             notification = self._create_notification(
                 user=user,
                 campaign=campaign,
+                snapshot=snapshot,
                 notification_type='campaign_status',
                 priority='medium',
                 title=f'📉 Low Email Activity: {campaign.name}',
@@ -1752,26 +1785,20 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             }
         return None
     
-    def _check_campaign_progress(self, campaign: Campaign, user: User) -> Optional[Dict]:
+    def _check_campaign_progress(self, campaign: Campaign, user: User,
+                                 snapshot: Optional[CampaignSnapshot] = None) -> Optional[Dict]:
         """Check campaign progress and provide regular updates for active campaigns"""
         notifications = []
         opportunities = []
         
         # Get campaign statistics
-        total_emails_sent = EmailSendHistory.objects.filter(campaign=campaign).count()
-        emails_opened = EmailSendHistory.objects.filter(
-            campaign=campaign,
-            status__in=['opened', 'clicked']
-        ).count()
-        emails_clicked = EmailSendHistory.objects.filter(
-            campaign=campaign,
-            status='clicked'
-        ).count()
-        total_replies = Reply.objects.filter(campaign=campaign).count()
-        positive_replies = Reply.objects.filter(
-            campaign=campaign,
-            interest_level='positive'
-        ).count()
+        snapshot = self._snapshot(campaign, snapshot)
+        metrics = snapshot.metrics
+        total_emails_sent = metrics.total_sent
+        emails_opened = metrics.opened
+        emails_clicked = metrics.clicked
+        total_replies = metrics.replies
+        positive_replies = metrics.positive_replies
         
         # Calculate rates
         open_rate = (emails_opened / total_emails_sent * 100) if total_emails_sent > 0 else 0
@@ -1787,9 +1814,8 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             days_running = (timezone.now().date() - campaign.start_date).days
         else:
             # Use first email sent date as proxy
-            first_email = EmailSendHistory.objects.filter(campaign=campaign).order_by('sent_at').first()
-            if first_email and first_email.sent_at:
-                days_running = (timezone.now().date() - first_email.sent_at.date()).days
+            if metrics.first_sent_at:
+                days_running = (timezone.now().date() - metrics.first_sent_at.date()).days
             else:
                 days_running = 0
         
@@ -1797,34 +1823,21 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
         if days_running > 0 and days_running % 7 == 0:
             # Check if we already sent a weekly update today (avoid duplicates)
             today = timezone.now().date()
-            existing_update = MarketingNotification.objects.filter(
-                user=user,
-                campaign=campaign,
-                notification_type='milestone',
-                title__icontains='Weekly Progress',
-                created_at__date=today
-            ).exists()
+            existing_update = snapshot.has_notification(
+                user.id, 'milestone', title_contains='Weekly Progress',
+                on_date=today
+            ) is not None
             
             if not existing_update:
                 # Calculate weekly stats (last 7 days)
-                week_cutoff = timezone.now() - timedelta(days=7)
-                weekly_sent = EmailSendHistory.objects.filter(
-                    campaign=campaign,
-                    sent_at__gte=week_cutoff
-                ).count()
-                weekly_opened = EmailSendHistory.objects.filter(
-                    campaign=campaign,
-                    status__in=['opened', 'clicked'],
-                    sent_at__gte=week_cutoff
-                ).count()
-                weekly_replies = Reply.objects.filter(
-                    campaign=campaign,
-                    replied_at__gte=week_cutoff
-                ).count()
+                weekly_sent = snapshot.sent_7d
+                weekly_opened = snapshot.opened_7d
+                weekly_replies = snapshot.total_replies_7d
                 
                 notification = self._create_notification(
                     user=user,
                     campaign=campaign,
+                    snapshot=snapshot,
                     notification_type='milestone',
                     priority='low',
                     title=f'📊 Weekly Progress Update: {campaign.name}',
@@ -1851,18 +1864,16 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
         
         # Milestone: First 100 emails sent
         if total_emails_sent >= 100 and total_emails_sent < 110:
-            existing_milestone = MarketingNotification.objects.filter(
-                user=user,
-                campaign=campaign,
-                notification_type='milestone',
-                title__icontains='100 emails',
-                created_at__gte=timezone.now() - timedelta(days=1)
-            ).exists()
+            existing_milestone = snapshot.has_notification(
+                user.id, 'milestone', title_contains='100 emails',
+                since=timezone.now() - timedelta(days=1)
+            ) is not None
             
             if not existing_milestone:
                 notification = self._create_notification(
                     user=user,
                     campaign=campaign,
+                    snapshot=snapshot,
                     notification_type='milestone',
                     priority='low',
                     title=f'🎯 Milestone: 100 Emails Sent - {campaign.name}',
@@ -1885,18 +1896,16 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
         
         # Good performance opportunity: High engagement
         if open_rate >= 25 and click_rate >= 3 and total_emails_sent >= 20:
-            existing_opportunity = MarketingNotification.objects.filter(
-                user=user,
-                campaign=campaign,
-                notification_type='opportunity',
-                title__icontains='High Performance',
-                created_at__gte=timezone.now() - timedelta(days=3)
-            ).exists()
+            existing_opportunity = snapshot.has_notification(
+                user.id, 'opportunity', title_contains='High Performance',
+                since=timezone.now() - timedelta(days=3)
+            ) is not None
             
             if not existing_opportunity:
                 notification = self._create_notification(
                     user=user,
                     campaign=campaign,
+                    snapshot=snapshot,
                     notification_type='opportunity',
                     priority='low',
                     title=f'🚀 High Performance Campaign: {campaign.name}',
@@ -1925,23 +1934,18 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             }
         return None
     
-    def _check_recent_activity_summary(self, campaign: Campaign, user: User) -> Optional[Dict]:
+    def _check_recent_activity_summary(self, campaign: Campaign, user: User,
+                                       snapshot: Optional[CampaignSnapshot] = None) -> Optional[Dict]:
         """Create one notification per campaign: recent stats plus issues, opportunities, and improvement suggestions."""
         notifications = []
         opportunities = []
-        recent_cutoff = timezone.now() - timedelta(days=7)
-        email_sends = EmailSendHistory.objects.filter(campaign=campaign, sent_at__gte=recent_cutoff)
-        total_sent = email_sends.count()
-        if total_sent == 0:
-            replies_recent = Reply.objects.filter(campaign=campaign, replied_at__gte=recent_cutoff)
-            if not replies_recent.exists():
-                return None
-        emails_opened = email_sends.filter(status__in=['opened', 'clicked']).count()
-        emails_clicked = email_sends.filter(status='clicked').count()
-        replies_recent = Reply.objects.filter(campaign=campaign, replied_at__gte=recent_cutoff)
-        reply_count = replies_recent.count()
-        positive_count = replies_recent.filter(interest_level='positive').count()
-        negative_count = replies_recent.filter(interest_level='negative').count()
+        snapshot = self._snapshot(campaign, snapshot)
+        total_sent = snapshot.sent_7d
+        emails_opened = snapshot.opened_7d
+        emails_clicked = snapshot.clicked_7d
+        reply_count = snapshot.total_replies_7d
+        positive_count = snapshot.replies_7d.get('positive', 0)
+        negative_count = snapshot.replies_7d.get('negative', 0)
         if total_sent == 0 and reply_count == 0:
             return None
         # Build stats line
@@ -1973,6 +1977,7 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
         notification = self._create_notification(
             user=user,
             campaign=campaign,
+            snapshot=snapshot,
             notification_type='engagement',
             priority='medium',
             title=f'Activity update: {campaign.name}',
@@ -1996,20 +2001,23 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             return {'notifications': notifications, 'opportunities': opportunities}
         return None
     
-    def _check_first_milestones(self, campaign: Campaign, user: User) -> Optional[Dict]:
+    def _check_first_milestones(self, campaign: Campaign, user: User,
+                                snapshot: Optional[CampaignSnapshot] = None) -> Optional[Dict]:
         """Notify on first open and first click (low threshold so new campaigns get feedback)."""
         notifications = []
         opportunities = []
-        email_sends = EmailSendHistory.objects.filter(campaign=campaign)
-        total_sent = email_sends.count()
+        snapshot = self._snapshot(campaign, snapshot)
+        metrics = snapshot.metrics
+        total_sent = metrics.total_sent
         if total_sent < 1:
             return None
-        emails_opened = email_sends.filter(status__in=['opened', 'clicked']).count()
-        emails_clicked = email_sends.filter(status='clicked').count()
+        emails_opened = metrics.opened
+        emails_clicked = metrics.clicked
         if emails_opened >= 1:
             n = self._create_notification(
                 user=user,
                 campaign=campaign,
+                snapshot=snapshot,
                 notification_type='engagement',
                 priority='low',
                 title=f'First email opened: {campaign.name}',
@@ -2025,6 +2033,7 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             n = self._create_notification(
                 user=user,
                 campaign=campaign,
+                snapshot=snapshot,
                 notification_type='engagement',
                 priority='low',
                 title=f'First click: {campaign.name}',
@@ -2040,26 +2049,22 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             return {'notifications': notifications, 'opportunities': opportunities}
         return None
     
-    def _check_sub_sequence_triggered(self, campaign: Campaign, user: User) -> Optional[Dict]:
+    def _check_sub_sequence_triggered(self, campaign: Campaign, user: User,
+                                      snapshot: Optional[CampaignSnapshot] = None) -> Optional[Dict]:
         """Notify when a reply triggered a sub-sequence (follow-up sequence)."""
         notifications = []
         opportunities = []
-        recent_cutoff = timezone.now() - timedelta(days=7)
-        triggered = Reply.objects.filter(
-            campaign=campaign,
-            sub_sequence__isnull=False,
-            replied_at__gte=recent_cutoff
-        )
-        if not triggered.exists():
+        snapshot = self._snapshot(campaign, snapshot)
+        count = snapshot.sub_sequence_replies_7d
+        if not count:
             return None
-        count = triggered.count()
-        unique_leads = triggered.values('lead__email').distinct().count()
-        sub_names = list(triggered.values_list('sub_sequence__name', flat=True).distinct())
-        sub_names = [n for n in sub_names if n]
+        unique_leads = snapshot.sub_sequence_leads_7d
+        sub_names = snapshot.sub_sequence_names
         sub_label = sub_names[0] if len(sub_names) == 1 else f'{len(sub_names)} sub-sequences'
         notification = self._create_notification(
             user=user,
             campaign=campaign,
+            snapshot=snapshot,
             notification_type='engagement',
             priority='medium',
             title=f'Sub-sequence triggered: {campaign.name}',
@@ -2075,26 +2080,37 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             return {'notifications': notifications, 'opportunities': opportunities}
         return None
     
+    def _snapshot(self, campaign: Campaign, snapshot: Optional[CampaignSnapshot] = None) -> CampaignSnapshot:
+        """Snapshot passed in by run_campaign_checks, or built for direct calls"""
+        if snapshot is None:
+            snapshot = build_campaign_snapshots([campaign])[campaign.id]
+        return snapshot
+    
     def _create_notification(self, user: User, campaign: Optional[Campaign],
                            notification_type: str, priority: str, title: str,
                            message: str, action_required: bool = False,
                            action_url: Optional[str] = None,
-                           metadata: Optional[Dict] = None) -> Optional[MarketingNotification]:
+                           metadata: Optional[Dict] = None,
+                           snapshot: Optional[CampaignSnapshot] = None) -> Optional[MarketingNotification]:
         """
         Create a notification in the database
         Prevents duplicates by checking if a similar notification was created recently (last 24 hours)
+        With a snapshot the duplicate check uses its prefetched notifications (no query)
         """
         from datetime import timedelta
         
         # Check for duplicate notification in last 24 hours
         recent_cutoff = timezone.now() - timedelta(hours=24)
-        duplicate = MarketingNotification.objects.filter(
-            user=user,
-            campaign=campaign,
-            notification_type=notification_type,
-            title=title,
-            created_at__gte=recent_cutoff
-        ).first()
+        if snapshot is not None:
+            duplicate = snapshot.has_notification(user.id, notification_type, title=title, since=recent_cutoff)
+        else:
+            duplicate = MarketingNotification.objects.filter(
+                user=user,
+                campaign=campaign,
+                notification_type=notification_type,
+                title=title,
+                created_at__gte=recent_cutoff
+            ).first()
         
         # If duplicate exists and is unread, don't create a new one
         if duplicate and not duplicate.is_read:
@@ -2125,14 +2141,19 @@ class ProactiveNotificationAgent(MarketingBaseAgent):
             created_at__lt=batch_window  # Only mark ones created before this batch window
         )
         
-        if previous_unread.exists():
-            # Mark all previous unread notifications as read
-            updated_count = previous_unread.update(
-                is_read=True,
-                read_at=timezone.now()
-            )
+        # Mark all previous unread notifications as read
+        read_at = timezone.now()
+        updated_count = previous_unread.update(
+            is_read=True,
+            read_at=read_at
+        )
+        if updated_count:
             logger.info(f"Auto-marked {updated_count} previous notifications as read for user {user.id} when new notification {notification.id} was created")
         
+        if snapshot is not None:
+            snapshot.mark_read_before(user.id, batch_window, read_at)
+            snapshot.add_notification(notification)
+        
         return notification
     
     def get_notifications(self, user_id: int, unread_only: bool = False,
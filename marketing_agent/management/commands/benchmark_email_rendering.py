@@ -0,0 +1,108 @@
+"""
+Django management command to benchmark per-recipient email rendering.
+
+Renders N personalized emails (subject, HTML, plain text and tracking) twice:
+once the way send_email used to (template engine + regexes per email) and once
+from the template's cached render plan. Nothing is saved or sent.
+
+Usage:
+    python manage.py benchmark_email_rendering
+    python manage.py benchmark_email_rendering --count 10000
+    python manage.py benchmark_email_rendering --template-id 5  # Use a real template
+"""
+
+import logging
+import re
+import time
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from marketing_agent.models import Campaign, EmailTemplate, Lead
+from marketing_agent.services.email_service import EmailService
+
+SAMPLE_HTML = '''<html><body>
+<p>Hi {{ lead_name }},</p>
+<p>I noticed {{ lead_company }} has been growing quickly and thought {{ campaign_name }} might help.</p>
+<p>Here is a <a href="https://example.com/case-study">short case study</a> and our
+<a href="https://example.com/pricing">pricing</a>. Happy to <a href="#">set up a call</a>.</p>
+<p>Best,<br>The team</p>
+<p><a href="https://example.com/unsubscribe?email={{ lead_email }}">Unsubscribe</a></p>
+</body></html>'''
+
+
+class Command(BaseCommand):
+    help = 'Benchmark rendering personalized emails with and without cached render plans'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--count',
+            type=int,
+            default=10000,
+            help='Number of personalized emails to render (default: 10000)',
+        )
+        parser.add_argument(
+            '--template-id',
+            type=int,
+            help='Benchmark an existing EmailTemplate instead of the built-in sample',
+        )
+
+    def handle(self, *args, **options):
+        count = options['count']
+        if options.get('template_id'):
+            try:
+                template = EmailTemplate.objects.select_related('campaign').get(id=options['template_id'])
+            except EmailTemplate.DoesNotExist:
+                raise CommandError(f"EmailTemplate {options['template_id']} not found")
+            campaign = template.campaign
+        else:
+            campaign = Campaign(id=1, name='Spring Outreach')
+            template = EmailTemplate(
+                id=1, campaign=campaign, name='Benchmark', subject='Quick idea for {{ lead_company }}, {{ lead_name }}',
+                html_content=SAMPLE_HTML, updated_at=timezone.now(),
+            )
+
+        leads = [
+            Lead(first_name=f'Lead{i}', email=f'lead{i}@company{i % 97}.example.com', company=f'Company {i % 97}')
+            for i in range(count)
+        ]
+        sends = [SimpleNamespace(id=i, tracking_token=f'{i:032x}', campaign_id=campaign.id) for i in range(count)]
+
+        # Per-link tracking logs would dominate the legacy timing
+        logging.getLogger('marketing_agent.services.email_service').setLevel(logging.WARNING)
+        service = EmailService()
+
+        start = time.perf_counter()
+        legacy = [self._render_legacy(service, template, lead, campaign, send) for lead, send in zip(leads, sends)]
+        legacy_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        planned = []
+        for lead, send in zip(leads, sends):
+            plan = service.get_render_plan(template, campaign)
+            context_vars = service.get_context_vars(lead, campaign)
+            subject, html_content, text_content = service.render_email(plan, context_vars)
+            planned.append((subject, service.render_tracked_html(plan, context_vars, html_content, send), text_content))
+        planned_seconds = time.perf_counter() - start
+
+        mismatches = sum(1 for a, b in zip(legacy, planned) if a != b)
+        self.stdout.write(f'Rendered {count} personalized email(s)')
+        self.stdout.write(f'  Template engine per email: {legacy_seconds:.3f}s ({count / legacy_seconds:,.0f}/s)')
+        self.stdout.write(f'  Cached render plan:        {planned_seconds:.3f}s ({count / planned_seconds:,.0f}/s)')
+        self.stdout.write(f'  Speedup: {legacy_seconds / planned_seconds:.1f}x')
+        if mismatches:
+            self.stdout.write(self.style.ERROR(f'  {mismatches} email(s) rendered differently!'))
+        else:
+            self.stdout.write(self.style.SUCCESS('  Output identical for every email'))
+
+    def _render_legacy(self, service, template, lead, campaign, send):
+        """What send_email did for every recipient before render plans"""
+        context_vars = service.get_context_vars(lead, campaign)
+        subject = service.render_email_content(template.subject, context_vars)
+        html_content = service.render_email_content(template.html_content, context_vars)
+        if template.text_content:
+            text_content = service.render_email_content(template.text_content, context_vars)
+        else:
+            text_content = re.sub(r'<[^>]+>', '', html_content)
+        return subject, service._add_email_tracking(html_content, send), text_content
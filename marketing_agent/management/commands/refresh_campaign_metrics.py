@@ -0,0 +1,39 @@
+"""
+Django management command to refresh the campaign metrics rollup tables.
+
+monitor_campaigns_task refreshes the rollup incrementally on every run; use
+--full after a data migration or manual cleanup to rebuild it from scratch.
+
+Usage:
+    python manage.py refresh_campaign_metrics
+    python manage.py refresh_campaign_metrics --full
+    python manage.py refresh_campaign_metrics --campaign-id 3 --full  # For specific campaign
+"""
+
+from django.core.management.base import BaseCommand
+from marketing_agent.services.campaign_metrics import refresh_campaign_metrics
+
+
+class Command(BaseCommand):
+    help = 'Refresh the per-campaign metrics rollup (CampaignMetrics / CampaignDailyMetrics)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--campaign-id',
+            type=int,
+            action='append',
+            help='Refresh only this campaign ID (can be repeated)',
+        )
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Rebuild the rollup from EmailSendHistory/Reply instead of applying recent changes',
+        )
+
+    def handle(self, *args, **options):
+        campaign_ids = options.get('campaign_id')
+        full = options.get('full', False)
+
+        refreshed = refresh_campaign_metrics(campaign_ids=campaign_ids, full=full)
+        mode = 'Rebuilt' if full else 'Refreshed'
+        self.stdout.write(self.style.SUCCESS(f'{mode} metrics for {refreshed} campaign(s)'))
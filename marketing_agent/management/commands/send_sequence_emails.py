@@ -7,20 +7,36 @@ This command should be run periodically (e.g., every 30 minutes via cron) to:
 3. Send the next email in the sequence
 4. Stop if contact replied or sequence completed
 
+Contacts are selected by their materialized next_send_at /
+sub_sequence_next_send_at (see services/sequence_schedule.py), so each run
+only loads contacts whose next step is due.
+
 Usage:
     python manage.py send_sequence_emails
     python manage.py send_sequence_emails --dry-run
+    python manage.py send_sequence_emails --rebuild-schedule  # Recompute next_send_at first
+    python manage.py send_sequence_emails --campaign-id 3  # For specific campaign
+
+Each run leases the campaigns it sends (services/send_lease.py), so several
+runs - e.g. the per-campaign shard tasks in tasks.py - can work concurrently
+without sending to the same contact twice.
 """
 
+from django.conf import settings
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from django.db.models import Q, F
 from datetime import timedelta, datetime
+import time
 from marketing_agent.models import (
     Campaign, EmailSequence, EmailSequenceStep, EmailSendHistory, 
     Lead, CampaignContact
 )
+from marketing_agent.services.contact_provisioning import provision_campaign_contacts
 from marketing_agent.services.email_service import email_service
+from marketing_agent.services.send_lease import CampaignSendLease
+from marketing_agent.services.sequence_schedule import reschedule_contacts
+from marketing_agent.services.smtp_pool import get_smtp_pool
 import logging
 
 logger = logging.getLogger(__name__)
@@ -35,9 +51,32 @@ class Command(BaseCommand):
             action='store_true',
             help='Run without actually sending emails',
         )
+        parser.add_argument(
+            '--rebuild-schedule',
+            action='store_true',
+            help='Recompute next_send_at for every contact of active campaigns before sending',
+        )
+        parser.add_argument(
+            '--campaign-id',
+            type=int,
+            action='append',
+            help='Only send for this campaign ID (can be repeated); used by the per-campaign shard tasks',
+        )
 
     def handle(self, *args, **options):
+        # Campaign leases keep concurrent runs (shard tasks, cron, manual) off each other's contacts.
+        # A dry run sends nothing, so it does not lease and never blocks a real run.
+        self._lease = None if options['dry_run'] else CampaignSendLease()
+        try:
+            self._send(**options)
+        finally:
+            if self._lease:
+                self._lease.release()
+
+    def _send(self, **options):
         dry_run = options['dry_run']
+        # EmailAccount id -> monotonic time until which its rate limit is exhausted
+        self._throttled_until = {}
         
         self.stdout.write(self.style.SUCCESS(' Starting automated email sequence processing...'))
         self.stdout.write(f'Current time: {timezone.now()}')
@@ -47,6 +86,8 @@ class Command(BaseCommand):
         
         # Get all active campaigns
         campaigns = Campaign.objects.filter(status='active')
+        if options.get('campaign_id'):
+            campaigns = campaigns.filter(id__in=options['campaign_id'])
         campaign_count = campaigns.count()
         self.stdout.write(f'\n Found {campaign_count} active campaign(s)')
         
@@ -58,6 +99,12 @@ class Command(BaseCommand):
         total_checked = 0
         total_skipped = 0
         total_stopped = 0
+        # Campaign id -> its active main sequences (campaigns without any are skipped)
+        main_sequences = {}
+        
+        if options['rebuild_schedule']:
+            rescheduled = reschedule_contacts(CampaignContact.objects.filter(campaign__in=campaigns))
+            self.stdout.write(f'Rebuilt send schedule ({rescheduled} contact(s) changed)')
         
         # Process each campaign
         for campaign in campaigns:
@@ -65,6 +112,12 @@ class Command(BaseCommand):
             self.stdout.write(f'Processing Campaign: {campaign.name} (ID: {campaign.id})')
             self.stdout.write(f'{"="*60}')
             
+            if self._lease and not self._lease.acquire(campaign.id):
+                self.stdout.write(self.style.WARNING(
+                    f'  Campaign "{campaign.name}" is being sent by another worker, skipping'
+                ))
+                continue
+            
             # Get active sequences for this campaign
             # IMPORTANT: Only process MAIN sequences here (not sub-sequences)
             # Sub-sequences should NEVER have contacts created for all leads
@@ -73,15 +126,10 @@ class Command(BaseCommand):
             
             # Ensure every lead has a CampaignContact per active MAIN sequence only
             # Sub-sequences should NOT have contacts created here - they are created when leads reply
-            leads = list(campaign.leads.all())
-            for seq in sequences:
-                for lead in leads:
-                    CampaignContact.objects.get_or_create(
-                        campaign=campaign,
-                        lead=lead,
-                        sequence=seq,
-                        defaults={'current_step': 0},
-                    )
+            # Set-based; skipped entirely when the campaign's leads/sequences are unchanged since last run
+            provisioned = provision_campaign_contacts(campaign, sequences)
+            if provisioned:
+                self.stdout.write(f'  Created {provisioned} new campaign contact(s)')
             
             # CRITICAL: Double-check that no sub-sequences are being processed as main sequences
             # If any sub-sequences have contacts for all leads, that's a bug
@@ -111,43 +159,15 @@ class Command(BaseCommand):
             if sequence_count == 0:
                 self.stdout.write(self.style.WARNING(f'  No active sequences found for campaign "{campaign.name}"'))
                 continue
-            
-            # Get all contacts for this campaign
-            # CRITICAL: Only get contacts from MAIN sequences (not sub-sequences)
-            # Sub-sequences are handled separately and should only have contacts who replied
-            all_contacts = CampaignContact.objects.filter(
-                campaign=campaign,
-                sequence__is_active=True,
-                sequence__isnull=False,
-                sequence__is_sub_sequence=False  # EXCLUDE sub-sequences from main contact processing
-            )
-            total_contacts = all_contacts.count()
-            print("total_contacts", total_contacts)
-            
-            # Get active contacts (not completed and not replied) - MAIN SEQUENCE
-            main_contacts = all_contacts.filter(
-                completed=False,
-                replied=False
-            ).select_related('lead', 'sequence').prefetch_related('sequence__steps')
-            
-            # Get contacts in sub-sequences (replied AND interest level matches sub-sequence interest_level)
-            # Only send sub-sequence emails to leads who:
-            # 1. Have replied
-            # 2. Have a sub-sequence assigned (or we'll try to assign one)
-            # 3. The sub-sequence is active
-            # 4. The sub-sequence is not completed
-            # 5. Their reply_interest_level matches the sub-sequence's interest_level OR sub-sequence accepts 'any'
-            
-            # First, get all replied contacts
-            replied_contacts_all = CampaignContact.objects.filter(
-                campaign=campaign,
-                replied=True
-            ).select_related('lead', 'sequence', 'sub_sequence')
+            main_sequences[campaign.id] = sequences
             
             # Try to assign sub-sequences to replied contacts that don't have one yet
             # This handles cases where mark_replied didn't assign a sub-sequence
-            replied_without_sub = replied_contacts_all.filter(sub_sequence__isnull=True)
-            self.stdout.write(f'  DEBUG: Replied contacts without sub-sequence: {replied_without_sub.count()}')
+            replied_without_sub = CampaignContact.objects.filter(
+                campaign=campaign,
+                replied=True,
+                sub_sequence__isnull=True
+            ).select_related('lead', 'sequence')
             
             for contact in replied_without_sub:
                 if contact.sequence and contact.reply_interest_level:
@@ -235,71 +255,58 @@ class Command(BaseCommand):
                             f'interest: {contact.reply_interest_level or "None"}'
                         )
                     )
-            
-            # Now get contacts with sub-sequences assigned
-            # Get all replied contacts with sub-sequences (don't filter by interest level here - that's handled in _process_sub_sequence_contact)
-            sub_sequence_contacts = CampaignContact.objects.filter(
-                campaign=campaign,
-                replied=True,
-                sub_sequence__is_active=True,
-                sub_sequence__isnull=False,
-                sub_sequence_completed=False
-            ).select_related('lead', 'sub_sequence').prefetch_related('sub_sequence__steps')
-            
-            main_contact_count = main_contacts.count()
-            sub_contact_count = sub_sequence_contacts.count()
-            
-            # Show breakdown of contact status
-            completed_count = all_contacts.filter(completed=True).count()
-            replied_count = all_contacts.filter(replied=True, completed=False).count()
-            replied_with_sub = replied_count - sub_contact_count  # Replied but no sub-sequence
-            
-            self.stdout.write(f'  Total contacts: {total_contacts}')
-            self.stdout.write(f'  Active main sequence contacts: {main_contact_count}')
-            self.stdout.write(f'  Active sub-sequence contacts: {sub_contact_count}')
-            if completed_count > 0:
-                self.stdout.write(f'  Completed: {completed_count}')
-            if replied_with_sub > 0:
-                self.stdout.write(f'  Replied (no sub-sequence): {replied_with_sub}')
-            
-            # Process main sequence contacts
-            if main_contact_count > 0:
-                self.stdout.write(f'\n  Processing {main_contact_count} main sequence contact(s)...')
-                for contact in main_contacts:
-                    total_checked += 1
-                    result = self._process_main_sequence_contact(contact, campaign, sequences, dry_run)
-                    if result == 'sent':
-                        total_sent += 1
-                    elif result == 'skipped':
-                        total_skipped += 1
-                    elif result == 'stopped':
-                        total_stopped += 1
-            
-            # Process sub-sequence contacts
-            if sub_contact_count > 0:
-                self.stdout.write(f'\n  Processing {sub_contact_count} sub-sequence contact(s)...')
-                for contact in sub_sequence_contacts:
-                    total_checked += 1
-                    # CRITICAL: Refresh contact from DB to ensure we have latest replied_at
-                    # This prevents issues where replied_at might have been set after query
-                    contact.refresh_from_db()
-                    result = self._process_sub_sequence_contact(contact, campaign, dry_run)
-                    if result == 'sent':
-                        total_sent += 1
-                    elif result == 'skipped':
-                        total_skipped += 1
-                    elif result == 'stopped':
-                        total_stopped += 1
-            
-            if main_contact_count == 0 and sub_contact_count == 0:
-                if total_contacts == 0:
-                    self.stdout.write(self.style.WARNING(f'  No contacts found for campaign "{campaign.name}"'))
-                else:
-                    self.stdout.write(self.style.WARNING(
-                        f'  No active contacts found for campaign "{campaign.name}" '
-                        f'(all {total_contacts} contact(s) are completed or replied)'
-                    ))
-                continue
+        
+        # Only contacts whose next step is due: one indexed range query on the materialized
+        # schedule, processed in keyset-paginated chunks (cost follows emails due, not contacts)
+        now = timezone.now()
+        due_main = CampaignContact.objects.filter(
+            campaign_id__in=list(main_sequences),
+            completed=False,
+            replied=False,
+            sequence__is_active=True,
+            sequence__is_sub_sequence=False  # EXCLUDE sub-sequences from main contact processing
+        ).select_related('campaign', 'lead', 'sequence').prefetch_related('sequence__steps')
+        
+        # Sub-sequence contacts: replied, with an active, unfinished sub-sequence
+        # (interest level matching is handled in _process_sub_sequence_contact)
+        due_sub = CampaignContact.objects.filter(
+            campaign_id__in=list(main_sequences),
+            replied=True,
+            sub_sequence__is_active=True,
+            sub_sequence_completed=False
+        ).select_related('campaign', 'lead', 'sub_sequence').prefetch_related('sub_sequence__steps')
+        
+        self.stdout.write(f'\n  Processing main sequence contacts due by {now}...')
+        for contact in self._due_contacts(due_main, 'next_send_at', now):
+            total_checked += 1
+            result = self._process_main_sequence_contact(
+                contact, contact.campaign, main_sequences[contact.campaign_id], dry_run
+            )
+            if result == 'sent':
+                total_sent += 1
+            elif result == 'skipped':
+                total_skipped += 1
+            elif result == 'stopped':
+                total_stopped += 1
+        
+        self.stdout.write(f'\n  Processing sub-sequence contacts due by {now}...')
+        for contact in self._due_contacts(due_sub, 'sub_sequence_next_send_at', now):
+            total_checked += 1
+            # CRITICAL: Refresh contact from DB to ensure we have latest replied_at
+            # This prevents issues where replied_at might have been set after query
+            contact.refresh_from_db()
+            result = self._process_sub_sequence_contact(contact, contact.campaign, dry_run)
+            if result == 'sent':
+                total_sent += 1
+            elif result == 'skipped':
+                total_skipped += 1
+            elif result == 'stopped':
+                total_stopped += 1
+        
+        # Release pooled SMTP connections held open during this run
+        smtp_pool = get_smtp_pool()
+        smtp_stats = smtp_pool.stats()
+        smtp_pool.close_all()
         
         # Summary
         self.stdout.write(
@@ -311,10 +318,38 @@ class Command(BaseCommand):
                 f'  Emails sent: {total_sent}\n'
                 f'  Emails skipped (waiting): {total_skipped}\n'
                 f'  Sequences completed/stopped: {total_stopped}\n'
+                f'  SMTP handshakes: {smtp_stats["handshakes"]} (avoided by pooling: {smtp_stats["handshakes_avoided"]})\n'
                 f'{"="*60}'
             )
         )
     
+    def _due_contacts(self, queryset, field, now):
+        """
+        Yield contacts whose `field` is due by `now`, in keyset-paginated chunks
+        ordered by (field, id). Contacts rescheduled while processing move past
+        `now`, so they are not picked up again in the same run. Campaign leases are
+        renewed before every chunk and checked again before every contact (a chunk
+        of slow sends may outlast the lease); campaigns whose lease was lost are
+        left alone.
+        """
+        chunk_size = getattr(settings, 'SEQUENCE_SEND_CHUNK_SIZE', 200)
+        due = queryset.filter(**{f'{field}__lte': now}).order_by(field, 'id')
+        last = None
+        while True:
+            page = due
+            if self._lease:
+                page = page.filter(campaign_id__in=self._lease.renew())
+            if last is not None:
+                page = page.filter(Q(**{f'{field}__gt': last[0]}) | Q(**{field: last[0], 'id__gt': last[1]}))
+            page = list(page[:chunk_size])
+            if not page:
+                return
+            last = (getattr(page[-1], field), page[-1].id)
+            for contact in page:
+                if self._lease and not self._lease.hold(contact.campaign_id):
+                    continue
+                yield contact
+    
     def _process_main_sequence_contact(self, contact, campaign, sequences, dry_run):
         """Process a contact in the main sequence. Returns 'sent', 'skipped', or 'stopped'"""
         lead = contact.lead
@@ -612,6 +647,9 @@ class Command(BaseCommand):
             if not dry_run:
                 # Use sub-sequence's email account if set
                 email_account = sub_sequence.email_account
+                if self._is_throttled(email_account, campaign):
+                    self.stdout.write(self.style.WARNING('    [RATE LIMITED] Sending account is at its limit, will retry next run'))
+                    return 'skipped'
                 result = email_service.send_email(
                     template=next_step.template,
                     lead=lead,
@@ -619,6 +657,9 @@ class Command(BaseCommand):
                     email_account=email_account
                 )
                 
+                if result.get('rate_limited'):
+                    self._record_rate_limit(result, email_account, campaign)
+                    return 'skipped'
                 if result.get('success'):
                     # Update sub-sequence state
                     contact.sub_sequence_step = next_step_number
@@ -659,6 +700,24 @@ class Command(BaseCommand):
         
         return 'skipped'
     
+    def _sending_account_id(self, email_account, campaign):
+        account = email_account or email_service.get_default_email_account(campaign.owner_id)
+        return account.pk if account else None
+    
+    def _is_throttled(self, email_account, campaign):
+        """True if this run already hit the sending account's rate limit (skip instead of waiting)"""
+        until = self._throttled_until.get(self._sending_account_id(email_account, campaign))
+        return until is not None and time.monotonic() < until
+    
+    def _record_rate_limit(self, result, email_account, campaign):
+        """Remember an exhausted account so its other contacts are skipped; other accounts keep sending"""
+        retry_after = result.get('retry_after') or 0
+        if result.get('rate_limit_scope') == 'account':
+            self._throttled_until[self._sending_account_id(email_account, campaign)] = time.monotonic() + retry_after
+        self.stdout.write(
+            self.style.WARNING(f'    [RATE LIMITED] {result.get("error")} - moving on to other contacts')
+        )
+    
     def _should_send_email(self, contact, campaign, next_step):
         """Determine if it's time to send the next email in main sequence"""
         from datetime import datetime
@@ -727,6 +786,9 @@ class Command(BaseCommand):
         if not dry_run:
             # Use sequence's email account if set
             email_account = sequence.email_account
+            if self._is_throttled(email_account, campaign):
+                self.stdout.write(self.style.WARNING('    [RATE LIMITED] Sending account is at its limit, will retry next run'))
+                return 'skipped'
             result = email_service.send_email(
                 template=next_step.template,
                 lead=lead,
@@ -734,6 +796,9 @@ class Command(BaseCommand):
                 email_account=email_account
             )
             
+            if result.get('rate_limited'):
+                self._record_rate_limit(result, email_account, campaign)
+                return 'skipped'
             if result.get('success'):
                 # Update contact state
                 contact.advance_step(sent_at=timezone.now())
@@ -8,17 +8,30 @@ This command should be run periodically (e.g., every 5 minutes via Windows Sched
 4. Match replies with sent emails (EmailSendHistory)
 5. Save replies and trigger sub-sequence logic
 
+Sync is incremental: each account stores its INBOX UIDVALIDITY and last synced UID,
+so a run only fetches mail that arrived since the previous one. Accounts are synced
+concurrently (IMAP_SYNC_MAX_WORKERS).
+
 Usage:
     python manage.py sync_inbox
     python manage.py sync_inbox --account-id 1
+    python manage.py sync_inbox --full-scan
 """
 
 import imaplib
 import email
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from email.header import decode_header
+from django.conf import settings
 from django.core.management.base import BaseCommand
+from django.db import connections
 from django.utils import timezone
 from marketing_agent.models import EmailAccount, EmailSendHistory, CampaignContact, Reply, Campaign, Lead
+from marketing_agent.services.reply_index import (
+    lead_contact_index, match_reply, normalize_message_id, recent_sends_by_recipient, recorded_reply_ids,
+    referenced_message_ids, resolve_message_ids,
+)
 from marketing_agent.views import mark_contact_replied
 import logging
 import re
@@ -26,6 +39,9 @@ from datetime import timedelta
 
 logger = logging.getLogger(__name__)
 
+# Headers needed to pick candidates and detect replies without downloading bodies
+REPLY_HEADER_FIELDS = 'FROM SUBJECT DATE MESSAGE-ID IN-REPLY-TO REFERENCES'
+
 
 class Command(BaseCommand):
     help = 'Sync inbox via IMAP and detect email replies automatically'
@@ -41,10 +57,16 @@ class Command(BaseCommand):
             action='store_true',
             help='Run without actually processing replies',
         )
+        parser.add_argument(
+            '--full-scan',
+            action='store_true',
+            help='Ignore stored UID watermarks and re-scan unread mail from the last 7 days',
+        )
 
     def handle(self, *args, **options):
         account_id = options.get('account_id')
         dry_run = options.get('dry_run', False)
+        full_scan = options.get('full_scan', False)
         
         self.stdout.write(self.style.SUCCESS('\n=== Starting IMAP Inbox Sync ===\n'))
         self.stdout.write(f'Current time: {timezone.now()}')
@@ -70,37 +92,44 @@ class Command(BaseCommand):
             self.stdout.write(self.style.WARNING('[WARNING] Please enable IMAP sync in Email Accounts settings.'))
             return
         
-        # Get all active campaign leads (for filtering)
-        active_campaigns = Campaign.objects.filter(status='active')
-        campaign_leads = Lead.objects.filter(
-            campaigns__in=active_campaigns
-        ).distinct()
-        known_lead_emails = set(lead.email.lower() for lead in campaign_leads)
+        # Leads of active campaigns (for filtering), with their contacts: one query for the whole run
+        lead_index = lead_contact_index()
         
-        self.stdout.write(f'Found {len(known_lead_emails)} known lead email(s) from active campaigns')
-        if known_lead_emails:
+        self.stdout.write(f'Found {len(lead_index)} known lead email(s) from active campaigns')
+        if lead_index:
             self.stdout.write(f'   Will only process replies from these leads')
         
         total_replies_found = 0
         total_replies_processed = 0
         
-        # Process each account
+        # Process accounts concurrently (each has its own IMAP connection)
+        syncable = []
         for account in accounts:
-            self.stdout.write(f'\n{"="*60}')
-            self.stdout.write(f'Processing Account: {account.name} ({account.email})')
-            self.stdout.write(f'{"="*60}')
-            
             if not account.imap_host or not account.imap_username or not account.imap_password:
                 self.stdout.write(self.style.WARNING(f'  [WARNING] IMAP settings incomplete for {account.email}. Skipping.'))
                 continue
-            
+            syncable.append(account)
+        
+        def sync_one(account):
             try:
-                replies_found, replies_processed = self.sync_account_inbox(account, dry_run, known_lead_emails)
-                total_replies_found += replies_found
-                total_replies_processed += replies_processed
+                return self.sync_account_inbox(account, dry_run, lead_index, full_scan)
             except Exception as e:
                 self.stdout.write(self.style.ERROR(f'  [ERROR] Error syncing {account.email}: {str(e)}'))
                 logger.error(f'Error syncing account {account.id} ({account.email}): {str(e)}', exc_info=True)
+                return 0, 0
+            finally:
+                if threading.current_thread() is not threading.main_thread():
+                    connections.close_all()
+        
+        max_workers = max(1, min(int(getattr(settings, 'IMAP_SYNC_MAX_WORKERS', 4)), len(syncable) or 1))
+        if max_workers == 1:
+            results = [sync_one(account) for account in syncable]
+        else:
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='imap-sync') as executor:
+                results = list(executor.map(sync_one, syncable))
+        for replies_found, replies_processed in results:
+            total_replies_found += replies_found
+            total_replies_processed += replies_processed
         
         self.stdout.write(f'\n{"="*60}')
         self.stdout.write(self.style.SUCCESS(f'\n[OK] Sync Complete'))
@@ -108,16 +137,20 @@ class Command(BaseCommand):
         self.stdout.write(f'Total replies processed: {total_replies_processed}')
         self.stdout.write(f'{"="*60}\n')
 
-    def sync_account_inbox(self, account, dry_run=False, known_lead_emails=None):
+    def sync_account_inbox(self, account, dry_run=False, lead_index=None, full_scan=False):
         """
         Sync inbox for a single email account
         Only processes emails from known campaign leads (optimized for privacy & performance)
+        
+        Incremental: only UIDs above the account's stored watermark are fetched. The first sync,
+        a UIDVALIDITY change or --full-scan falls back to the unread mail of the last 7 days.
+        Headers are fetched for a whole UID batch in one FETCH; full bodies only for candidates.
         """
         replies_found = 0
         replies_processed = 0
         
-        if known_lead_emails is None:
-            known_lead_emails = set()
+        if lead_index is None:
+            lead_index = {}
         
         try:
             # Connect to IMAP server
@@ -130,169 +163,219 @@ class Command(BaseCommand):
             
             # Login
             mail.login(account.imap_username, account.imap_password)
-            self.stdout.write(f'  Connected to IMAP server: {account.imap_host}:{account.imap_port}')
+            self.stdout.write(f'  [{account.email}] Connected to IMAP server: {account.imap_host}:{account.imap_port}')
             
-            # Select inbox
-            mail.select('INBOX')
+            # Select inbox read-only: bodies are fetched with BODY.PEEK so nothing is marked as read
+            uidvalidity, uidnext = self._inbox_status(mail)
+            mail.select('INBOX', readonly=True)
             
-            # Search for unread emails (last 7 days)
-            since_date = (timezone.now() - timedelta(days=7)).strftime('%d-%b-%Y')
-            status, messages = mail.search(None, f'(UNSEEN SINCE {since_date})')
+            last_uid = account.imap_last_uid
+            incremental = (
+                not full_scan and last_uid is not None
+                and uidvalidity is not None and account.imap_uidvalidity == uidvalidity
+            )
+            if incremental:
+                status, messages = mail.uid('SEARCH', None, f'UID {last_uid + 1}:*')
+            else:
+                # Search for unread emails (last 7 days)
+                since_date = (timezone.now() - timedelta(days=7)).strftime('%d-%b-%Y')
+                status, messages = mail.uid('SEARCH', None, f'(UNSEEN SINCE {since_date})')
             
             if status != 'OK':
-                self.stdout.write(self.style.WARNING(f'   Failed to search inbox'))
+                self.stdout.write(self.style.WARNING(f'   [{account.email}] Failed to search inbox'))
                 mail.logout()
                 return replies_found, replies_processed
             
-            email_ids = messages[0].split()
+            uids = sorted(int(uid) for uid in messages[0].split())
+            if incremental:
+                # "N:*" always matches the newest message, even when its UID is below N
+                uids = [uid for uid in uids if uid > last_uid]
+            
+            # Watermark to store after this run (never move it backwards)
+            new_last_uid = max([last_uid or 0] + uids + ([uidnext - 1] if uidnext and not incremental else []))
             
-            if not email_ids:
-                self.stdout.write(f'  [INFO] No unread emails found')
+            if not uids:
+                self.stdout.write(f'  [{account.email}] [INFO] No new emails found')
                 mail.logout()
+                if not dry_run:
+                    self._save_sync_state(account, uidvalidity, new_last_uid)
                 return replies_found, replies_processed
             
-            self.stdout.write(f'   Found {len(email_ids)} unread email(s)')
+            self.stdout.write(f'   [{account.email}] Found {len(uids)} {"new" if incremental else "unread"} email(s)')
             
             emails_checked = 0
             emails_from_leads = 0
+            replies_already_recorded = 0
+            batch_size = max(1, int(getattr(settings, 'IMAP_SYNC_FETCH_BATCH_SIZE', 200)))
             
-            # Process each email
-            for email_id in email_ids:
-                try:
-                    # Fetch email headers first (lightweight check)
-                    status, msg_data = mail.fetch(email_id, '(BODY.PEEK[HEADER])')
-                    if status != 'OK':
+            for start in range(0, len(uids), batch_size):
+                batch = uids[start:start + batch_size]
+                
+                # One FETCH for the headers of the whole batch
+                headers = self._fetch_messages(mail, batch, f'(UID BODY.PEEK[HEADER.FIELDS ({REPLY_HEADER_FIELDS})])')
+                
+                # Emails we sent that this batch references (one query for all headers)
+                referenced = set()
+                for msg_headers in headers.values():
+                    referenced.update(referenced_message_ids(msg_headers))
+                sent_by_message_id = resolve_message_ids(referenced)
+                
+                # Replies recorded by an earlier run (the inbox is read-only, so re-scans see them again)
+                recorded = recorded_reply_ids(
+                    normalize_message_id(msg_headers.get('Message-ID')) for msg_headers in headers.values()
+                )
+                
+                # Full bodies only for mail from known leads or replying to one of our emails
+                wanted = []
+                for uid in batch:
+                    msg_headers = headers.get(uid)
+                    if msg_headers is None:
                         continue
-                    
-                    header_data = msg_data[0][1]
-                    msg_headers = email.message_from_bytes(header_data)
-                    
-                    # OPTIMIZATION: Check sender email first (before fetching full email)
                     sender_email = self.get_email_address(msg_headers['From'])
                     if not sender_email:
                         continue
-                    
                     emails_checked += 1
-                    
-                    # Skip if not from a known lead (privacy & performance optimization)
-                    if known_lead_emails and sender_email.lower() not in known_lead_emails:
-                        continue  # Skip this email - not from a campaign lead
-                    
-                    emails_from_leads += 1
-                    
-                    # Fetch full email only if it's from a known lead
-                    status, msg_data = mail.fetch(email_id, '(RFC822)')
-                    if status != 'OK':
+                    if normalize_message_id(msg_headers.get('Message-ID')) in recorded:
+                        replies_already_recorded += 1
+                        continue
+                    if not lead_index or sender_email in lead_index or any(
+                            m in sent_by_message_id for m in referenced_message_ids(msg_headers)):
+                        wanted.append(uid)
+                emails_from_leads += len(wanted)
+                bodies = self._fetch_messages(mail, wanted, '(UID BODY.PEEK[])') if wanted else {}
+                
+                # Subject fallback candidates ("Re: ..." not matched by headers): one query per batch
+                fallback_senders = set()
+                for uid in wanted:
+                    msg_headers = headers[uid]
+                    if (self.decode_header(msg_headers.get('Subject', '')).lower().startswith('re:')
+                            and match_reply(msg_headers, '', None, sent_by_message_id)[0] is None):
+                        fallback_senders.add(self.get_email_address(msg_headers['From']))
+                recent_by_recipient = recent_sends_by_recipient(fallback_senders)
+                
+                for uid in wanted:
+                    msg = bodies.get(uid)
+                    if msg is None:
                         continue
-                    
-                    email_body = msg_data[0][1]
-                    msg = email.message_from_bytes(email_body)
-                    
-                    # Check if this is a reply
-                    is_reply, sent_email = self.detect_reply(msg, account)
-                    
-                    if is_reply and sent_email:
-                        replies_found += 1
-                        self.stdout.write(f'\n  [REPLY] Reply detected!')
-                        self.stdout.write(f'     From: {sender_email}')
-                        self.stdout.write(f'     Subject: {self.decode_header(msg["Subject"])}')
-                        self.stdout.write(f'     Original Email: {sent_email.subject} (ID: {sent_email.id})')
+                    try:
+                        sender_email = self.get_email_address(msg['From'])
+                        
+                        # Check if this is a reply
+                        is_reply, sent_email = self.detect_reply(
+                            msg, account, sent_by_message_id, recent_by_recipient
+                        )
                         
-                        if not dry_run:
-                            # Process reply
-                            success = self.process_reply(msg, sent_email, account)
-                            if success:
-                                replies_processed += 1
-                                self.stdout.write(f'     [OK] Reply processed successfully')
-                                # Mark email as read (optional - comment out if you want to keep unread)
-                                # mail.store(email_id, '+FLAGS', '\\Seen')
+                        if is_reply and sent_email:
+                            replies_found += 1
+                            self.stdout.write(f'\n  [REPLY] Reply detected! ({account.email})')
+                            self.stdout.write(f'     From: {sender_email}')
+                            self.stdout.write(f'     Subject: {self.decode_header(msg["Subject"])}')
+                            self.stdout.write(f'     Original Email: {sent_email.subject} (ID: {sent_email.id})')
+                            
+                            if not dry_run:
+                                # Process reply
+                                success = self.process_reply(msg, sent_email, account, lead_index)
+                                if success:
+                                    replies_processed += 1
+                                    self.stdout.write(f'     [OK] Reply processed successfully')
+                                else:
+                                    self.stdout.write(f'     [ERROR] Failed to process reply')
                             else:
-                                self.stdout.write(f'     [ERROR] Failed to process reply')
+                                self.stdout.write(f'     [SKIP] Skipped (dry run)')
                         else:
-                            self.stdout.write(f'     [SKIP] Skipped (dry run)')
-                    else:
-                        # Email from lead but not a reply to campaign email
-                        logger.debug(f'Email from lead {sender_email} is not a reply to campaign email')
-                    
-                except Exception as e:
-                    self.stdout.write(self.style.ERROR(f'  [ERROR] Error processing email {email_id.decode()}: {str(e)}'))
-                    logger.error(f'Error processing email {email_id.decode()}: {str(e)}', exc_info=True)
-                    continue
+                            # Email from lead but not a reply to campaign email
+                            logger.debug(f'Email from lead {sender_email} is not a reply to campaign email')
+                        
+                    except Exception as e:
+                        self.stdout.write(self.style.ERROR(f'  [ERROR] Error processing email UID {uid}: {str(e)}'))
+                        logger.error(f'Error processing email UID {uid}: {str(e)}', exc_info=True)
+                        continue
+                
+                # Persist progress per batch so a failure later on doesn't re-scan this batch
+                if not dry_run:
+                    self._save_sync_state(account, uidvalidity, max(batch[-1], last_uid or 0))
+            
+            if not dry_run:
+                self._save_sync_state(account, uidvalidity, new_last_uid)
             
             # Logout
             mail.logout()
             self.stdout.write(f'\n  [OK] Finished processing account: {account.email}')
             self.stdout.write(f'     Checked: {emails_checked} email(s), From leads: {emails_from_leads} email(s)')
+            if replies_already_recorded:
+                self.stdout.write(f'     Skipped: {replies_already_recorded} reply(ies) already recorded')
             
         except imaplib.IMAP4.error as e:
-            self.stdout.write(self.style.ERROR(f'  [ERROR] IMAP error: {str(e)}'))
+            self.stdout.write(self.style.ERROR(f'  [ERROR] IMAP error ({account.email}): {str(e)}'))
             logger.error(f'IMAP error for account {account.id}: {str(e)}', exc_info=True)
         except Exception as e:
-            self.stdout.write(self.style.ERROR(f'  [ERROR] Error: {str(e)}'))
+            self.stdout.write(self.style.ERROR(f'  [ERROR] Error ({account.email}): {str(e)}'))
             logger.error(f'Error syncing account {account.id}: {str(e)}', exc_info=True)
         
         return replies_found, replies_processed
 
-    def detect_reply(self, msg, account):
+    def _inbox_status(self, mail):
+        """Return (UIDVALIDITY, UIDNEXT) of INBOX, or None for values the server didn't report"""
+        status, data = mail.status('INBOX', '(UIDVALIDITY UIDNEXT)')
+        if status != 'OK' or not data or not data[0]:
+            return None, None
+        text = data[0].decode(errors='ignore') if isinstance(data[0], bytes) else str(data[0])
+        uidvalidity = re.search(r'UIDVALIDITY (\d+)', text)
+        uidnext = re.search(r'UIDNEXT (\d+)', text)
+        return (int(uidvalidity.group(1)) if uidvalidity else None,
+                int(uidnext.group(1)) if uidnext else None)
+
+    def _fetch_messages(self, mail, uids, query):
+        """UID FETCH a set of messages in one round trip. Returns {uid: email.message.Message}"""
+        status, data = mail.uid('FETCH', ','.join(str(uid) for uid in uids), query)
+        if status != 'OK':
+            return {}
+        messages = {}
+        for part in data:
+            if not isinstance(part, tuple) or len(part) < 2:
+                continue
+            match = re.search(rb'UID (\d+)', part[0])
+            if match:
+                messages[int(match.group(1))] = email.message_from_bytes(part[1])
+        return messages
+
+    def _save_sync_state(self, account, uidvalidity, last_uid):
+        EmailAccount.objects.filter(pk=account.pk).update(
+            imap_uidvalidity=uidvalidity,
+            imap_last_uid=last_uid,
+            imap_last_synced_at=timezone.now(),
+        )
+        account.imap_uidvalidity = uidvalidity
+        account.imap_last_uid = last_uid
+
+    def detect_reply(self, msg, account, sent_by_message_id=None, recent_by_recipient=None):
         """
         Detect if email is a reply using professional method:
         1. Check In-Reply-To header (PRIMARY)
         2. Check References header (SECONDARY)
         3. Fallback: Check Subject for "Re:" (optional safety)
+        
+        sent_by_message_id / recent_by_recipient are the batch maps from services.reply_index;
+        when omitted they are built for this message alone.
         """
-        in_reply_to = msg.get('In-Reply-To', '').strip()
-        references = msg.get('References', '').strip()
         subject = self.decode_header(msg.get('Subject', ''))
+        sender_email = self.get_email_address(msg['From'])
         
-        # PRIMARY: Check In-Reply-To header
-        if in_reply_to:
-            # Remove < > brackets
-            message_id = in_reply_to.strip('<>')
-            sent_email = EmailSendHistory.objects.filter(
-                message_id=message_id
-            ).first()
-            
-            if sent_email:
-                logger.info(f'Reply detected via In-Reply-To header: {message_id}')
-                return True, sent_email
-        
-        # SECONDARY: Check References header
-        if references:
-            # References can contain multiple Message-IDs (space-separated)
-            ref_message_ids = re.findall(r'<([^>]+)>', references)
-            for message_id in ref_message_ids:
-                sent_email = EmailSendHistory.objects.filter(
-                    message_id=message_id
-                ).first()
-                
-                if sent_email:
-                    logger.info(f'Reply detected via References header: {message_id}')
-                    return True, sent_email
+        if sent_by_message_id is None:
+            sent_by_message_id = resolve_message_ids(referenced_message_ids(msg))
+        sent_email, method = match_reply(msg, subject, sender_email, sent_by_message_id)
+        if sent_email is None and subject.lower().startswith('re:') and sender_email:
+            if recent_by_recipient is None:
+                recent_by_recipient = recent_sends_by_recipient([sender_email])
+            sent_email, method = match_reply(msg, subject, sender_email, {}, recent_by_recipient)
         
-        # FALLBACK: Check Subject for "Re:" (optional safety)
-        if subject and subject.lower().startswith('re:'):
-            # Try to match by subject and sender
-            sender_email = self.get_email_address(msg['From'])
-            if sender_email:
-                # Get recent sent emails (last 14 days) to this sender
-                fourteen_days_ago = timezone.now() - timedelta(days=14)
-                subject_without_re = re.sub(r'^(re:|fw:|fwd:)\s*', '', subject, flags=re.IGNORECASE).strip()
-                
-                sent_emails = EmailSendHistory.objects.filter(
-                    recipient_email=sender_email,
-                    sent_at__gte=fourteen_days_ago,
-                    status__in=['sent', 'delivered', 'opened', 'clicked']
-                ).order_by('-sent_at')[:10]
-                
-                for sent_email in sent_emails:
-                    sent_subject = re.sub(r'^(re:|fw:|fwd:)\s*', '', sent_email.subject, flags=re.IGNORECASE).strip()
-                    if sent_subject.lower() == subject_without_re.lower():
-                        logger.info(f'Reply detected via Subject fallback: {subject}')
-                        return True, sent_email
+        if sent_email:
+            logger.info(f'Reply detected via {method}: {subject}')
+            return True, sent_email
         
         return False, None
 
-    def process_reply(self, msg, sent_email, account):
+    def process_reply(self, msg, sent_email, account, lead_index=None):
         """
         Process a detected reply:
         1. Extract reply content
@@ -309,11 +392,12 @@ class Command(BaseCommand):
             campaign = sent_email.campaign
             lead = sent_email.lead
             
-            # Get or create CampaignContact
-            contact = CampaignContact.objects.filter(
+            # Check the CampaignContact exists (from the run's lead index when available)
+            contact_id = (lead_index or {}).get((lead.email or '').lower(), {}).get(campaign.id)
+            contact = contact_id or CampaignContact.objects.filter(
                 campaign=campaign,
                 lead=lead
-            ).first()
+            ).values_list('id', flat=True).first()
             
             if not contact:
                 logger.warning(f'CampaignContact not found for campaign {campaign.id}, lead {lead.id}')
@@ -347,7 +431,8 @@ class Command(BaseCommand):
                 lead=lead,
                 reply_subject=reply_subject,
                 reply_content=reply_content,
-                reply_date=reply_date
+                reply_date=reply_date,
+                message_id=normalize_message_id(msg.get('Message-ID')),
             )
             
             if result.get('success'):
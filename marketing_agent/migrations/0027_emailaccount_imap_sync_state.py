@@ -0,0 +1,26 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketing_agent', '0026_rename_marketing_a_campaig_c04f71_idx_ppp_marketi_campaig_2b624b_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emailaccount',
+            name='imap_uidvalidity',
+            field=models.BigIntegerField(blank=True, help_text='INBOX UIDVALIDITY at last sync (UIDs reset when it changes)', null=True),
+        ),
+        migrations.AddField(
+            model_name='emailaccount',
+            name='imap_last_uid',
+            field=models.BigIntegerField(blank=True, help_text='Highest INBOX UID already synced', null=True),
+        ),
+        migrations.AddField(
+            model_name='emailaccount',
+            name='imap_last_synced_at',
+            field=models.DateTimeField(blank=True, help_text='Last successful IMAP sync', null=True),
+        ),
+    ]
@@ -0,0 +1,30 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketing_agent', '0027_emailaccount_imap_sync_state'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailTrackingEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.CharField(choices=[('open', 'Open'), ('click', 'Click')], max_length=10)),
+                ('url', models.TextField(blank=True, help_text='Clicked URL (click events only)')),
+                ('user_agent', models.CharField(blank=True, max_length=500)),
+                ('ip_address', models.GenericIPAddressField(blank=True, null=True)),
+                ('occurred_at', models.DateTimeField(help_text='When the pixel/link was hit (not when the event was stored)')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('send_history', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tracking_events', to='marketing_agent.emailsendhistory')),
+            ],
+            options={
+                'db_table': 'ppp_marketingagent_emailtrackingevent',
+                'ordering': ['-occurred_at'],
+                'indexes': [models.Index(fields=['send_history', 'event_type'], name='ppp_marketi_send_hi_eba2d0_idx'), models.Index(fields=['event_type', '-occurred_at'], name='ppp_marketi_event_t_dbba71_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,64 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketing_agent', '0028_emailtrackingevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CampaignMetrics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_sent', models.PositiveIntegerField(default=0, help_text='All EmailSendHistory rows (any status)')),
+                ('delivered', models.PositiveIntegerField(default=0, help_text='Status delivered, opened or clicked')),
+                ('opened', models.PositiveIntegerField(default=0, help_text='Status opened or clicked')),
+                ('clicked', models.PositiveIntegerField(default=0)),
+                ('bounced', models.PositiveIntegerField(default=0)),
+                ('failed', models.PositiveIntegerField(default=0)),
+                ('replies', models.PositiveIntegerField(default=0)),
+                ('positive_replies', models.PositiveIntegerField(default=0)),
+                ('first_sent_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('refreshed_through', models.DateTimeField(blank=True, db_index=True, help_text='Source changes up to this time are included', null=True)),
+                ('campaign', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='metrics_rollup', to='marketing_agent.campaign')),
+            ],
+            options={
+                'db_table': 'ppp_marketingagent_campaignmetrics',
+            },
+        ),
+        migrations.CreateModel(
+            name='CampaignDailyMetrics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_sent', models.PositiveIntegerField(default=0, help_text='All EmailSendHistory rows (any status)')),
+                ('delivered', models.PositiveIntegerField(default=0, help_text='Status delivered, opened or clicked')),
+                ('opened', models.PositiveIntegerField(default=0, help_text='Status opened or clicked')),
+                ('clicked', models.PositiveIntegerField(default=0)),
+                ('bounced', models.PositiveIntegerField(default=0)),
+                ('failed', models.PositiveIntegerField(default=0)),
+                ('replies', models.PositiveIntegerField(default=0)),
+                ('positive_replies', models.PositiveIntegerField(default=0)),
+                ('first_sent_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('date', models.DateField()),
+                ('campaign', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_metrics', to='marketing_agent.campaign')),
+            ],
+            options={
+                'db_table': 'ppp_marketingagent_campaigndailymetrics',
+                'ordering': ['-date'],
+                'unique_together': {('campaign', 'date')},
+            },
+        ),
+        migrations.AddIndex(
+            model_name='emailsendhistory',
+            index=models.Index(fields=['updated_at'], name='ppp_marketi_updated_be402e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reply',
+            index=models.Index(fields=['updated_at'], name='ppp_marketi_updated_c7964d_idx'),
+        ),
+    ]
@@ -0,0 +1,92 @@
+from datetime import timedelta
+
+from django.db import migrations, models
+
+
+BACKFILL_BATCH_SIZE = 1000
+IMMEDIATE_DELAY = timedelta(minutes=1)
+
+
+def _next_step_due(steps, current_step, reference, last_sent_at, now):
+    # Timing rules of send_sequence_emails as of this migration (kept here so later
+    # changes to marketing_agent.services.sequence_schedule can't alter the backfill)
+    if not steps:
+        return None
+    next_number = current_step + 1
+    if next_number > len(steps):
+        return now
+    step = next((s for s in steps if s.step_order == next_number), None)
+    if step is None:
+        return None
+    delay = timedelta(days=step.delay_days, hours=step.delay_hours, minutes=step.delay_minutes)
+    if current_step == 0:
+        return reference if delay <= IMMEDIATE_DELAY else reference + delay
+    if not last_sent_at:
+        return now
+    return last_sent_at + delay
+
+
+def _ordered_steps(sequence):
+    if sequence is None:
+        return []
+    return sorted(sequence.steps.all(), key=lambda step: step.step_order)
+
+
+def backfill_send_schedule(apps, schema_editor):
+    from django.utils import timezone
+
+    CampaignContact = apps.get_model('marketing_agent', 'CampaignContact')
+    contacts = CampaignContact.objects.filter(
+        models.Q(completed=False, replied=False, sequence__isnull=False)
+        | models.Q(replied=True, sub_sequence__isnull=False, sub_sequence_completed=False)
+    ).prefetch_related('sequence__steps', 'sub_sequence__steps')
+    now = timezone.now()
+    last_id = 0
+    while True:
+        page = list(contacts.filter(id__gt=last_id).order_by('id')[:BACKFILL_BATCH_SIZE])
+        if not page:
+            break
+        last_id = page[-1].id
+        for contact in page:
+            contact.next_send_at = None
+            contact.sub_sequence_next_send_at = None
+            if not contact.completed and not contact.replied and contact.sequence_id is not None:
+                contact.next_send_at = _next_step_due(
+                    _ordered_steps(contact.sequence), contact.current_step,
+                    contact.started_at or contact.created_at or now, contact.last_sent_at, now,
+                )
+            if contact.replied and contact.sub_sequence_id is not None and not contact.sub_sequence_completed:
+                contact.sub_sequence_next_send_at = _next_step_due(
+                    _ordered_steps(contact.sub_sequence), contact.sub_sequence_step,
+                    contact.replied_at or now, contact.sub_sequence_last_sent_at, now,
+                )
+        CampaignContact.objects.bulk_update(page, ['next_send_at', 'sub_sequence_next_send_at'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketing_agent', '0029_campaign_metrics_rollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='campaigncontact',
+            name='next_send_at',
+            field=models.DateTimeField(blank=True, help_text='When the next main sequence step is due (empty = nothing to send)', null=True),
+        ),
+        migrations.AddField(
+            model_name='campaigncontact',
+            name='sub_sequence_next_send_at',
+            field=models.DateTimeField(blank=True, help_text='When the next sub-sequence step is due (empty = nothing to send)', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='campaigncontact',
+            index=models.Index(fields=['next_send_at', 'id'], name='ppp_marketi_next_se_bf38ef_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='campaigncontact',
+            index=models.Index(fields=['sub_sequence_next_send_at', 'id'], name='ppp_marketi_sub_seq_192acd_idx'),
+        ),
+        migrations.RunPython(backfill_send_schedule, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketing_agent', '0030_campaigncontact_next_send_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='campaign',
+            name='send_lease_token',
+            field=models.CharField(blank=True, db_index=True, default='', help_text="Run currently sending this campaign's sequence emails", max_length=32),
+        ),
+        migrations.AddField(
+            model_name='campaign',
+            name='send_lease_expires_at',
+            field=models.DateTimeField(blank=True, help_text='When the send lease lapses', null=True),
+        ),
+    ]
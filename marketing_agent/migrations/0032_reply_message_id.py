@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketing_agent', '0031_campaign_send_lease'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reply',
+            name='message_id',
+            field=models.CharField(blank=True, db_index=True, default='', help_text='Message-ID header of the reply email (skips replies already recorded on re-sync)', max_length=500),
+        ),
+    ]
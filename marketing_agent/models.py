@@ -94,6 +94,12 @@ class Campaign(models.Model):
     leads = models.ManyToManyField('Lead', blank=True, related_name='campaigns', through='CampaignLead')
     
     owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='marketing_campaigns')
+    
+    # Sequence sender lease (see services/send_lease.py) - one worker sends a campaign at a time
+    send_lease_token = models.CharField(max_length=32, blank=True, default='', db_index=True,
+                                        help_text='Run currently sending this campaign\'s sequence emails')
+    send_lease_expires_at = models.DateTimeField(null=True, blank=True, help_text='When the send lease lapses')
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -513,12 +519,102 @@ class EmailSendHistory(models.Model):
         indexes = [
             models.Index(fields=['campaign', 'status']),
             models.Index(fields=['lead', 'campaign']),
+            models.Index(fields=['updated_at']),
         ]
     
     def __str__(self):
         return f"{self.subject} to {self.recipient_email} ({self.status})"
 
 
+class EmailTrackingEvent(models.Model):
+    """Raw open/click events from tracking pixels and links (one row per hit, for analytics)"""
+    EVENT_CHOICES = [
+        ('open', 'Open'),
+        ('click', 'Click'),
+    ]
+    
+    send_history = models.ForeignKey(EmailSendHistory, on_delete=models.CASCADE, related_name='tracking_events')
+    event_type = models.CharField(max_length=10, choices=EVENT_CHOICES)
+    url = models.TextField(blank=True, help_text='Clicked URL (click events only)')
+    user_agent = models.CharField(max_length=500, blank=True)
+    ip_address = models.GenericIPAddressField(null=True, blank=True)
+    occurred_at = models.DateTimeField(help_text='When the pixel/link was hit (not when the event was stored)')
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'ppp_marketingagent_emailtrackingevent'
+        ordering = ['-occurred_at']
+        indexes = [
+            models.Index(fields=['send_history', 'event_type']),
+            models.Index(fields=['event_type', '-occurred_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.event_type} on {self.send_history_id} at {self.occurred_at}"
+
+
+class CampaignMetricsCounters(models.Model):
+    """Email/reply counters shared by the campaign metrics rollup tables"""
+    total_sent = models.PositiveIntegerField(default=0, help_text='All EmailSendHistory rows (any status)')
+    delivered = models.PositiveIntegerField(default=0, help_text='Status delivered, opened or clicked')
+    opened = models.PositiveIntegerField(default=0, help_text='Status opened or clicked')
+    clicked = models.PositiveIntegerField(default=0)
+    bounced = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    replies = models.PositiveIntegerField(default=0)
+    positive_replies = models.PositiveIntegerField(default=0)
+    first_sent_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    COUNTER_FIELDS = ['total_sent', 'delivered', 'opened', 'clicked', 'bounced', 'failed',
+                      'replies', 'positive_replies']
+    
+    class Meta:
+        abstract = True
+    
+    def rate(self, count):
+        """Percentage of total_sent (0 when nothing was sent)"""
+        return (count / self.total_sent * 100) if self.total_sent > 0 else 0
+    
+    @property
+    def open_rate(self):
+        return self.rate(self.opened)
+    
+    @property
+    def click_rate(self):
+        return self.rate(self.clicked)
+
+
+class CampaignMetrics(CampaignMetricsCounters):
+    """
+    Running totals per campaign, maintained incrementally by
+    services.campaign_metrics.refresh_campaign_metrics (sum of CampaignDailyMetrics)
+    """
+    campaign = models.OneToOneField(Campaign, on_delete=models.CASCADE, related_name='metrics_rollup')
+    refreshed_through = models.DateTimeField(null=True, blank=True, db_index=True,
+                                             help_text='Source changes up to this time are included')
+    
+    class Meta:
+        db_table = 'ppp_marketingagent_campaignmetrics'
+    
+    def __str__(self):
+        return f"Metrics for {self.campaign_id}: {self.total_sent} sent"
+
+
+class CampaignDailyMetrics(CampaignMetricsCounters):
+    """Per-day counters for a campaign (emails by send date, replies by reply date)"""
+    campaign = models.ForeignKey(Campaign, on_delete=models.CASCADE, related_name='daily_metrics')
+    date = models.DateField()
+    
+    class Meta:
+        db_table = 'ppp_marketingagent_campaigndailymetrics'
+        ordering = ['-date']
+        unique_together = [('campaign', 'date')]
+    
+    def __str__(self):
+        return f"Metrics for {self.campaign_id} on {self.date}: {self.total_sent} sent"
+
+
 class EmailAccount(models.Model):
     """Email Account Configuration for Sending Campaign Emails"""
     ACCOUNT_TYPE_CHOICES = [
@@ -551,6 +647,10 @@ class EmailAccount(models.Model):
     imap_username = models.CharField(max_length=255, blank=True, help_text='IMAP username (usually same as email)')
     imap_password = models.CharField(max_length=500, blank=True, help_text='IMAP password')
     enable_imap_sync = models.BooleanField(default=False, help_text='Enable automatic IMAP sync for reply detection')
+    # IMAP incremental sync watermark (sync_inbox only fetches UIDs above imap_last_uid)
+    imap_uidvalidity = models.BigIntegerField(null=True, blank=True, help_text='INBOX UIDVALIDITY at last sync (UIDs reset when it changes)')
+    imap_last_uid = models.BigIntegerField(null=True, blank=True, help_text='Highest INBOX UID already synced')
+    imap_last_synced_at = models.DateTimeField(null=True, blank=True, help_text='Last successful IMAP sync')
     
     # Status
     is_active = models.BooleanField(default=True, help_text='Is this account active and ready to use?')
@@ -631,6 +731,12 @@ class CampaignContact(models.Model):
     started_at = models.DateTimeField(null=True, blank=True, help_text='When sequence started for this contact')
     completed_at = models.DateTimeField(null=True, blank=True, help_text='When sequence completed')
     
+    # Materialized schedule (maintained by save(), see services/sequence_schedule.py)
+    next_send_at = models.DateTimeField(null=True, blank=True,
+                                        help_text='When the next main sequence step is due (empty = nothing to send)')
+    sub_sequence_next_send_at = models.DateTimeField(null=True, blank=True,
+                                                     help_text='When the next sub-sequence step is due (empty = nothing to send)')
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -644,12 +750,29 @@ class CampaignContact(models.Model):
             models.Index(fields=['campaign', 'sub_sequence', 'sub_sequence_step']),
             models.Index(fields=['last_sent_at']),
             models.Index(fields=['sub_sequence_last_sent_at']),
+            # send_sequence_emails: due contacts, keyset-paginated by (send time, id)
+            models.Index(fields=['next_send_at', 'id']),
+            models.Index(fields=['sub_sequence_next_send_at', 'id']),
         ]
     
     def __str__(self):
         status = 'Completed' if self.completed else ('Replied' if self.replied else f'Step {self.current_step}')
         return f"{self.lead.email} - {self.campaign.name} ({status})"
     
+    def save(self, *args, **kwargs):
+        """Override save to keep next_send_at / sub_sequence_next_send_at in step with the contact's state"""
+        self.refresh_schedule()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | {'next_send_at', 'sub_sequence_next_send_at'}
+        super().save(*args, **kwargs)
+    
+    def refresh_schedule(self, now=None):
+        """Recompute when the next main and sub-sequence steps are due"""
+        from marketing_agent.services.sequence_schedule import next_main_send_at, next_sub_send_at
+        self.next_send_at = next_main_send_at(self, now=now)
+        self.sub_sequence_next_send_at = next_sub_send_at(self, now=now)
+    
     def mark_replied(self, reply_subject='', reply_content='', reply_at=None, interest_level='not_analyzed', analysis='', sub_sequence=None):
         """
         Mark this contact as having replied - stops main sequence automation and starts sub-sequence if available
@@ -794,6 +917,8 @@ class Reply(models.Model):
     reply_subject = models.CharField(max_length=500, blank=True)
     reply_content = models.TextField(blank=True)
     replied_at = models.DateTimeField(default=timezone.now)
+    message_id = models.CharField(max_length=500, blank=True, default='', db_index=True,
+                                  help_text='Message-ID header of the reply email (skips replies already recorded on re-sync)')
     
     # AI Analysis
     interest_level = models.CharField(max_length=20, choices=INTEREST_LEVEL_CHOICES, default='not_analyzed')
@@ -816,6 +941,7 @@ class Reply(models.Model):
             models.Index(fields=['lead', '-replied_at']),
             models.Index(fields=['sequence', '-replied_at']),
             models.Index(fields=['campaign', 'sequence', '-replied_at']),
+            models.Index(fields=['updated_at']),
         ]
     
     def __str__(self):
@@ -848,18 +974,11 @@ def create_campaign_contact(sender, instance, action, pk_set, **kwargs):
     """Automatically create CampaignContact when leads are added to a campaign"""
     if action == 'post_add':
         active_sequences = list(instance.email_sequences.filter(is_active=True))
-        if not active_sequences:
+        if not active_sequences or not pk_set:
             return
 
-        for lead_id in pk_set:
-            lead = Lead.objects.get(pk=lead_id)
-            for seq in active_sequences:
-                CampaignContact.objects.get_or_create(
-                    campaign=instance,
-                    lead=lead,
-                    sequence=seq,
-                    defaults={'current_step': 0},
-                )
+        from marketing_agent.services.contact_provisioning import provision_campaign_contacts
+        provision_campaign_contacts(instance, active_sequences, lead_ids=pk_set)
 
 
 @receiver(pre_save, sender=Campaign)
@@ -0,0 +1,204 @@
+"""
+Campaign Metrics Rollup
+Keeps CampaignDailyMetrics (per campaign per day) and CampaignMetrics (per
+campaign totals) up to date so monitoring reads one row per campaign instead
+of counting every EmailSendHistory/Reply row on each run.
+
+refresh_campaign_metrics() is incremental: it only re-aggregates the
+(campaign, day) buckets that contain EmailSendHistory or Reply rows changed
+since the last refresh (by their indexed updated_at), then re-sums the
+totals of the affected campaigns. Its cost follows the volume of new
+activity, not the number of emails ever sent. Buckets are recomputed rather
+than adjusted by deltas, so a refresh can be repeated safely and status
+changes made through bulk_update are picked up as well.
+"""
+import logging
+from datetime import timedelta
+from typing import Dict, Iterable, Optional
+
+from django.db import transaction
+from django.db.models import Count, Max, Min, Q, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from marketing_agent.models import (
+    CampaignDailyMetrics, CampaignMetrics, CampaignMetricsCounters, EmailSendHistory, Reply,
+)
+
+logger = logging.getLogger(__name__)
+
+# Re-scan this much before the watermark: rows saved in transactions that committed late
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+COUNTERS = CampaignMetricsCounters.COUNTER_FIELDS
+
+SEND_COUNTS = {
+    'total_sent': Count('id'),
+    'delivered': Count('id', filter=Q(status__in=['delivered', 'opened', 'clicked'])),
+    'opened': Count('id', filter=Q(status__in=['opened', 'clicked'])),
+    'clicked': Count('id', filter=Q(status='clicked')),
+    'bounced': Count('id', filter=Q(status='bounced')),
+    'failed': Count('id', filter=Q(status='failed')),
+    'first_sent_at': Min('sent_at'),
+}
+REPLY_COUNTS = {
+    'replies': Count('id'),
+    'positive_replies': Count('id', filter=Q(interest_level='positive')),
+}
+
+
+def _send_day():
+    # Emails count on the day they were sent (creation day while still pending/failed)
+    return TruncDate(Coalesce('sent_at', 'created_at'))
+
+
+def _empty_bucket() -> Dict:
+    bucket = {field: 0 for field in COUNTERS}
+    bucket['first_sent_at'] = None
+    return bucket
+
+
+def refresh_campaign_metrics(campaign_ids: Optional[Iterable[int]] = None, full: bool = False) -> int:
+    """
+    Fold EmailSendHistory/Reply changes since the last refresh into the rollup tables.
+
+    Args:
+        campaign_ids: Limit the refresh to these campaigns (does not advance the global watermark)
+        full: Rebuild the buckets from scratch instead of using the watermark
+
+    Returns:
+        int: Number of campaigns whose totals were recomputed
+    """
+    started = timezone.now()
+    scoped = campaign_ids is not None
+    sends = EmailSendHistory.objects.order_by()
+    replies = Reply.objects.order_by()
+    if scoped:
+        campaign_ids = list(campaign_ids)
+        sends = sends.filter(campaign_id__in=campaign_ids)
+        replies = replies.filter(campaign_id__in=campaign_ids)
+
+    watermark = None
+    if not full:
+        watermark = CampaignMetrics.objects.aggregate(last=Max('refreshed_through'))['last']
+
+    sends = sends.annotate(day=_send_day())
+    replies = replies.annotate(day=TruncDate('replied_at'))
+
+    if watermark is None:
+        touched = None  # every bucket in scope
+    else:
+        since = watermark - WATERMARK_OVERLAP
+        touched = set(sends.filter(updated_at__gt=since).values_list('campaign_id', 'day').distinct())
+        touched |= set(replies.filter(updated_at__gt=since).values_list('campaign_id', 'day').distinct())
+        if not touched:
+            return 0
+        touched_campaigns = {campaign_id for campaign_id, _ in touched}
+        touched_days = {day for _, day in touched}
+        sends = sends.filter(campaign_id__in=touched_campaigns, day__in=touched_days)
+        replies = replies.filter(campaign_id__in=touched_campaigns, day__in=touched_days)
+
+    buckets: Dict[tuple, Dict] = {key: _empty_bucket() for key in (touched or ())}
+    for row in sends.values('campaign_id', 'day').annotate(**SEND_COUNTS):
+        bucket = buckets.setdefault((row['campaign_id'], row['day']), _empty_bucket())
+        bucket.update({field: row[field] for field in SEND_COUNTS})
+    for row in replies.values('campaign_id', 'day').annotate(**REPLY_COUNTS):
+        bucket = buckets.setdefault((row['campaign_id'], row['day']), _empty_bucket())
+        bucket.update({field: row[field] for field in REPLY_COUNTS})
+    campaigns = {campaign_id for campaign_id, _ in buckets}
+    if touched is None:
+        # Full rebuild also resets campaigns whose rows are all gone
+        campaigns |= set(campaign_ids) if scoped else set(
+            CampaignMetrics.objects.values_list('campaign_id', flat=True)
+        ) | set(CampaignDailyMetrics.objects.values_list('campaign_id', flat=True).distinct())
+
+    with transaction.atomic():
+        _store_daily(buckets, rebuild_campaigns=campaigns if touched is None else None)
+        _store_totals(campaigns, refreshed_through=None if scoped else started)
+
+    logger.info(f'Campaign metrics refreshed for {len(campaigns)} campaign(s), {len(buckets)} day bucket(s)')
+    return len(campaigns)
+
+
+def _store_daily(buckets: Dict[tuple, Dict], rebuild_campaigns=None) -> None:
+    if rebuild_campaigns is not None:
+        # Full rebuild: start these campaigns from an empty table
+        CampaignDailyMetrics.objects.filter(campaign_id__in=rebuild_campaigns).delete()
+    existing = {
+        (row.campaign_id, row.date): row
+        for row in CampaignDailyMetrics.objects.filter(
+            campaign_id__in={campaign_id for campaign_id, _ in buckets},
+            date__in={day for _, day in buckets},
+        )
+    }
+    to_create, to_update, to_delete = [], [], []
+    now = timezone.now()
+    for (campaign_id, day), values in buckets.items():
+        row = existing.get((campaign_id, day))
+        if not any(values[field] for field in COUNTERS):
+            if row is not None:
+                to_delete.append(row.pk)
+            continue
+        if row is None:
+            to_create.append(CampaignDailyMetrics(campaign_id=campaign_id, date=day, **values))
+        else:
+            for field, value in values.items():
+                setattr(row, field, value)
+            row.updated_at = now
+            to_update.append(row)
+    if to_delete:
+        CampaignDailyMetrics.objects.filter(pk__in=to_delete).delete()
+    if to_create:
+        CampaignDailyMetrics.objects.bulk_create(to_create, batch_size=1000)
+    if to_update:
+        CampaignDailyMetrics.objects.bulk_update(
+            to_update, COUNTERS + ['first_sent_at', 'updated_at'], batch_size=1000
+        )
+
+
+def _store_totals(campaign_ids, refreshed_through=None) -> None:
+    if not campaign_ids:
+        return
+    # Annotation names can't shadow model fields, hence the sum_ prefix
+    totals = {
+        row['campaign_id']: row
+        for row in CampaignDailyMetrics.objects.filter(campaign_id__in=campaign_ids).order_by().values(
+            'campaign_id'
+        ).annotate(sum_first_sent_at=Min('first_sent_at'), **{f'sum_{field}': Sum(field) for field in COUNTERS})
+    }
+    existing = {row.campaign_id: row for row in CampaignMetrics.objects.filter(campaign_id__in=campaign_ids)}
+    to_create, to_update = [], []
+    now = timezone.now()
+    for campaign_id in campaign_ids:
+        values = totals.get(campaign_id) or {}
+        row = existing.get(campaign_id)
+        if row is None:
+            row = CampaignMetrics(campaign_id=campaign_id)
+            to_create.append(row)
+        else:
+            to_update.append(row)
+        for field in COUNTERS:
+            setattr(row, field, values.get(f'sum_{field}') or 0)
+        row.first_sent_at = values.get('sum_first_sent_at')
+        row.updated_at = now
+        if refreshed_through is not None:
+            row.refreshed_through = refreshed_through
+    if to_create:
+        CampaignMetrics.objects.bulk_create(to_create, batch_size=1000)
+    if to_update:
+        fields = COUNTERS + ['first_sent_at', 'updated_at']
+        if refreshed_through is not None:
+            fields.append('refreshed_through')
+        CampaignMetrics.objects.bulk_update(to_update, fields, batch_size=1000)
+
+
+def get_campaign_metrics(campaign_ids: Iterable[int]) -> Dict[int, CampaignMetrics]:
+    """
+    Rollup rows for the given campaigns in one query.
+    Campaigns without activity get an unsaved all-zero row.
+    """
+    campaign_ids = list(campaign_ids)
+    metrics = {row.campaign_id: row for row in CampaignMetrics.objects.filter(campaign_id__in=campaign_ids)}
+    for campaign_id in campaign_ids:
+        metrics.setdefault(campaign_id, CampaignMetrics(campaign_id=campaign_id))
+    return metrics
@@ -0,0 +1,209 @@
+"""
+Campaign Snapshot
+Everything ProactiveNotificationAgent's checks read about a campaign, gathered
+for all monitored campaigns at once with a fixed number of grouped queries
+(conditional aggregation) instead of a dozen filtered counts per campaign:
+
+- all-time totals from the CampaignMetrics rollup (see campaign_metrics)
+- lead and sequence counts
+- windowed send stats (last 24h, last 7 days, the 7 days before)
+- distinct contacted recipients
+- last-7-day replies by interest level, latest positive reply and
+  sub-sequence triggers
+- the user's recent notifications, so duplicate checks run in memory
+
+The number of queries does not depend on how many campaigns are monitored.
+"""
+import logging
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional
+
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.utils import timezone
+
+from marketing_agent.models import (
+    Campaign, CampaignLead, CampaignMetrics, EmailSendHistory, EmailSequence, MarketingNotification, Reply,
+)
+from marketing_agent.services.campaign_metrics import get_campaign_metrics, refresh_campaign_metrics
+
+logger = logging.getLogger(__name__)
+
+RECENT_DAYS = 7
+# Longest look-back of any duplicate-notification check
+NOTIFICATION_LOOKBACK = timedelta(days=3)
+CONTACTED_STATUSES = ['delivered', 'opened', 'clicked']
+OPENED_STATUSES = ['opened', 'clicked']
+
+
+class CampaignSnapshot:
+    """Pre-aggregated monitoring inputs for one campaign (see build_campaign_snapshots)."""
+
+    def __init__(self, campaign_id: int, metrics: CampaignMetrics, now=None):
+        self.campaign_id = campaign_id
+        self.now = now or timezone.now()
+        self.metrics = metrics  # all-time totals
+        self.leads = 0
+        self.sequences = 0
+        self.active_sequences = 0
+        self.followup_sequences = 0
+        self.contacted_leads = 0
+        # Sends by sent_at window
+        self.sent_24h = 0
+        self.failed_24h = 0  # failed or bounced
+        self.sent_7d = 0
+        self.opened_7d = 0
+        self.clicked_7d = 0
+        self.sent_prev_7d = 0
+        self.opened_prev_7d = 0
+        # Replies of the last 7 days
+        self.replies_7d: Dict[str, int] = {}  # interest level -> replies
+        self.reply_leads_7d: Dict[str, int] = {}  # interest level -> distinct lead emails
+        self.latest_positive_email: Optional[str] = None
+        self.sub_sequence_replies_7d = 0
+        self.sub_sequence_leads_7d = 0
+        self.sub_sequence_names: List[str] = []
+        # Owner's MarketingNotification rows of the last NOTIFICATION_LOOKBACK, newest first.
+        # Shared by all snapshots of the same owner: creating a notification marks the owner's
+        # older ones read, and every campaign's duplicate check has to see that.
+        self.notifications: List[MarketingNotification] = []
+
+    @property
+    def total_replies_7d(self) -> int:
+        return sum(self.replies_7d.values())
+
+    def has_notification(self, user_id: int, notification_type: str, title_contains: str = None,
+                         title: str = None, since=None, on_date=None) -> Optional[MarketingNotification]:
+        """
+        In-memory equivalent of MarketingNotification.objects.filter(...).first() for this campaign.
+        title_contains matches case-insensitively, like title__icontains.
+        """
+        for notification in self.notifications:
+            if notification.campaign_id != self.campaign_id or notification.user_id != user_id:
+                continue
+            if notification.notification_type != notification_type:
+                continue
+            if title is not None and notification.title != title:
+                continue
+            if title_contains is not None and title_contains.lower() not in notification.title.lower():
+                continue
+            if since is not None and notification.created_at < since:
+                continue
+            if on_date is not None and timezone.localtime(notification.created_at).date() != on_date:
+                continue
+            return notification
+        return None
+
+    def add_notification(self, notification: MarketingNotification) -> None:
+        """Record a notification created during this run so later checks see it."""
+        self.notifications.insert(0, notification)
+
+    def mark_read_before(self, user_id: int, cutoff, read_at) -> None:
+        """Mirror _create_notification's bulk "mark previous unread as read" update."""
+        for notification in self.notifications:
+            if notification.user_id == user_id and not notification.is_read and notification.created_at < cutoff:
+                notification.is_read = True
+                notification.read_at = read_at
+
+
+def build_campaign_snapshots(campaigns: Iterable[Campaign], refresh: bool = True) -> Dict[int, CampaignSnapshot]:
+    """
+    Build snapshots for many campaigns at once.
+
+    Args:
+        campaigns: Campaigns (or campaign ids) to snapshot
+        refresh: Fold new activity into the metrics rollup first
+
+    Returns:
+        dict: campaign id -> CampaignSnapshot
+    """
+    campaign_ids = [getattr(campaign, 'id', campaign) for campaign in campaigns]
+    if not campaign_ids:
+        return {}
+    if refresh:
+        refresh_campaign_metrics()
+
+    now = timezone.now()
+    day_ago = now - timedelta(hours=24)
+    week_ago = now - timedelta(days=RECENT_DAYS)
+    two_weeks_ago = week_ago - timedelta(days=RECENT_DAYS)
+
+    snapshots = {
+        campaign_id: CampaignSnapshot(campaign_id, metrics, now=now)
+        for campaign_id, metrics in get_campaign_metrics(campaign_ids).items()
+    }
+
+    for row in CampaignLead.objects.filter(campaign_id__in=campaign_ids).order_by().values(
+        'campaign_id'
+    ).annotate(total=Count('id')):
+        snapshots[row['campaign_id']].leads = row['total']
+
+    for row in EmailSequence.objects.filter(campaign_id__in=campaign_ids).order_by().values(
+        'campaign_id'
+    ).annotate(
+        total=Count('id'),
+        active=Count('id', filter=Q(is_active=True)),
+        followup=Count('id', filter=Q(name__icontains='follow')),
+    ):
+        snapshot = snapshots[row['campaign_id']]
+        snapshot.sequences = row['total']
+        snapshot.active_sequences = row['active']
+        snapshot.followup_sequences = row['followup']
+
+    recent = Q(sent_at__gte=week_ago)
+    previous = Q(sent_at__gte=two_weeks_ago, sent_at__lt=week_ago)
+    for row in EmailSendHistory.objects.filter(
+        campaign_id__in=campaign_ids, sent_at__gte=two_weeks_ago
+    ).order_by().values('campaign_id').annotate(
+        sent_24h=Count('id', filter=Q(sent_at__gte=day_ago)),
+        failed_24h=Count('id', filter=Q(sent_at__gte=day_ago, status__in=['failed', 'bounced'])),
+        sent_7d=Count('id', filter=recent),
+        opened_7d=Count('id', filter=recent & Q(status__in=OPENED_STATUSES)),
+        clicked_7d=Count('id', filter=recent & Q(status='clicked')),
+        sent_prev_7d=Count('id', filter=previous),
+        opened_prev_7d=Count('id', filter=previous & Q(status__in=OPENED_STATUSES)),
+    ):
+        snapshot = snapshots[row['campaign_id']]
+        for field in ('sent_24h', 'failed_24h', 'sent_7d', 'opened_7d', 'clicked_7d',
+                      'sent_prev_7d', 'opened_prev_7d'):
+            setattr(snapshot, field, row[field])
+
+    for row in EmailSendHistory.objects.filter(
+        campaign_id__in=campaign_ids, status__in=CONTACTED_STATUSES
+    ).order_by().values('campaign_id').annotate(contacted=Count('recipient_email', distinct=True)):
+        snapshots[row['campaign_id']].contacted_leads = row['contacted']
+
+    recent_replies = Reply.objects.filter(campaign_id__in=campaign_ids, replied_at__gte=week_ago).order_by()
+    for row in recent_replies.values('campaign_id', 'interest_level').annotate(
+        total=Count('id'), unique_leads=Count('lead__email', distinct=True),
+    ):
+        snapshot = snapshots[row['campaign_id']]
+        snapshot.replies_7d[row['interest_level']] = row['total']
+        snapshot.reply_leads_7d[row['interest_level']] = row['unique_leads']
+
+    # Sub-sequence triggers: one row per (campaign, lead, sub-sequence) is enough to count leads and names
+    triggered = recent_replies.filter(sub_sequence__isnull=False)
+    for row in triggered.values('campaign_id', 'lead__email', 'sub_sequence__name').annotate(total=Count('id')):
+        snapshot = snapshots[row['campaign_id']]
+        snapshot.sub_sequence_replies_7d += row['total']
+        if row['sub_sequence__name'] and row['sub_sequence__name'] not in snapshot.sub_sequence_names:
+            snapshot.sub_sequence_names.append(row['sub_sequence__name'])
+    for row in triggered.values('campaign_id').annotate(unique_leads=Count('lead__email', distinct=True)):
+        snapshots[row['campaign_id']].sub_sequence_leads_7d = row['unique_leads']
+
+    latest_positive = Reply.objects.filter(
+        campaign_id=OuterRef('pk'), interest_level='positive', replied_at__gte=week_ago,
+    ).order_by('-replied_at').values('lead__email')[:1]
+    notifications_by_owner: Dict[int, List[MarketingNotification]] = {}
+    for campaign_id, owner_id, email in Campaign.objects.filter(id__in=campaign_ids).annotate(
+        latest_positive_email=Subquery(latest_positive)
+    ).values_list('id', 'owner_id', 'latest_positive_email'):
+        snapshot = snapshots[campaign_id]
+        snapshot.latest_positive_email = email
+        snapshot.notifications = notifications_by_owner.setdefault(owner_id, [])
+
+    for notification in MarketingNotification.objects.filter(
+        campaign_id__in=campaign_ids, created_at__gte=now - NOTIFICATION_LOOKBACK
+    ).order_by('-created_at'):
+        snapshots[notification.campaign_id].notifications.append(notification)
+
+    return snapshots
@@ -0,0 +1,96 @@
+"""
+Campaign Contact Provisioning
+Makes sure every lead of a campaign has a CampaignContact for each active
+MAIN sequence, using set-based queries instead of one get_or_create per
+(lead, sequence).
+
+A per-campaign watermark (lead links, active sequences, contact count) is
+kept in Django's cache so send_sequence_emails skips campaigns whose leads
+and sequences haven't changed since the last run.
+"""
+import logging
+from typing import Iterable, Optional
+
+from django.core.cache import cache
+from django.db.models import Count, Exists, Max, OuterRef
+from django.utils import timezone
+
+from marketing_agent.models import CampaignContact, CampaignLead
+from marketing_agent.services.sequence_schedule import next_main_send_at, ordered_steps
+
+logger = logging.getLogger(__name__)
+
+WATERMARK_KEY = 'campaign_contacts_watermark_{campaign_id}'
+WATERMARK_TTL = 24 * 3600  # seconds
+BULK_BATCH_SIZE = 1000
+
+
+def _watermark(campaign, sequence_ids) -> tuple:
+    links = CampaignLead.objects.filter(campaign=campaign).aggregate(count=Count('id'), last=Max('id'))
+    contacts = CampaignContact.objects.filter(campaign=campaign, sequence_id__in=sequence_ids).count()
+    return (links['count'], links['last'], tuple(sorted(sequence_ids)), contacts)
+
+
+def provision_campaign_contacts(campaign, sequences=None, lead_ids: Optional[Iterable[int]] = None,
+                                use_watermark: bool = True) -> int:
+    """
+    Create missing CampaignContacts for (campaign, lead, sequence) triples.
+
+    Args:
+        campaign: Campaign to provision
+        sequences: Main sequences to provision (defaults to the campaign's active main sequences)
+        lead_ids: Only consider these leads (defaults to every lead in the campaign)
+        use_watermark: Skip the campaign if nothing changed since the last full run
+
+    Returns:
+        int: Number of contacts created
+    """
+    if sequences is None:
+        # Sub-sequences never get contacts here - they are assigned when leads reply
+        sequences = campaign.email_sequences.filter(is_active=True, is_sub_sequence=False)
+    sequences = list(sequences)
+    sequence_ids = [seq.id for seq in sequences]
+    if not sequence_ids:
+        return 0
+
+    full_run = lead_ids is None
+    watermark_key = WATERMARK_KEY.format(campaign_id=campaign.id)
+    watermark = None
+    if full_run and use_watermark:
+        watermark = _watermark(campaign, sequence_ids)
+        if cache.get(watermark_key) == watermark:
+            return 0
+
+    links = CampaignLead.objects.filter(campaign=campaign)
+    if lead_ids is not None:
+        links = links.filter(lead_id__in=list(lead_ids))
+
+    created = 0
+    for sequence in sequences:
+        # Leads of this campaign without a contact in this sequence (one query per sequence)
+        missing_lead_ids = links.annotate(
+            has_contact=Exists(CampaignContact.objects.filter(
+                campaign=campaign, lead_id=OuterRef('lead_id'), sequence_id=sequence.id,
+            ))
+        ).filter(has_contact=False).values_list('lead_id', flat=True)
+        new_contacts = [
+            CampaignContact(campaign=campaign, lead_id=lead_id, sequence_id=sequence.id, current_step=0)
+            for lead_id in missing_lead_ids.iterator(chunk_size=BULK_BATCH_SIZE)
+        ]
+        if new_contacts:
+            # bulk_create skips save(), so set the first step's send time here (same for every new contact)
+            first_send_at = next_main_send_at(new_contacts[0], steps=ordered_steps(sequence), now=timezone.now())
+            for contact in new_contacts:
+                contact.next_send_at = first_send_at
+            # No ignore_conflicts: mssql-django does not support it, and the Exists filter above
+            # already leaves out existing (campaign, lead, sequence) triples
+            CampaignContact.objects.bulk_create(new_contacts, batch_size=BULK_BATCH_SIZE)
+            created += len(new_contacts)
+
+    if full_run and use_watermark:
+        if created:
+            watermark = _watermark(campaign, sequence_ids)
+        cache.set(watermark_key, watermark, WATERMARK_TTL)
+    if created:
+        logger.info(f'Provisioned {created} CampaignContact(s) for campaign {campaign.id}')
+    return created
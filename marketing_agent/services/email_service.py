@@ -7,6 +7,11 @@ from django.template import Context, Template
 from django.conf import settings
 from django.utils import timezone
 from marketing_agent.models import Campaign, Lead, EmailTemplate, EmailSendHistory
+from marketing_agent.services.rate_limiter import get_email_rate_limiter
+from marketing_agent.services.render_plan import (
+    RenderPlanCache, TemplateRenderPlan, TAG_RE, TRACKED_URL_SAFE, TRACKING_TOKEN_SLOT,
+)
+from marketing_agent.services.smtp_pool import get_smtp_pool
 import re
 import time
 from datetime import timedelta
@@ -19,28 +24,34 @@ logger = logging.getLogger(__name__)
 class EmailService:
     """Service for sending campaign emails with spam prevention and tracking"""
     
-    # Rate limiting: max emails per minute
-    MAX_EMAILS_PER_MINUTE = 30
+    # Rate limits are per EmailAccount and recipient domain (see services/rate_limiter.py)
+    # How long the default EmailAccount lookup per owner is reused
+    DEFAULT_ACCOUNT_CACHE_SECONDS = 60
     
     def __init__(self):
-        self.sent_count = 0
-        self.minute_start = timezone.now()
+        self._default_accounts = {}  # owner_id -> (EmailAccount, fetched_at)
+        self._render_plans = RenderPlanCache()
     
-    def check_rate_limit(self):
-        """Check if we're within rate limits"""
-        now = timezone.now()
-        if (now - self.minute_start).total_seconds() >= 60:
-            # Reset counter for new minute
-            self.sent_count = 0
-            self.minute_start = now
-        
-        if self.sent_count >= self.MAX_EMAILS_PER_MINUTE:
-            # Wait until next minute
-            wait_seconds = 60 - (now - self.minute_start).total_seconds()
-            if wait_seconds > 0:
-                time.sleep(wait_seconds)
-                self.sent_count = 0
-                self.minute_start = timezone.now()
+    def get_default_email_account(self, owner_id: int):
+        """Active default EmailAccount for owner, cached briefly so bulk sends don't re-query it per email"""
+        from marketing_agent.models import EmailAccount
+        now = time.monotonic()
+        cached = self._default_accounts.get(owner_id)
+        if cached and now - cached[1] < self.DEFAULT_ACCOUNT_CACHE_SECONDS:
+            return cached[0]
+        email_account = EmailAccount.objects.filter(
+            owner_id=owner_id,
+            is_active=True
+        ).order_by('-is_default', '-created_at').first()
+        self._default_accounts[owner_id] = (email_account, now)
+        return email_account
+    
+    def try_acquire_send_slot(self, email_account, recipient_email: str):
+        """
+        Non-blocking rate-limit check shared by all workers (token bucket per account and recipient domain).
+        Returns a RateLimitDecision; when denied, retry_after says how many seconds until a slot frees up.
+        """
+        return get_email_rate_limiter().try_acquire(email_account, recipient_email)
     
     def calculate_spam_score(self, subject: str, html_content: str, text_content: str = '') -> float:
         """
@@ -115,6 +126,50 @@ class EmailService:
             content = re.sub(r'\{\{[^}]+\}\}', '', content)
             return content
     
+    def get_render_plan(self, template: EmailTemplate, campaign: Campaign) -> TemplateRenderPlan:
+        """Compiled render plan for a template, cached per (template id, updated_at, campaign id)"""
+        key = (template.pk, template.updated_at, campaign.pk)
+        return self._render_plans.get(key, lambda: TemplateRenderPlan(
+            template, campaign.pk,
+            track=self._apply_tracking,
+            fallback=self.render_email_content,
+            spam_score=self.calculate_spam_score,
+        ))
+    
+    def get_context_vars(self, lead: Lead, campaign: Campaign) -> Dict:
+        """Personalization variables available to email templates"""
+        return {
+            'lead_name': lead.first_name or lead.email.split('@')[0],
+            'lead_email': lead.email,
+            'campaign_name': campaign.name,
+            'lead_company': lead.company or '',
+        }
+    
+    def render_email(self, plan: TemplateRenderPlan, context_vars: Dict):
+        """
+        Render subject, HTML and plain text for one recipient from a render plan.
+        
+        Returns:
+            tuple: (subject, html_content, text_content) - HTML without tracking
+        """
+        subject = plan.subject.render(context_vars)
+        html_content = plan.html.render(context_vars)
+        if plan.text is not None:
+            text_content = plan.text.render(context_vars)
+        elif plan.text_from_html is not None and plan.markup_free(context_vars):
+            text_content = plan.text_from_html.render(context_vars)
+        else:
+            # Generate plain text from HTML
+            text_content = TAG_RE.sub('', html_content)
+        return subject, html_content, text_content
+    
+    def render_tracked_html(self, plan: TemplateRenderPlan, context_vars: Dict, html_content: str,
+                            send_history: EmailSendHistory) -> str:
+        """Recipient's HTML with tracking pixel and tracked links, from the plan when it is exact"""
+        if send_history.tracking_token and plan.tracking_exact(context_vars):
+            return plan.tracked_html.render({**context_vars, TRACKING_TOKEN_SLOT: send_history.tracking_token})
+        return self._add_email_tracking(html_content, send_history)
+    
     def send_email(
         self, 
         template: EmailTemplate,
@@ -127,28 +182,24 @@ class EmailService:
         Send email to a lead using a template
         
         Returns:
-            Dict with success status, send_history_id, and any errors
+            Dict with success status, send_history_id, and any errors.
+            When the account or recipient domain is over its rate limit nothing is
+            recorded and the dict has rate_limited=True, rate_limit_scope and
+            retry_after (seconds).
         """
         recipient_email = test_email or lead.email
         
+        # Use provided email account, or get default
+        if not email_account:
+            email_account = self.get_default_email_account(campaign.owner_id)
+        
         # Prepare context variables
-        context_vars = {
-            'lead_name': lead.first_name or lead.email.split('@')[0],
-            'lead_email': lead.email,
-            'campaign_name': campaign.name,
-            'lead_company': lead.company or '',
-        }
+        context_vars = self.get_context_vars(lead, campaign)
         
-        # Render email content
+        # Render email content from the template's compiled render plan
         try:
-            subject = self.render_email_content(template.subject, context_vars)
-            html_content = self.render_email_content(template.html_content, context_vars)
-            text_content = template.text_content
-            if text_content:
-                text_content = self.render_email_content(text_content, context_vars)
-            else:
-                # Generate plain text from HTML
-                text_content = re.sub(r'<[^>]+>', '', html_content)
+            plan = self.get_render_plan(template, campaign)
+            subject, html_content, text_content = self.render_email(plan, context_vars)
         except Exception as e:
             logger.error(f"Error rendering email for lead {lead.id}: {str(e)}")
             return {
@@ -156,8 +207,16 @@ class EmailService:
                 'error': f'Template rendering error: {str(e)}'
             }
         
-        # Check rate limit
-        self.check_rate_limit()
+        # Check rate limit - never sleep here; the caller moves on and retries later
+        decision = self.try_acquire_send_slot(email_account, recipient_email)
+        if not decision:
+            return {
+                'success': False,
+                'rate_limited': True,
+                'rate_limit_scope': decision.scope,
+                'retry_after': decision.retry_after,
+                'error': f'Rate limit reached ({decision.scope}); retry in {decision.retry_after:.0f}s'
+            }
         
         # Create send history record
         send_history = EmailSendHistory.objects.create(
@@ -178,36 +237,15 @@ class EmailService:
         send_history.save()
         
         # Add tracking to HTML content
-        html_content = self._add_email_tracking(html_content, send_history)
+        html_content = self.render_tracked_html(plan, context_vars, html_content, send_history)
         
         # Send email
         try:
-            # Use provided email account, or get default
-            from marketing_agent.models import EmailAccount
-            if not email_account:
-                email_account = EmailAccount.objects.filter(
-                    owner=campaign.owner,
-                    is_active=True
-            ).order_by('-is_default', '-created_at').first()
-            
             if not email_account:
                 raise ValueError('No active email account found. Please add an email account first.')
             
             from_email = email_account.email
             
-            # Use custom SMTP backend if account is configured
-            from django.core.mail.backends.smtp import EmailBackend
-            
-            smtp_backend = EmailBackend(
-                host=email_account.smtp_host,
-                port=email_account.smtp_port,
-                username=email_account.smtp_username,
-                password=email_account.smtp_password,
-                use_tls=email_account.use_tls,
-                use_ssl=email_account.use_ssl,
-                fail_silently=False,
-            )
-            
             # Generate Message-ID for reply detection
             import uuid
             import socket
@@ -220,7 +258,6 @@ class EmailService:
                 body=text_content or html_content,
                 from_email=from_email,
                 to=[recipient_email],
-                connection=smtp_backend,
             )
             
             # Add Message-ID header
@@ -229,7 +266,8 @@ class EmailService:
             if html_content:
                 email.attach_alternative(html_content, "text/html")
             
-            email.send()
+            # Send over a pooled, already-authenticated SMTP connection for this account
+            get_smtp_pool().send(email_account, email)
             
             # Update send history with Message-ID
             send_history.status = 'sent'
@@ -237,13 +275,11 @@ class EmailService:
             send_history.message_id = message_id.strip('<>')  # Store without < >
             send_history.save()
             
-            self.sent_count += 1
-            
-            # Update spam score if not already set
+            # Update spam score if not already set (scored once per render plan, not per send).
+            # A queryset update leaves updated_at - and with it the cached plan - alone.
             if template.spam_score is None:
-                spam_score = self.calculate_spam_score(subject, html_content, text_content)
-                template.spam_score = spam_score
-                template.save(update_fields=['spam_score'])
+                template.spam_score = plan.spam_score
+                EmailTemplate.objects.filter(pk=template.pk, spam_score__isnull=True).update(spam_score=plan.spam_score)
             
             logger.info(f"Email sent successfully to {recipient_email} (Campaign: {campaign.name}, Template: {template.name})")
             
@@ -271,50 +307,68 @@ class EmailService:
         """
         Add tracking pixel and wrap links with tracking URLs
         """
+        tracking_token = send_history.tracking_token
+        
+        if not tracking_token:
+            logger.error(f"No tracking token for EmailSendHistory {send_history.id}")
+            return html_content
+        
+        html_content = self._apply_tracking(html_content, tracking_token, send_history.campaign_id)
+        
+        # Log tracking info
+        logger.info(
+            f"[EMAIL TRACKING] Added tracking to email {send_history.id}, "
+            f"Token: {tracking_token[:10]}..."
+        )
+        return html_content
+    
+    def _tracking_base_url(self) -> str:
+        """Base URL of the tracking endpoints"""
         from django.conf import settings
-        from django.urls import reverse
         
+        # Get base URL for tracking endpoints
+        # Try multiple methods to get the correct base URL
+        base_url = None
+        
+        # Method 1: Check SITE_URL setting (recommended)
+        base_url = getattr(settings, 'SITE_URL', None)
+        
+        # Method 2: Try to get from ALLOWED_HOSTS
+        if not base_url and hasattr(settings, 'ALLOWED_HOSTS') and settings.ALLOWED_HOSTS:
+            host = settings.ALLOWED_HOSTS[0]
+            if host != '*':
+                protocol = 'https' if getattr(settings, 'USE_HTTPS', False) else 'http'
+                # Add port for development if not specified
+                if ':' not in host and protocol == 'http':
+                    base_url = f"{protocol}://{host}:8000"
+                else:
+                    base_url = f"{protocol}://{host}"
+        
+        # Method 3: Final fallback to localhost (for development only)
+        if not base_url:
+            base_url = 'http://127.0.0.1:8000'  # Default for local development
+            logger.warning(
+                f"SITE_URL not configured in settings. Using {base_url}. "
+                "Tracking URLs may not work from external email clients. "
+                "To fix: Add SITE_URL = 'http://your-domain.com' to settings.py or .env file"
+            )
+        
+        # Clean up base_url - remove trailing slashes and any path components
+        # SITE_URL should be just the domain (e.g., https://example.com), not https://example.com/marketing/
+        base_url = base_url.rstrip('/')
+        # If base_url ends with /marketing, remove it (tracking URLs are at root level)
+        if base_url.endswith('/marketing'):
+            base_url = base_url[:-9]  # Remove '/marketing'
+        logger.info(f"[EMAIL TRACKING] Using base URL: {base_url}")
+        return base_url
+    
+    def _apply_tracking(self, html_content: str, tracking_token: str, campaign_id: Optional[int]) -> str:
+        """
+        Inject the tracking pixel and wrap links with tracking URLs for tracking_token.
+        Also run once per render plan with a token placeholder (see services/render_plan.py).
+        """
         try:
-            # Get base URL for tracking endpoints
-            # Try multiple methods to get the correct base URL
-            base_url = None
-            
-            # Method 1: Check SITE_URL setting (recommended)
-            base_url = getattr(settings, 'SITE_URL', None)
-            
-            # Method 2: Try to get from ALLOWED_HOSTS
-            if not base_url and hasattr(settings, 'ALLOWED_HOSTS') and settings.ALLOWED_HOSTS:
-                host = settings.ALLOWED_HOSTS[0]
-                if host != '*':
-                    protocol = 'https' if getattr(settings, 'USE_HTTPS', False) else 'http'
-                    # Add port for development if not specified
-                    if ':' not in host and protocol == 'http':
-                        base_url = f"{protocol}://{host}:8000"
-                    else:
-                        base_url = f"{protocol}://{host}"
-            
-            # Method 3: Final fallback to localhost (for development only)
-            if not base_url:
-                base_url = 'http://127.0.0.1:8000'  # Default for local development
-                logger.warning(
-                    f"SITE_URL not configured in settings. Using {base_url}. "
-                    "Tracking URLs may not work from external email clients. "
-                    "To fix: Add SITE_URL = 'http://your-domain.com' to settings.py or .env file"
-                )
-            
-            # Clean up base_url - remove trailing slashes and any path components
-            # SITE_URL should be just the domain (e.g., https://example.com), not https://example.com/marketing/
-            base_url = base_url.rstrip('/')
-            # If base_url ends with /marketing, remove it (tracking URLs are at root level)
-            if base_url.endswith('/marketing'):
-                base_url = base_url[:-9]  # Remove '/marketing'
-            logger.info(f"[EMAIL TRACKING] Using base URL: {base_url}")
-            
-            tracking_token = send_history.tracking_token
-            
-            if not tracking_token:
-                logger.error(f"No tracking token for EmailSendHistory {send_history.id}")
-                return html_content
+            base_url = self._tracking_base_url()
             
             # Add tracking pixel using simple token URL format: /token?t=TOKEN
             # This is simpler and works better with email clients
@@ -354,8 +408,8 @@ class EmailService:
                 if href == '#' or href.strip() == '' or href.startswith('#'):
                     logger.warning(f"[EMAIL TRACKING] Found anchor link (href='{href}') - converting to campaign page")
                     # Default to campaign page if available
-                    if send_history.campaign:
-                        href = f'/marketing/campaigns/{send_history.campaign.id}/'
+                    if campaign_id:
+                        href = f'/marketing/campaigns/{campaign_id}/'
                     else:
                         href = '/marketing/'
                     logger.info(f"[EMAIL TRACKING] Converted anchor link: {original_href} -> {href}")
@@ -371,7 +425,7 @@ class EmailService:
                 
                 # URL encode the href for the tracking URL
                 from urllib.parse import quote as url_quote
-                encoded_href = url_quote(href, safe=':/?#[]@!$&\'()*+,;=')
+                encoded_href = url_quote(href, safe=TRACKED_URL_SAFE)
                 
                 # Create tracked URL using simple token format: /token?t=TOKEN&url=ORIGINAL_URL
                 tracked_url = f"{base_url}/token?t={tracking_token}&url={encoded_href}"
@@ -406,13 +460,6 @@ class EmailService:
                 flags=re.IGNORECASE
             )
             
-            # Log tracking info
-            logger.info(
-                f"[EMAIL TRACKING] Added tracking to email {send_history.id}, "
-                f"Token: {tracking_token[:10]}..., "
-                f"Pixel: {tracking_pixel_url}"
-            )
-            
         except Exception as e:
             logger.error(f"Error adding tracking to email: {str(e)}")
             # Continue without tracking if there's an error
@@ -0,0 +1,287 @@
+"""
+Lead Import
+Bulk import of leads from an uploaded CSV/Excel file into a campaign, with
+a fixed number of queries per chunk instead of get_or_create, save() and
+campaign.leads.add() per row:
+
+1. CSV files are streamed with pandas (chunksize); Excel files are read
+   once and sliced into chunks.
+2. Emails are normalized and validated with column operations, and rows
+   are deduplicated per email.
+3. Existing leads of the owner are fetched with one IN query per chunk.
+   New leads are bulk_created and existing ones bulk_updated.
+4. Missing campaign links are bulk-inserted. m2m_changed is sent just like
+   campaign.leads.add() sends it, so CampaignContacts are still provisioned.
+
+Rows that cannot be imported are reported in LeadImportResult.errors and
+the rest of the file goes on.
+"""
+import logging
+from typing import Dict, Iterator, List
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, router, transaction
+from django.db.models.signals import m2m_changed
+from django.utils import timezone
+
+from marketing_agent.models import Campaign, CampaignLead, Lead
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1000  # keeps the per-chunk IN queries under SQL Server's 2100-parameter limit
+DEFAULT_SOURCE = 'campaign_upload'
+# Optional columns copied onto Lead; a non-empty cell overwrites the stored value
+LEAD_FIELDS = ['first_name', 'last_name', 'phone', 'company', 'job_title']
+MAX_ERRORS = 1000
+
+
+class LeadImportResult:
+    """Outcome of import_leads"""
+
+    def __init__(self):
+        self.processed = 0  # rows imported and linked to the campaign
+        self.created = 0
+        self.updated = 0
+        self.linked = 0  # leads newly added to the campaign
+        self.skipped = 0  # rows without an email
+        self.errors: List[Dict] = []  # {'row', 'email', 'error'}, capped at MAX_ERRORS
+        self.error_count = 0
+
+    def add_error(self, row: int, email: str, error: str) -> None:
+        self.error_count += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append({'row': row, 'email': email, 'error': error})
+
+    def as_dict(self) -> Dict:
+        return {
+            'processed': self.processed,
+            'created': self.created,
+            'updated': self.updated,
+            'linked': self.linked,
+            'skipped': self.skipped,
+            'error_count': self.error_count,
+            'errors': self.errors,
+        }
+
+
+def read_lead_chunks(leads_file, chunk_size: int = None) -> Iterator:
+    """
+    Yield DataFrames of at most chunk_size rows with normalized column names.
+    Every cell is read as text, so phone numbers and ids keep their exact digits.
+    """
+    import pandas as pd
+
+    chunk_size = chunk_size or int(getattr(settings, 'LEAD_IMPORT_CHUNK_SIZE', DEFAULT_CHUNK_SIZE))
+    file_extension = leads_file.name.split('.')[-1].lower()
+    if file_extension not in ['csv', 'xlsx', 'xls']:
+        raise ValueError('Invalid file format. Please upload CSV, XLSX, or XLS files.')
+
+    # Reset file pointer to beginning (in case it was read before)
+    if hasattr(leads_file, 'seek'):
+        leads_file.seek(0)
+    if file_extension == 'csv':
+        chunks = pd.read_csv(leads_file, chunksize=chunk_size, dtype=str, encoding='utf-8')
+    else:
+        # Excel can't be streamed; read once and hand it out in slices
+        df = pd.read_excel(leads_file, dtype=str)
+        chunks = (df.iloc[start:start + chunk_size] for start in range(0, max(len(df), 1), chunk_size))
+
+    for chunk in chunks:
+        chunk.columns = chunk.columns.str.lower().str.strip()
+        yield chunk
+
+
+def _clean(series):
+    """Stripped text with blank cells as missing"""
+    cleaned = series.astype('string').str.strip()
+    return cleaned.mask((cleaned == '').fillna(False))
+
+
+def _valid_email(email: str) -> bool:
+    try:
+        validate_email(email)
+    except ValidationError:
+        return False
+    return True
+
+
+def _prepare_chunk(chunk, result: LeadImportResult):
+    """Normalize a chunk into one row per valid email; invalid rows go to result.errors"""
+    import pandas as pd
+
+    rows = pd.DataFrame({'email': _clean(chunk['email']).str.lower()}, index=chunk.index)
+    # Spreadsheet row numbers: header is row 1
+    rows['row'] = chunk.index + 2
+    for field in LEAD_FIELDS + ['source']:
+        rows[field] = _clean(chunk[field]) if field in chunk.columns else pd.Series(pd.NA, index=chunk.index, dtype='string')
+
+    missing = rows['email'].isna()
+    result.skipped += int(missing.sum())
+    rows = rows[~missing]
+
+    max_lengths = {field: Lead._meta.get_field(field).max_length for field in ['email'] + LEAD_FIELDS + ['source']}
+    invalid = ~rows['email'].map(_valid_email).astype(bool)
+    too_long = pd.Series(False, index=rows.index)
+    for field, max_length in max_lengths.items():
+        too_long |= rows[field].str.len().fillna(0) > max_length
+    for row in rows[invalid | too_long].itertuples(index=False):
+        result.add_error(row.row, row.email, 'Invalid email address' if not _valid_email(row.email)
+                         else 'Value too long for one of the lead fields')
+    rows = rows[~(invalid | too_long)]
+    result.processed += len(rows)
+
+    # One row per email: a lead is created from its first row, later rows overwrite
+    # fields with their non-empty values - so the last non-empty value wins
+    if rows.empty:
+        return rows
+    first_source = rows.drop_duplicates('email', keep='first').set_index('email')['source']
+    merged = rows.groupby('email', sort=False)[LEAD_FIELDS + ['row']].last()
+    merged['source'] = first_source
+    return merged
+
+
+def _import_chunk(rows, owner, campaign: Campaign, result: LeadImportResult) -> None:
+    existing = {lead.email: lead for lead in Lead.objects.filter(owner=owner, email__in=list(rows.index))}
+
+    now = timezone.now()
+    new_leads, changed_leads = [], []
+    for row in rows.itertuples():
+        values = _row_values(row)
+        lead = existing.get(row.Index)
+        if lead is None:
+            new_leads.append(Lead(
+                email=row.Index, owner=owner, source=_row_source(row),
+                **{field: values.get(field, '') for field in LEAD_FIELDS},
+            ))
+        elif any(getattr(lead, field) != value for field, value in values.items()):
+            for field, value in values.items():
+                setattr(lead, field, value)
+            lead.updated_at = now  # bulk_update doesn't apply auto_now
+            changed_leads.append(lead)
+
+    if new_leads:
+        Lead.objects.bulk_create(new_leads, batch_size=1000)
+        if any(lead.pk is None for lead in new_leads):
+            # Backends without RETURNING on bulk inserts: look the new ids up
+            created_ids = dict(Lead.objects.filter(owner=owner, email__in=[lead.email for lead in new_leads])
+                               .values_list('email', 'id'))
+            for lead in new_leads:
+                lead.pk = created_ids[lead.email]
+        result.created += len(new_leads)
+    if changed_leads:
+        Lead.objects.bulk_update(changed_leads, LEAD_FIELDS + ['updated_at'], batch_size=1000)
+        result.updated += len(changed_leads)
+
+    lead_ids = [lead.pk for lead in new_leads] + [lead.pk for lead in existing.values()]
+    _link_to_campaign(campaign, lead_ids, result)
+
+
+def _missing(value) -> bool:
+    import pandas as pd
+    return value is None or pd.isna(value)
+
+
+def _row_values(row) -> Dict[str, str]:
+    """Lead fields with a value in this row"""
+    return {field: getattr(row, field) for field in LEAD_FIELDS if not _missing(getattr(row, field))}
+
+
+def _row_source(row) -> str:
+    return DEFAULT_SOURCE if _missing(row.source) else row.source
+
+
+def _link_to_campaign(campaign: Campaign, lead_ids: List[int], result: LeadImportResult) -> None:
+    """Bulk version of campaign.leads.add(*lead_ids), sending the same m2m_changed signals"""
+    already = set(CampaignLead.objects.filter(campaign=campaign, lead_id__in=lead_ids).values_list('lead_id', flat=True))
+    missing = {lead_id for lead_id in lead_ids if lead_id not in already}
+    if not missing:
+        return
+    using = router.db_for_write(CampaignLead, instance=campaign)
+    signal_kwargs = dict(sender=CampaignLead, instance=campaign, reverse=False, model=Lead, using=using)
+    m2m_changed.send(action='pre_add', pk_set=missing, **signal_kwargs)
+    CampaignLead.objects.bulk_create(
+        [CampaignLead(campaign=campaign, lead_id=lead_id) for lead_id in missing], batch_size=1000,
+    )
+    m2m_changed.send(action='post_add', pk_set=missing, **signal_kwargs)
+    result.linked += len(missing)
+
+
+def _import_rows_one_by_one(rows, owner, campaign: Campaign, result: LeadImportResult) -> None:
+    """Slow path for a chunk that hit a conflict (e.g. a concurrent import): row by row, errors per row"""
+    for row in rows.itertuples():
+        email = row.Index
+        try:
+            with transaction.atomic():
+                values = _row_values(row)
+                lead, created = Lead.objects.get_or_create(email=email, owner=owner, defaults={
+                    'source': _row_source(row), **values,
+                })
+                if created:
+                    result.created += 1
+                elif values:
+                    for field, value in values.items():
+                        setattr(lead, field, value)
+                    lead.save()
+                    result.updated += 1
+                if not campaign.leads.filter(pk=lead.pk).exists():
+                    campaign.leads.add(lead)
+                    result.linked += 1
+        except Exception as e:
+            result.processed -= 1
+            result.add_error(int(row.row), email, str(e))
+
+
+def import_leads(leads_file, owner, campaign: Campaign, chunk_size: int = None) -> LeadImportResult:
+    """
+    Import leads from a CSV/Excel upload and add them to a campaign.
+
+    Args:
+        leads_file: Uploaded file (csv, xlsx or xls) with an email column
+        owner: User owning the leads
+        campaign: Campaign the leads are added to
+        chunk_size: Rows per chunk (defaults to LEAD_IMPORT_CHUNK_SIZE)
+
+    Returns:
+        LeadImportResult
+
+    Raises:
+        ValueError: Unreadable file, no email column or no rows
+    """
+    result = LeadImportResult()
+    seen_rows = False
+    chunks = read_lead_chunks(leads_file, chunk_size)
+    while True:
+        try:
+            chunk = next(chunks)
+        except StopIteration:
+            break
+        except ValueError:
+            raise
+        except Exception as e:
+            raise ValueError(f'Error reading file: {str(e)}. Please ensure the file is a valid CSV or Excel file.')
+        if 'email' not in chunk.columns:
+            raise ValueError('Email column is required in the file')
+        if chunk.empty:
+            continue
+        seen_rows = True
+        rows = _prepare_chunk(chunk, result)
+        if rows.empty:
+            continue
+        counts = (result.created, result.updated, result.linked)
+        try:
+            with transaction.atomic():
+                _import_chunk(rows, owner, campaign, result)
+        except IntegrityError as e:
+            logger.warning(f"Lead import chunk conflicted ({e}); importing it row by row")
+            result.created, result.updated, result.linked = counts
+            _import_rows_one_by_one(rows, owner, campaign, result)
+
+    if not seen_rows:
+        raise ValueError('File is empty')
+    logger.info(
+        f"Imported leads into campaign {campaign.id}: {result.processed} processed, {result.created} created, "
+        f"{result.updated} updated, {result.linked} linked, {result.error_count} error(s)"
+    )
+    return result
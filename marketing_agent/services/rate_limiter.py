@@ -0,0 +1,185 @@
+"""
+Outbound Email Rate Limiter
+Token buckets kept in Django's cache so every process sending from the same
+EmailAccount (web, Celery workers, management commands) draws from the same
+budget. With a shared cache backend (Redis/Memcached/DB) the limits hold
+across workers; with the default local-memory cache they hold per process.
+
+Two buckets are checked for each email:
+- per sending EmailAccount (EMAIL_RATE_LIMIT_PER_ACCOUNT_PER_MINUTE)
+- per recipient domain (EMAIL_RATE_LIMIT_PER_DOMAIN_PER_MINUTE), so one
+  provider (e.g. gmail.com) isn't flooded by several accounts at once
+
+try_acquire() never sleeps: when a bucket is empty it returns how long to
+wait, and the caller moves on to other work.
+"""
+import logging
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PER_ACCOUNT_PER_MINUTE = 30
+DEFAULT_PER_DOMAIN_PER_MINUTE = 60
+KEY_PREFIX = 'email_rate_limit'
+STATE_TTL = 3600  # seconds; idle buckets expire (and come back full)
+LOCK_TTL = 2  # seconds; a crashed holder can't wedge a bucket for longer than this
+LOCK_ATTEMPTS = 5
+LOCK_RETRY_DELAY = 0.005  # seconds
+
+
+class RateLimitDecision:
+    """Result of try_acquire(): allowed, or which bucket is empty and for how long."""
+
+    def __init__(self, allowed: bool, retry_after: float = 0.0, scope: Optional[str] = None):
+        self.allowed = allowed
+        self.retry_after = retry_after
+        self.scope = scope  # 'account' / 'domain' / 'contention' when denied
+
+    def __bool__(self) -> bool:
+        return self.allowed
+
+    def __repr__(self) -> str:
+        if self.allowed:
+            return 'RateLimitDecision(allowed)'
+        return f'RateLimitDecision(denied scope={self.scope} retry_after={self.retry_after:.2f}s)'
+
+
+class EmailRateLimiter:
+    """
+    Distributed token-bucket limiter for outbound email.
+    Use get_email_rate_limiter() to access the shared instance.
+    """
+
+    def __init__(self):
+        self._stats_lock = threading.Lock()
+        self.allowed = 0
+        self.denied = 0
+
+    @staticmethod
+    def _cache():
+        from django.core.cache import caches
+        return caches[getattr(settings, 'EMAIL_RATE_LIMIT_CACHE_ALIAS', 'default')]
+
+    @staticmethod
+    def enabled() -> bool:
+        return bool(getattr(settings, 'EMAIL_RATE_LIMIT_ENABLED', True))
+
+    @staticmethod
+    def _limits() -> Tuple[int, int]:
+        per_account = int(getattr(settings, 'EMAIL_RATE_LIMIT_PER_ACCOUNT_PER_MINUTE', DEFAULT_PER_ACCOUNT_PER_MINUTE))
+        per_domain = int(getattr(settings, 'EMAIL_RATE_LIMIT_PER_DOMAIN_PER_MINUTE', DEFAULT_PER_DOMAIN_PER_MINUTE))
+        return per_account, per_domain
+
+    def _buckets(self, email_account, recipient_email: str) -> List[Tuple[str, str, int]]:
+        """(scope, cache key, per-minute limit) for each bucket an email draws from."""
+        per_account, per_domain = self._limits()
+        buckets = []
+        if email_account is not None and per_account > 0:
+            buckets.append(('account', f'{KEY_PREFIX}:account:{email_account.pk}', per_account))
+        domain = recipient_email.rsplit('@', 1)[-1].strip().lower() if recipient_email and '@' in recipient_email else ''
+        if domain and per_domain > 0:
+            buckets.append(('domain', f'{KEY_PREFIX}:domain:{domain}', per_domain))
+        # Fixed order so two workers never take the same locks in opposite order
+        return sorted(buckets, key=lambda b: b[1])
+
+    def _lock(self, cache, key: str) -> Optional[str]:
+        token = uuid.uuid4().hex
+        for attempt in range(LOCK_ATTEMPTS):
+            if cache.add(f'{key}:lock', token, LOCK_TTL):
+                return token
+            time.sleep(LOCK_RETRY_DELAY)
+        return None
+
+    @staticmethod
+    def _unlock(cache, key: str, token: str) -> None:
+        if cache.get(f'{key}:lock') == token:
+            cache.delete(f'{key}:lock')
+
+    @staticmethod
+    def _available(state: Optional[Dict[str, float]], limit: int, now: float) -> float:
+        """Tokens in a bucket of capacity `limit` refilling at limit/60 per second."""
+        if not state:
+            return float(limit)
+        elapsed = max(0.0, now - state['updated'])
+        return min(float(limit), state['tokens'] + elapsed * limit / 60.0)
+
+    def try_acquire(self, email_account, recipient_email: str = '') -> RateLimitDecision:
+        """
+        Take one token from the account and recipient-domain buckets, or none at all.
+
+        Returns:
+            RateLimitDecision: truthy if the email may be sent now
+        """
+        if not self.enabled():
+            return RateLimitDecision(True)
+        buckets = self._buckets(email_account, recipient_email)
+        if not buckets:
+            return RateLimitDecision(True)
+        try:
+            cache = self._cache()
+        except Exception as e:
+            logger.warning(f"Email rate limiter cache unavailable, not limiting: {e}")
+            return RateLimitDecision(True)
+
+        held = []
+        try:
+            for _, key, _ in buckets:
+                token = self._lock(cache, key)
+                if token is None:
+                    return self._deny(LOCK_TTL / 4, 'contention')
+                held.append((key, token))
+
+            now = time.time()
+            states = cache.get_many([key for _, key, _ in buckets])
+            available = {}
+            for scope, key, limit in buckets:
+                tokens = self._available(states.get(key), limit, now)
+                if tokens < 1.0:
+                    return self._deny((1.0 - tokens) * 60.0 / limit, scope)
+                available[key] = tokens
+            cache.set_many(
+                {key: {'tokens': available[key] - 1.0, 'updated': now} for _, key, _ in buckets},
+                STATE_TTL,
+            )
+        finally:
+            for key, token in held:
+                self._unlock(cache, key, token)
+
+        with self._stats_lock:
+            self.allowed += 1
+        return RateLimitDecision(True)
+
+    def _deny(self, retry_after: float, scope: str) -> RateLimitDecision:
+        with self._stats_lock:
+            self.denied += 1
+        return RateLimitDecision(False, retry_after=retry_after, scope=scope)
+
+    def stats(self) -> Dict[str, Any]:
+        per_account, per_domain = self._limits()
+        with self._stats_lock:
+            return {
+                'enabled': self.enabled(),
+                'per_account_per_minute': per_account,
+                'per_domain_per_minute': per_domain,
+                'allowed': self.allowed,
+                'denied': self.denied,
+            }
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_email_rate_limiter() -> EmailRateLimiter:
+    """Get the process-wide email rate limiter (singleton pattern)."""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = EmailRateLimiter()
+    return _limiter
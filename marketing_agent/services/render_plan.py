@@ -0,0 +1,191 @@
+"""
+Email Render Plans
+Templates compiled once into render plans, so sending to many recipients does
+not re-parse the template, re-strip HTML or re-run the link-tracking regexes
+for every email.
+
+A RenderPlan is a template split into static segments and variable slots;
+rendering is a single join of segments and slot values. Only templates made
+of plain {{ variable }} tokens compile to a plan. Templates using tags,
+filters or comments keep a compiled Django Template (parsed once) instead.
+
+A TemplateRenderPlan holds the plans for an EmailTemplate's subject, HTML
+and text, the plain text derived from the HTML when the template has none,
+and the HTML with tracking pixel and tracked links already applied. The
+tracking token is one more slot; variables inside a tracked link become
+URL-encoded slots. Values that could change what the tag and link regexes
+match (markup, or quotes/whitespace in a link) make that send strip tags and
+add tracking on the rendered HTML instead, exactly as before.
+"""
+import logging
+import re
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, FrozenSet, List, Optional
+from urllib.parse import quote as url_quote
+
+from django.conf import settings
+from django.template import Context, Engine
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_SIZE = 256
+TRACKING_TOKEN_SLOT = '__tracking_token__'
+VARIABLE_RE = re.compile(r'\{\{\s*([A-Za-z][A-Za-z0-9_]*)\s*\}\}')
+TAG_RE = re.compile(r'<[^>]+>')
+# Characters left unencoded when an original link is put into a tracked URL
+TRACKED_URL_SAFE = ':/?#[]@!$&\'()*+,;='
+# Placeholders that cannot occur in template text; inside a tracked link they come back URL-encoded
+_PLACEHOLDER = '\x00{}\x00'
+_PLACEHOLDER_RE = re.compile('(\x00|%00)([A-Za-z_][A-Za-z0-9_]*)\\1')
+# A link that starts with a variable decides how it is tracked (mailto:, #, relative...) per value
+_HREF_FROM_VARIABLE_RE = re.compile('href\\s*=\\s*["\']?\x00', re.IGNORECASE)
+# What a value inside a tracked link must not contain for the precompiled link to be exact
+_LINK_UNSAFE_RE = re.compile(r'[\s"\'<>]|/token\?|track/email')
+
+
+class RenderPlan:
+    """Static segments with variable slots between them: segments[0] slots[0] segments[1] ..."""
+
+    __slots__ = ('segments', 'slots', 'quoted')
+
+    def __init__(self, segments: List[str], slots: List[str], quoted: FrozenSet[int] = frozenset()):
+        self.segments = segments
+        self.slots = slots
+        self.quoted = quoted  # positions of slots inside a tracked URL, rendered URL-encoded
+
+    @classmethod
+    def compile(cls, content: str) -> Optional['RenderPlan']:
+        """Plan for content made of plain {{ variable }} tokens, or None if it needs the template engine."""
+        parts = VARIABLE_RE.split(content)
+        segments, slots = parts[0::2], parts[1::2]
+        for segment in segments:
+            if '{{' in segment or '{%' in segment or '{#' in segment:
+                return None
+        return cls(segments, slots)
+
+    @classmethod
+    def from_placeholders(cls, content: str) -> 'RenderPlan':
+        parts = _PLACEHOLDER_RE.split(content)
+        markers, slots = parts[1::3], parts[2::3]
+        quoted = frozenset(i for i, marker in enumerate(markers) if marker == '%00')
+        return cls(parts[0::3], slots, quoted)
+
+    @property
+    def quoted_slots(self) -> FrozenSet[str]:
+        return frozenset(self.slots[i] for i in self.quoted)
+
+    def with_placeholders(self) -> str:
+        """The content with every slot as a placeholder, for transforming it once at compile time."""
+        return self.render({slot: _PLACEHOLDER.format(slot) for slot in self.slots})
+
+    def render(self, values: Dict) -> str:
+        segments = self.segments
+        quoted = self.quoted
+        out = [segments[0]]
+        for i, slot in enumerate(self.slots):
+            value = values.get(slot)
+            value = '' if value is None else str(value)
+            out.append(url_quote(value, safe=TRACKED_URL_SAFE) if i in quoted else value)
+            out.append(segments[i + 1])
+        return ''.join(out)
+
+
+class EngineRenderer:
+    """Fallback for content that needs the Django template engine; parsed once, rendered per recipient."""
+
+    def __init__(self, content: str, fallback: Callable[[str, Dict], str]):
+        self.content = content
+        self.fallback = fallback
+        try:
+            self.template = Engine().from_string(content)
+        except Exception as e:
+            logger.error(f"Error compiling email template: {str(e)}")
+            self.template = None
+
+    def render(self, values: Dict) -> str:
+        if self.template is None:
+            return self.fallback(self.content, values)
+        return self.template.render(Context(values, autoescape=False))
+
+
+def compile_content(content: str, fallback: Callable[[str, Dict], str]):
+    """RenderPlan for content if possible, else an EngineRenderer; both have render(values)."""
+    return RenderPlan.compile(content) or EngineRenderer(content, fallback)
+
+
+class TemplateRenderPlan:
+    """Everything EmailService.send_email renders for one EmailTemplate, compiled once."""
+
+    def __init__(self, template, campaign_id: int, track: Callable[[str, str, int], str],
+                 fallback: Callable[[str, Dict], str], spam_score: Callable[[str, str, str], float]):
+        self.subject = compile_content(template.subject, fallback)
+        self.html = compile_content(template.html_content, fallback)
+        self.text = compile_content(template.text_content, fallback) if template.text_content else None
+        self.text_from_html = None
+        self.tracked_html = None
+        self.link_slots = frozenset()  # variables used inside tracked links
+        if isinstance(self.html, RenderPlan):
+            html = self.html.with_placeholders()
+            if self.text is None:
+                self.text_from_html = RenderPlan.from_placeholders(TAG_RE.sub('', html))
+            if not _HREF_FROM_VARIABLE_RE.search(html):
+                tracked = RenderPlan.from_placeholders(
+                    track(html, _PLACEHOLDER.format(TRACKING_TOKEN_SLOT), campaign_id)
+                )
+                # Every variable must come through tracking, either as-is or URL-encoded in a link
+                if sorted(s for s in tracked.slots if s != TRACKING_TOKEN_SLOT) == sorted(self.html.slots):
+                    self.tracked_html = tracked
+                    self.link_slots = tracked.quoted_slots
+        self.spam_score = spam_score(template.subject, template.html_content, template.text_content or '')
+
+    @staticmethod
+    def markup_free(values: Dict) -> bool:
+        """True if no value could add or change tags (the precompiled plain text is exact)."""
+        for value in values.values():
+            value = str(value)
+            if '<' in value or '>' in value:
+                return False
+        return True
+
+    def tracking_exact(self, values: Dict) -> bool:
+        """True if the precompiled tracked HTML matches tracking the rendered HTML for these values."""
+        if self.tracked_html is None or not self.markup_free(values):
+            return False
+        for slot in self.link_slots:
+            if _LINK_UNSAFE_RE.search(str(values.get(slot) or '')):
+                return False
+        return True
+
+
+class RenderPlanCache:
+    """
+    In-process LRU of TemplateRenderPlans keyed by (template id, updated_at, campaign id).
+    Editing a template changes updated_at, so stale plans are never used.
+    """
+
+    def __init__(self, max_entries: int = None):
+        self.max_entries = max_entries or int(getattr(settings, 'EMAIL_RENDER_PLAN_CACHE_SIZE', DEFAULT_CACHE_SIZE))
+        self._plans = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, build: Callable[[], TemplateRenderPlan]) -> TemplateRenderPlan:
+        with self._lock:
+            plan = self._plans.get(key)
+            if plan is not None:
+                self._plans.move_to_end(key)
+                self.hits += 1
+                return plan
+            self.misses += 1
+        plan = build()
+        with self._lock:
+            self._plans[key] = plan
+            while len(self._plans) > self.max_entries:
+                self._plans.popitem(last=False)
+        return plan
+
+    def clear(self) -> None:
+        with self._lock:
+            self._plans.clear()
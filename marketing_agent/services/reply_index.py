@@ -0,0 +1,171 @@
+"""
+Reply Index
+Set-based lookups used by sync_inbox to match fetched messages against what
+we sent, instead of one EmailSendHistory query per header value:
+
+- resolve_message_ids(): normalized Message-ID -> EmailSendHistory for a
+  whole batch of In-Reply-To/References values in one query (served by the
+  indexed EmailSendHistory.message_id column)
+- recent_sends_by_recipient(): recent sends per recipient for the
+  "Re: <subject>" fallback, one query per batch
+- lead_contact_index(): lead email -> {campaign id: contact id} for the
+  leads of active campaigns, one query per sync run
+- recorded_reply_ids(): which fetched replies are already stored as Reply
+  rows (by the reply's own Message-ID), one query per batch, so re-scanning
+  mail (--full-scan, UIDVALIDITY change) never records a reply twice
+
+match_reply() then decides per message using only these in-memory maps.
+IN lists are split into chunks of LOOKUP_CHUNK_SIZE values: long threads
+carry dozens of References each, which would otherwise exceed SQL Server's
+2100-parameter limit.
+"""
+import logging
+import re
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from marketing_agent.models import CampaignContact, CampaignLead, EmailSendHistory, Reply
+
+logger = logging.getLogger(__name__)
+
+SUBJECT_FALLBACK_DAYS = 14
+SUBJECT_FALLBACK_SENDS = 10  # most recent sends per recipient compared by subject
+REPLIED_TO_STATUSES = ['sent', 'delivered', 'opened', 'clicked']
+REPLY_PREFIX_RE = re.compile(r'^(re:|fw:|fwd:)\s*', flags=re.IGNORECASE)
+MESSAGE_ID_RE = re.compile(r'<([^>]+)>')
+LOOKUP_CHUNK_SIZE = 1000  # values per IN query (SQL Server allows 2100 parameters)
+
+
+def _chunks(values: Iterable[str]) -> Iterable[List[str]]:
+    values = sorted(values)
+    for start in range(0, len(values), LOOKUP_CHUNK_SIZE):
+        yield values[start:start + LOOKUP_CHUNK_SIZE]
+
+
+def normalize_message_id(value: Optional[str]) -> str:
+    """Message-ID as stored in EmailSendHistory.message_id (no < >, no whitespace)."""
+    return (value or '').strip().strip('<>').strip()
+
+
+def referenced_message_ids(msg) -> List[str]:
+    """Normalized Message-IDs a message replies to, In-Reply-To first, then References in order."""
+    ids = []
+    in_reply_to = normalize_message_id(msg.get('In-Reply-To'))
+    if in_reply_to:
+        ids.append(in_reply_to)
+    for message_id in MESSAGE_ID_RE.findall(msg.get('References') or ''):
+        message_id = normalize_message_id(message_id)
+        if message_id and message_id not in ids:
+            ids.append(message_id)
+    return ids
+
+
+def resolve_message_ids(message_ids: Iterable[str]) -> Dict[str, EmailSendHistory]:
+    """
+    Resolve a batch of Message-IDs to the emails we sent, in one query.
+
+    Returns:
+        dict: normalized Message-ID (as given, and lower-cased) -> EmailSendHistory
+    """
+    wanted = {normalize_message_id(m) for m in message_ids} - {''}
+    if not wanted:
+        return {}
+    # Some servers lower-case header values; look up both spellings
+    lookup = wanted | {m.lower() for m in wanted}
+    sent_emails = [
+        sent_email
+        for chunk in _chunks(lookup)
+        for sent_email in EmailSendHistory.objects.filter(message_id__in=chunk).select_related('campaign', 'lead')
+    ]
+    resolved = {}
+    for sent_email in sorted(sent_emails, key=lambda e: e.id):
+        # First send wins, as with .filter(message_id=...).first()
+        resolved.setdefault(sent_email.message_id, sent_email)
+        resolved.setdefault(sent_email.message_id.lower(), sent_email)
+    return resolved
+
+
+def recorded_reply_ids(message_ids: Iterable[str]) -> Set[str]:
+    """The given (normalized) reply Message-IDs that already have a Reply row."""
+    wanted = {normalize_message_id(m) for m in message_ids} - {''}
+    if not wanted:
+        return set()
+    recorded = set()
+    for chunk in _chunks(wanted):
+        recorded.update(Reply.objects.filter(message_id__in=chunk).values_list('message_id', flat=True))
+    return recorded
+
+
+def recent_sends_by_recipient(recipient_emails: Iterable[str],
+                              days: int = SUBJECT_FALLBACK_DAYS) -> Dict[str, List[EmailSendHistory]]:
+    """Recent sends to each recipient (newest first, at most SUBJECT_FALLBACK_SENDS each), in one query."""
+    recipients = {e.lower() for e in recipient_emails if e}
+    if not recipients:
+        return {}
+    since = timezone.now() - timedelta(days=days)
+    recent = [
+        sent_email
+        for chunk in _chunks(recipients)
+        for sent_email in EmailSendHistory.objects.filter(
+            recipient_email__in=chunk,
+            sent_at__gte=since,
+            status__in=REPLIED_TO_STATUSES,
+        ).select_related('campaign', 'lead').order_by('-sent_at')
+    ]
+    sends: Dict[str, List[EmailSendHistory]] = {}
+    for sent_email in recent:  # each recipient's sends come from one chunk, newest first
+        bucket = sends.setdefault(sent_email.recipient_email.lower(), [])
+        if len(bucket) < SUBJECT_FALLBACK_SENDS:
+            bucket.append(sent_email)
+    return sends
+
+
+def strip_reply_prefix(subject: str) -> str:
+    return REPLY_PREFIX_RE.sub('', subject or '').strip()
+
+
+def match_reply(msg, subject: str, sender_email: Optional[str],
+                sent_by_message_id: Dict[str, EmailSendHistory],
+                recent_by_recipient: Optional[Dict[str, List[EmailSendHistory]]] = None
+                ) -> Tuple[Optional[EmailSendHistory], Optional[str]]:
+    """
+    Match one message using the batch maps above (no queries).
+
+    Returns:
+        (sent_email, method): method is 'in-reply-to', 'references' or 'subject'; (None, None) if not a reply
+    """
+    ids = referenced_message_ids(msg)
+    has_in_reply_to = bool(normalize_message_id(msg.get('In-Reply-To')))
+    for position, message_id in enumerate(ids):
+        sent_email = sent_by_message_id.get(message_id) or sent_by_message_id.get(message_id.lower())
+        if sent_email:
+            method = 'in-reply-to' if position == 0 and has_in_reply_to else 'references'
+            return sent_email, method
+
+    if recent_by_recipient and sender_email and subject and subject.lower().startswith('re:'):
+        wanted = strip_reply_prefix(subject).lower()
+        for sent_email in recent_by_recipient.get(sender_email.lower(), []):
+            if strip_reply_prefix(sent_email.subject).lower() == wanted:
+                return sent_email, 'subject'
+    return None, None
+
+
+def lead_contact_index() -> Dict[str, Dict[int, Optional[int]]]:
+    """
+    Lead email (lower-case) -> {campaign id: first CampaignContact id or None} for every lead
+    of an active campaign, in one query. The keys double as the set of known lead senders.
+    """
+    first_contact = CampaignContact.objects.filter(
+        campaign_id=OuterRef('campaign_id'), lead_id=OuterRef('lead_id'),
+    ).order_by('id').values('id')[:1]
+    rows = CampaignLead.objects.filter(
+        campaign__status='active'
+    ).annotate(contact_id=Subquery(first_contact)).values_list('lead__email', 'campaign_id', 'contact_id')
+    index: Dict[str, Dict[int, Optional[int]]] = {}
+    for lead_email, campaign_id, contact_id in rows.iterator(chunk_size=2000):
+        if lead_email:
+            index.setdefault(lead_email.lower(), {})[campaign_id] = contact_id
+    return index
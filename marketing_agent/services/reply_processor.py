@@ -12,7 +12,7 @@ import re
 logger = logging.getLogger(__name__)
 
 
-def process_reply_directly(campaign, lead, reply_subject, reply_content, reply_date=None):
+def process_reply_directly(campaign, lead, reply_subject, reply_content, reply_date=None, message_id=''):
     """
     Process an email reply directly (without HTTP request)
     This is the core logic extracted from mark_contact_replied view
@@ -23,11 +23,17 @@ def process_reply_directly(campaign, lead, reply_subject, reply_content, reply_d
         reply_subject: Reply email subject
         reply_content: Reply email content
         reply_date: Reply date (optional, defaults to now)
+        message_id: Message-ID of the reply email (optional); a reply already
+            recorded under it is not processed again
     
     Returns:
         dict: {'success': bool, 'message': str, 'error': str (if failed)}
     """
     try:
+        if message_id and Reply.objects.filter(message_id=message_id).exists():
+            logger.info(f"Reply {message_id} from {lead.email} already recorded - skipping")
+            return {'success': True, 'message': 'Reply already recorded', 'duplicate': True}
+        
         # Get or create contact
         contact = CampaignContact.objects.filter(
             campaign=campaign,
@@ -180,6 +186,7 @@ def process_reply_directly(campaign, lead, reply_subject, reply_content, reply_d
                 sub_sequence=reply_sub_sequence,
                 reply_subject=reply_subject,
                 reply_content=reply_content,
+                message_id=message_id or '',
                 interest_level=interest_level,
                 analysis=analysis,
                 triggering_email=triggering_email,
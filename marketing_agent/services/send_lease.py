@@ -0,0 +1,115 @@
+"""
+Send Lease
+Per-campaign lease for the sequence sender, so campaigns can be sent by many
+Celery workers at once without any contact being processed twice.
+
+A run of send_sequence_emails holds one token. It leases each campaign it
+sends with a conditional UPDATE (free or expired lease only), which is atomic
+on every database backend and needs no shared cache. Campaigns leased by
+another run are skipped. The lease is renewed while the run works and
+released when it finishes; a crashed worker's lease simply expires.
+
+hold() is checked before every contact: once less than half of a lease is
+left it is renewed on the spot, so a slow chunk (SMTP timeouts, throttling)
+can never outlast the lease and overlap with a run that took it over.
+"""
+import logging
+import time
+import uuid
+from datetime import timedelta
+from typing import Dict, Set
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from marketing_agent.models import Campaign
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEASE_SECONDS = 900
+
+
+class CampaignSendLease:
+    """Campaign leases held by one sender run."""
+
+    def __init__(self, lease_seconds: int = None):
+        self.token = uuid.uuid4().hex
+        self.lease_seconds = int(
+            lease_seconds or getattr(settings, 'SEQUENCE_SEND_LEASE_SECONDS', DEFAULT_LEASE_SECONDS)
+        )
+        self.campaign_ids: Set[int] = set()
+        # campaign id -> time.monotonic() the lease lasts until (taken before the UPDATE,
+        # so it never outlives the stored expiry)
+        self._deadlines: Dict[int, float] = {}
+
+    def _expires_at(self):
+        return timezone.now() + timedelta(seconds=self.lease_seconds)
+
+    def _drop(self, campaign_ids) -> None:
+        if campaign_ids:
+            logger.warning(f"Send lease lost for campaign(s) {sorted(campaign_ids)}; another worker took over")
+        for campaign_id in campaign_ids:
+            self.campaign_ids.discard(campaign_id)
+            self._deadlines.pop(campaign_id, None)
+
+    def acquire(self, campaign_id: int) -> bool:
+        """Lease a campaign unless another run holds an unexpired lease on it."""
+        started = time.monotonic()
+        acquired = Campaign.objects.filter(id=campaign_id).filter(
+            Q(send_lease_token='') | Q(send_lease_token=self.token)
+            | Q(send_lease_expires_at__isnull=True) | Q(send_lease_expires_at__lt=timezone.now())
+        ).update(send_lease_token=self.token, send_lease_expires_at=self._expires_at())
+        if acquired:
+            self.campaign_ids.add(campaign_id)
+            self._deadlines[campaign_id] = started + self.lease_seconds
+        return bool(acquired)
+
+    def hold(self, campaign_id: int) -> bool:
+        """
+        Check that this run still holds a campaign's lease before working on it,
+        renewing it once less than half of it is left.
+
+        Returns:
+            bool: False if the lease lapsed and another run took the campaign over
+        """
+        if campaign_id not in self.campaign_ids:
+            return False
+        if self._deadlines.get(campaign_id, 0) - time.monotonic() > self.lease_seconds / 2:
+            return True  # unexpired: no other run can have taken it
+        started = time.monotonic()
+        renewed = Campaign.objects.filter(id=campaign_id, send_lease_token=self.token).update(
+            send_lease_expires_at=self._expires_at()
+        )
+        if not renewed:
+            self._drop({campaign_id})
+            return False
+        self._deadlines[campaign_id] = started + self.lease_seconds
+        return True
+
+    def renew(self) -> Set[int]:
+        """
+        Extend every lease this run still holds.
+
+        Returns:
+            set: Campaign ids still leased (a lease that lapsed and was taken over is dropped)
+        """
+        if not self.campaign_ids:
+            return set()
+        started = time.monotonic()
+        Campaign.objects.filter(send_lease_token=self.token).update(send_lease_expires_at=self._expires_at())
+        held = set(Campaign.objects.filter(send_lease_token=self.token).values_list('id', flat=True))
+        self._drop(self.campaign_ids - held)
+        self.campaign_ids = held
+        for campaign_id in held:
+            self._deadlines[campaign_id] = started + self.lease_seconds
+        return held
+
+    def release(self) -> None:
+        """Give up every lease this run holds."""
+        if self.campaign_ids:
+            Campaign.objects.filter(send_lease_token=self.token).update(
+                send_lease_token='', send_lease_expires_at=None
+            )
+        self.campaign_ids = set()
+        self._deadlines = {}
@@ -0,0 +1,123 @@
+"""
+Sequence Schedule
+Materialized send times on CampaignContact so send_sequence_emails only
+loads contacts that are due:
+
+- next_send_at: when the next main-sequence step is due
+- sub_sequence_next_send_at: when the next sub-sequence step is due
+
+Both follow the timing rules the sender has always used: the first step is
+due a delay after the contact started (main sequence) or replied
+(sub-sequence), delays of a minute or less send right away, and later steps
+are due a delay after the previous send. None means there is nothing to
+send. A contact that needs housekeeping (all steps sent, missing timestamps)
+is due immediately so the sender can complete or repair it.
+
+CampaignContact.save() keeps both fields current. Bulk writes and step
+edits, which bypass save(), call reschedule_contacts().
+"""
+import logging
+from datetime import timedelta
+from typing import List, Optional
+
+from django.db.models import Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+IMMEDIATE_DELAY = timedelta(minutes=1)
+SCHEDULE_FIELDS = ['next_send_at', 'sub_sequence_next_send_at']
+RESCHEDULE_BATCH_SIZE = 1000
+
+
+def step_delay(step) -> timedelta:
+    return timedelta(days=step.delay_days, hours=step.delay_hours, minutes=step.delay_minutes)
+
+
+def ordered_steps(sequence) -> List:
+    """Steps of a sequence by step_order (served from prefetch_related('...__steps') when present)."""
+    if sequence is None:
+        return []
+    return sorted(sequence.steps.all(), key=lambda step: step.step_order)
+
+
+def _next_step_due(steps, current_step, reference, last_sent_at, now):
+    if not steps:
+        return None
+    next_number = current_step + 1
+    if next_number > len(steps):
+        return now  # every step sent - the sender marks it completed
+    step = next((s for s in steps if s.step_order == next_number), None)
+    if step is None:
+        return None
+    delay = step_delay(step)
+    if current_step == 0:
+        return reference if delay <= IMMEDIATE_DELAY else reference + delay
+    if not last_sent_at:
+        return now  # inconsistent state - the sender resets the step
+    return last_sent_at + delay
+
+
+def next_main_send_at(contact, steps=None, now=None) -> Optional:
+    """When the contact's next main-sequence step is due (None: nothing to send)."""
+    if contact.completed or contact.replied or contact.sequence_id is None:
+        return None
+    now = now or timezone.now()
+    if steps is None:
+        steps = ordered_steps(contact.sequence)
+    reference = contact.started_at or contact.created_at or now
+    return _next_step_due(steps, contact.current_step, reference, contact.last_sent_at, now)
+
+
+def next_sub_send_at(contact, steps=None, now=None) -> Optional:
+    """When the contact's next sub-sequence step is due (None: nothing to send)."""
+    if not contact.replied or contact.sub_sequence_id is None or contact.sub_sequence_completed:
+        return None
+    now = now or timezone.now()
+    if steps is None:
+        steps = ordered_steps(contact.sub_sequence)
+    # Without replied_at the sender sets it to now before sending
+    reference = contact.replied_at or now
+    return _next_step_due(steps, contact.sub_sequence_step, reference, contact.sub_sequence_last_sent_at, now)
+
+
+def reschedule_contacts(contacts, batch_size: int = RESCHEDULE_BATCH_SIZE) -> int:
+    """
+    Recompute next_send_at / sub_sequence_next_send_at for a queryset of contacts.
+    Used after writes that bypass CampaignContact.save() (queryset.update, step edits).
+
+    Returns:
+        int: Number of contacts whose schedule changed
+    """
+    from marketing_agent.models import CampaignContact
+
+    contacts = contacts.select_related(None).prefetch_related('sequence__steps', 'sub_sequence__steps')
+    now = timezone.now()
+    changed = 0
+    last_id = 0
+    while True:
+        page = list(contacts.filter(id__gt=last_id).order_by('id')[:batch_size])
+        if not page:
+            break
+        last_id = page[-1].id
+        updated = []
+        for contact in page:
+            next_send_at = next_main_send_at(contact, now=now)
+            sub_next_send_at = next_sub_send_at(contact, now=now)
+            if (next_send_at, sub_next_send_at) != (contact.next_send_at, contact.sub_sequence_next_send_at):
+                contact.next_send_at = next_send_at
+                contact.sub_sequence_next_send_at = sub_next_send_at
+                updated.append(contact)
+        if updated:
+            CampaignContact.objects.bulk_update(updated, SCHEDULE_FIELDS)
+            changed += len(updated)
+    if changed:
+        logger.info(f'Rescheduled {changed} campaign contact(s)')
+    return changed
+
+
+def reschedule_sequence_contacts(sequence) -> int:
+    """Recompute the schedule of every contact in a sequence (main or sub) after its steps changed."""
+    from marketing_agent.models import CampaignContact
+
+    return reschedule_contacts(CampaignContact.objects.filter(Q(sequence=sequence) | Q(sub_sequence=sequence)))
@@ -0,0 +1,233 @@
+"""
+SMTP Connection Pool
+Keeps authenticated SMTP connections open per EmailAccount so consecutive
+sends (e.g. a send_sequence_emails run) reuse one TCP+TLS handshake and
+login instead of opening a new connection for every email.
+
+Connections are keyed by the account's SMTP settings, so editing an
+account's host/credentials starts a new pool. Each account is capped at
+SMTP_POOL_MAX_CONNECTIONS_PER_ACCOUNT connections; idle connections older
+than SMTP_POOL_IDLE_TIMEOUT are closed instead of reused; a send that fails
+because the server dropped a reused connection is retried once on a
+fresh one.
+"""
+import hashlib
+import logging
+import smtplib
+import threading
+import time
+from typing import Any, Dict, List, Tuple
+
+from django.conf import settings
+from django.core.mail.backends.smtp import EmailBackend
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONNECTIONS_PER_ACCOUNT = 2
+DEFAULT_IDLE_TIMEOUT = 60  # seconds; most SMTP servers drop idle sessions after a few minutes
+DEFAULT_ACQUIRE_TIMEOUT = 60  # seconds
+
+# Errors that mean a reused session was dropped by the server (reconnect and retry once).
+# Timeouts are not retried: the server may already have accepted the message.
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError)
+
+
+class _AccountPool:
+    """Idle connections, connection cap and counters for one EmailAccount."""
+
+    def __init__(self, label: str, max_connections: int):
+        self.label = label
+        self.max_connections = max_connections
+        self.slots = threading.BoundedSemaphore(max_connections)
+        self.idle: List[Tuple[EmailBackend, float]] = []  # (backend, last_used)
+        self.lock = threading.Lock()
+        self.handshakes = 0
+        self.reused = 0
+        self.reconnects = 0
+        self.sends = 0
+        self.failures = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                'account': self.label,
+                'max_connections': self.max_connections,
+                'idle_connections': len(self.idle),
+                'handshakes': self.handshakes,
+                'handshakes_avoided': self.reused,
+                'reconnects': self.reconnects,
+                'sends': self.sends,
+                'failures': self.failures,
+            }
+
+
+class SMTPConnectionPool:
+    """
+    Pooled SMTP connections keyed by EmailAccount.
+    Use get_smtp_pool() to access the shared instance.
+    """
+
+    def __init__(self):
+        self._pools: Dict[tuple, _AccountPool] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(email_account) -> tuple:
+        secret = hashlib.sha256((email_account.smtp_password or '').encode('utf-8')).hexdigest()
+        return (
+            email_account.pk, email_account.smtp_host, email_account.smtp_port,
+            email_account.smtp_username, secret, email_account.use_tls, email_account.use_ssl,
+        )
+
+    def _pool_for(self, email_account) -> _AccountPool:
+        key = self._key(email_account)
+        pool = self._pools.get(key)
+        if pool is None:
+            with self._lock:
+                pool = self._pools.get(key)
+                if pool is None:
+                    # Account settings changed: retire connections opened with the old ones
+                    stale = [k for k in self._pools if k[0] == email_account.pk]
+                    for k in stale:
+                        self._close_pool(self._pools.pop(k))
+                    max_connections = int(getattr(
+                        settings, 'SMTP_POOL_MAX_CONNECTIONS_PER_ACCOUNT', DEFAULT_MAX_CONNECTIONS_PER_ACCOUNT
+                    ))
+                    pool = _AccountPool(email_account.email, max(1, max_connections))
+                    self._pools[key] = pool
+        return pool
+
+    @staticmethod
+    def _open(email_account, pool: _AccountPool) -> EmailBackend:
+        backend = EmailBackend(
+            host=email_account.smtp_host,
+            port=email_account.smtp_port,
+            username=email_account.smtp_username,
+            password=email_account.smtp_password,
+            use_tls=email_account.use_tls,
+            use_ssl=email_account.use_ssl,
+            fail_silently=False,
+        )
+        backend.open()
+        with pool.lock:
+            pool.handshakes += 1
+        return backend
+
+    @staticmethod
+    def _close(backend: EmailBackend) -> None:
+        try:
+            backend.close()
+        except Exception:
+            pass
+
+    def _checkout(self, email_account, pool: _AccountPool) -> Tuple[EmailBackend, bool]:
+        """Return (backend, reused)."""
+        idle_timeout = float(getattr(settings, 'SMTP_POOL_IDLE_TIMEOUT', DEFAULT_IDLE_TIMEOUT))
+        now = time.monotonic()
+        while True:
+            with pool.lock:
+                if not pool.idle:
+                    break
+                backend, last_used = pool.idle.pop()
+            if now - last_used <= idle_timeout and backend.connection is not None:
+                with pool.lock:
+                    pool.reused += 1
+                return backend, True
+            self._close(backend)
+        return self._open(email_account, pool), False
+
+    def _checkin(self, pool: _AccountPool, backend: EmailBackend) -> None:
+        with pool.lock:
+            pool.idle.append((backend, time.monotonic()))
+
+    def send(self, email_account, message) -> int:
+        """
+        Send an EmailMessage through a pooled connection for email_account.
+        Retries once on a fresh connection if the pooled one was dropped.
+
+        Returns:
+            int: Number of messages sent (as EmailBackend.send_messages)
+        """
+        pool = self._pool_for(email_account)
+        timeout = float(getattr(settings, 'SMTP_POOL_ACQUIRE_TIMEOUT', DEFAULT_ACQUIRE_TIMEOUT))
+        if not pool.slots.acquire(timeout=timeout):
+            raise TimeoutError(
+                f'Timed out after {timeout}s waiting for an SMTP connection for {email_account.email} '
+                f'(max {pool.max_connections} per account)'
+            )
+        try:
+            backend, reused = self._checkout(email_account, pool)
+            try:
+                message.connection = backend
+                sent = backend.send_messages([message])
+            except CONNECTION_ERRORS as e:
+                if not reused:
+                    self._close(backend)
+                    with pool.lock:
+                        pool.failures += 1
+                    raise
+                logger.info(f"SMTP connection for {email_account.email} dropped ({e}); reconnecting")
+                self._close(backend)
+                with pool.lock:
+                    pool.reconnects += 1
+                backend = self._open(email_account, pool)
+                try:
+                    message.connection = backend
+                    sent = backend.send_messages([message])
+                except Exception:
+                    self._close(backend)
+                    with pool.lock:
+                        pool.failures += 1
+                    raise
+            except Exception:
+                # SMTP-level rejection (bad recipient etc.): the session may be mid-transaction, don't reuse it
+                self._close(backend)
+                with pool.lock:
+                    pool.failures += 1
+                raise
+            with pool.lock:
+                pool.sends += 1
+            self._checkin(pool, backend)
+            return sent
+        finally:
+            pool.slots.release()
+
+    def _close_pool(self, pool: _AccountPool) -> None:
+        with pool.lock:
+            idle = pool.idle
+            pool.idle = []
+        for backend, _ in idle:
+            self._close(backend)
+
+    def close_all(self) -> None:
+        """Close every idle connection (end of a sequence run / worker shutdown). Counters are kept."""
+        with self._lock:
+            pools = list(self._pools.values())
+        for pool in pools:
+            self._close_pool(pool)
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-account connection counters plus totals."""
+        with self._lock:
+            pools = list(self._pools.values())
+        accounts = [pool.stats() for pool in pools]
+        return {
+            'accounts': accounts,
+            'handshakes': sum(a['handshakes'] for a in accounts),
+            'handshakes_avoided': sum(a['handshakes_avoided'] for a in accounts),
+            'sends': sum(a['sends'] for a in accounts),
+        }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_smtp_pool() -> SMTPConnectionPool:
+    """Get the process-wide SMTP connection pool (singleton pattern)."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = SMTPConnectionPool()
+    return _pool
@@ -0,0 +1,272 @@
+"""
+Email Tracking Buffer
+Write-behind ingest for open/click tracking. The pixel and redirect views
+only append an event to an in-process buffer and return; a daemon thread
+flushes the buffer in batches:
+
+- one query loads (and row-locks) the EmailSendHistory rows for all tokens
+  in the batch
+- events are applied in order (same status rules as before) and the changed
+  rows are written with one bulk_update of the tracking fields only
+- every event is kept in EmailTrackingEvent (one bulk_create) for
+  per-event analytics
+
+A batch is flushed every EMAIL_TRACKING_FLUSH_INTERVAL seconds or as soon as
+EMAIL_TRACKING_FLUSH_EVENTS events are buffered, and at interpreter exit.
+A batch that fails (database blip, deadlock on the row locks) is rolled back
+as a whole and goes back to the front of the buffer; after
+EMAIL_TRACKING_MAX_ATTEMPTS failures its events are dropped and logged.
+Set EMAIL_TRACKING_BUFFER_ENABLED = False to write synchronously.
+"""
+import atexit
+import logging
+import os
+import threading
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FLUSH_INTERVAL = 1.0  # seconds
+DEFAULT_FLUSH_EVENTS = 500
+DEFAULT_MAX_BUFFERED_EVENTS = 50000
+DEFAULT_MAX_ATTEMPTS = 3
+TRACKED_FIELDS = ['status', 'delivered_at', 'opened_at', 'clicked_at', 'updated_at']
+
+
+def apply_open(send_history, at) -> bool:
+    """Apply an open to an EmailSendHistory in memory. Returns True if anything changed."""
+    if send_history.status not in ['opened', 'clicked']:
+        # Mark as delivered first if needed
+        if send_history.status == 'sent' and not send_history.delivered_at:
+            send_history.delivered_at = at
+        send_history.status = 'opened'
+        send_history.opened_at = at
+        return True
+    if not send_history.opened_at:
+        send_history.opened_at = at
+        return True
+    return False
+
+
+def apply_click(send_history, at) -> bool:
+    """Apply a click to an EmailSendHistory in memory. Returns True (a click always updates clicked_at)."""
+    # Mark as delivered/opened first if needed
+    if send_history.status == 'sent' and not send_history.delivered_at:
+        send_history.delivered_at = at
+    if send_history.status in ['sent', 'delivered'] and not send_history.opened_at:
+        send_history.opened_at = at
+    send_history.status = 'clicked'
+    send_history.clicked_at = at
+    return True
+
+
+class TrackingEventBuffer:
+    """
+    In-process buffer of tracking events with a background flusher.
+    Use get_tracking_buffer() to access the shared instance.
+    """
+
+    def __init__(self):
+        self.flush_interval = float(getattr(settings, 'EMAIL_TRACKING_FLUSH_INTERVAL', DEFAULT_FLUSH_INTERVAL))
+        self.flush_events = max(1, int(getattr(settings, 'EMAIL_TRACKING_FLUSH_EVENTS', DEFAULT_FLUSH_EVENTS)))
+        self.max_buffered_events = int(getattr(
+            settings, 'EMAIL_TRACKING_MAX_BUFFERED_EVENTS', DEFAULT_MAX_BUFFERED_EVENTS
+        ))
+        self.max_attempts = max(1, int(getattr(settings, 'EMAIL_TRACKING_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS)))
+        self.dropped = 0
+        self.failed = 0
+        self.flushed = 0
+        self._start()
+
+    def _start(self) -> None:
+        self._events: deque = deque()
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()  # one batch at a time (flusher vs explicit flush)
+        self._closed = False
+        self._retrying = False  # last flush failed: wait an interval before the next attempt
+        self._thread = threading.Thread(target=self._run, name='tracking-flusher', daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def enabled() -> bool:
+        return bool(getattr(settings, 'EMAIL_TRACKING_BUFFER_ENABLED', True))
+
+    def record(self, event_type: str, tracking_token: str, url: str = '',
+               user_agent: str = '', ip_address: Optional[str] = None) -> None:
+        """Queue one open/click. Never touches the database unless buffering is disabled."""
+        event = {
+            'event_type': event_type,
+            'token': tracking_token,
+            'url': url or '',
+            'user_agent': (user_agent or '')[:500],
+            'ip_address': ip_address or None,
+            'at': timezone.now(),
+        }
+        if not self.enabled():
+            self._write([event])
+            return
+        with self._cond:
+            if len(self._events) >= self.max_buffered_events:
+                # Never block the request; drop the oldest event if the database can't keep up
+                self._events.popleft()
+                self.dropped += 1
+            self._events.append(event)
+            if len(self._events) >= self.flush_events:
+                self._cond.notify()
+
+    def flush(self) -> int:
+        """Write everything buffered so far. Returns the number of events written."""
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._cond:
+                    batch = [self._events.popleft() for _ in range(min(self.flush_events, len(self._events)))]
+                if not batch:
+                    return written
+                try:
+                    self._write(batch)
+                    written += len(batch)
+                    self._retrying = False
+                except Exception as e:
+                    self._retry_or_drop(batch, e)
+                    return written
+
+    def close(self) -> None:
+        """Stop the flusher thread after writing what is buffered."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+        self.flush()
+
+    def _retry_or_drop(self, batch: List[Dict[str, Any]], error: Exception) -> None:
+        """Requeue a failed batch at the front of the buffer, dropping events out of attempts."""
+        retry, failed = [], []
+        for event in batch:
+            event['attempts'] = event.get('attempts', 0) + 1
+            (retry if event['attempts'] < self.max_attempts else failed).append(event)
+        with self._cond:
+            self._events.extendleft(reversed(retry))
+            self.failed += len(failed)
+            self._retrying = True
+        if retry:
+            logger.warning(f"Failed to flush {len(retry)} tracking event(s), will retry: {error}", exc_info=True)
+        if failed:
+            logger.error(
+                f"Dropped {len(failed)} tracking event(s) after {self.max_attempts} failed attempts: {error}",
+                exc_info=True,
+            )
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if not self._closed and (self._retrying or len(self._events) < self.flush_events):
+                    self._cond.wait(self.flush_interval)
+                if self._closed:
+                    return
+                pending = bool(self._events)
+            if pending:
+                close_old_connections()
+                try:
+                    self.flush()
+                finally:
+                    close_old_connections()
+
+    def _write(self, events: List[Dict[str, Any]]) -> None:
+        from marketing_agent.models import EmailSendHistory, EmailTrackingEvent
+
+        tokens = {event['token'] for event in events}
+        with transaction.atomic():
+            # Rows are locked until the bulk update, so concurrent status changes aren't overwritten
+            rows = {
+                row.tracking_token: row
+                for row in EmailSendHistory.objects.select_for_update().filter(tracking_token__in=tokens).only(
+                    'id', 'tracking_token', *TRACKED_FIELDS
+                )
+            }
+            raw_events = self._apply(events, rows)
+            # Same transaction: a failed batch leaves nothing behind, so retrying it can't double-count
+            if raw_events:
+                EmailTrackingEvent.objects.bulk_create(raw_events)
+        with self._cond:
+            self.flushed += len(events)
+
+    def _apply(self, events: List[Dict[str, Any]], rows: Dict[str, Any]) -> list:
+        """Apply events to the locked rows, bulk update the changed ones and return the raw event rows."""
+        from marketing_agent.models import EmailSendHistory, EmailTrackingEvent
+
+        changed = {}
+        raw_events = []
+        for event in events:
+            send_history = rows.get(event['token'])
+            if send_history is None:
+                logger.warning(f"[TRACKING] Token not found: {event['token'][:10]}...")
+                continue
+            old_status = send_history.status
+            apply = apply_open if event['event_type'] == 'open' else apply_click
+            if apply(send_history, event['at']):
+                send_history.updated_at = timezone.now()
+                changed[send_history.pk] = send_history
+                if send_history.status != old_status:
+                    logger.info(
+                        f"[STATUS UPDATED] Email ID {send_history.pk}: {old_status} → {send_history.status}"
+                    )
+            raw_events.append(EmailTrackingEvent(
+                send_history_id=send_history.pk,
+                event_type=event['event_type'],
+                url=event['url'],
+                user_agent=event['user_agent'],
+                ip_address=event['ip_address'],
+                occurred_at=event['at'],
+            ))
+        if changed:
+            EmailSendHistory.objects.bulk_update(list(changed.values()), TRACKED_FIELDS)
+        return raw_events
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                'enabled': self.enabled(),
+                'buffered': len(self._events),
+                'flushed': self.flushed,
+                'dropped': self.dropped,
+                'failed': self.failed,
+            }
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_tracking_buffer() -> TrackingEventBuffer:
+    """Get the process-wide tracking event buffer (singleton pattern)."""
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = TrackingEventBuffer()
+    return _buffer
+
+
+def flush_tracking_events() -> None:
+    """Flush buffered tracking events (also runs at interpreter exit)."""
+    if _buffer is not None:
+        _buffer.flush()
+
+
+def _restart_after_fork() -> None:
+    # The flusher thread doesn't survive fork; the parent flushed before forking
+    global _buffer_lock
+    _buffer_lock = threading.Lock()
+    if _buffer is not None:
+        _buffer._start()
+
+
+atexit.register(flush_tracking_events)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(before=flush_tracking_events, after_in_child=_restart_after_fork)
@@ -3,6 +3,7 @@ Celery tasks for marketing agent automation
 All tasks that were previously run via Windows Task Scheduler are now automated with Celery.
 """
 from celery import shared_task
+from django.conf import settings
 from django.core.management import call_command
 from django.utils import timezone
 from marketing_agent.models import Campaign, EmailSendHistory
@@ -20,11 +21,20 @@ def send_sequence_emails_task(self):
     - Respects user-defined delays (delay_days, delay_hours, delay_minutes) from sequence steps
     - Minimum time gap between emails is 5 minutes (task frequency)
     - Actual email timing is based on sequence step delays set by user
+    - With SEQUENCE_SEND_FANOUT (default) it only enqueues one send_campaign_sequence_emails_task
+      per active campaign, so campaigns are sent concurrently by however many workers are running
     
     Scheduled: Every 5 minutes via Celery Beat
     Replaces: Windows Task Scheduler running 'send_sequence_emails'
     """
     try:
+        if getattr(settings, 'SEQUENCE_SEND_FANOUT', True):
+            campaign_ids = list(Campaign.objects.filter(status='active').values_list('id', flat=True))
+            # Shards left over from an earlier beat are dropped; the next fan-out covers their campaigns
+            expires = getattr(settings, 'SEQUENCE_SEND_SHARD_EXPIRES', 600)
+            for campaign_id in campaign_ids:
+                send_campaign_sequence_emails_task.apply_async(args=[campaign_id], expires=expires)
+            return {'status': 'success', 'message': f'Queued sequence sending for {len(campaign_ids)} campaign(s)'}
         call_command('send_sequence_emails')
         return {'status': 'success', 'message': 'Sequence emails checked and sent based on user-defined delays'}
     except Exception as e:
@@ -33,6 +43,21 @@ def send_sequence_emails_task(self):
         raise self.retry(exc=e)
 
 
+@shared_task(bind=True, max_retries=3, default_retry_delay=300)
+def send_campaign_sequence_emails_task(self, campaign_id):
+    """
+    Celery task to send one campaign's sequence emails (a shard of send_sequence_emails_task).
+    The campaign send lease taken by send_sequence_emails makes a second shard for the same
+    campaign skip it, so no contact is sent to twice.
+    """
+    try:
+        call_command('send_sequence_emails', campaign_id=[campaign_id])
+        return {'status': 'success', 'campaign_id': campaign_id}
+    except Exception as e:
+        print(f'Error in sequence emails task for campaign {campaign_id}: {str(e)}')
+        raise self.retry(exc=e)
+
+
 @shared_task(bind=True, max_retries=3, default_retry_delay=300)
 def sync_inbox_task(self):
     """
@@ -160,12 +185,16 @@ def monitor_campaigns_task():
     """
     try:
         from marketing_agent.agents.proactive_notification_agent import ProactiveNotificationAgent
+        from marketing_agent.services.campaign_snapshot import build_campaign_snapshots
         agent = ProactiveNotificationAgent()
         
         # Monitor ALL campaigns (not just active) - each status needs different checks
-        all_campaigns = Campaign.objects.filter(
+        all_campaigns = list(Campaign.objects.filter(
             status__in=['active', 'scheduled', 'paused', 'draft']
-        ).select_related('owner')
+        ).select_related('owner'))
+        
+        # Gather what every check needs for all campaigns at once (fixed number of queries)
+        snapshots = build_campaign_snapshots(all_campaigns)
         
         total_notifications = 0
         campaigns_checked = 0
@@ -174,7 +203,7 @@ def monitor_campaigns_task():
         for campaign in all_campaigns:
             try:
                 # Check campaign for all notification types
-                result = agent.check_campaign(campaign.owner.id, campaign.id)
+                result = agent.run_campaign_checks(campaign, campaign.owner, snapshots[campaign.id])
                 
                 if result.get('success'):
                     notifications_created = result.get('notifications_created', 0)
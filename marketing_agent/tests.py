@@ -1,3 +1,359 @@
-from django.test import TestCase
+import re
+from datetime import timedelta
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.db import connection
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from marketing_agent.agents.proactive_notification_agent import ProactiveNotificationAgent
+from marketing_agent.models import (
+    Campaign, CampaignContact, CampaignLead, EmailSendHistory, EmailSequence, EmailSequenceStep, EmailTemplate,
+    EmailTrackingEvent, Lead, Reply,
+)
+from marketing_agent.services.campaign_snapshot import build_campaign_snapshots
+from marketing_agent.services.email_service import EmailService
+from marketing_agent.services.lead_import import import_leads
+from marketing_agent.services.reply_index import recorded_reply_ids, resolve_message_ids
+from marketing_agent.services.reply_processor import process_reply_directly
+from marketing_agent.services.send_lease import CampaignSendLease
+from marketing_agent.services.sequence_schedule import reschedule_sequence_contacts
+from marketing_agent.services.tracking_buffer import TrackingEventBuffer
+
+
+class CampaignMonitoringQueryTests(TestCase):
+    """ProactiveNotificationAgent monitoring reads pre-aggregated snapshots, not per-campaign counts."""
+
+    STATUSES = ['sent', 'delivered', 'opened', 'clicked', 'bounced', 'failed']
+
+    def _make_campaigns(self, user, count):
+        now = timezone.now()
+        campaigns = []
+        for c in range(count):
+            campaign = Campaign.objects.create(name=f'{user.username} campaign {c}', owner=user, status='active')
+            sequence = EmailSequence.objects.create(campaign=campaign, name='Intro')
+            sub_sequence = EmailSequence.objects.create(
+                campaign=campaign, name='Interested follow-up', parent_sequence=sequence, is_sub_sequence=True,
+            )
+            for i in range(12):
+                lead = Lead.objects.create(owner=user, email=f'{user.username}-{c}-{i}@example.com')
+                CampaignLead.objects.create(campaign=campaign, lead=lead)
+                EmailSendHistory.objects.create(
+                    campaign=campaign, lead=lead, subject='Hello', recipient_email=lead.email,
+                    status=self.STATUSES[i % len(self.STATUSES)], sent_at=now - timedelta(days=i),
+                )
+                if i < 3:
+                    contact = CampaignContact.objects.create(campaign=campaign, lead=lead, sequence=sequence)
+                    Reply.objects.create(
+                        contact=contact, campaign=campaign, lead=lead, replied_at=now - timedelta(hours=i),
+                        interest_level='positive' if i < 2 else 'negative',
+                        sub_sequence=sub_sequence if i == 0 else None,
+                    )
+            campaigns.append(campaign)
+        return campaigns
+
+    def _monitoring_queries(self, count):
+        user = User.objects.create_user(username=f'owner{count}', password='x')
+        self._make_campaigns(user, count)
+        # Activity is older than the rollup's re-scan window, so only monitoring itself is measured
+        an_hour_ago = timezone.now() - timedelta(hours=1)
+        EmailSendHistory.objects.update(updated_at=an_hour_ago)
+        Reply.objects.update(updated_at=an_hour_ago)
+        agent = ProactiveNotificationAgent()
+        # First run creates the notifications; the second one only finds duplicates
+        agent.monitor_all_campaigns(user.id)
+        with CaptureQueriesContext(connection) as ctx:
+            result = agent.monitor_all_campaigns(user.id)
+        self.assertTrue(result['success'])
+        self.assertEqual(result['campaigns_monitored'], count)
+        return len(ctx)
+
+    def test_monitoring_query_count_is_constant_in_number_of_campaigns(self):
+        self.assertEqual(self._monitoring_queries(2), self._monitoring_queries(6))
+
+    def test_snapshot_matches_per_campaign_counts(self):
+        user = User.objects.create_user(username='owner', password='x')
+        campaign = self._make_campaigns(user, 1)[0]
+        snapshot = build_campaign_snapshots([campaign])[campaign.id]
+        sends = EmailSendHistory.objects.filter(campaign=campaign)
+        week_ago = timezone.now() - timedelta(days=7)
+
+        self.assertEqual(snapshot.leads, campaign.leads.count())
+        self.assertEqual(snapshot.sequences, 2)
+        self.assertEqual(snapshot.followup_sequences, 1)
+        self.assertEqual(snapshot.metrics.total_sent, sends.count())
+        self.assertEqual(snapshot.metrics.opened, sends.filter(status__in=['opened', 'clicked']).count())
+        self.assertEqual(snapshot.metrics.replies, 3)
+        self.assertEqual(snapshot.sent_7d, sends.filter(sent_at__gte=week_ago).count())
+        self.assertEqual(snapshot.opened_7d, sends.filter(sent_at__gte=week_ago, status__in=['opened', 'clicked']).count())
+        self.assertEqual(snapshot.contacted_leads, sends.filter(status__in=['delivered', 'opened', 'clicked']).count())
+        self.assertEqual(snapshot.replies_7d, {'positive': 2, 'negative': 1})
+        self.assertEqual(snapshot.latest_positive_email, f'{user.username}-0-0@example.com')
+        self.assertEqual(snapshot.sub_sequence_replies_7d, 1)
+        self.assertEqual(snapshot.sub_sequence_names, ['Interested follow-up'])
+
+
+class CampaignSendLeaseTests(TestCase):
+    """Concurrent sequence sender runs never work on the same campaign."""
+
+    def setUp(self):
+        user = User.objects.create_user(username='owner', password='x')
+        self.campaign = Campaign.objects.create(name='Leased', owner=user, status='active')
+
+    def test_lease_is_exclusive_until_released_or_expired(self):
+        first, second = CampaignSendLease(), CampaignSendLease()
+        self.assertTrue(first.acquire(self.campaign.id))
+        self.assertFalse(second.acquire(self.campaign.id))
+
+        Campaign.objects.filter(id=self.campaign.id).update(send_lease_expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertTrue(second.acquire(self.campaign.id))
+        self.assertEqual(first.renew(), set())
+
+        second.release()
+        self.assertTrue(first.acquire(self.campaign.id))
+
+    def test_hold_renews_before_the_lease_can_lapse(self):
+        lease = CampaignSendLease(lease_seconds=600)
+        with mock.patch('marketing_agent.services.send_lease.time.monotonic', return_value=1000.0):
+            self.assertTrue(lease.acquire(self.campaign.id))
+        Campaign.objects.filter(id=self.campaign.id).update(send_lease_expires_at=timezone.now())
+
+        # Plenty of lease left: trusted without touching the database
+        with mock.patch('marketing_agent.services.send_lease.time.monotonic', return_value=1200.0):
+            self.assertTrue(lease.hold(self.campaign.id))
+        self.assertLessEqual(Campaign.objects.get(id=self.campaign.id).send_lease_expires_at, timezone.now())
+
+        # Past half-time: renewed in the database
+        with mock.patch('marketing_agent.services.send_lease.time.monotonic', return_value=1400.0):
+            self.assertTrue(lease.hold(self.campaign.id))
+        self.assertGreater(Campaign.objects.get(id=self.campaign.id).send_lease_expires_at,
+                           timezone.now() + timedelta(seconds=500))
+
+        # Lapsed and taken over by another run: dropped
+        Campaign.objects.filter(id=self.campaign.id).update(send_lease_token='other')
+        with mock.patch('marketing_agent.services.send_lease.time.monotonic', return_value=1800.0):
+            self.assertFalse(lease.hold(self.campaign.id))
+        self.assertEqual(lease.campaign_ids, set())
+
+    def test_sender_skips_campaign_leased_by_another_run(self):
+        lease = CampaignSendLease()
+        lease.acquire(self.campaign.id)
+        out = StringIO()
+        call_command('send_sequence_emails', campaign_id=[self.campaign.id], stdout=out)
+        self.assertIn('being sent by another worker', out.getvalue())
+        self.assertIn('Contacts checked: 0', out.getvalue())
+
+
+class SequenceScheduleTests(TestCase):
+    """CampaignContact.next_send_at / sub_sequence_next_send_at follow the sender's timing rules."""
+
+    def setUp(self):
+        user = User.objects.create_user(username='owner', password='x')
+        self.campaign = Campaign.objects.create(name='Scheduled', owner=user, status='active')
+        template = EmailTemplate.objects.create(campaign=self.campaign, name='T', subject='Hi', html_content='<p>Hi</p>')
+        self.sequence = EmailSequence.objects.create(campaign=self.campaign, name='Intro')
+        self.sub_sequence = EmailSequence.objects.create(
+            campaign=self.campaign, name='Follow-up', parent_sequence=self.sequence, is_sub_sequence=True,
+        )
+        for order, delay in enumerate([timedelta(0), timedelta(days=2), timedelta(hours=5)], start=1):
+            EmailSequenceStep.objects.create(
+                sequence=self.sequence, template=template, step_order=order,
+                delay_days=delay.days, delay_hours=delay.seconds // 3600,
+            )
+        EmailSequenceStep.objects.create(sequence=self.sub_sequence, template=template, step_order=1, delay_days=1)
+        self.lead = Lead.objects.create(owner=user, email='lead@example.com')
+
+    def test_main_sequence_steps_follow_delays(self):
+        started_at = timezone.now()
+        contact = CampaignContact.objects.create(
+            campaign=self.campaign, lead=self.lead, sequence=self.sequence, started_at=started_at,
+        )
+        self.assertEqual(contact.next_send_at, started_at)  # first step without delay: due right away
+
+        sent_at = timezone.now()
+        contact.current_step, contact.last_sent_at = 1, sent_at
+        contact.save(update_fields=['current_step', 'last_sent_at'])
+        contact.refresh_from_db()
+        self.assertEqual(contact.next_send_at, sent_at + timedelta(days=2))
+
+        contact.current_step = 3
+        contact.save()
+        self.assertLessEqual(contact.next_send_at, timezone.now())  # all sent: due so the sender completes it
+
+        contact.completed = True
+        contact.save()
+        self.assertIsNone(contact.next_send_at)
+
+    def test_reply_moves_contact_to_sub_sequence_schedule(self):
+        contact = CampaignContact.objects.create(campaign=self.campaign, lead=self.lead, sequence=self.sequence)
+        replied_at = timezone.now()
+        contact.replied, contact.replied_at, contact.sub_sequence = True, replied_at, self.sub_sequence
+        contact.save()
+        self.assertIsNone(contact.next_send_at)
+        self.assertEqual(contact.sub_sequence_next_send_at, replied_at + timedelta(days=1))
+
+    def test_bulk_writes_are_rescheduled(self):
+        contact = CampaignContact.objects.create(campaign=self.campaign, lead=self.lead, sequence=self.sequence)
+        sent_at = timezone.now()
+        CampaignContact.objects.filter(id=contact.id).update(current_step=1, last_sent_at=sent_at)
+        self.sequence.steps.filter(step_order=2).update(delay_days=4)
+
+        self.assertEqual(reschedule_sequence_contacts(self.sequence), 1)
+        contact.refresh_from_db()
+        self.assertEqual(contact.next_send_at, sent_at + timedelta(days=4))
+
+
+class TrackingEventBufferTests(TestCase):
+    """Buffered opens/clicks survive a failed flush and are written exactly once."""
+
+    @override_settings(EMAIL_TRACKING_FLUSH_INTERVAL=3600, EMAIL_TRACKING_MAX_ATTEMPTS=2)
+    def test_failed_batch_is_retried_then_dropped(self):
+        user = User.objects.create_user(username='owner', password='x')
+        campaign = Campaign.objects.create(name='Tracked', owner=user)
+        lead = Lead.objects.create(owner=user, email='lead@example.com')
+        send = EmailSendHistory.objects.create(
+            campaign=campaign, lead=lead, subject='Hi', recipient_email=lead.email, status='sent',
+            tracking_token='tok', sent_at=timezone.now(),
+        )
+        buffer = TrackingEventBuffer()
+        self.addCleanup(buffer.close)
+
+        buffer.record('open', 'tok')
+        with mock.patch.object(EmailTrackingEvent.objects, 'bulk_create', side_effect=RuntimeError('deadlock')):
+            self.assertEqual(buffer.flush(), 0)
+        self.assertEqual(buffer.stats()['buffered'], 1)
+        send.refresh_from_db()
+        self.assertEqual(send.status, 'sent')  # rolled back with the failed batch
+
+        self.assertEqual(buffer.flush(), 1)
+        send.refresh_from_db()
+        self.assertEqual(send.status, 'opened')
+        self.assertEqual(EmailTrackingEvent.objects.filter(send_history=send).count(), 1)
+
+        buffer.record('click', 'tok', url='https://example.com')
+        with mock.patch.object(buffer, '_write', side_effect=RuntimeError('database unavailable')):
+            buffer.flush()
+            with self.assertLogs('marketing_agent.services.tracking_buffer', level='ERROR'):
+                buffer.flush()
+        self.assertEqual((buffer.stats()['buffered'], buffer.stats()['failed']), (0, 1))
+
+
+class ReplyIndexTests(TestCase):
+    """Message-ID lookups are split into bounded IN queries without changing their result."""
+
+    @mock.patch('marketing_agent.services.reply_index.LOOKUP_CHUNK_SIZE', 2)
+    def test_resolve_message_ids_in_chunks(self):
+        user = User.objects.create_user(username='owner', password='x')
+        campaign = Campaign.objects.create(name='Threads', owner=user)
+        lead = Lead.objects.create(owner=user, email='lead@example.com')
+        sends = [
+            EmailSendHistory.objects.create(
+                campaign=campaign, lead=lead, subject='Hi', recipient_email=lead.email, message_id=message_id,
+            )
+            for message_id in ['a@mail', 'b@mail', 'c@mail', 'a@mail']
+        ]
+        references = ['<a@mail>', 'B@mail', 'c@mail', 'x@mail', 'y@mail', 'z@mail']
+
+        with CaptureQueriesContext(connection) as ctx:
+            resolved = resolve_message_ids(references)
+
+        self.assertGreater(len(ctx), 1)
+        self.assertEqual(resolved['a@mail'], sends[0])  # first send wins across chunks
+        self.assertEqual(resolved['b@mail'], sends[1])  # found through its lower-cased spelling
+        self.assertEqual(resolved['c@mail'], sends[2])
+        self.assertNotIn('x@mail', resolved)
+
+
+class ReplyDedupeTests(TestCase):
+    """A reply seen again by a full inbox re-scan is not recorded twice."""
+
+    def test_reply_with_recorded_message_id_is_skipped(self):
+        user = User.objects.create_user(username='owner', password='x')
+        campaign = Campaign.objects.create(name='Replies', owner=user, status='active')
+        lead = Lead.objects.create(owner=user, email='lead@example.com')
+        CampaignContact.objects.create(campaign=campaign, lead=lead)
+
+        first = process_reply_directly(campaign, lead, '', '', message_id='abc@mail.example.com')
+        again = process_reply_directly(campaign, lead, '', '', message_id='abc@mail.example.com')
+
+        self.assertTrue(first['success'])
+        self.assertTrue(again['success'] and again.get('duplicate'))
+        self.assertEqual(Reply.objects.filter(lead=lead).count(), 1)
+        self.assertEqual(recorded_reply_ids(['<abc@mail.example.com>', 'other@mail.example.com']),
+                         {'abc@mail.example.com'})
+
+
+class EmailRenderPlanTests(TestCase):
+    """Cached render plans produce exactly what per-email rendering and tracking did."""
+
+    HTML = (
+        '<html><body><p>Hi {{ lead_name }} at {{ lead_company }}</p>'
+        '<a href="https://example.com/offer">Offer</a> <a href="#">Call</a>'
+        '<a href="https://example.com/unsubscribe?email={{ lead_email }}">Unsubscribe</a></body></html>'
+    )
+
+    def _legacy(self, service, template, context_vars, send):
+        html_content = service.render_email_content(template.html_content, context_vars)
+        return (
+            service.render_email_content(template.subject, context_vars),
+            service._add_email_tracking(html_content, send),
+            re.sub(r'<[^>]+>', '', html_content),
+        )
+
+    def test_plan_output_matches_per_email_rendering(self):
+        campaign = Campaign(id=5, name='Spring Outreach')
+        template = EmailTemplate(
+            id=9, campaign=campaign, subject='Idea for {{ lead_company }}', html_content=self.HTML,
+            updated_at=timezone.now(),
+        )
+        service = EmailService()
+        for i, name in enumerate(['Ann', 'Ann Lee', "O'Neil", '<b>Bold</b>']):
+            lead = Lead(first_name=name, email=f'lead{i}+x@example.com', company=f'{name} & Co')
+            send = SimpleNamespace(id=i, tracking_token=f'token{i}', campaign_id=campaign.id)
+            context_vars = service.get_context_vars(lead, campaign)
+            plan = service.get_render_plan(template, campaign)
+            subject, html_content, text_content = service.render_email(plan, context_vars)
+            rendered = (subject, service.render_tracked_html(plan, context_vars, html_content, send), text_content)
+            self.assertEqual(rendered, self._legacy(service, template, context_vars, send))
+        self.assertIsNotNone(plan.tracked_html)
+        self.assertEqual(service._render_plans.misses, 1)
+
+
+class LeadImportTests(TestCase):
+    """Bulk lead import keeps the per-row semantics of the old get_or_create loop."""
+
+    CSV = (
+        'Email, First_Name ,last_name,phone,source\n'
+        'a@example.com,Ann,,555,\n'
+        'B@Example.com ,Bob,Builder,,web\n'
+        'a@example.com,,Smith,,ref\n'
+        ',No email,,,\n'
+        'not-an-email,Bad,,,\n'
+        'existing@example.com,,,777,\n'
+    )
+
+    def test_import_merges_duplicates_updates_existing_and_links_campaign(self):
+        user = User.objects.create_user(username='owner', password='x')
+        Lead.objects.create(owner=user, email='existing@example.com', first_name='Old')
+        campaign = Campaign.objects.create(name='Import', owner=user)
+        EmailSequence.objects.create(campaign=campaign, name='Intro')
+
+        result = import_leads(SimpleUploadedFile('leads.csv', self.CSV.encode()), user, campaign, chunk_size=2)
+
+        # The second a@example.com row is in the next chunk, so it updates the lead the first one created
+        self.assertEqual((result.processed, result.created, result.updated, result.skipped), (4, 2, 2, 1))
+        self.assertEqual([error['row'] for error in result.errors], [6])
+        ann = Lead.objects.get(owner=user, email='a@example.com')
+        self.assertEqual((ann.first_name, ann.last_name, ann.phone, ann.source), ('Ann', 'Smith', '555', 'campaign_upload'))
+        self.assertEqual(Lead.objects.get(owner=user, email='b@example.com').source, 'web')
+        existing = Lead.objects.get(owner=user, email='existing@example.com')
+        self.assertEqual((existing.first_name, existing.phone), ('Old', '777'))
+        self.assertEqual(campaign.leads.count(), 3)
+        # Linking sends m2m_changed, so contacts are provisioned as with campaign.leads.add()
+        self.assertEqual(CampaignContact.objects.filter(campaign=campaign).count(), 3)
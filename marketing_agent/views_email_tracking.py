@@ -12,51 +12,47 @@ from urllib.parse import unquote
 import logging
 
 from .models import EmailSendHistory
+from .services.tracking_buffer import get_tracking_buffer
 
 logger = logging.getLogger(__name__)
 
 
+def _record_tracking_event(request, event_type, tracking_token, url=''):
+    """Queue an open/click for the write-behind flusher (no database write on the request path)"""
+    forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR', '')
+    ip_address = forwarded_for.split(',')[0].strip() if forwarded_for else request.META.get('REMOTE_ADDR')
+    get_tracking_buffer().record(
+        event_type,
+        tracking_token,
+        url=url,
+        user_agent=request.META.get('HTTP_USER_AGENT', ''),
+        ip_address=ip_address or None,
+    )
+
+
+def _default_redirect_path(tracking_token):
+    """Campaign page for the email (used when a click has no usable URL)"""
+    campaign_id = EmailSendHistory.objects.filter(
+        tracking_token=tracking_token
+    ).values_list('campaign_id', flat=True).first()
+    if campaign_id:
+        return f'/marketing/campaigns/{campaign_id}/'
+    return '/marketing/'
+
+
 @csrf_exempt  # Tracking pixels and links don't send CSRF tokens
 @require_http_methods(["GET"])
 def track_email_open(request, tracking_token):
     """
     Track email open by serving a 1x1 transparent pixel
-    UPDATES STATUS IMMEDIATELY when pixel loads
+    The open is queued and written in batches (services.tracking_buffer), so the
+    pixel is returned without waiting on the database
     """
     try:
-        send_history = get_object_or_404(EmailSendHistory, tracking_token=tracking_token)
+        logger.debug(f"[OPEN TRACKING REQUEST] Token: {tracking_token[:10]}...")
         
-        logger.info(
-            f"[OPEN TRACKING REQUEST] Token: {tracking_token[:10]}..., "
-            f"Email: {send_history.recipient_email}, "
-            f"Current Status: {send_history.status}"
-        )
-        
-        # STEP 1: UPDATE STATUS IMMEDIATELY (before returning pixel)
-        old_status = send_history.status
-        
-        # Only update if not already opened/clicked
-        if send_history.status not in ['opened', 'clicked']:
-            # Mark as delivered first if needed
-            if send_history.status == 'sent' and not send_history.delivered_at:
-                send_history.delivered_at = timezone.now()
-            
-            # Update to opened
-            send_history.status = 'opened'
-            send_history.opened_at = timezone.now()
-            send_history.save()  # SAVE IMMEDIATELY
-            
-            logger.info(
-                f"✅ [STATUS UPDATED] Email: {send_history.recipient_email}, "
-                f"Status: {old_status} → opened, "
-                f"Opened At: {send_history.opened_at}"
-            )
-        else:
-            # Update opened_at timestamp even if already opened (for analytics)
-            if not send_history.opened_at:
-                send_history.opened_at = timezone.now()
-                send_history.save()
-                logger.info(f"[OPEN TRACKING] Updated opened_at timestamp for already tracked email")
+        # STEP 1: QUEUE THE OPEN (status is updated by the background flusher)
+        _record_tracking_event(request, 'open', tracking_token)
         
         # STEP 2: Return 1x1 transparent GIF pixel
         # Standard 1x1 transparent GIF (actual GIF file bytes)
@@ -85,38 +81,14 @@ def track_email_open(request, tracking_token):
 def track_email_click(request, tracking_token):
     """
     Track email link click and redirect to original URL
-    UPDATES STATUS FIRST, then redirects (this is critical!)
+    The click is queued first (services.tracking_buffer), then we redirect
+    without waiting on the database
     """
     try:
-        # Get email send history
-        send_history = get_object_or_404(EmailSendHistory, tracking_token=tracking_token)
-        
-        logger.info(
-            f"[CLICK TRACKING REQUEST] Token: {tracking_token[:10]}..., "
-            f"Email: {send_history.recipient_email}, "
-            f"Current Status: {send_history.status}"
-        )
-        
-        # STEP 1: UPDATE STATUS FIRST (before any redirect logic)
-        old_status = send_history.status
-        
-        # Mark as delivered/opened first if needed
-        if send_history.status == 'sent' and not send_history.delivered_at:
-            send_history.delivered_at = timezone.now()
+        logger.debug(f"[CLICK TRACKING REQUEST] Token: {tracking_token[:10]}...")
         
-        if send_history.status in ['sent', 'delivered'] and not send_history.opened_at:
-            send_history.opened_at = timezone.now()
-        
-        # Update to clicked
-        send_history.status = 'clicked'
-        send_history.clicked_at = timezone.now()
-        send_history.save()  # SAVE IMMEDIATELY
-        
-        logger.info(
-            f"✅ [STATUS UPDATED] Email: {send_history.recipient_email}, "
-            f"Status: {old_status} → clicked, "
-            f"Clicked At: {send_history.clicked_at}"
-        )
+        # STEP 1: QUEUE THE CLICK (before any redirect logic)
+        _record_tracking_event(request, 'click', tracking_token, request.GET.get('url', ''))
         
         # STEP 2: Get redirect URL from query parameter
         original_url = request.GET.get('url', '')
@@ -126,10 +98,7 @@ def track_email_click(request, tracking_token):
         if not original_url or original_url == '#' or original_url == '%23':
             logger.warning(f"No valid URL in click tracking, using default")
             # Default to campaign page
-            if send_history.campaign:
-                original_url = f'/marketing/campaigns/{send_history.campaign.id}/'
-            else:
-                original_url = '/marketing/'
+            original_url = _default_redirect_path(tracking_token)
         else:
             # Decode URL
             try:
@@ -140,10 +109,7 @@ def track_email_click(request, tracking_token):
             
             # Handle anchor links
             if original_url == '#' or original_url.startswith('#'):
-                if send_history.campaign:
-                    original_url = f'/marketing/campaigns/{send_history.campaign.id}/'
-                else:
-                    original_url = '/marketing/'
+                original_url = _default_redirect_path(tracking_token)
         
         # STEP 3: Build absolute redirect URL
         from django.conf import settings
@@ -178,17 +144,6 @@ def track_email_click(request, tracking_token):
         logger.error(f"❌ Error tracking email click: {str(e)}", exc_info=True)
         logger.error(f"Traceback: {traceback.format_exc()}")
         
-        # Try to update status even on error
-        try:
-            send_history = EmailSendHistory.objects.filter(tracking_token=tracking_token).first()
-            if send_history and send_history.status != 'clicked':
-                send_history.status = 'clicked'
-                send_history.clicked_at = timezone.now()
-                send_history.save()
-                logger.info(f"✅ [ERROR RECOVERY] Updated status to clicked for token {tracking_token[:10]}...")
-        except Exception as save_error:
-            logger.error(f"Failed to update status on error: {save_error}")
-        
         # Try to redirect to original URL anyway
         original_url = request.GET.get('url', '')
         if original_url:
@@ -314,44 +269,10 @@ def simple_track_open(request, tracking_token=None):
             pixel = b'\x47\x49\x46\x38\x39\x61\x01\x00\x01\x00\x80\x00\x00\xff\xff\xff\x00\x00\x00\x21\xf9\x04\x01\x00\x00\x00\x00\x2c\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02\x04\x01\x00\x3b'
             return HttpResponse(pixel, content_type='image/gif')
         
-        # Find email send history by token
-        send_history = EmailSendHistory.objects.filter(tracking_token=tracking_token).first()
+        logger.debug(f"[SIMPLE OPEN TRACK] Token: {tracking_token[:10]}...")
         
-        if not send_history:
-            logger.warning(f"[SIMPLE TRACK] Token not found: {tracking_token[:10]}...")
-            # Return pixel anyway
-            pixel = b'\x47\x49\x46\x38\x39\x61\x01\x00\x01\x00\x80\x00\x00\xff\xff\xff\x00\x00\x00\x21\xf9\x04\x01\x00\x00\x00\x00\x2c\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02\x04\x01\x00\x3b'
-            return HttpResponse(pixel, content_type='image/gif')
-        
-        logger.info(
-            f"[SIMPLE OPEN TRACK] Token: {tracking_token[:10]}..., "
-            f"Email: {send_history.recipient_email}, "
-            f"Current Status: {send_history.status}"
-        )
-        
-        # Update status if not already opened/clicked
-        old_status = send_history.status
-        
-        if send_history.status not in ['opened', 'clicked']:
-            # Mark as delivered first if needed
-            if send_history.status == 'sent' and not send_history.delivered_at:
-                send_history.delivered_at = timezone.now()
-            
-            # Update to opened
-            send_history.status = 'opened'
-            send_history.opened_at = timezone.now()
-            send_history.save()
-            
-            logger.info(
-                f"✅ [SIMPLE TRACK UPDATED] Email: {send_history.recipient_email}, "
-                f"Status: {old_status} → opened, "
-                f"Opened At: {send_history.opened_at}"
-            )
-        else:
-            # Update opened_at timestamp even if already opened
-            if not send_history.opened_at:
-                send_history.opened_at = timezone.now()
-                send_history.save()
+        # Queue the open (unknown tokens are logged and skipped by the flusher)
+        _record_tracking_event(request, 'open', tracking_token)
         
         # Return 1x1 transparent GIF pixel
         pixel = b'\x47\x49\x46\x38\x39\x61\x01\x00\x01\x00\x80\x00\x00\xff\xff\xff\x00\x00\x00\x21\xf9\x04\x01\x00\x00\x00\x00\x2c\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02\x04\x01\x00\x3b'
@@ -395,60 +316,17 @@ def simple_track_click(request, tracking_token=None):
             base_url = getattr(settings, 'SITE_URL', 'http://127.0.0.1:8000')
             return HttpResponseRedirect(f"{base_url.rstrip('/')}/marketing/")
         
-        # Find email send history by token
-        send_history = EmailSendHistory.objects.filter(tracking_token=tracking_token).first()
-        
-        if not send_history:
-            logger.warning(f"[SIMPLE CLICK TRACK] Token not found: {tracking_token[:10]}...")
-            # Try to redirect to original URL anyway
-            original_url = request.GET.get('url', '/marketing/')
-            if original_url and original_url != '#':
-                try:
-                    original_url = unquote(original_url)
-                    if original_url.startswith('http://') or original_url.startswith('https://'):
-                        return HttpResponseRedirect(original_url)
-                except:
-                    pass
-            from django.conf import settings
-            base_url = getattr(settings, 'SITE_URL', 'http://127.0.0.1:8000')
-            return HttpResponseRedirect(f"{base_url.rstrip('/')}/marketing/")
-        
-        logger.info(
-            f"[SIMPLE CLICK TRACK] Token: {tracking_token[:10]}..., "
-            f"Email: {send_history.recipient_email}, "
-            f"Current Status: {send_history.status}"
-        )
-        
-        # Update status first
-        old_status = send_history.status
+        logger.debug(f"[SIMPLE CLICK TRACK] Token: {tracking_token[:10]}...")
         
-        # Mark as delivered/opened first if needed
-        if send_history.status == 'sent' and not send_history.delivered_at:
-            send_history.delivered_at = timezone.now()
-        
-        if send_history.status in ['sent', 'delivered'] and not send_history.opened_at:
-            send_history.opened_at = timezone.now()
-        
-        # Update to clicked
-        send_history.status = 'clicked'
-        send_history.clicked_at = timezone.now()
-        send_history.save()
-        
-        logger.info(
-            f"✅ [SIMPLE CLICK UPDATED] Email: {send_history.recipient_email}, "
-            f"Status: {old_status} → clicked, "
-            f"Clicked At: {send_history.clicked_at}"
-        )
+        # Queue the click first (unknown tokens are logged and skipped by the flusher)
+        _record_tracking_event(request, 'click', tracking_token, request.GET.get('url', ''))
         
         # Get redirect URL
         original_url = request.GET.get('url', '')
         
         # Handle missing or invalid URLs
         if not original_url or original_url == '#' or original_url == '%23':
-            if send_history.campaign:
-                original_url = f'/marketing/campaigns/{send_history.campaign.id}/'
-            else:
-                original_url = '/marketing/'
+            original_url = _default_redirect_path(tracking_token)
         else:
             try:
                 original_url = unquote(original_url)
@@ -456,10 +334,7 @@ def simple_track_click(request, tracking_token=None):
                 original_url = '/marketing/'
             
             if original_url == '#' or original_url.startswith('#'):
-                if send_history.campaign:
-                    original_url = f'/marketing/campaigns/{send_history.campaign.id}/'
-                else:
-                    original_url = '/marketing/'
+                original_url = _default_redirect_path(tracking_token)
         
         # Build absolute redirect URL
         from django.conf import settings
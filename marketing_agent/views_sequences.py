@@ -10,6 +10,7 @@ import json
 import logging
 
 from .models import Campaign, EmailSequence, EmailSequenceStep, EmailTemplate, EmailAccount, EmailSendHistory
+from .services.sequence_schedule import reschedule_sequence_contacts
 from django.utils import timezone
 
 logger = logging.getLogger(__name__)
@@ -226,6 +227,9 @@ def update_sequence(request, campaign_id, sequence_id):
                     delay_hours=step_data.get('delay_hours', 0),
                     delay_minutes=step_data.get('delay_minutes', 0),
                 )
+            
+            # Steps/delays changed: move existing contacts' next send time accordingly
+            reschedule_sequence_contacts(sequence)
         
         return JsonResponse({
             'success': True,
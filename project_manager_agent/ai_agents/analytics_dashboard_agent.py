@@ -6,6 +6,7 @@ Provides insights, analytics, and visualizations for project performance.
 from .base_agent import BaseAgent
 from .enhancements.chart_generation import ChartGenerator
 from core.models import Project, Task
+from .context_manager import ContextManager
 from typing import Dict, List, Optional
 from django.utils import timezone
 from datetime import datetime, timedelta
@@ -65,16 +66,10 @@ class AnalyticsDashboardAgent(BaseAgent):
                 'error': f'Project with ID {project_id} not found'
             }
         
-        tasks = Task.objects.filter(project=project).select_related('assignee')
-        tasks_data = [{
-            'id': t.id,
-            'title': t.title,
-            'status': t.status,
-            'priority': t.priority,
-            'priority_score': getattr(t, 'priority_score', None),
-            'due_date': t.due_date.isoformat() if t.due_date else None,
-            'assignee_id': t.assignee.id if t.assignee else None,
-        } for t in tasks]
+        tasks_data = ContextManager.get_project_tasks(
+            project.id, fields=('id', 'title', 'status', 'priority', 'priority_score', 'due_date', 'assignee_id'),
+            include_dependencies=False,
+        )
         
         # Generate all charts
         charts = {}
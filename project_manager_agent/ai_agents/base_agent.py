@@ -11,6 +11,9 @@ except ImportError:
 from django.conf import settings
 import logging
 
+from core.llm_pool import get_llm_pool
+from core.llm_cache import get_llm_cache, make_cache_key
+
 logger = logging.getLogger(__name__)
 
 
@@ -18,11 +21,20 @@ class BaseAgent:
     """
     Base class for all AI agents in the Project Manager system.
     Provides common functionality like Groq API integration and logging.
+    
+    Response caching (see core.llm_cache):
+        llm_cache_ttl = None  -> cache deterministic (temperature 0) calls only
+        llm_cache_ttl = 0     -> never cache this agent's calls
+        llm_cache_ttl = N     -> cache all calls for N seconds
     """
     
+    llm_cache_ttl = None
+    
     def __init__(self, model=None):
         """
-        Initialize the base agent with Groq API client.
+        Initialize the base agent with a pooled Groq API client.
+        Clients are shared process-wide (see core.llm_pool), so constructing
+        an agent does not open a new HTTP connection pool.
         
         Args:
             model (str): Groq model to use. Defaults to settings.GROQ_MODEL
@@ -32,9 +44,9 @@ class BaseAgent:
             raise ValueError("GROQ_API_KEY not found in environment variables. Please set it in .env file.")
         
         try:
-            # Simple initialization - just pass api_key
-            # Some versions of groq may have issues with extra arguments
-            self.client = Groq(api_key=self.api_key)
+            # Shared client per API key - reuses keep-alive connections across agents
+            self._llm_entry = get_llm_pool().groq(self.api_key)
+            self.client = self._llm_entry.client
         except TypeError as e:
             error_msg = str(e)
             if 'proxies' in error_msg or 'unexpected keyword' in error_msg:
@@ -57,7 +69,7 @@ class BaseAgent:
         self.model = model or getattr(settings, 'GROQ_MODEL', 'llama-3.1-8b-instant')
         self.agent_name = self.__class__.__name__
     
-    def _call_llm(self, prompt, system_prompt=None, temperature=0.7, max_tokens=1024):
+    def _call_llm(self, prompt, system_prompt=None, temperature=0.7, max_tokens=1024, use_cache=None):
         """
         Make a call to the Groq LLM API.
         
@@ -66,6 +78,7 @@ class BaseAgent:
             system_prompt (str): System prompt for context
             temperature (float): Sampling temperature (0-1)
             max_tokens (int): Maximum tokens in response
+            use_cache (bool): False to bypass the response cache, True to force it
             
         Returns:
             str: LLM response text
@@ -84,14 +97,20 @@ class BaseAgent:
                 "content": prompt
             })
             
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=temperature,
-                max_tokens=max_tokens
-            )
+            def call():
+                with self._llm_entry.acquire(self.model) as client:
+                    response = client.chat.completions.create(
+                        model=self.model,
+                        messages=messages,
+                        temperature=temperature,
+                        max_tokens=max_tokens
+                    )
+                return response.choices[0].message.content
             
-            return response.choices[0].message.content
+            cache = get_llm_cache()
+            cache_key = make_cache_key('groq', self.model, messages, temperature, max_tokens)
+            cacheable = cache.should_cache(temperature, self.llm_cache_ttl, use_cache)
+            return cache.get_or_call(cache_key, call, cacheable, self.llm_cache_ttl)
             
         except Exception as e:
             logger.error(f"Error in {self.agent_name} LLM call: {str(e)}")
@@ -1,12 +1,22 @@
 """
 Unified Context Manager
 Centralized context service for all agents to share project context efficiently.
+
+Project context is cached per project version (core/context_versions.py):
+signals bump the version whenever the project, its tasks, subtasks, task
+dependencies or team members change. With a shared cache the context is
+never stale and is kept for a day; with the default per-process cache other
+processes don't see a bump, so it is kept for 5 minutes (PM_CONTEXT_CACHE_TTL
+overrides both). The context is built from
+one task query with the dependency lists prefetched, and task statistics are
+accumulated in the same pass.
 """
 
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional
 from django.core.cache import cache
 from django.utils import timezone
 from django.db import models
+from core import context_versions
 from core.models import Project, Task, UserProfile
 from datetime import datetime, timedelta
 import json
@@ -21,8 +31,14 @@ class ContextManager:
     Provides cached, versioned context for all agents.
     """
     
-    CACHE_TIMEOUT = 300  # 5 minutes
+    CACHE_TIMEOUT = 300  # 5 minutes, for the (unversioned) user projects context
     CACHE_PREFIX = "pm_context_"
+    TASK_STATUSES = ['todo', 'in_progress', 'review', 'done', 'blocked']
+    TASK_PRIORITIES = ['low', 'medium', 'high']
+    
+    @staticmethod
+    def project_cache_timeout() -> int:
+        return context_versions.context_cache_timeout()
     
     @staticmethod
     def get_project_context(project_id: int, include_tasks: bool = True, 
@@ -37,9 +53,11 @@ class ContextManager:
             include_dependencies (bool): Include dependency graphs
             
         Returns:
-            Dict: Comprehensive project context
+            Dict: Comprehensive project context ('version' is the project's context version)
         """
-        cache_key = f"{ContextManager.CACHE_PREFIX}project_{project_id}_{include_tasks}_{include_team}_{include_dependencies}"
+        version = context_versions.current(project_id)
+        cache_key = (f"{ContextManager.CACHE_PREFIX}project_{project_id}_v{version}_"
+                     f"{include_tasks:d}{include_team:d}{include_dependencies:d}")
         
         # Try cache first
         cached_context = cache.get(cache_key)
@@ -48,9 +66,7 @@ class ContextManager:
             return cached_context
         
         try:
-            project = Project.objects.select_related(
-                'owner', 'project_manager', 'company', 'industry'
-            ).prefetch_related('tasks', 'team_members').get(id=project_id)
+            project = Project.objects.select_related('owner').get(id=project_id)
         except Project.DoesNotExist:
             return {'error': f'Project {project_id} not found'}
         
@@ -71,16 +87,25 @@ class ContextManager:
                 'updated_at': project.updated_at.isoformat(),
             },
             'generated_at': timezone.now().isoformat(),
-            'version': 1
+            'version': version
         }
         
         if include_tasks:
-            tasks = Task.objects.filter(project=project).select_related(
-                'assignee', 'project'
-            ).prefetch_related('depends_on', 'dependent_tasks', 'subtasks')
+            tasks = Task.objects.filter(project=project).select_related('assignee').annotate(
+                subtask_count=models.Count('subtasks')
+            )
+            if include_dependencies:
+                ids_only = Task.objects.only('id')
+                tasks = tasks.prefetch_related(
+                    models.Prefetch('depends_on', queryset=ids_only),
+                    models.Prefetch('dependent_tasks', queryset=ids_only),
+                )
             
             context['tasks'] = []
+            by_status = dict.fromkeys(ContextManager.TASK_STATUSES, 0)
+            by_priority = dict.fromkeys(ContextManager.TASK_PRIORITIES, 0)
             for task in tasks:
+                assignee = task.assignee
                 task_data = {
                     'id': task.id,
                     'title': task.title,
@@ -91,8 +116,10 @@ class ContextManager:
                     'estimated_hours': float(task.estimated_hours) if task.estimated_hours else None,
                     'actual_hours': float(task.actual_hours) if task.actual_hours else None,
                     'progress_percentage': task.progress_percentage,
-                    'assignee_id': task.assignee.id if task.assignee else None,
-                    'assignee_username': task.assignee.username if task.assignee else None,
+                    'assignee_id': assignee.id if assignee else None,
+                    'assignee_username': assignee.username if assignee else None,
+                    'assignee_name': assignee.get_full_name() or assignee.username if assignee else None,
+                    'subtask_count': task.subtask_count,
                     'created_at': task.created_at.isoformat(),
                     'updated_at': task.updated_at.isoformat(),
                 }
@@ -100,27 +127,23 @@ class ContextManager:
                 if include_dependencies:
                     task_data['dependencies'] = [dep.id for dep in task.depends_on.all()]
                     task_data['dependent_tasks'] = [dep.id for dep in task.dependent_tasks.all()]
-                    task_data['dependency_count'] = task.depends_on.count()
-                    task_data['dependent_count'] = task.dependent_tasks.count()
+                    task_data['dependency_count'] = len(task_data['dependencies'])
+                    task_data['dependent_count'] = len(task_data['dependent_tasks'])
                 
                 context['tasks'].append(task_data)
+                if task.status in by_status:
+                    by_status[task.status] += 1
+                if task.priority in by_priority:
+                    by_priority[task.priority] += 1
             
             # Task statistics
+            total = len(context['tasks'])
             context['task_stats'] = {
-                'total': len(context['tasks']),
-                'by_status': {
-                    status: sum(1 for t in context['tasks'] if t['status'] == status)
-                    for status in ['todo', 'in_progress', 'review', 'done', 'blocked']
-                },
-                'by_priority': {
-                    priority: sum(1 for t in context['tasks'] if t['priority'] == priority)
-                    for priority in ['low', 'medium', 'high']
-                },
-                'completed': sum(1 for t in context['tasks'] if t['status'] == 'done'),
-                'completion_rate': round(
-                    (sum(1 for t in context['tasks'] if t['status'] == 'done') / len(context['tasks']) * 100)
-                    if context['tasks'] else 0, 2
-                )
+                'total': total,
+                'by_status': by_status,
+                'by_priority': by_priority,
+                'completed': by_status['done'],
+                'completion_rate': round(by_status['done'] / total * 100 if total else 0, 2),
             }
         
         if include_team:
@@ -132,6 +155,8 @@ class ContextManager:
                     'username': member.user.username,
                     'role': member.role,
                     'name': member.user.get_full_name() or member.user.username,
+                    'is_member': True,
+                    'active': member.removed_at is None,
                 })
             
             # Add owner if not in team
@@ -142,13 +167,39 @@ class ContextManager:
                     'username': project.owner.username,
                     'role': 'owner',
                     'name': project.owner.get_full_name() or project.owner.username,
+                    'is_member': False,
+                    'active': True,
                 })
         
-        # Cache the context
-        cache.set(cache_key, context, ContextManager.CACHE_TIMEOUT)
+        # Cache the context; a change to the project moves it to a new version
+        cache.set(cache_key, context, ContextManager.project_cache_timeout())
         
         return context
     
+    @staticmethod
+    def get_project_tasks(project_id: int, fields: Optional[Iterable[str]] = None,
+                          include_dependencies: bool = True) -> List[Dict]:
+        """
+        Task dicts from a project's cached context.
+        
+        Args:
+            project_id (int): Project ID
+            fields (Iterable[str]): Task keys to keep (None = all), so callers
+                pass agents only the fields they used to build themselves
+            include_dependencies (bool): Include dependency ids and counts
+            
+        Returns:
+            List[Dict]: Tasks in the default task ordering (empty if the project doesn't exist)
+        """
+        context = ContextManager.get_project_context(
+            project_id, include_team=False, include_dependencies=include_dependencies
+        )
+        tasks = context.get('tasks', [])
+        if fields is not None:
+            fields = tuple(fields)
+            tasks = [{field: task.get(field) for field in fields} for task in tasks]
+        return tasks
+    
     @staticmethod
     def get_user_projects_context(user_id: int, limit: int = 50) -> Dict:
         """
@@ -169,7 +220,7 @@ class ContextManager:
         
         projects = Project.objects.filter(
             models.Q(owner_id=user_id) | models.Q(project_manager_id=user_id)
-        ).select_related('owner', 'project_manager')[:limit]
+        ).annotate(tasks_count=models.Count('tasks'))[:limit]
         
         all_projects = []
         for project in projects:
@@ -180,7 +231,7 @@ class ContextManager:
                 'status': project.status,
                 'priority': project.priority,
                 'project_type': project.project_type,
-                'tasks_count': project.tasks.count(),
+                'tasks_count': project.tasks_count,
                 'created_at': project.created_at.isoformat(),
             })
         
@@ -197,19 +248,14 @@ class ContextManager:
     @staticmethod
     def invalidate_project_context(project_id: int):
         """
-        Invalidate cached context for a project.
+        Invalidate cached context for a project, e.g. after a bulk queryset
+        update that sent no signals.
         
         Args:
             project_id (int): Project ID
         """
-        # Invalidate all variations
-        patterns = [
-            f"{ContextManager.CACHE_PREFIX}project_{project_id}_*",
-            f"{ContextManager.CACHE_PREFIX}user_projects_*",
-        ]
-        
-        # Note: Django cache doesn't support pattern deletion easily
-        # In production, use Redis with pattern deletion
+        # Every cached variation is keyed by the version, so moving to a new one retires them all
+        context_versions.bump(project_id)
         logger.info(f"Context invalidated for project {project_id}")
     
     @staticmethod
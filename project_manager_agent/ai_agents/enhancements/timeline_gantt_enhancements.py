@@ -9,6 +9,9 @@ import random
 import math
 import logging
 
+from ..schedule_optimization import OrderingProblem, optimize_annealing, optimize_genetic
+from ..scheduling import simulate_schedule
+
 logger = logging.getLogger(__name__)
 
 
@@ -16,16 +19,20 @@ class TimelineGanttEnhancements:
     """Enhancement methods for Timeline/Gantt Agent"""
     
     @staticmethod
-    def generate_probabilistic_timeline(tasks: List[Dict], iterations: int = 1000) -> Dict:
+    def generate_probabilistic_timeline(tasks: List[Dict], iterations: int = 1000, seed: Optional[int] = None) -> Dict:
         """
         Generate timeline with probability distributions using Monte Carlo simulation.
+        Task durations are sampled from PERT (beta) distributions and propagated
+        through the task dependencies, so the result is the distribution of the
+        project's length along its longest chain, not the sum of all tasks.
         
         Args:
-            tasks (List[Dict]): Tasks with estimated durations
+            tasks (List[Dict]): Tasks with estimated durations and dependencies
             iterations (int): Number of simulation iterations
+            seed (int): Random seed for a reproducible simulation
             
         Returns:
-            Dict: Probabilistic timeline with confidence intervals
+            Dict: Probabilistic timeline (workdays) with confidence intervals and per-task criticality index
         """
         if not tasks:
             return {
@@ -36,63 +43,44 @@ class TimelineGanttEnhancements:
                 'confidence_intervals': {}
             }
         
-        # Run Monte Carlo simulation
-        durations = []
-        
-        for _ in range(iterations):
-            total_duration = 0
-            
-            for task in tasks:
-                # Get base duration
-                estimated_hours = task.get('estimated_hours', 0) or 0
-                base_days = max(1, int(estimated_hours / 8)) if estimated_hours > 0 else 3
-                
-                # Add variability (PERT: optimistic, realistic, pessimistic)
-                # Optimistic: 85% of base
-                # Realistic: base
-                # Pessimistic: 130% of base
-                optimistic = base_days * 0.85
-                realistic = base_days
-                pessimistic = base_days * 1.3
-                
-                # Random duration between optimistic and pessimistic
-                # Weighted towards realistic (beta distribution approximation)
-                rand = random.random()
-                if rand < 0.2:
-                    duration = optimistic + (realistic - optimistic) * random.random()
-                elif rand < 0.8:
-                    duration = optimistic + (pessimistic - optimistic) * random.random() * 0.5
-                else:
-                    duration = realistic + (pessimistic - realistic) * random.random()
-                
-                total_duration += max(1, int(duration))
-            
-            durations.append(total_duration)
-        
-        # Calculate statistics
-        durations.sort()
+        # PERT estimates: optimistic 85%, realistic 100%, pessimistic 130% of the base duration
+        estimates = {}
+        dependencies = {}
+        for index, task in enumerate(tasks):
+            estimated_hours = task.get('estimated_hours', 0) or 0
+            base_days = max(1, int(estimated_hours / 8)) if estimated_hours > 0 else 3
+            task_id = task.get('id', f'task-{index}')
+            estimates[task_id] = (base_days * 0.85, base_days, base_days * 1.3)
+            dependencies[task_id] = task.get('dependencies', []) or []
         
-        optimistic_duration = durations[int(len(durations) * 0.1)]  # 10th percentile
-        realistic_duration = durations[int(len(durations) * 0.5)]   # 50th percentile (median)
-        pessimistic_duration = durations[int(len(durations) * 0.9)]  # 90th percentile
-        expected_duration = sum(durations) / len(durations)
+        simulation = simulate_schedule(estimates, dependencies, iterations=max(1, iterations), seed=seed)
+        durations = simulation.project_durations
         
         return {
-            'optimistic': optimistic_duration,
-            'realistic': realistic_duration,
-            'pessimistic': pessimistic_duration,
-            'expected': int(expected_duration),
+            'optimistic': simulation.percentile(0.1),  # 10th percentile
+            'realistic': simulation.percentile(0.5),  # 50th percentile (median)
+            'pessimistic': simulation.percentile(0.9),  # 90th percentile
+            'expected': int(durations.mean()),
             'confidence_intervals': {
                 '80%': {
-                    'lower': durations[int(len(durations) * 0.1)],
-                    'upper': durations[int(len(durations) * 0.9)]
+                    'lower': simulation.percentile(0.1),
+                    'upper': simulation.percentile(0.9)
                 },
                 '95%': {
-                    'lower': durations[int(len(durations) * 0.025)],
-                    'upper': durations[int(len(durations) * 0.975)]
+                    'lower': simulation.percentile(0.025),
+                    'upper': simulation.percentile(0.975)
                 }
             },
-            'simulation_iterations': iterations
+            'percentiles': {
+                f'p{p}': simulation.percentile(p / 100) for p in (10, 25, 50, 75, 80, 90, 95)
+            },
+            'std_dev': round(float(durations.std()), 2),
+            # Share of iterations in which each task was on the critical path
+            'criticality_index': {
+                task_id: round(index, 3) for task_id, index in simulation.criticality.items()
+            },
+            'simulation_iterations': iterations,
+            'seed': seed
         }
     
     @staticmethod
@@ -493,225 +481,80 @@ class TimelineGanttEnhancements:
     
     @staticmethod
     def optimize_schedule_genetic_algorithm(tasks: List[Dict], resources: List[Dict] = None, 
-                                           generations: int = 50, population_size: int = 20) -> Dict:
+                                           generations: int = 50, population_size: int = 20,
+                                           seed: Optional[int] = None, patience: Optional[int] = None,
+                                           workers: int = 0) -> Dict:
         """
         Optimize schedule using genetic algorithm approach.
+        Individuals are task orders that respect the dependencies; the fittest
+        order finishes high-priority and short tasks earliest (see
+        schedule_optimization.py). Evolution stops early once the best order
+        hasn't improved for `patience` generations.
         
         Args:
             tasks (List[Dict]): Tasks to schedule
             resources (List[Dict]): Available resources
-            generations (int): Number of generations to evolve
+            generations (int): Maximum number of generations to evolve
             population_size (int): Size of population
+            seed (int): Random seed for a reproducible run
+            patience (int): Generations without improvement before stopping
+            workers (int): Processes evaluating the population (0 or 1 = in process)
             
         Returns:
-            Dict: Optimized schedule
+            Dict: Optimized schedule with convergence stats
         """
         if not tasks:
             return {'optimized_tasks': [], 'fitness_score': 0}
         
-        # Simple genetic algorithm for task ordering
-        # Fitness function: minimize total project duration while respecting dependencies
-        
-        def calculate_fitness(task_order: List[int], task_map: Dict) -> float:
-            """Calculate fitness: lower total duration = higher fitness"""
-            if not task_order:
-                return 0.0
-            
-            # Calculate total duration considering dependencies
-            completed = set()
-            total_duration = 0
-            current_time = 0
-            
-            for task_id in task_order:
-                task = task_map.get(task_id)
-                if not task:
-                    continue
-                
-                # Check dependencies
-                deps = task.get('dependencies', [])
-                if deps and not all(dep in completed for dep in deps):
-                    # Dependencies not met, add penalty
-                    total_duration += 1000  # Large penalty
-                    continue
-                
-                # Add task duration
-                hours = task.get('estimated_hours', 0) or 0
-                days = max(1, int(hours / 8)) if hours > 0 else 3
-                total_duration += days
-                current_time += days
-                completed.add(task_id)
-            
-            # Fitness is inverse of duration (higher is better)
-            return 1.0 / (total_duration + 1)
-        
-        # Create task map
-        task_map = {task.get('id'): task for task in tasks}
-        task_ids = list(task_map.keys())
-        
-        if not task_ids:
-            return {'optimized_tasks': [], 'fitness_score': 0}
-        
-        # Initialize population (random task orders)
-        import random
-        population = []
-        for _ in range(population_size):
-            individual = task_ids.copy()
-            random.shuffle(individual)
-            fitness = calculate_fitness(individual, task_map)
-            population.append((individual, fitness))
-        
-        # Evolve population
-        for generation in range(generations):
-            # Sort by fitness
-            population.sort(key=lambda x: x[1], reverse=True)
-            
-            # Keep top 50%
-            elite_size = population_size // 2
-            elite = population[:elite_size]
-            
-            # Generate new population
-            new_population = elite.copy()
-            
-            while len(new_population) < population_size:
-                # Crossover: take two parents from elite
-                parent1 = random.choice(elite)[0]
-                parent2 = random.choice(elite)[0]
-                
-                # Simple crossover: take first half from parent1, rest from parent2
-                crossover_point = len(parent1) // 2
-                child = parent1[:crossover_point]
-                
-                # Add remaining tasks from parent2 (not already in child)
-                for task_id in parent2:
-                    if task_id not in child:
-                        child.append(task_id)
-                
-                # Mutation: swap two random tasks
-                if random.random() < 0.1:  # 10% mutation rate
-                    idx1, idx2 = random.sample(range(len(child)), 2)
-                    child[idx1], child[idx2] = child[idx2], child[idx1]
-                
-                fitness = calculate_fitness(child, task_map)
-                new_population.append((child, fitness))
-            
-            population = new_population
-        
-        # Get best solution
-        population.sort(key=lambda x: x[1], reverse=True)
-        best_order = population[0][0]
-        best_fitness = population[0][1]
-        
-        # Build optimized task list
-        optimized_tasks = []
-        for task_id in best_order:
-            if task_id in task_map:
-                optimized_tasks.append(task_map[task_id])
-        
+        result = optimize_genetic(
+            OrderingProblem(tasks), generations=generations, population_size=population_size,
+            patience=patience, seed=seed, workers=workers,
+        )
         return {
-            'optimized_tasks': optimized_tasks,
-            'fitness_score': round(best_fitness, 4),
+            'optimized_tasks': result.tasks,
+            'fitness_score': round(1.0 / (result.energy + 1), 4),
             'generations': generations,
-            'optimization_method': 'genetic_algorithm'
+            'optimization_method': 'genetic_algorithm',
+            'dependency_violations': result.violations,
+            'average_completion_days': round(result.average_completion, 2),
+            'convergence': result.convergence,
         }
     
     @staticmethod
     def optimize_schedule_simulated_annealing(tasks: List[Dict], initial_temp: float = 100.0,
-                                            cooling_rate: float = 0.95, iterations: int = 1000) -> Dict:
+                                            cooling_rate: float = 0.95, iterations: int = 1000,
+                                            seed: Optional[int] = None, patience: Optional[int] = None) -> Dict:
         """
         Optimize schedule using simulated annealing algorithm.
+        Starts from the priority order and scores each swap incrementally (see
+        schedule_optimization.py); stops early once the best order hasn't
+        improved for `patience` iterations.
         
         Args:
             tasks (List[Dict]): Tasks to schedule
             initial_temp (float): Initial temperature
             cooling_rate (float): Temperature cooling rate
-            iterations (int): Number of iterations
+            iterations (int): Maximum number of iterations
+            seed (int): Random seed for a reproducible run
+            patience (int): Iterations without improvement before stopping
             
         Returns:
-            Dict: Optimized schedule
+            Dict: Optimized schedule with convergence stats
         """
         if not tasks:
             return {'optimized_tasks': [], 'energy': float('inf')}
         
-        import random
-        
-        def calculate_energy(task_order: List[int], task_map: Dict) -> float:
-            """Calculate energy: lower is better (total duration + dependency violations)"""
-            if not task_order:
-                return float('inf')
-            
-            completed = set()
-            total_duration = 0
-            violations = 0
-            
-            for task_id in task_order:
-                task = task_map.get(task_id)
-                if not task:
-                    continue
-                
-                # Check dependencies
-                deps = task.get('dependencies', [])
-                unmet_deps = [dep for dep in deps if dep not in completed]
-                if unmet_deps:
-                    violations += len(unmet_deps) * 10  # Penalty for violations
-                
-                # Add task duration
-                hours = task.get('estimated_hours', 0) or 0
-                days = max(1, int(hours / 8)) if hours > 0 else 3
-                total_duration += days
-                completed.add(task_id)
-            
-            return total_duration + violations
-        
-        # Create task map
-        task_map = {task.get('id'): task for task in tasks}
-        task_ids = list(task_map.keys())
-        
-        if not task_ids:
-            return {'optimized_tasks': [], 'energy': float('inf')}
-        
-        # Initialize solution (random order)
-        current_order = task_ids.copy()
-        random.shuffle(current_order)
-        current_energy = calculate_energy(current_order, task_map)
-        
-        best_order = current_order.copy()
-        best_energy = current_energy
-        
-        temperature = initial_temp
-        
-        # Simulated annealing
-        for iteration in range(iterations):
-            # Generate neighbor: swap two random tasks
-            neighbor = current_order.copy()
-            idx1, idx2 = random.sample(range(len(neighbor)), 2)
-            neighbor[idx1], neighbor[idx2] = neighbor[idx2], neighbor[idx1]
-            
-            neighbor_energy = calculate_energy(neighbor, task_map)
-            
-            # Accept if better or with probability based on temperature
-            delta = neighbor_energy - current_energy
-            if delta < 0 or random.random() < math.exp(-delta / temperature):
-                current_order = neighbor
-                current_energy = neighbor_energy
-                
-                # Update best if better
-                if current_energy < best_energy:
-                    best_order = current_order.copy()
-                    best_energy = current_energy
-            
-            # Cool down
-            temperature *= cooling_rate
-        
-        # Build optimized task list
-        optimized_tasks = []
-        for task_id in best_order:
-            if task_id in task_map:
-                optimized_tasks.append(task_map[task_id])
-        
+        result = optimize_annealing(
+            OrderingProblem(tasks), initial_temp=initial_temp, cooling_rate=cooling_rate,
+            iterations=iterations, patience=patience, seed=seed,
+        )
         return {
-            'optimized_tasks': optimized_tasks,
-            'energy': round(best_energy, 2),
+            'optimized_tasks': result.tasks,
+            'energy': round(result.energy, 2),
             'iterations': iterations,
-            'optimization_method': 'simulated_annealing'
+            'optimization_method': 'simulated_annealing',
+            'dependency_violations': result.violations,
+            'average_completion_days': round(result.average_completion, 2),
+            'convergence': result.convergence,
         }
 
@@ -26,6 +26,9 @@ class KnowledgeQAAgent(BaseAgent):
     - Learn from project patterns and provide insights
     """
     
+    # Identical questions over identical project context (dashboard refreshes) reuse the answer
+    llm_cache_ttl = 300
+    
     def __init__(self):
         super().__init__()
         self.system_prompt = """You are a Knowledge Q&A Agent for a project management system.
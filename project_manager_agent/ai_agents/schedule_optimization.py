@@ -0,0 +1,401 @@
+"""
+Schedule Optimization Core
+Evaluation kernel shared by the genetic algorithm and simulated annealing
+schedule optimizers of the Timeline/Gantt agent.
+
+A candidate schedule is an order in which tasks are worked one after another.
+Its energy (lower is better) is
+
+    violations * (total duration + 1) + priority-weighted average completion day
+
+where violations counts dependency links whose dependency comes later in the
+order. Any order that respects the dependencies therefore beats any order
+that doesn't, and among valid orders high-priority and short tasks are
+finished first. (The total duration of a serial order is the same for every
+order, so on its own it can't rank candidates.)
+
+Tasks are numbered 0..n-1 once: durations, weights and dependency lists are
+index arrays, and each task's dependencies are also a bitset (a Python int),
+so a full evaluation is a single pass of bit operations. OrderState keeps the
+positions and prefix sums of an order, which gives the energy change of
+swapping two tasks from the two tasks' own links in O(1 + degree) instead of
+re-evaluating the whole order.
+"""
+
+import logging
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from heapq import heapify, heappop, heappush
+from typing import Dict, List, Optional, Sequence
+
+from .scheduling import _graph
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_WEIGHTS = {'high': 3, 'medium': 2, 'low': 1}
+HISTORY_POINTS = 100  # simulated annealing records the best energy this many times per run
+SWAP_DISTANCE = 8  # simulated annealing swaps tasks at most this many positions apart
+
+
+def task_days(task: Dict) -> int:
+    """Workdays of a task dict: 8 hours a day, at least 1, and 3 without an estimate"""
+    hours = task.get('estimated_hours', 0) or 0
+    return max(1, int(hours / 8)) if hours > 0 else 3
+
+
+class OrderingProblem:
+    """Tasks to order, as index arrays and dependency bitsets"""
+
+    def __init__(self, tasks: List[Dict]):
+        task_map = {task.get('id'): task for task in tasks}
+        self.task_ids = list(task_map)
+        self.tasks = list(task_map.values())
+        predecessors, successors = _graph(
+            self.task_ids, {task_id: task.get('dependencies') for task_id, task in task_map.items()}
+        )
+        index = {task_id: i for i, task_id in enumerate(self.task_ids)}
+        self.durations = [task_days(task) for task in self.tasks]
+        self.weights = [PRIORITY_WEIGHTS.get(task.get('priority'), 2) for task in self.tasks]
+        self.preds = [[index[dep_id] for dep_id in predecessors[task_id]] for task_id in self.task_ids]
+        self.succs = [[index[succ_id] for succ_id in successors[task_id]] for task_id in self.task_ids]
+        self.pred_masks = [sum(1 << p for p in preds) for preds in self.preds]
+        self.total_duration = sum(self.durations)
+        self.total_weight = sum(self.weights) or 1
+        self.violation_penalty = self.total_duration + 1
+
+    def __len__(self):
+        return len(self.task_ids)
+
+    def __getstate__(self):
+        # Process-pool workers only evaluate orders
+        return {'durations': self.durations, 'weights': self.weights, 'pred_masks': self.pred_masks,
+                'total_weight': self.total_weight, 'violation_penalty': self.violation_penalty}
+
+    def evaluate(self, order: Sequence[int]):
+        """(dependency violations, weighted completion) of an order of task indexes"""
+        durations, weights, pred_masks = self.durations, self.weights, self.pred_masks
+        done = violations = elapsed = weighted = 0
+        for i in order:
+            missing = pred_masks[i] & ~done
+            if missing:
+                violations += bin(missing).count('1')
+            elapsed += durations[i]
+            weighted += weights[i] * elapsed
+            done |= 1 << i
+        return violations, weighted
+
+    def energy(self, violations: int, weighted: int) -> float:
+        return violations * self.violation_penalty + weighted / self.total_weight
+
+    def order_energy(self, order: Sequence[int]) -> float:
+        return self.energy(*self.evaluate(order))
+
+    def topological_order(self, rng: Optional[random.Random] = None) -> List[int]:
+        """
+        Task indexes with every task after its dependencies. Ready tasks are
+        taken at random with rng, otherwise highest priority weight per workday
+        first; tasks in a dependency cycle are released in index order.
+        """
+        count = len(self.task_ids)
+        pending = [len(preds) for preds in self.preds]
+
+        def key(i):
+            return rng.random() if rng is not None else -self.weights[i] / self.durations[i]
+
+        ready = [(key(i), i) for i in range(count) if not pending[i]]
+        heapify(ready)
+        order = []
+        next_index = 0
+        while len(order) < count:
+            if not ready:
+                while not pending[next_index]:
+                    next_index += 1
+                ready.append((0, next_index))
+            i = heappop(ready)[1]
+            pending[i] = None
+            order.append(i)
+            for succ in self.succs[i]:
+                if pending[succ]:
+                    pending[succ] -= 1
+                    if not pending[succ]:
+                        heappush(ready, (key(succ), succ))
+        return order
+
+    @staticmethod
+    def crossover(first: List[int], second: List[int], cut: int) -> List[int]:
+        """first[:cut], then the remaining tasks in second's order; valid whenever both parents are"""
+        head = first[:cut]
+        taken = set(head)
+        return head + [i for i in second if i not in taken]
+
+    def shift(self, order: List[int], rng: random.Random) -> List[int]:
+        """Move one random task to a random position between its dependencies and its dependents"""
+        position = [0] * len(order)
+        for p, i in enumerate(order):
+            position[i] = p
+        task = rng.randrange(len(order))
+        low = max((position[p] + 1 for p in self.preds[task]), default=0)
+        high = min((position[s] - 1 for s in self.succs[task]), default=len(order) - 1)
+        if low >= high:
+            return order
+        order = order.copy()
+        order.pop(position[task])
+        target = rng.randint(low, high)
+        order.insert(target, task)
+        return order
+
+
+class OrderState:
+    """An order with its task positions and prefix sums, for O(1 + degree) swap deltas"""
+
+    def __init__(self, problem: OrderingProblem, order: Sequence[int]):
+        self.problem = problem
+        self.order = list(order)
+        self.position = [0] * len(self.order)
+        self.elapsed = [0] * (len(self.order) + 1)  # elapsed[p]: workdays of order[:p]
+        self.weight_before = [0] * (len(self.order) + 1)  # weight_before[p]: priority weight of order[:p]
+        for p, i in enumerate(self.order):
+            self.position[i] = p
+            self.elapsed[p + 1] = self.elapsed[p] + problem.durations[i]
+            self.weight_before[p + 1] = self.weight_before[p] + problem.weights[i]
+        self.violations, self.weighted = problem.evaluate(self.order)
+
+    @property
+    def energy(self) -> float:
+        return self.problem.energy(self.violations, self.weighted)
+
+    def swap_delta(self, i: int, j: int):
+        """(violations delta, weighted completion delta) of swapping positions i < j"""
+        problem, position = self.problem, self.position
+        a, b = self.order[i], self.order[j]
+        da, db = problem.durations[a], problem.durations[b]
+        between = self.elapsed[j] - self.elapsed[i + 1]
+        # a finishes db + between later, b finishes da + between earlier, tasks between shift by db - da
+        weighted = (problem.weights[a] * (db + between) - problem.weights[b] * (da + between)
+                    + (db - da) * (self.weight_before[j] - self.weight_before[i + 1]))
+
+        violations = 0
+        for p in problem.preds[a]:  # a moves past its dependencies placed after it (b included)
+            if i < position[p] <= j:
+                violations -= 1
+        for s in problem.succs[a]:  # ... and past its dependents placed after it (b included)
+            if i < position[s] <= j:
+                violations += 1
+        for p in problem.preds[b]:  # b moves before its dependencies placed before it (a counted above)
+            if i < position[p] < j:
+                violations += 1
+        for s in problem.succs[b]:
+            if i < position[s] < j:
+                violations -= 1
+        return violations, weighted
+
+    def swap(self, i: int, j: int, violations: int, weighted: int):
+        """Apply a swap of positions i < j whose deltas came from swap_delta"""
+        problem, order = self.problem, self.order
+        a, b = order[i], order[j]
+        order[i], order[j] = b, a
+        self.position[a], self.position[b] = j, i
+        self.violations += violations
+        self.weighted += weighted
+        duration_shift = problem.durations[b] - problem.durations[a]
+        weight_shift = problem.weights[b] - problem.weights[a]
+        for p in range(i + 1, j + 1):
+            self.elapsed[p] += duration_shift
+            self.weight_before[p] += weight_shift
+
+
+class OptimizationResult:
+    """Best order found by an optimizer and how the search converged"""
+
+    def __init__(self, problem: OrderingProblem, order: List[int], convergence: Dict):
+        self.violations, self.weighted = problem.evaluate(order)
+        self.energy = problem.energy(self.violations, self.weighted)
+        self.tasks = [problem.tasks[i] for i in order]
+        self.average_completion = self.weighted / problem.total_weight
+        self.convergence = convergence
+
+
+_worker_problem = None
+
+
+def _init_worker(problem):
+    global _worker_problem
+    _worker_problem = problem
+
+
+def _evaluate_orders(orders):
+    return [_worker_problem.order_energy(order) for order in orders]
+
+
+class _Evaluator:
+    """Full evaluations of a batch of orders, spread over worker processes when workers > 1"""
+
+    def __init__(self, problem: OrderingProblem, workers: int = 0):
+        self.problem = problem
+        self.workers = workers if workers and workers > 1 else 0
+        self.executor = None
+        self.count = 0
+
+    def __enter__(self):
+        if self.workers:
+            self.executor = ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(self.problem,))
+        return self
+
+    def __exit__(self, *exc):
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+        return False
+
+    def __call__(self, orders: List[List[int]]) -> List[float]:
+        self.count += len(orders)
+        if self.executor is not None:
+            size = math.ceil(len(orders) / self.workers)
+            try:
+                chunks = self.executor.map(_evaluate_orders, [orders[k:k + size] for k in range(0, len(orders), size)])
+                return [energy for chunk in chunks for energy in chunk]
+            except Exception as e:
+                # e.g. daemonic Celery workers can't start child processes
+                logger.warning(f"Process pool evaluation failed, evaluating in process: {e}")
+                self.executor.shutdown(cancel_futures=True)
+                self.executor = None
+                self.workers = 0
+        return [self.problem.order_energy(order) for order in orders]
+
+
+def optimize_genetic(problem: OrderingProblem, generations: int = 50, population_size: int = 20,
+                     mutation_rate: float = 0.1, patience: Optional[int] = None, seed: Optional[int] = None,
+                     workers: int = 0) -> OptimizationResult:
+    """
+    Genetic algorithm over task orders.
+
+    The population starts from the priority order plus random topological
+    orders, crossover keeps a prefix of one parent and the rest in the other
+    parent's order, and mutation shifts a task within its dependency window,
+    so every individual respects the dependencies (unless they have cycles).
+    The best half survives each generation.
+
+    Args:
+        problem: Tasks to order
+        generations: Maximum number of generations
+        population_size: Individuals per generation
+        mutation_rate: Probability that a child is mutated
+        patience: Stop after this many generations without improvement (None = generations // 4, at least 5)
+        seed: Seed for a reproducible run (None = random)
+        workers: Processes evaluating each generation's children (0 or 1 = in process)
+
+    Returns:
+        OptimizationResult
+    """
+    started = time.perf_counter()
+    rng = random.Random(seed)
+    patience = patience if patience is not None else max(5, generations // 4)
+    population_size = max(2, population_size)
+    count = len(problem)
+
+    with _Evaluator(problem, workers) as evaluate:
+        orders = [problem.topological_order()] + [problem.topological_order(rng) for _ in range(population_size - 1)]
+        population = sorted(zip(evaluate(orders), orders), key=lambda individual: individual[0])
+        initial_energy = best_energy = population[0][0]
+        history = [round(best_energy, 4)]
+        best_at = since_improvement = generation = 0
+
+        for generation in range(1, generations + 1):
+            elite = population[:max(1, population_size // 2)]
+            children = []
+            while len(elite) + len(children) < population_size:
+                first, second = rng.choice(elite)[1], rng.choice(elite)[1]
+                child = problem.crossover(first, second, rng.randint(1, count - 1)) if count > 1 else first
+                if count > 1 and rng.random() < mutation_rate:
+                    child = problem.shift(child, rng)
+                children.append(child)
+            population = sorted(elite + list(zip(evaluate(children), children)), key=lambda individual: individual[0])
+
+            history.append(round(population[0][0], 4))
+            if population[0][0] < best_energy - 1e-9:
+                best_energy, best_at, since_improvement = population[0][0], generation, 0
+            else:
+                since_improvement += 1
+                if since_improvement >= patience:
+                    break
+
+        return OptimizationResult(problem, population[0][1], {
+            'initial_energy': round(initial_energy, 4),
+            'best_energy': round(best_energy, 4),
+            'best_at': best_at,
+            'iterations_run': generation,
+            'stopped_early': generation < generations,
+            'evaluations': evaluate.count,
+            'history': history,
+            'workers': evaluate.workers or 1,
+            'seed': seed,
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 1),
+        })
+
+
+def optimize_annealing(problem: OrderingProblem, initial_temp: float = 100.0, cooling_rate: float = 0.95,
+                       iterations: int = 1000, patience: Optional[int] = None,
+                       seed: Optional[int] = None) -> OptimizationResult:
+    """
+    Simulated annealing over task orders, starting from the priority order.
+
+    Each move swaps two tasks at most SWAP_DISTANCE positions apart (distant
+    swaps almost always break a dependency) and is scored with
+    OrderState.swap_delta, so an iteration costs O(1 + degree) instead of a
+    full evaluation.
+
+    Args:
+        problem: Tasks to order
+        initial_temp: Initial temperature (in energy units, i.e. workdays)
+        cooling_rate: Temperature multiplier per iteration
+        iterations: Maximum number of moves
+        patience: Stop after this many moves without improvement (None = iterations // 4, at least 100)
+        seed: Seed for a reproducible run (None = random)
+
+    Returns:
+        OptimizationResult
+    """
+    started = time.perf_counter()
+    rng = random.Random(seed)
+    patience = patience if patience is not None else max(100, iterations // 4)
+    count = len(problem)
+    state = OrderState(problem, problem.topological_order())
+    initial_energy = best_energy = current_energy = state.energy
+    best_order = state.order.copy()
+    history = [round(best_energy, 4)]
+    record_every = max(1, iterations // HISTORY_POINTS)
+    temperature = initial_temp
+    best_at = since_improvement = iteration = 0
+
+    if count > 1:
+        for iteration in range(1, iterations + 1):
+            i = rng.randrange(count - 1)
+            j = rng.randint(i + 1, min(count - 1, i + SWAP_DISTANCE))
+            violations, weighted = state.swap_delta(i, j)
+            delta = violations * problem.violation_penalty + weighted / problem.total_weight
+            if delta < 0 or (temperature > 0 and rng.random() < math.exp(-delta / temperature)):
+                state.swap(i, j, violations, weighted)
+                current_energy = state.energy
+            if current_energy < best_energy - 1e-9:
+                best_energy, best_order, best_at, since_improvement = current_energy, state.order.copy(), iteration, 0
+            else:
+                since_improvement += 1
+            temperature *= cooling_rate
+            if iteration % record_every == 0:
+                history.append(round(best_energy, 4))
+            if since_improvement >= patience:
+                break
+
+    return OptimizationResult(problem, best_order, {
+        'initial_energy': round(initial_energy, 4),
+        'best_energy': round(best_energy, 4),
+        'best_at': best_at,
+        'iterations_run': iteration,
+        'stopped_early': iteration < iterations,
+        'evaluations': iteration + 1,
+        'history': history,
+        'workers': 1,
+        'seed': seed,
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 1),
+    })
@@ -0,0 +1,341 @@
+"""
+Scheduling Core
+Workday calendar arithmetic and Critical Path Method (CPM) shared by the
+Timeline/Gantt agent.
+
+WorkCalendar counts workdays (Monday-Friday, minus optional holidays) in
+closed form: a date maps to the number of workdays before it, so adding or
+counting workdays is O(1) without holidays and O(log h) with h holidays,
+instead of stepping one day at a time.
+
+schedule_critical_path runs the forward and backward passes iteratively in
+topological order over integer workday offsets, in O(V + E) for V tasks and E
+dependencies. Durations and offsets are inclusive: a 1-day task starting at
+offset 0 finishes at offset 0 and its successors start at offset 1.
+Dependency cycles don't fail the schedule: each task in a cycle is scheduled
+in input order using the dependencies that are already scheduled.
+
+simulate_schedule is the Monte Carlo version: PERT (beta) durations for all
+tasks x iterations are drawn as one NumPy array and pushed through the same
+topological order, giving the distribution of the project duration and how
+often each task is critical.
+"""
+
+from bisect import bisect_left, bisect_right
+from collections import deque
+from datetime import date, timedelta
+from typing import Dict, Hashable, Iterable, List, Optional
+
+# date(1, 1, 1) is a Monday, so ordinal 1 starts a week
+_EPOCH_ORDINAL = 1
+
+
+def _weekdays_before(ordinal: int) -> int:
+    """Number of Monday-Friday days before the given date ordinal"""
+    weeks, rest = divmod(ordinal - _EPOCH_ORDINAL, 7)
+    return weeks * 5 + min(rest, 5)
+
+
+def _weekday_ordinal(index: int) -> int:
+    """Ordinal of the index-th Monday-Friday day (inverse of _weekdays_before)"""
+    weeks, rest = divmod(index, 5)
+    return _EPOCH_ORDINAL + weeks * 7 + rest
+
+
+class WorkCalendar:
+    """
+    Monday-Friday workdays with optional holidays.
+
+    Every date has a workday number: the count of workdays before it. A
+    workday's number is its position in the sequence of workdays, and a
+    non-workday shares the number of the next workday.
+    """
+
+    def __init__(self, holidays: Optional[Iterable[date]] = None):
+        # Weekday indexes of holidays; weekend holidays change nothing
+        self._holidays = sorted({
+            _weekdays_before(day.toordinal()) for day in (holidays or []) if day.weekday() < 5
+        })
+        self._holiday_set = frozenset(self._holidays)
+
+    def is_workday(self, day: date) -> bool:
+        """Check if a date is a workday (Monday-Friday and not a holiday)"""
+        return day.weekday() < 5 and (
+            not self._holiday_set or _weekdays_before(day.toordinal()) not in self._holiday_set
+        )
+
+    def workday_number(self, day: date) -> int:
+        """Number of workdays before this date"""
+        index = _weekdays_before(day.toordinal())
+        if self._holidays:
+            index -= bisect_left(self._holidays, index)
+        return index
+
+    def date_of(self, number: int) -> date:
+        """The workday with the given workday number"""
+        index = number
+        if self._holidays:
+            # Smallest weekday index with `number` non-holiday weekdays before it (never a holiday)
+            while True:
+                shifted = number + bisect_right(self._holidays, index)
+                if shifted == index:
+                    break
+                index = shifted
+        return date.fromordinal(_weekday_ordinal(index))
+
+    def add_workdays(self, start_date: date, workdays: int) -> date:
+        """
+        Move a date by a number of workdays, skipping weekends and holidays.
+        Positive counts land on the n-th workday after start_date, negative on the
+        n-th workday before it; 0 returns start_date unchanged.
+        """
+        if workdays == 0:
+            return start_date
+        if workdays > 0:
+            return self.date_of(self.workday_number(start_date + timedelta(days=1)) + workdays - 1)
+        return self.date_of(self.workday_number(start_date) + workdays)
+
+    def workdays_between(self, start_date: date, end_date: date) -> int:
+        """Number of workdays from start_date to end_date, both included (0 if end is before start)"""
+        if end_date < start_date:
+            return 0
+        return self.workday_number(end_date + timedelta(days=1)) - self.workday_number(start_date)
+
+
+class TaskSchedule:
+    """CPM result for one task; all values are inclusive workday offsets from the project start"""
+
+    __slots__ = ('task_id', 'duration', 'early_start', 'early_finish', 'late_start', 'late_finish', 'free_float')
+
+    def __init__(self, task_id, duration: int):
+        self.task_id = task_id
+        self.duration = duration
+        self.early_start = self.early_finish = 0
+        self.late_start = self.late_finish = 0
+        self.free_float = 0
+
+    @property
+    def total_float(self) -> int:
+        return self.late_finish - self.early_finish
+
+    @property
+    def is_critical(self) -> bool:
+        return self.total_float <= 0
+
+
+def _graph(task_ids: List[Hashable], dependencies: Dict[Hashable, Iterable[Hashable]]):
+    """Deduplicated in-graph predecessor and successor lists"""
+    known = set(task_ids)
+    predecessors = {}
+    successors = {task_id: [] for task_id in task_ids}
+    for task_id in task_ids:
+        deps = []
+        for dep_id in dict.fromkeys(dependencies.get(task_id) or ()):
+            if dep_id in known and dep_id != task_id:
+                deps.append(dep_id)
+                successors[dep_id].append(task_id)
+        predecessors[task_id] = deps
+    return predecessors, successors
+
+
+def topological_order(task_ids: Iterable[Hashable], dependencies: Dict[Hashable, Iterable[Hashable]]) -> List:
+    """
+    Tasks ordered so each comes after its dependencies (Kahn's algorithm, stable in input order).
+    Dependencies on unknown tasks are ignored; tasks left in a cycle are released in input order.
+    """
+    task_ids = list(dict.fromkeys(task_ids))
+    predecessors, successors = _graph(task_ids, dependencies)
+    return _order(task_ids, predecessors, successors)
+
+
+def _order(task_ids, predecessors, successors) -> List:
+    pending = {task_id: len(predecessors[task_id]) for task_id in task_ids}
+    ready = deque(task_id for task_id in task_ids if not pending[task_id])
+    order = []
+    next_index = 0
+    while len(order) < len(task_ids):
+        if not ready:
+            # Cycle: release the first task still waiting
+            while pending[task_ids[next_index]] is None or pending[task_ids[next_index]] == 0:
+                next_index += 1
+            ready.append(task_ids[next_index])
+        task_id = ready.popleft()
+        if pending[task_id] is None:
+            continue
+        pending[task_id] = None
+        order.append(task_id)
+        for successor in successors[task_id]:
+            if pending[successor]:
+                pending[successor] -= 1
+                if not pending[successor]:
+                    ready.append(successor)
+    return order
+
+
+def schedule_critical_path(durations: Dict[Hashable, int],
+                           dependencies: Dict[Hashable, Iterable[Hashable]]) -> Dict[Hashable, TaskSchedule]:
+    """
+    Critical Path Method over workday offsets.
+
+    Args:
+        durations: Task id -> duration in workdays (at least 1)
+        dependencies: Task id -> ids of tasks it depends on
+
+    Returns:
+        dict: Task id -> TaskSchedule with early/late start and finish, total and free float,
+        in the input order of durations
+    """
+    task_ids = list(durations)
+    predecessors, successors = _graph(task_ids, dependencies)
+    order = _order(task_ids, predecessors, successors)
+    schedules = {task_id: TaskSchedule(task_id, max(1, int(durations[task_id]))) for task_id in task_ids}
+
+    # Forward pass: a task starts the workday after its last dependency finishes
+    done = set()
+    for task_id in order:
+        schedule = schedules[task_id]
+        finishes = [schedules[dep_id].early_finish for dep_id in predecessors[task_id] if dep_id in done]
+        schedule.early_start = max(finishes) + 1 if finishes else 0
+        schedule.early_finish = schedule.early_start + schedule.duration - 1
+        done.add(task_id)
+
+    project_finish = max((s.early_finish for s in schedules.values()), default=0)
+
+    # Backward pass: a task must finish the workday before its first dependent has to start
+    done = set()
+    for task_id in reversed(order):
+        schedule = schedules[task_id]
+        starts = [schedules[succ_id].late_start for succ_id in successors[task_id] if succ_id in done]
+        schedule.late_finish = min(starts) - 1 if starts else project_finish
+        schedule.late_start = schedule.late_finish - schedule.duration + 1
+        early_starts = [schedules[succ_id].early_start for succ_id in successors[task_id]]
+        schedule.free_float = (
+            max(0, min(early_starts) - schedule.early_finish - 1) if early_starts else schedule.total_float
+        )
+        done.add(task_id)
+
+    return schedules
+
+
+def dependency_depths(dependencies: Dict[Hashable, Iterable[Hashable]]) -> Dict[Hashable, int]:
+    """
+    Length (in dependency links) of the longest dependency chain below each task.
+    Dependencies that aren't keys of the mapping count as tasks without dependencies.
+    """
+    task_ids = list(dependencies)
+    for deps in dependencies.values():
+        task_ids.extend(deps or ())
+    task_ids = list(dict.fromkeys(task_ids))
+    predecessors, successors = _graph(task_ids, dependencies)
+    depths = {}
+    for task_id in _order(task_ids, predecessors, successors):
+        depths[task_id] = max((depths[dep_id] + 1 for dep_id in predecessors[task_id] if dep_id in depths), default=0)
+    return depths
+
+
+PERT_QUANTILES = 4096  # resolution of the sampled beta distributions
+SIMULATION_CHUNK = 2000  # iterations simulated at once (bounds memory to tasks x chunk arrays)
+
+
+class ScheduleSimulation:
+    """Outcome of simulate_schedule"""
+
+    def __init__(self, project_durations, criticality: Dict[Hashable, float], seed: Optional[int]):
+        self.project_durations = project_durations  # sorted workdays to finish the project, one per iteration
+        self.criticality = criticality  # task id -> share of iterations in which the task was critical
+        self.seed = seed
+
+    def percentile(self, fraction: float) -> int:
+        """Duration at a fraction of the sorted iterations (0.5 = median)"""
+        durations = self.project_durations
+        return int(durations[min(len(durations) - 1, int(len(durations) * fraction))])
+
+
+def _beta_quantiles(alpha: float, beta: float, size: int = PERT_QUANTILES):
+    """Beta(alpha, beta) quantiles at the midpoints of `size` equally likely bins"""
+    import numpy as np
+
+    x = (np.arange(16 * size) + 0.5) / (16 * size)
+    log_pdf = (alpha - 1) * np.log(x) + (beta - 1) * np.log1p(-x)
+    cdf = np.cumsum(np.exp(log_pdf - log_pdf.max()))
+    cdf /= cdf[-1]
+    return np.interp((np.arange(size) + 0.5) / size, cdf, x)
+
+
+def simulate_schedule(estimates: Dict[Hashable, tuple], dependencies: Dict[Hashable, Iterable[Hashable]],
+                      iterations: int = 1000, seed: Optional[int] = None) -> ScheduleSimulation:
+    """
+    Monte Carlo simulation of the project duration through the dependency graph.
+
+    Every iteration draws a PERT (beta) duration for every task, in whole
+    workdays of at least 1, and runs the forward and backward passes: the
+    project takes as long as its longest dependency chain, and a task is
+    critical in an iteration when it has no float. All iterations of a task are
+    one NumPy row, so the Python loop runs over tasks, not tasks x iterations.
+
+    Args:
+        estimates: Task id -> (optimistic, most likely, pessimistic) duration in workdays
+        dependencies: Task id -> ids of tasks it depends on
+        iterations: Number of simulated projects
+        seed: Seed for a reproducible simulation (None = random)
+
+    Returns:
+        ScheduleSimulation
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    task_ids = list(estimates)
+    predecessors, successors = _graph(task_ids, dependencies)
+    order = _order(task_ids, predecessors, successors)
+    position = {task_id: i for i, task_id in enumerate(order)}
+    # Row i is order[i]; links against the order (cycles) are dropped
+    preds = [[position[p] for p in predecessors[task_id] if position[p] < i] for i, task_id in enumerate(order)]
+    succs = [[position[s] for s in successors[task_id] if position[s] > i] for i, task_id in enumerate(order)]
+
+    low, mode, high = (np.array([float(estimates[task_id][k]) for task_id in order]) for k in range(3))
+    high = np.maximum(high, low)
+    mode = np.clip(mode, low, high)
+    spread = high - low
+    safe_spread = np.where(spread > 0, spread, 1.0)
+    # PERT shape; tasks without spread get a symmetric shape and a constant duration
+    shapes = np.round(np.stack([1 + 4 * (mode - low) / safe_spread, 1 + 4 * (high - mode) / safe_spread], axis=1), 6)
+    shapes[spread <= 0] = (3.0, 3.0)
+    unique_shapes, shape_index = np.unique(shapes, axis=0, return_inverse=True)
+    tables = np.stack([_beta_quantiles(a, b) for a, b in unique_shapes])
+    shape_index = shape_index.reshape(-1)
+
+    count = len(order)
+    project_durations = []
+    critical_counts = np.zeros(count, dtype=np.int64)
+    for done in range(0, iterations, SIMULATION_CHUNK):
+        size = min(SIMULATION_CHUNK, iterations - done)
+        draws = rng.integers(0, PERT_QUANTILES, size=(count, size))
+        fractions = tables[0][draws] if len(tables) == 1 else tables[shape_index[:, None], draws]
+        durations = np.maximum(1, np.floor(low[:, None] + fractions * spread[:, None])).astype(np.int32)
+
+        finish = np.empty_like(durations)
+        for i in range(count):
+            if not preds[i]:
+                finish[i] = durations[i]
+            elif len(preds[i]) == 1:
+                np.add(finish[preds[i][0]], durations[i], out=finish[i])
+            else:
+                np.add(finish[preds[i]].max(axis=0), durations[i], out=finish[i])
+        project = finish.max(axis=0)
+
+        late_start = np.empty_like(durations)
+        for i in range(count - 1, -1, -1):
+            if not succs[i]:
+                late_finish = project
+            elif len(succs[i]) == 1:
+                late_finish = late_start[succs[i][0]]
+            else:
+                late_finish = late_start[succs[i]].min(axis=0)
+            np.subtract(late_finish, durations[i], out=late_start[i])
+            critical_counts[i] += np.count_nonzero(late_finish == finish[i])
+        project_durations.append(project)
+
+    project_durations = np.sort(np.concatenate(project_durations)) if project_durations else np.zeros(0, dtype=np.int32)
+    criticality = {task_id: float(critical_counts[i]) / max(1, iterations) for i, task_id in enumerate(order)}
+    return ScheduleSimulation(project_durations, {task_id: criticality[task_id] for task_id in task_ids}, seed)
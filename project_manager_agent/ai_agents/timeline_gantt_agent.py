@@ -7,9 +7,18 @@ from .base_agent import BaseAgent
 from .enhancements.timeline_gantt_enhancements import TimelineGanttEnhancements
 from typing import Dict, List, Optional, Set, Tuple
 from datetime import datetime, timedelta, timezone as dt_timezone, date as date_type
+from django.conf import settings
 from django.utils import timezone
 from core.models import Project, Task
+from .context_manager import ContextManager
+from .scheduling import WorkCalendar, dependency_depths, schedule_critical_path
 import calendar
+import math
+
+# Task fields handed to the schedule optimizers and scenario generators
+SCHEDULE_TASK_FIELDS = (
+    'id', 'title', 'estimated_hours', 'assignee_id', 'priority', 'status', 'dependencies', 'due_date',
+)
 
 
 class TimelineGanttAgent(BaseAgent):
@@ -34,39 +43,36 @@ class TimelineGanttAgent(BaseAgent):
         You should consider dependencies, resources, and constraints when planning timelines."""
         self.workdays_per_week = 5  # Monday-Friday
         self.hours_per_day = 8
+        self._calendar = None
+    
+    @property
+    def work_calendar(self) -> WorkCalendar:
+        """Workday calendar (Monday-Friday minus settings.PROJECT_HOLIDAYS)"""
+        if self._calendar is None:
+            self._calendar = WorkCalendar(self._configured_holidays())
+        return self._calendar
+    
+    @staticmethod
+    def _configured_holidays() -> List[date_type]:
+        holidays = []
+        for value in getattr(settings, 'PROJECT_HOLIDAYS', []) or []:
+            try:
+                holidays.append(value if isinstance(value, date_type) else date_type.fromisoformat(str(value)))
+            except ValueError:
+                continue
+        return holidays
     
     def _is_workday(self, date: date_type) -> bool:
-        """Check if a date is a workday (Monday-Friday)"""
-        return date.weekday() < 5  # 0-4 are Monday-Friday
+        """Check if a date is a workday (Monday-Friday, not a holiday)"""
+        return self.work_calendar.is_workday(date)
     
     def _add_workdays(self, start_date: date_type, workdays: int) -> date_type:
         """Add workdays to a date, skipping weekends. Supports negative workdays."""
-        if workdays == 0:
-            return start_date
-        
-        current = start_date
-        days_added = 0
-        direction = 1 if workdays > 0 else -1
-        target = abs(workdays)
-        
-        while abs(days_added) < target:
-            current += timedelta(days=direction)
-            if self._is_workday(current):
-                days_added += direction
-        
-        return current
+        return self.work_calendar.add_workdays(start_date, workdays)
     
     def _calculate_workdays_between(self, start_date: date_type, end_date: date_type) -> int:
         """Calculate number of workdays between two dates"""
-        if end_date < start_date:
-            return 0
-        workdays = 0
-        current = start_date
-        while current <= end_date:
-            if self._is_workday(current):
-                workdays += 1
-            current += timedelta(days=1)
-        return workdays
+        return self.work_calendar.workdays_between(start_date, end_date)
     
     def create_timeline(self, project_id: int, tasks: List[Dict]) -> Dict:
         """
@@ -473,9 +479,9 @@ Return JSON array with optimized dates:
             risk_buffers = TimelineGanttEnhancements.calculate_risk_buffers(gantt_data['tasks'])
             gantt_data['risk_buffers'] = risk_buffers
             
-            # Generate probabilistic timeline
+            # Generate probabilistic timeline (seeded per project, so refreshing the chart doesn't reshuffle it)
             probabilistic_timeline = TimelineGanttEnhancements.generate_probabilistic_timeline(
-                gantt_data['tasks'], iterations=1000
+                gantt_data['tasks'], iterations=1000, seed=project_id
             )
             gantt_data['probabilistic_timeline'] = probabilistic_timeline
             
@@ -585,184 +591,70 @@ Return JSON array with optimized dates:
         else:
             return 0
     
+    def _task_duration_days(self, task_data: Dict) -> int:
+        """Task duration in workdays for CPM (from duration_days, else estimated hours, else 3)"""
+        duration = task_data.get('duration_days', 1)
+        if duration <= 0:
+            # Estimate from hours or default
+            hours = task_data.get('estimated_hours', 0) or 0
+            if hours > 0:
+                return max(1, int(hours / self.hours_per_day))
+            return 3  # Default 3 days
+        return max(1, duration)
+    
     def _identify_critical_path(self, tasks_data: List[Dict], tasks_queryset=None) -> Tuple[List[Dict], Dict]:
         """
         Identify critical path using Critical Path Method (CPM) algorithm.
         Calculates early start/finish, late start/finish, and float for each task.
+        Floats are in workdays; critical tasks have zero total float.
         """
         if not tasks_data:
-            return []
+            return [], {}
         
-        # Build task map and dependency graph
         task_map = {t['id']: t for t in tasks_data}
-        dependencies = {}
-        dependents = {}
-        
-        for task in tasks_data:
-            task_id = task['id']
-            deps = task.get('dependencies', [])
-            dependencies[task_id] = deps
-            for dep_id in deps:
-                if dep_id not in dependents:
-                    dependents[dep_id] = []
-                dependents[dep_id].append(task_id)
-        
-        # Find tasks with no dependencies (start nodes)
-        start_tasks = [t_id for t_id in task_map.keys() if not dependencies.get(t_id, [])]
-        
-        # Forward pass: Calculate Early Start (ES) and Early Finish (EF)
-        early_start = {}
-        early_finish = {}
-        visited = set()
-        
-        def get_task_duration(task_data):
-            """Get task duration in days"""
-            duration = task_data.get('duration_days', 1)
-            if duration <= 0:
-                # Estimate from hours or default
-                hours = task_data.get('estimated_hours', 0) or 0
-                if hours > 0:
-                    return max(1, int(hours / self.hours_per_day))
-                return 3  # Default 3 days
-            return max(1, duration)
-        
-        def forward_pass(task_id):
-            if task_id in visited:
-                return early_start.get(task_id, date_type.today())
-            
-            visited.add(task_id)
-            task = task_map[task_id]
-            
-            # Get dependencies' early finish dates
-            dep_early_finishes = []
-            for dep_id in dependencies.get(task_id, []):
-                if dep_id in task_map:
-                    forward_pass(dep_id)  # Ensure dependency is processed
-                    dep_ef = early_finish.get(dep_id)
-                    if dep_ef:
-                        dep_early_finishes.append(dep_ef)
-            
-            # Early start is max of all dependency early finishes (or project start)
-            if dep_early_finishes:
-                es = max(dep_early_finishes)
-                # Add 1 workday buffer between tasks
-                es = self._add_workdays(es, 1)
-            else:
-                # Start task on project start date (or earliest date in tasks)
-                start_dates = [datetime.strptime(t.get('start_date', ''), '%Y-%m-%d').date() 
-                             for t in tasks_data if t.get('start_date')]
-                es = min(start_dates) if start_dates else date_type.today()
-            
-            duration = get_task_duration(task)
-            ef = self._add_workdays(es, duration - 1)  # -1 because start day counts
-            
-            early_start[task_id] = es
-            early_finish[task_id] = ef
-            
-            return es
+        schedules = schedule_critical_path(
+            {task_id: self._task_duration_days(task) for task_id, task in task_map.items()},
+            {task_id: task.get('dependencies', []) for task_id, task in task_map.items()},
+        )
         
-        # Process all tasks
-        for task_id in task_map.keys():
-            forward_pass(task_id)
+        # Offsets count workdays from the earliest planned start (or today)
+        start_dates = [datetime.strptime(t['start_date'], '%Y-%m-%d').date() for t in tasks_data if t.get('start_date')]
+        project_start = min(start_dates) if start_dates else date_type.today()
+        if not self._is_workday(project_start):
+            project_start = self._add_workdays(project_start, 1)
+        dates = {}
         
-        # Find project end date (max early finish)
-        if not early_finish:
-            return [], {}
+        def offset_date(offset):
+            if offset not in dates:
+                dates[offset] = self._add_workdays(project_start, offset).isoformat()
+            return dates[offset]
         
-        project_end = max(early_finish.values())
-        
-        # Backward pass: Calculate Late Start (LS) and Late Finish (LF)
-        late_finish = {}
-        late_start = {}
-        visited_backward = set()
-        
-        def backward_pass(task_id):
-            if task_id in visited_backward:
-                return late_finish.get(task_id, project_end)
-            
-            visited_backward.add(task_id)
-            task = task_map[task_id]
-            
-            # Get dependents' late start dates
-            dependent_late_starts = []
-            for dep_id in dependents.get(task_id, []):
-                if dep_id in task_map:
-                    backward_pass(dep_id)  # Ensure dependent is processed
-                    dep_ls = late_start.get(dep_id)
-                    if dep_ls:
-                        dependent_late_starts.append(dep_ls)
-            
-            # Late finish is min of all dependent late starts (or project end)
-            if dependent_late_starts:
-                lf = min(dependent_late_starts)
-                # Subtract 1 workday buffer
-                lf = self._add_workdays(lf, -1)
-            else:
-                lf = project_end
-            
-            duration = get_task_duration(task)
-            ls = self._add_workdays(lf, -(duration - 1))
-            
-            late_finish[task_id] = lf
-            late_start[task_id] = ls
-            
-            return lf
-        
-        # Process all tasks in reverse order
-        for task_id in reversed(list(task_map.keys())):
-            backward_pass(task_id)
-        
-        # Calculate float (slack) for all tasks and identify critical path
         all_task_slack = {}
         critical_path = []
-        
-        for task_id, task_data in task_map.items():
-            es = early_start.get(task_id)
-            ef = early_finish.get(task_id)
-            ls = late_start.get(task_id)
-            lf = late_finish.get(task_id)
-            
-            if es and ef and ls and lf:
-                # Total float = LS - ES or LF - EF (should be same)
-                total_float = self._calculate_workdays_between(ef, lf)
-                
-                # Free float (can delay without affecting next task)
-                free_float = float('inf')
-                for dep_id in dependents.get(task_id, []):
-                    if dep_id in early_start:
-                        dep_es = early_start[dep_id]
-                        free_float = min(free_float, self._calculate_workdays_between(ef, dep_es))
-                
-                if free_float == float('inf'):
-                    free_float = total_float
-                
-                # Critical path: tasks with zero or near-zero float
-                is_critical = total_float <= 1  # Allow 1 day tolerance
-                
-                # Store slack for all tasks
-                all_task_slack[task_id] = {
-                    'total_float': total_float,
-                    'free_float': free_float,
-                    'early_start': es.isoformat(),
-                    'early_finish': ef.isoformat(),
-                    'late_start': ls.isoformat(),
-                    'late_finish': lf.isoformat()
-                }
-                
-                # Add to critical path if zero float
-                if is_critical:
-                    critical_path.append({
-                        'task_id': task_id,
-                        'title': task_data.get('title', 'Unknown'),
-                        'early_start': es.isoformat(),
-                        'early_finish': ef.isoformat(),
-                        'late_start': ls.isoformat(),
-                        'late_finish': lf.isoformat(),
-                        'total_float': total_float,
-                        'free_float': free_float,
-                        'duration_days': get_task_duration(task_data),
-                        'reason': f'Zero float - on critical path (blocks project completion)'
-                    })
+        for task_id, schedule in schedules.items():
+            slack = {
+                'total_float': schedule.total_float,
+                'free_float': schedule.free_float,
+                'early_start': offset_date(schedule.early_start),
+                'early_finish': offset_date(schedule.early_finish),
+                'late_start': offset_date(schedule.late_start),
+                'late_finish': offset_date(schedule.late_finish)
+            }
+            all_task_slack[task_id] = slack
+            
+            if schedule.is_critical:
+                critical_path.append({
+                    'task_id': task_id,
+                    'title': task_map[task_id].get('title', 'Unknown'),
+                    'early_start': slack['early_start'],
+                    'early_finish': slack['early_finish'],
+                    'late_start': slack['late_start'],
+                    'late_finish': slack['late_finish'],
+                    'total_float': schedule.total_float,
+                    'free_float': schedule.free_float,
+                    'duration_days': schedule.duration,
+                    'reason': f'Zero float - on critical path (blocks project completion)'
+                })
         
         # Sort by early start
         critical_path.sort(key=lambda x: x['early_start'])
@@ -1373,17 +1265,19 @@ Return JSON array:
         total_actual_hours = 0
         tasks_with_deps = 0
         dependency_chains = []
+        task_workdays = {}
+        task_dependencies = {}
         
-        for task in tasks:
+        for index, task in enumerate(tasks):
             estimated = task.get('estimated_hours')
             actual = task.get('actual_hours')
             dependencies = task.get('dependencies', [])
             
             if estimated and estimated > 0:
-                total_estimated_hours += float(estimated)
+                hours = float(estimated)
                 tasks_with_estimates += 1
             elif actual and actual > 0:
-                total_estimated_hours += float(actual)
+                hours = float(actual)
                 total_actual_hours += float(actual)
                 tasks_with_actual += 1
             else:
@@ -1395,7 +1289,10 @@ Return JSON array:
                     hours = 4
                 else:
                     hours = 8
-                total_estimated_hours += hours
+            total_estimated_hours += hours
+            task_key = task.get('id', f'task-{index}')
+            task_workdays[task_key] = max(1, math.ceil(hours / self.hours_per_day))
+            task_dependencies[task_key] = dependencies or []
             
             if dependencies and len(dependencies) > 0:
                 tasks_with_deps += 1
@@ -1410,6 +1307,10 @@ Return JSON array:
         parallelizable_tasks = len(tasks) - tasks_with_deps
         max_parallel_tasks = min(team_size, parallelizable_tasks)
         
+        # Longest dependency chain in workdays (CPM) - the minimum duration with unlimited people
+        schedules = schedule_critical_path(task_workdays, task_dependencies)
+        critical_path_days = max((schedule.early_finish for schedule in schedules.values()), default=-1) + 1
+        
         # Prepare task summary for AI
         import json
         task_summary = []
@@ -1437,6 +1338,7 @@ PROJECT STATISTICS:
 - Team Size: {team_size} people
 - Parallelizable Tasks (no dependencies): {parallelizable_tasks}
 - Maximum Parallel Tasks: {max_parallel_tasks}
+- Critical Path (longest dependency chain): {critical_path_days} working days
 
 TASK DETAILS:
 {json.dumps(task_summary[:30], indent=2)}
@@ -1529,6 +1431,8 @@ CALCULATE AND RETURN JSON:
             # Dependency impact
             dependency_multiplier = 1.0 + (tasks_with_deps * 0.1 / max(1, len(tasks)))
             adjusted_days = effective_days * dependency_multiplier
+            # No amount of parallel work finishes before the longest dependency chain
+            adjusted_days = max(adjusted_days, critical_path_days)
             
             optimistic_days = adjusted_days * 0.85
             realistic_days = adjusted_days * 1.20
@@ -1563,7 +1467,7 @@ CALCULATE AND RETURN JSON:
                     'Break down large tasks into smaller, parallelizable subtasks'
                 ],
                 'dependency_analysis': {
-                    'critical_path_length_days': round(realistic_days, 1),
+                    'critical_path_length_days': critical_path_days,
                     'bottleneck_tasks': [],
                     'dependency_impact_percent': round((dependency_multiplier - 1) * 100, 1)
                 }
@@ -1868,12 +1772,12 @@ CALCULATE AND RETURN JSON:
         critical_path = []
         bottlenecks = []
         
-        # Build dependency relationships
+        # Build dependency relationships (relations are prefetched - no queries per task)
         for task in tasks:
-            dependencies = task.depends_on.all()
-            dependents = task.dependent_tasks.all()
+            dependencies = list(task.depends_on.all())
+            dependents = list(task.dependent_tasks.all())
             
-            if dependencies.exists() or dependents.exists():
+            if dependencies or dependents:
                 dependency_info = {
                     'task_id': task.id,
                     'task_title': task.title,
@@ -1883,8 +1787,8 @@ CALCULATE AND RETURN JSON:
                     'assignee': task.assignee.username if task.assignee else None,
                     'depends_on': [],
                     'dependent_tasks': [],
-                    'dependency_count': dependencies.count(),
-                    'dependent_count': dependents.count(),
+                    'dependency_count': len(dependencies),
+                    'dependent_count': len(dependents),
                     'is_critical': False,
                     'is_bottleneck': False
                 }
@@ -1908,27 +1812,27 @@ CALCULATE AND RETURN JSON:
                     })
                 
                 # Identify critical path tasks (tasks with many dependents)
-                if dependents.count() >= 3:
+                if len(dependents) >= 3:
                     dependency_info['is_critical'] = True
                     critical_path.append({
                         'task_id': task.id,
                         'task_title': task.title,
-                        'dependent_count': dependents.count(),
-                        'reason': f'This task blocks {dependents.count()} other tasks'
+                        'dependent_count': len(dependents),
+                        'reason': f'This task blocks {len(dependents)} other tasks'
                     })
                 
                 # Identify bottlenecks (tasks with many dependencies and many dependents)
-                if dependencies.count() >= 2 and dependents.count() >= 2:
+                if len(dependencies) >= 2 and len(dependents) >= 2:
                     dependency_info['is_bottleneck'] = True
                     bottlenecks.append({
                         'task_id': task.id,
                         'task_title': task.title,
-                        'dependency_count': dependencies.count(),
-                        'dependent_count': dependents.count(),
+                        'dependency_count': len(dependencies),
+                        'dependent_count': len(dependents),
                         'status': task.status,
                         'priority': task.priority,
                         'risk_level': 'high' if task.status in ['todo', 'blocked'] else 'medium',
-                        'reason': f'Task has {dependencies.count()} dependencies and blocks {dependents.count()} tasks'
+                        'reason': f'Task has {len(dependencies)} dependencies and blocks {len(dependents)} tasks'
                     })
                 
                 dependency_map.append(dependency_info)
@@ -1936,8 +1840,8 @@ CALCULATE AND RETURN JSON:
         # Identify potential bottleneck risks
         bottleneck_risks = []
         for task in tasks:
-            if task.status in ['todo', 'blocked'] and task.dependent_tasks.count() > 0:
-                blocking_count = task.dependent_tasks.filter(status__in=['todo', 'in_progress']).count()
+            if task.status in ['todo', 'blocked']:
+                blocking_count = sum(1 for dep_task in task.dependent_tasks.all() if dep_task.status in ['todo', 'in_progress'])
                 if blocking_count > 2:
                     bottleneck_risks.append({
                         'task_id': task.id,
@@ -1951,29 +1855,9 @@ CALCULATE AND RETURN JSON:
         # Calculate dependency statistics
         total_dependencies = sum(len(d['depends_on']) for d in dependency_map)
         total_dependents = sum(len(d['dependent_tasks']) for d in dependency_map)
-        max_dependency_depth = 0
-        
-        def calculate_depth(task_id, visited=None, depth=0):
-            if visited is None:
-                visited = set()
-            if task_id in visited:
-                return depth
-            visited.add(task_id)
-            
-            task_info = next((d for d in dependency_map if d['task_id'] == task_id), None)
-            if not task_info:
-                return depth
-            
-            max_child_depth = depth
-            for dep in task_info['depends_on']:
-                child_depth = calculate_depth(dep['id'], visited.copy(), depth + 1)
-                max_child_depth = max(max_child_depth, child_depth)
-            
-            return max_child_depth
-        
-        for task_info in dependency_map:
-            depth = calculate_depth(task_info['task_id'])
-            max_dependency_depth = max(max_dependency_depth, depth)
+        # Longest dependency chain, computed once over the whole graph
+        depths = dependency_depths({d['task_id']: [dep['id'] for dep in d['depends_on']] for d in dependency_map})
+        max_dependency_depth = max(depths.values(), default=0)
         
         # Use AI to analyze dependencies and provide insights
         if dependency_map:
@@ -2471,18 +2355,7 @@ Return JSON:
                 'error': f'Project with ID {project_id} not found'
             }
         
-        tasks = Task.objects.filter(project=project).select_related('assignee')
-        
-        tasks_data = [{
-            'id': t.id,
-            'title': t.title,
-            'estimated_hours': float(t.estimated_hours) if t.estimated_hours else None,
-            'assignee_id': t.assignee.id if t.assignee else None,
-            'priority': t.priority,
-            'status': t.status,
-            'dependencies': [dep.id for dep in t.depends_on.all()],
-            'due_date': t.due_date.isoformat() if t.due_date else None,
-        } for t in tasks]
+        tasks_data = ContextManager.get_project_tasks(project.id, fields=SCHEDULE_TASK_FIELDS)
         
         optimization_result = TimelineGanttEnhancements.optimize_schedule(tasks_data, resources)
         
@@ -2509,18 +2382,7 @@ Return JSON:
         for project_id in project_ids:
             try:
                 project = Project.objects.get(id=project_id)
-                tasks = Task.objects.filter(project=project).select_related('assignee')
-                
-                tasks_data = [{
-                    'id': t.id,
-                    'title': t.title,
-                    'estimated_hours': float(t.estimated_hours) if t.estimated_hours else None,
-                    'assignee_id': t.assignee.id if t.assignee else None,
-                    'priority': t.priority,
-                    'status': t.status,
-                    'dependencies': [dep.id for dep in t.depends_on.all()],
-                    'due_date': t.due_date.isoformat() if t.due_date else None,
-                } for t in tasks]
+                tasks_data = ContextManager.get_project_tasks(project.id, fields=SCHEDULE_TASK_FIELDS)
                 
                 projects_data.append({
                     'id': project.id,
@@ -2559,17 +2421,7 @@ Return JSON:
                 'error': f'Project with ID {project_id} not found'
             }
         
-        tasks = Task.objects.filter(project=project).select_related('assignee')
-        
-        tasks_data = [{
-            'id': t.id,
-            'title': t.title,
-            'estimated_hours': float(t.estimated_hours) if t.estimated_hours else None,
-            'priority': t.priority,
-            'status': t.status,
-            'dependencies': [dep.id for dep in t.depends_on.all()],
-            'due_date': t.due_date.isoformat() if t.due_date else None,
-        } for t in tasks]
+        tasks_data = ContextManager.get_project_tasks(project.id, fields=SCHEDULE_TASK_FIELDS)
         
         scenarios_result = TimelineGanttEnhancements.generate_what_if_scenarios(tasks_data, scenarios)
         
@@ -2602,20 +2454,11 @@ Return JSON:
                 'error': f'Project with ID {project_id} not found'
             }
         
-        tasks = Task.objects.filter(project=project).select_related('assignee')
-        
-        tasks_data = [{
-            'id': t.id,
-            'title': t.title,
-            'estimated_hours': float(t.estimated_hours) if t.estimated_hours else None,
-            'priority': t.priority,
-            'status': t.status,
-            'dependencies': [dep.id for dep in t.depends_on.all()],
-            'due_date': t.due_date.isoformat() if t.due_date else None,
-        } for t in tasks]
+        tasks_data = ContextManager.get_project_tasks(project.id, fields=SCHEDULE_TASK_FIELDS)
         
         optimization_result = TimelineGanttEnhancements.optimize_schedule_genetic_algorithm(
-            tasks_data, generations=generations, population_size=population_size
+            tasks_data, generations=generations, population_size=population_size, seed=project_id,
+            workers=getattr(settings, 'SCHEDULE_OPTIMIZER_WORKERS', 0),
         )
         
         return {
@@ -2646,20 +2489,10 @@ Return JSON:
                 'error': f'Project with ID {project_id} not found'
             }
         
-        tasks = Task.objects.filter(project=project).select_related('assignee')
-        
-        tasks_data = [{
-            'id': t.id,
-            'title': t.title,
-            'estimated_hours': float(t.estimated_hours) if t.estimated_hours else None,
-            'priority': t.priority,
-            'status': t.status,
-            'dependencies': [dep.id for dep in t.depends_on.all()],
-            'due_date': t.due_date.isoformat() if t.due_date else None,
-        } for t in tasks]
+        tasks_data = ContextManager.get_project_tasks(project.id, fields=SCHEDULE_TASK_FIELDS)
         
         optimization_result = TimelineGanttEnhancements.optimize_schedule_simulated_annealing(
-            tasks_data, iterations=iterations
+            tasks_data, iterations=iterations, seed=project_id
         )
         
         return {
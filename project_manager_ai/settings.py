@@ -410,6 +410,94 @@ GROQ_API_KEY = os.getenv('GROQ_API_KEY', '')
 GROQ_MODEL = os.getenv('GROQ_MODEL', 'llama-3.1-8b-instant')
 GROQ_REC_API_KEY = os.getenv('GROQ_REC_API_KEY', '')
 
+# Shared LLM client pool (core/llm_pool.py) - one keep-alive client per provider/API key
+LLM_POOL_MAX_CONCURRENCY = int(os.getenv('LLM_POOL_MAX_CONCURRENCY', '8'))  # Concurrent requests per client
+LLM_POOL_MAX_KEEPALIVE = int(os.getenv('LLM_POOL_MAX_KEEPALIVE', '20'))  # Idle connections kept open
+LLM_POOL_KEEPALIVE_EXPIRY = float(os.getenv('LLM_POOL_KEEPALIVE_EXPIRY', '60'))  # Seconds before idle connection closes
+LLM_POOL_ACQUIRE_TIMEOUT = float(os.getenv('LLM_POOL_ACQUIRE_TIMEOUT', '120'))  # Max wait for a free slot
+
+# LLM response cache (core/llm_cache.py) - in-process LRU in front of Django's cache
+LLM_CACHE_ENABLED = os.getenv('LLM_CACHE_ENABLED', 'True').lower() == 'true'
+LLM_CACHE_TTL = int(os.getenv('LLM_CACHE_TTL', '3600'))  # Default TTL (seconds) for cached responses
+LLM_CACHE_LOCAL_MAX_ENTRIES = int(os.getenv('LLM_CACHE_LOCAL_MAX_ENTRIES', '512'))  # In-process LRU size
+LLM_CACHE_ALIAS = os.getenv('LLM_CACHE_ALIAS', 'default')  # Django cache alias for the shared tier
+
+# Recruitment CV batches (recruitment_agent/batch.py) - CVs processed concurrently per upload
+RECRUITMENT_BATCH_WORKERS = int(os.getenv('RECRUITMENT_BATCH_WORKERS', '4'))
+# CVs per Celery chunk task for background CV jobs (process-cvs with run_async=true)
+RECRUITMENT_JOB_CHUNK_SIZE = int(os.getenv('RECRUITMENT_JOB_CHUNK_SIZE', '10'))
+
+# Recruitment JSONL logs (recruitment_agent/log_service.py) - buffered, flushed by a background thread
+RECRUITMENT_LOG_FLUSH_INTERVAL = float(os.getenv('RECRUITMENT_LOG_FLUSH_INTERVAL', '1.0'))  # seconds
+RECRUITMENT_LOG_FLUSH_BYTES = int(os.getenv('RECRUITMENT_LOG_FLUSH_BYTES', str(64 * 1024)))
+RECRUITMENT_LOG_MAX_BYTES = int(os.getenv('RECRUITMENT_LOG_MAX_BYTES', str(10 * 1024 * 1024)))  # rotate at this size
+RECRUITMENT_LOG_BACKUP_COUNT = int(os.getenv('RECRUITMENT_LOG_BACKUP_COUNT', '5'))
+
+# Marketing SMTP connection pool (marketing_agent/services/smtp_pool.py) - per EmailAccount
+SMTP_POOL_MAX_CONNECTIONS_PER_ACCOUNT = int(os.getenv('SMTP_POOL_MAX_CONNECTIONS_PER_ACCOUNT', '2'))
+SMTP_POOL_IDLE_TIMEOUT = int(os.getenv('SMTP_POOL_IDLE_TIMEOUT', '60'))  # seconds before an idle connection is dropped
+SMTP_POOL_ACQUIRE_TIMEOUT = int(os.getenv('SMTP_POOL_ACQUIRE_TIMEOUT', '60'))  # seconds to wait for a free connection
+
+# Outbound email rate limits (marketing_agent/services/rate_limiter.py) - token buckets in Django's cache.
+# Use a shared cache (Redis/DB) for EMAIL_RATE_LIMIT_CACHE_ALIAS so limits hold across Celery workers.
+EMAIL_RATE_LIMIT_ENABLED = os.getenv('EMAIL_RATE_LIMIT_ENABLED', 'True').lower() == 'true'
+EMAIL_RATE_LIMIT_PER_ACCOUNT_PER_MINUTE = int(os.getenv('EMAIL_RATE_LIMIT_PER_ACCOUNT_PER_MINUTE', '30'))
+EMAIL_RATE_LIMIT_PER_DOMAIN_PER_MINUTE = int(os.getenv('EMAIL_RATE_LIMIT_PER_DOMAIN_PER_MINUTE', '60'))
+EMAIL_RATE_LIMIT_CACHE_ALIAS = os.getenv('EMAIL_RATE_LIMIT_CACHE_ALIAS', 'default')
+
+# IMAP inbox sync (sync_inbox): UIDs per batched FETCH and accounts synced in parallel
+IMAP_SYNC_FETCH_BATCH_SIZE = int(os.getenv('IMAP_SYNC_FETCH_BATCH_SIZE', '200'))
+IMAP_SYNC_MAX_WORKERS = int(os.getenv('IMAP_SYNC_MAX_WORKERS', '4'))
+
+# Open/click tracking write-behind buffer (marketing_agent/services/tracking_buffer.py)
+EMAIL_TRACKING_BUFFER_ENABLED = os.getenv('EMAIL_TRACKING_BUFFER_ENABLED', 'True').lower() == 'true'
+EMAIL_TRACKING_FLUSH_INTERVAL = float(os.getenv('EMAIL_TRACKING_FLUSH_INTERVAL', '1.0'))  # seconds between batch writes
+EMAIL_TRACKING_FLUSH_EVENTS = int(os.getenv('EMAIL_TRACKING_FLUSH_EVENTS', '500'))  # flush early at this many events
+EMAIL_TRACKING_MAX_BUFFERED_EVENTS = int(os.getenv('EMAIL_TRACKING_MAX_BUFFERED_EVENTS', '50000'))
+EMAIL_TRACKING_MAX_ATTEMPTS = int(os.getenv('EMAIL_TRACKING_MAX_ATTEMPTS', '3'))  # per batch before its events are dropped
+
+# send_sequence_emails: due contacts loaded per keyset-paginated chunk (by next_send_at)
+SEQUENCE_SEND_CHUNK_SIZE = int(os.getenv('SEQUENCE_SEND_CHUNK_SIZE', '200'))
+# Fan sequence sending out to one Celery task per active campaign (marketing_agent.tasks);
+# a per-campaign lease (marketing_agent/services/send_lease.py) keeps concurrent shards apart
+SEQUENCE_SEND_FANOUT = os.getenv('SEQUENCE_SEND_FANOUT', 'True').lower() == 'true'
+SEQUENCE_SEND_SHARD_EXPIRES = int(os.getenv('SEQUENCE_SEND_SHARD_EXPIRES', '600'))  # seconds a queued shard stays valid
+SEQUENCE_SEND_LEASE_SECONDS = int(os.getenv('SEQUENCE_SEND_LEASE_SECONDS', '900'))  # renewed once less than half is left
+
+# Compiled email render plans kept per process (marketing_agent/services/render_plan.py)
+EMAIL_RENDER_PLAN_CACHE_SIZE = int(os.getenv('EMAIL_RENDER_PLAN_CACHE_SIZE', '256'))
+
+# Rows per chunk when importing a campaign's leads file (marketing_agent/services/lead_import.py)
+LEAD_IMPORT_CHUNK_SIZE = int(os.getenv('LEAD_IMPORT_CHUNK_SIZE', '1000'))
+
+# Task change side effects (activity log, notifications, assignment emails) - core/task_events.py
+# Applied in the background in batches; False applies them synchronously after each commit
+TASK_EVENTS_ASYNC = os.getenv('TASK_EVENTS_ASYNC', 'True').lower() == 'true'
+TASK_EVENTS_FLUSH_INTERVAL = float(os.getenv('TASK_EVENTS_FLUSH_INTERVAL', '2'))  # seconds
+TASK_EVENTS_BATCH_SIZE = int(os.getenv('TASK_EVENTS_BATCH_SIZE', '500'))
+TASK_EVENTS_MAX_ATTEMPTS = int(os.getenv('TASK_EVENTS_MAX_ATTEMPTS', '3'))  # per batch before its events are dropped
+
+# Company dashboard / projects list response cache (core/dashboard_cache.py), 0 = disabled.
+# Invalidated on Project/Task/Subtask writes; use a shared cache alias when running several workers.
+COMPANY_DASHBOARD_CACHE_TTL = int(os.getenv('COMPANY_DASHBOARD_CACHE_TTL', '0'))  # seconds
+COMPANY_DASHBOARD_CACHE_ALIAS = os.getenv('COMPANY_DASHBOARD_CACHE_ALIAS', 'default')
+
+# Non-working days for timeline scheduling (project_manager_agent/ai_agents/scheduling.py),
+# comma-separated ISO dates on top of weekends, e.g. "2025-12-25,2026-01-01"
+PROJECT_HOLIDAYS = [day.strip() for day in os.getenv('PROJECT_HOLIDAYS', '').split(',') if day.strip()]
+
+# Processes evaluating each generation of the genetic schedule optimizer
+# (project_manager_agent/ai_agents/schedule_optimization.py); 0 or 1 evaluates
+# in process, which is fastest below a few thousand tasks
+SCHEDULE_OPTIMIZER_WORKERS = int(os.getenv('SCHEDULE_OPTIMIZER_WORKERS', '0'))
+
+# Seconds the agents' project context is cached
+# (project_manager_agent/ai_agents/context_manager.py). Entries are keyed by a
+# per-project version bumped on every change (core/context_versions.py). Unset:
+# a day with a shared cache backend, 5 minutes with the per-process default
+# cache, which doesn't carry version bumps to other workers
+PM_CONTEXT_CACHE_TTL = int(os.environ['PM_CONTEXT_CACHE_TTL']) if os.getenv('PM_CONTEXT_CACHE_TTL') else None
+
 
 # --------------------
 # Email Configuration
@@ -544,8 +632,10 @@ CELERY_WORKER_PREFETCH_MULTIPLIER = 1  # Prefetch only 1 task at a time
 CELERY_TASK_REJECT_ON_WORKER_LOST = True  # Reject tasks if worker dies
 
 # Windows-specific worker settings (fixes ValueError unpacking issue)
-CELERY_WORKER_POOL = 'solo'  # Use solo pool on Windows (avoids multiprocessing issues)
-CELERY_WORKER_CONCURRENCY = 1  # Single worker process on Windows
+# Sequence sending fans out per campaign, so on Linux set e.g. CELERY_WORKER_POOL=prefork and
+# CELERY_WORKER_CONCURRENCY=8 (or run more workers) to send campaigns in parallel
+CELERY_WORKER_POOL = os.getenv('CELERY_WORKER_POOL', 'solo')  # Use solo pool on Windows (avoids multiprocessing issues)
+CELERY_WORKER_CONCURRENCY = int(os.getenv('CELERY_WORKER_CONCURRENCY', '1'))  # Single worker process on Windows
 
 # Retry settings
 CELERY_TASK_DEFAULT_RETRY_DELAY = 300  # 5 minutes default retry delay
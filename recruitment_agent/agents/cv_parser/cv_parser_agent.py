@@ -17,6 +17,7 @@ except (ImportError, TypeError, Exception):
     # pip install spacy
     # python -m spacy download en_core_web_sm
 
+from recruitment_agent.batch import run_batch
 from recruitment_agent.core import GroqClient, GroqClientError
 from recruitment_agent.log_service import LogService
 from recruitment_agent.agents.cv_parser.prompts import CV_PARSING_SYSTEM_PROMPT
@@ -98,22 +99,32 @@ class CVParserAgent:
         self._log_step("parse_complete", {"extracted_keys": list(normalized.keys())})
         return normalized
 
-    def parse_multiple(self, cvs: List[str]) -> List[Dict[str, Any]]:
+    def parse_multiple(
+        self, cvs: List[str], max_workers: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
         """
-        Parse multiple CVs provided as raw text strings.
+        Parse multiple CVs provided as raw text strings, concurrently.
+
+        Results are returned in input order. A CV that fails to parse yields
+        {"error": ..., "error_type": ...} in its slot instead of aborting the
+        batch; an expired/invalid API key is still raised since no CV can succeed.
         """
-        results: List[Dict[str, Any]] = []
         self._log_step("batch_parse_start", {"count": len(cvs)})
-        for idx, cv_text in enumerate(cvs):
-            self._log_step("cv_processing_start", {"index": idx})
-            try:
-                parsed = self.parse_text(cv_text)
-                results.append(parsed)
-            except Exception as exc:  # pragma: no cover - propagate after logging
-                self._log_error("cv_processing_failed", exc, {"index": idx})
-                raise
-            self._log_step("cv_processing_complete", {"index": idx})
-        self._log_step("batch_parse_complete", {"count": len(results)})
+        outcomes = run_batch(
+            cvs, self.parse_text, max_workers=max_workers, log_service=self.log_service
+        )
+        results: List[Dict[str, Any]] = []
+        for outcome in outcomes:
+            if outcome["is_auth_error"]:
+                raise GroqClientError(outcome["error"], is_auth_error=True)
+            if outcome["ok"]:
+                results.append(outcome["result"])
+            else:
+                results.append({"error": outcome["error"], "error_type": outcome["error_type"]})
+        self._log_step(
+            "batch_parse_complete",
+            {"count": len(results), "failed": sum(1 for o in outcomes if not o["ok"])},
+        )
         return results
 
     def _extract_text_from_pdf(self, path: Path) -> str:
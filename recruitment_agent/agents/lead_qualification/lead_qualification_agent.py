@@ -1,8 +1,9 @@
 import re
 from typing import Any, Dict, List, Optional, Tuple
 
+from recruitment_agent.batch import run_batch
 from recruitment_agent.log_service import LogService
-from recruitment_agent.skill_equivalences import skill_matches_keyword, is_exact_match, is_related_match
+from recruitment_agent.skill_equivalences import MATCH_EXACT, MATCH_RELATED, match_matrix
 
 
 class LeadQualificationAgent:
@@ -28,6 +29,7 @@ class LeadQualificationAgent:
         enriched_data: Optional[Dict[str, Any]] = None,
         interview_threshold: Optional[int] = None,
         hold_threshold: Optional[int] = None,
+        persist: bool = True,
     ) -> Dict[str, Any]:
         self._log_step("qualification_start", {"has_keywords": bool(job_keywords), "has_enriched": bool(enriched_data)})
 
@@ -96,7 +98,7 @@ class LeadQualificationAgent:
         }
 
         record_id = candidate_insights.get("record_id") or parsed_cv.get("record_id")
-        if self.sql_repository and record_id:
+        if persist and self.sql_repository and record_id:
             self.sql_repository.store_qualification(record_id, result)
 
         self._log_step("qualification_complete", {"decision": decision, "priority": priority, "confidence": confidence})
@@ -107,11 +109,34 @@ class LeadQualificationAgent:
         cvs: List[Tuple[Dict[str, Any], Dict[str, Any]]],
         job_keywords: Optional[List[str]] = None,
         top_n: Optional[int] = None,
+        max_workers: Optional[int] = None,
+        interview_threshold: Optional[int] = None,
+        hold_threshold: Optional[int] = None,
     ) -> List[Dict[str, Any]]:
+        """
+        Qualify many CVs concurrently, rank them in one sort and persist all
+        qualification results and ranks with a single bulk repository write.
+        cvs: list of (parsed_cv, candidate_insights) tuples.
+        """
         self._log_step("batch_qualification_start", {"count": len(cvs), "has_keywords": bool(job_keywords), "top_n": top_n})
-        results: List[Dict[str, Any]] = []
-        for parsed_cv, insights in cvs:
-            results.append(self.qualify(parsed_cv, insights, job_keywords))
+        
+        # Qualify on the batch pool; nothing is written until all candidates are ranked
+        outcomes = run_batch(
+            cvs,
+            lambda cv: self.qualify(
+                cv[0], cv[1], job_keywords,
+                interview_threshold=interview_threshold, hold_threshold=hold_threshold, persist=False,
+            ),
+            max_workers=max_workers,
+            log_service=self.log_service,
+        )
+        scored: List[Tuple[Any, Dict[str, Any]]] = []  # (record_id, result)
+        for outcome in outcomes:
+            if not outcome["ok"]:
+                self._log_step("batch_qualification_item_failed", {"index": outcome["index"], "error": outcome["error"]})
+                continue
+            parsed_cv, insights = cvs[outcome["index"]]
+            scored.append((insights.get("record_id") or parsed_cv.get("record_id"), outcome["result"]))
 
         # Rank by SKILLS MATCH - job requirements se best match wale top par
         def skills_based_sort_key(r: Dict[str, Any]) -> Tuple[float, int, int, int]:
@@ -135,12 +160,15 @@ class LeadQualificationAgent:
             # Quaternary: Confidence score
             return (match_ratio, matched_count, inferred_count, confidence)
         
-        results_sorted = sorted(results, key=skills_based_sort_key, reverse=True)
-        for rank, item in enumerate(results_sorted, start=1):
+        scored.sort(key=lambda pair: skills_based_sort_key(pair[1]), reverse=True)
+        results_sorted = [item for _, item in scored]
+        rows = []
+        for rank, (record_id, item) in enumerate(scored, start=1):
             item["rank"] = rank
-            record_id = item.get("record_id") or None
-            if self.sql_repository and record_id:
-                self.sql_repository.store_qualification(record_id, item, rank=rank)
+            if record_id:
+                rows.append({"record_id": record_id, "qualification": item, "rank": rank})
+        if self.sql_repository and rows:
+            self.sql_repository.store_qualifications(rows)
 
         if top_n is not None:
             results_sorted = results_sorted[:top_n]
@@ -427,37 +455,20 @@ class LeadQualificationAgent:
             return [], [], []
         
         all_skills = explicit_skills + inferred_skills
-        skills_lower = [s.lower() for s in all_skills]
+        keywords = [kw for kw in job_keywords if kw.lower().strip()]
+        # One pass over all (skill, keyword) pairs via the precompiled equivalence index
+        matrix = match_matrix(all_skills, keywords)
         
         exact_matched = []
         related_matched = []
         missing = []
         
-        for kw in job_keywords:
-            kw_lower = kw.lower().strip()
-            if not kw_lower:
-                continue
-            
-            # Check for exact match first
-            has_exact = False
-            has_related = False
-            
-            # IMPORTANT: Check exact match first, but ensure related matches are NOT added to exact
-            for sk in skills_lower:
-                # First check if it's an exact match (this function already excludes related matches)
-                if is_exact_match(sk, kw_lower):
-                    has_exact = True
-                    break  # Found exact match, stop searching
-                # Only check for related match if we haven't found exact yet
-                elif not has_exact and is_related_match(sk, kw_lower):
-                    has_related = True
-                    # Don't break - continue checking in case there's an exact match later
-                    # But if we find exact later, it will override this
-            
-            # Add to appropriate list - exact takes priority, then related, then missing
-            if has_exact:
+        for j, kw in enumerate(keywords):
+            column = {row[j] for row in matrix}
+            # Exact takes priority, then related, then missing
+            if MATCH_EXACT in column:
                 exact_matched.append(kw)
-            elif has_related:
+            elif MATCH_RELATED in column:
                 related_matched.append(kw)
             else:
                 missing.append(kw)
@@ -0,0 +1,137 @@
+"""
+Bounded-concurrency batch runner for CV processing.
+
+Runs one worker function per item on a thread pool so text extraction,
+Groq round-trips and DB writes of different CVs overlap. Results come back
+in input order, one entry per item, and a failing CV never aborts the rest
+of the batch. Groq 429s pause every worker until the Retry-After window has
+passed and are then retried; an auth error (expired key) stops scheduling
+new items because none of them can succeed.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from recruitment_agent.core import GroqClientError
+from recruitment_agent.log_service import LogService
+
+DEFAULT_BATCH_WORKERS = 4
+DEFAULT_RATE_LIMIT_RETRIES = 3
+DEFAULT_RATE_LIMIT_BACKOFF = 5.0  # seconds, used when Groq sends no Retry-After
+
+
+def get_batch_workers() -> int:
+    """Configured batch width (settings.RECRUITMENT_BATCH_WORKERS)."""
+    try:
+        from django.conf import settings
+        return max(1, int(getattr(settings, "RECRUITMENT_BATCH_WORKERS", DEFAULT_BATCH_WORKERS)))
+    except Exception:
+        return DEFAULT_BATCH_WORKERS
+
+
+class _RateLimitGate:
+    """Shared pause window so all workers back off together after a 429."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._resume_at = 0.0
+
+    def wait(self) -> None:
+        while True:
+            with self._lock:
+                delay = self._resume_at - time.monotonic()
+            if delay <= 0:
+                return
+            time.sleep(delay)
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self._resume_at = max(self._resume_at, time.monotonic() + seconds)
+
+
+def run_batch(
+    items: Sequence[Any],
+    worker: Callable[[Any], Any],
+    max_workers: Optional[int] = None,
+    max_rate_limit_retries: int = DEFAULT_RATE_LIMIT_RETRIES,
+    log_service: Optional[LogService] = None,
+    close_db_connections: bool = True,
+) -> List[Dict[str, Any]]:
+    """
+    Run worker(item) for every item with bounded concurrency.
+
+    Returns one dict per input item, in input order:
+        {"index", "ok", "result", "error", "error_type", "is_auth_error", "attempts"}
+    """
+    width = max(1, min(max_workers or get_batch_workers(), len(items) or 1))
+    gate = _RateLimitGate()
+    abort = threading.Event()
+
+    def _log(event: str, metadata: Dict[str, Any]) -> None:
+        if log_service:
+            log_service.log_event(event, metadata)
+
+    def run_one(index: int, item: Any, in_worker_thread: bool) -> Dict[str, Any]:
+        outcome: Dict[str, Any] = {
+            "index": index,
+            "ok": False,
+            "result": None,
+            "error": None,
+            "error_type": None,
+            "is_auth_error": False,
+            "attempts": 0,
+        }
+        try:
+            while True:
+                if abort.is_set():
+                    outcome["error"] = "Skipped: batch aborted after an authentication error"
+                    outcome["error_type"] = "aborted"
+                    return outcome
+                gate.wait()
+                outcome["attempts"] += 1
+                try:
+                    outcome["result"] = worker(item)
+                    outcome["ok"] = True
+                    return outcome
+                except GroqClientError as exc:
+                    if exc.is_rate_limit and outcome["attempts"] <= max_rate_limit_retries:
+                        delay = exc.retry_after or DEFAULT_RATE_LIMIT_BACKOFF * outcome["attempts"]
+                        _log("batch_rate_limited", {"index": index, "retry_after": delay, "attempt": outcome["attempts"]})
+                        gate.pause(delay)
+                        continue
+                    if exc.is_auth_error:
+                        outcome["is_auth_error"] = True
+                        abort.set()
+                    outcome["error"] = str(exc)
+                    outcome["error_type"] = type(exc).__name__
+                    return outcome
+                except Exception as exc:
+                    outcome["error"] = str(exc)
+                    outcome["error_type"] = type(exc).__name__
+                    return outcome
+        finally:
+            if not outcome["ok"] and log_service:
+                log_service.log_error("batch_item_failed", {"index": index, "error": outcome["error"]})
+            if close_db_connections and in_worker_thread:
+                # Worker threads get their own DB connections; don't leak them
+                try:
+                    from django.db import connections
+                    connections.close_all()
+                except Exception:
+                    pass
+
+    _log("batch_start", {"count": len(items), "workers": width})
+    if width == 1:
+        results = [run_one(i, item, False) for i, item in enumerate(items)]
+    else:
+        with ThreadPoolExecutor(max_workers=width, thread_name_prefix="cv-batch") as executor:
+            futures = [executor.submit(run_one, i, item, True) for i, item in enumerate(items)]
+            results = [f.result() for f in futures]
+    _log("batch_complete", {
+        "count": len(results),
+        "succeeded": sum(1 for r in results if r["ok"]),
+        "failed": sum(1 for r in results if not r["ok"]),
+    })
+    return results
@@ -4,15 +4,19 @@ from typing import Any, Dict, Optional
 
 import requests
 
+from core.llm_cache import get_llm_cache, make_cache_key
+from core.llm_pool import get_llm_pool
+
 
 class GroqClientError(Exception):
     """Custom exception for Groq client failures."""
     
-    def __init__(self, message: str, is_auth_error: bool = False, is_rate_limit: bool = False, is_request_too_large: bool = False):
+    def __init__(self, message: str, is_auth_error: bool = False, is_rate_limit: bool = False, is_request_too_large: bool = False, retry_after: Optional[int] = None):
         super().__init__(message)
         self.is_auth_error = is_auth_error  # API key expired/invalid
         self.is_rate_limit = is_rate_limit  # Rate limit exceeded
         self.is_request_too_large = is_request_too_large  # Request exceeds token limit (413)
+        self.retry_after = retry_after  # Seconds from Retry-After header (429 only)
 
 
 class GroqClient:
@@ -28,6 +32,7 @@ class GroqClient:
         model: Optional[str] = None,
         base_url: Optional[str] = None,
         timeout: int = 30,
+        cache_ttl: Optional[int] = None,
     ) -> None:
         # Use GROQ_REC_API_KEY for recruitment agent, fallback to GROQ_API_KEY
         self.api_key = api_key or os.environ.get("GROQ_REC_API_KEY") or os.environ.get("GROQ_API_KEY")
@@ -41,10 +46,26 @@ class GroqClient:
             "GROQ_BASE_URL", "https://api.groq.com/openai/v1/chat/completions"
         )
         self.timeout = timeout
+        # Response cache TTL (None = default TTL; prompts are temperature 0 so cacheable by default)
+        self.cache_ttl = cache_ttl
+        # Shared keep-alive session per API key (see core.llm_pool)
+        self._http = get_llm_pool().http_session("groq", self.api_key)
+
+    def _cache_lookup(self, payload: Dict[str, Any], use_cache: Optional[bool]):
+        """Return (cache, key, cached_value) for a payload; cache is None when not cacheable."""
+        cache = get_llm_cache()
+        if not cache.should_cache(payload.get("temperature"), self.cache_ttl, use_cache):
+            return None, None, None
+        key = make_cache_key(
+            "groq", payload["model"], payload["messages"], payload.get("temperature"),
+            payload.get("max_tokens"), payload.get("response_format"),
+        )
+        return cache, key, cache.get(key)
 
-    def send_prompt(self, system_prompt: str, text: str) -> Dict[str, Any]:
+    def send_prompt(self, system_prompt: str, text: str, use_cache: Optional[bool] = None) -> Dict[str, Any]:
         """
         Send a prompt and text to Groq and return parsed JSON.
+        Identical prompts are served from the shared response cache (pass use_cache=False to bypass).
         Raises GroqClientError with is_auth_error=True if API key is expired/invalid.
         """
         payload = {
@@ -57,15 +78,23 @@ class GroqClient:
             "response_format": {"type": "json_object"},
         }
 
+        cache, cache_key, cached = self._cache_lookup(payload, use_cache)
+        if cached is not None:
+            try:
+                return json.loads(cached)
+            except (TypeError, ValueError):
+                pass
+
         headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
         }
 
         try:
-            response = requests.post(
-                self.base_url, headers=headers, json=payload, timeout=self.timeout
-            )
+            with self._http.acquire(self.model) as session:
+                response = session.post(
+                    self.base_url, headers=headers, json=payload, timeout=self.timeout
+                )
             response.raise_for_status()
         except requests.HTTPError as exc:
             # Check for authentication errors (401, 403)
@@ -99,7 +128,8 @@ class GroqClient:
                 
                 raise GroqClientError(
                     error_msg,
-                    is_rate_limit=True
+                    is_rate_limit=True,
+                    retry_after=retry_after,
                 ) from exc
             
             # Check for request too large errors (413)
@@ -127,15 +157,21 @@ class GroqClient:
             
         except requests.RequestException as exc:
             raise GroqClientError(f"Groq API request failed: {exc}") from exc
+        except TimeoutError as exc:
+            # No free slot in the shared LLM pool (core.llm_pool); retryable like a rate limit
+            raise GroqClientError(f"Groq API request not sent: {exc}", is_rate_limit=True) from exc
 
         try:
             content = response.json()
             message = content["choices"][0]["message"]["content"]
-            return json.loads(message)
+            parsed = json.loads(message)
         except (KeyError, ValueError, json.JSONDecodeError) as exc:
             raise GroqClientError(f"Unable to parse Groq response: {exc}") from exc
+        if cache is not None:
+            cache.set(cache_key, message, self.cache_ttl)
+        return parsed
 
-    def send_prompt_text(self, system_prompt: str, text: str) -> str:
+    def send_prompt_text(self, system_prompt: str, text: str, use_cache: Optional[bool] = None) -> str:
         """
         Send a prompt and return raw text (no JSON mode). Use for long or free-form
         output where JSON would be fragile (e.g. multi-paragraph job descriptions).
@@ -148,14 +184,18 @@ class GroqClient:
             ],
             "temperature": 0,
         }
+        cache, cache_key, cached = self._cache_lookup(payload, use_cache)
+        if cached is not None:
+            return cached
         headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
         }
         try:
-            response = requests.post(
-                self.base_url, headers=headers, json=payload, timeout=self.timeout
-            )
+            with self._http.acquire(self.model) as session:
+                response = session.post(
+                    self.base_url, headers=headers, json=payload, timeout=self.timeout
+                )
             response.raise_for_status()
         except requests.HTTPError as exc:
             detail = ""
@@ -170,9 +210,15 @@ class GroqClient:
                     is_auth_error=True,
                 ) from exc
             if exc.response.status_code == 429:
+                retry_after = None
+                try:
+                    retry_after = int(exc.response.headers.get("Retry-After") or 0) or None
+                except (ValueError, TypeError):
+                    pass
                 raise GroqClientError(
                     "Groq API rate limit exceeded.",
                     is_rate_limit=True,
+                    retry_after=retry_after,
                 ) from exc
             if exc.response.status_code == 413:
                 raise GroqClientError(
@@ -184,10 +230,16 @@ class GroqClient:
             ) from exc
         except requests.RequestException as exc:
             raise GroqClientError(f"Groq API request failed: {exc}") from exc
+        except TimeoutError as exc:
+            # No free slot in the shared LLM pool (core.llm_pool); retryable like a rate limit
+            raise GroqClientError(f"Groq API request not sent: {exc}", is_rate_limit=True) from exc
         try:
             content = response.json()
-            return content["choices"][0]["message"]["content"].strip() or ""
+            message = content["choices"][0]["message"]["content"].strip() or ""
         except (KeyError, TypeError):
             raise GroqClientError("Unable to read Groq response") from None
+        if cache is not None and message:
+            cache.set(cache_key, message, self.cache_ttl)
+        return message
 
 
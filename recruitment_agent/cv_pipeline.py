@@ -0,0 +1,301 @@
+"""
+Shared CV processing pipeline.
+
+Used by the synchronous process-cvs endpoint and by the Celery CV job tasks
+(recruitment_agent/tasks.py), so both paths parse, qualify, rank and
+auto-schedule interviews identically.
+"""
+import json
+import logging
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.core.files.storage import default_storage
+
+from recruitment_agent.agents.cv_parser import CVParserAgent
+from recruitment_agent.agents.summarization import SummarizationAgent
+from recruitment_agent.agents.lead_enrichment import LeadResearchEnrichmentAgent
+from recruitment_agent.agents.lead_qualification import LeadQualificationAgent
+from recruitment_agent.agents.job_description_parser import JobDescriptionParserAgent
+from recruitment_agent.agents.interview_scheduling import InterviewSchedulingAgent
+from recruitment_agent.core import GroqClient
+from recruitment_agent.log_service import LogService
+from recruitment_agent.django_repository import DjangoRepository
+from recruitment_agent.models import (
+    CVProcessingJob, CVProcessingJobItem, CVRecord, RecruiterEmailSettings,
+    RecruiterInterviewSettings, RecruiterQualificationSettings,
+)
+
+logger = logging.getLogger(__name__)
+
+# Initialize agents (singleton pattern for efficiency)
+_agents_cache = None
+
+def get_agents():
+    """Get initialized agents (singleton pattern)"""
+    global _agents_cache
+    
+    if _agents_cache is None:
+        log_service = LogService()
+        groq_client = GroqClient()
+        django_repo = DjangoRepository()
+        
+        _agents_cache = {
+            'log_service': log_service,
+            'groq_client': groq_client,
+            'cv_agent': CVParserAgent(groq_client=groq_client, log_service=log_service),
+            'sum_agent': SummarizationAgent(groq_client=groq_client, log_service=log_service),
+            'enrich_agent': LeadResearchEnrichmentAgent(log_service=log_service, sql_repository=django_repo),
+            'qualify_agent': LeadQualificationAgent(log_service=log_service, sql_repository=django_repo),
+            'job_desc_agent': JobDescriptionParserAgent(groq_client=groq_client, log_service=log_service),
+            'interview_agent': InterviewSchedulingAgent(log_service=log_service),
+            'django_repo': django_repo,
+        }
+    
+    return _agents_cache
+
+
+def process_cv_file(agents, file_name, temp_path, job_desc, job_kw_list,
+                    interview_threshold=None, hold_threshold=None, parse_only=False):
+    """
+    Run the per-CV pipeline (parse, store, summarize, enrich, qualify) for one upload.
+    Runs on a batch pool thread or a Celery worker, so it must not touch request state.
+    """
+    django_repo = agents['django_repo']
+    parsed = agents['cv_agent'].parse_file(str(temp_path))
+    
+    record_id = django_repo.store_parsed(file_name, parsed) if django_repo else None
+    # Link to job description if provided
+    if record_id and job_desc:
+        CVRecord.objects.filter(id=record_id).update(job_description=job_desc)
+    
+    result = {
+        'file_name': file_name,
+        'record_id': record_id,
+        'parsed': parsed,
+    }
+    if parse_only:
+        return result
+    
+    # Summarize
+    summary = agents['sum_agent'].summarize(parsed, job_kw_list)
+    # Ensure summary is a dict
+    if not isinstance(summary, dict):
+        summary = summary[0] if isinstance(summary, list) and len(summary) > 0 else {}
+    
+    # Enrich
+    enriched = agents['enrich_agent'].enrich(parsed, summary)
+    # Ensure enriched is a dict
+    if not isinstance(enriched, dict):
+        enriched = enriched[0] if isinstance(enriched, list) and len(enriched) > 0 else {}
+    
+    # Qualify - correct parameter order: (parsed_cv, candidate_insights, job_keywords, enriched_data, interview_threshold, hold_threshold)
+    # Not persisted here: rank_and_schedule writes qualification and rank for the whole batch at once
+    qualified = agents['qualify_agent'].qualify(parsed, summary, job_kw_list, enriched, interview_threshold, hold_threshold, persist=False)
+    # Ensure qualified is a dict
+    if not isinstance(qualified, dict):
+        qualified = qualified[0] if isinstance(qualified, list) and len(qualified) > 0 else {}
+    
+    result.update({
+        'summary': summary,
+        'enriched': enriched,
+        'qualified': qualified,
+    })
+    return result
+
+
+def load_qualification_thresholds(company_user) -> Tuple[Optional[int], Optional[int]]:
+    """Return (interview_threshold, hold_threshold) from the company user's custom settings, if any."""
+    interview_threshold = None
+    hold_threshold = None
+    try:
+        qual_settings = RecruiterQualificationSettings.objects.filter(company_user=company_user).first()
+        if qual_settings and qual_settings.use_custom_thresholds:
+            interview_threshold = qual_settings.interview_threshold
+            hold_threshold = qual_settings.hold_threshold
+    except Exception as e:
+        logger.warning(f"Error fetching qualification settings: {e}")
+    return interview_threshold, hold_threshold
+
+
+def rank_and_schedule(agents, all_results: List[Dict[str, Any]], company_user, job_desc=None,
+                      job_description_text: str = '', job_kw_list: Optional[List[str]] = None,
+                      top_n: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Rank processed CVs, persist qualification data and ranks on their CVRecords,
+    and auto-schedule interviews for INTERVIEW decisions. Returns the ranked list.
+    """
+    log_service = agents['log_service']
+    
+    # Rank results - use role_fit_score from summary, not qualified
+    ranked = sorted(
+        all_results,
+        key=lambda x: x['summary'].get('role_fit_score', 0) if isinstance(x.get('summary'), dict) else 0,
+        reverse=True
+    )
+
+    # Persist qualification data and ranks for all CVs in one bulk update
+    agents['django_repo'].store_qualifications([
+        {
+            'record_id': result['record_id'],
+            'qualification': result['qualified'] if isinstance(result.get('qualified'), dict) else {},
+            'rank': idx + 1,
+            # role_fit_score comes from summary, not qualified
+            'insights': result['summary'] if isinstance(result.get('summary'), dict) else None,
+            'enriched': result['enriched'],
+        }
+        for idx, result in enumerate(ranked) if result['record_id']
+    ])
+
+    # Apply top_n limit
+    if top_n:
+        ranked = ranked[:top_n]
+
+    # Get interview agent for auto-scheduling
+    interview_agent = agents.get('interview_agent')
+
+    # Use job's default interview type (Online/Onsite) for auto-scheduled invitations
+    auto_interview_type = 'ONLINE'
+    if job_desc:
+        job_int_settings = RecruiterInterviewSettings.objects.filter(
+            company_user=company_user,
+            job=job_desc
+        ).first()
+        if job_int_settings and getattr(job_int_settings, 'default_interview_type', None):
+            auto_interview_type = job_int_settings.default_interview_type
+
+    # Get company user email settings for interview defaults
+    try:
+        email_settings_obj = RecruiterEmailSettings.objects.get(company_user=company_user)
+        email_settings = {
+            'followup_delay_hours': email_settings_obj.followup_delay_hours,
+            'reminder_hours_before': email_settings_obj.reminder_hours_before,
+            'max_followup_emails': email_settings_obj.max_followup_emails,
+            'min_hours_between_followups': email_settings_obj.min_hours_between_followups,
+        }
+    except RecruiterEmailSettings.DoesNotExist:
+        email_settings = None
+
+    # Auto-schedule interviews
+    for result in ranked:
+        # Auto-schedule interview if decision is INTERVIEW
+        qual_decision = result.get('qualified', {}).get('decision', '') if isinstance(result.get('qualified'), dict) else ''
+        if qual_decision == "INTERVIEW" and interview_agent:
+            parsed_cv = result.get('parsed', {})
+            candidate_name = parsed_cv.get('name', 'Candidate') if isinstance(parsed_cv, dict) else 'Candidate'
+            candidate_email = parsed_cv.get('email') if isinstance(parsed_cv, dict) else None
+            candidate_phone = parsed_cv.get('phone') if isinstance(parsed_cv, dict) else None
+
+            # Get job role from job description or use default
+            job_role = "Position"
+            if job_description_text:
+                job_role = job_description_text.split('\n')[0][:100] if job_description_text else "Position"
+                job_role = re.sub(r'[\r\n\t]+', ' ', job_role)
+                job_role = re.sub(r'\s+', ' ', job_role).strip()
+            elif job_kw_list and len(job_kw_list) > 0:
+                job_role = job_kw_list[0]
+
+            if candidate_email:
+                logger.info(f"Auto-scheduling interview for approved candidate: {candidate_name} ({candidate_email})")
+                try:
+                    interview_result = interview_agent.schedule_interview(
+                        candidate_name=candidate_name,
+                        candidate_email=candidate_email,
+                        job_role=job_role,
+                        interview_type=auto_interview_type,  # From job's interview settings
+                        candidate_phone=candidate_phone,
+                        cv_record_id=result.get('record_id'),
+                        recruiter_id=None,  # Not using Django User
+                        company_user_id=company_user.id,
+                        email_settings=email_settings,
+                        custom_slots=None,
+                    )
+
+                    if interview_result.get('invitation_sent'):
+                        logger.info(f"Interview invitation sent successfully for {candidate_email}")
+                        result['interview_scheduled'] = True
+                        result['interview_id'] = interview_result.get('interview_id')
+                    else:
+                        logger.warning(f"Interview created but email failed for {candidate_email}")
+                        result['interview_scheduled'] = False
+                        result['interview_error'] = interview_result.get('message', 'Unknown error')
+                except Exception as interview_exc:
+                    logger.error(f"Failed to schedule interview for {candidate_email}: {str(interview_exc)}")
+                    log_service.log_error("auto_interview_scheduling_error", {
+                        "record_id": result.get('record_id'),
+                        "candidate_email": candidate_email,
+                        "error": str(interview_exc),
+                    })
+                    result['interview_scheduled'] = False
+                    result['interview_error'] = str(interview_exc)
+            else:
+                logger.warning(f"Skipping interview scheduling - no email found for {candidate_name}")
+                result['interview_scheduled'] = False
+                result['interview_error'] = "No email address found"
+
+    
+    return ranked
+
+
+# ------------------------
+# Background CV jobs (see recruitment_agent/tasks.py)
+# ------------------------
+def create_cv_job(company_user, files, job_desc=None, options: Optional[Dict[str, Any]] = None) -> CVProcessingJob:
+    """
+    Persist uploads to default storage and create a PENDING CVProcessingJob with one item per file.
+    The caller enqueues process_cv_job_task once this returns.
+    """
+    job = CVProcessingJob.objects.create(
+        company_user=company_user,
+        job_description=job_desc,
+        options_json=json.dumps(options or {}, ensure_ascii=False),
+        total_count=len(files),
+    )
+    items = []
+    for position, uploaded_file in enumerate(files):
+        storage_path = default_storage.save(
+            f"cv_jobs/{job.job_id}/{position:04d}_{uploaded_file.name}", uploaded_file
+        )
+        items.append(CVProcessingJobItem(
+            job=job,
+            position=position,
+            file_name=uploaded_file.name,
+            storage_path=storage_path,
+        ))
+    CVProcessingJobItem.objects.bulk_create(items)
+    return job
+
+
+def serialize_cv_job(job: CVProcessingJob) -> Dict[str, Any]:
+    """Status payload for a CV job: counters, per-CV progress, partial and final results."""
+    items = []
+    for item in job.items.all():
+        entry = {
+            'position': item.position,
+            'file_name': item.file_name,
+            'status': item.status,
+            'record_id': item.cv_record_id,
+        }
+        if item.status == 'DONE' and item.result_json:
+            entry['result'] = json.loads(item.result_json)
+        if item.error_message:
+            entry['error'] = item.error_message
+        items.append(entry)
+    
+    data = {
+        'job_id': str(job.job_id),
+        'status': job.status,
+        'total': job.total_count,
+        'processed': job.processed_count,
+        'failed': job.failed_count,
+        'progress': int(job.processed_count * 100 / job.total_count) if job.total_count else 100,
+        'items': items,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'completed_at': job.completed_at.isoformat() if job.completed_at else None,
+    }
+    if job.status == 'COMPLETED' and job.results_json:
+        data['results'] = json.loads(job.results_json)
+    if job.error_message:
+        data['error'] = job.error_message
+    return data
@@ -3,7 +3,7 @@ Django ORM-based repository for storing CV records.
 This replaces the SQLAlchemy-based SQLRepository to work with Django's database.
 """
 import json
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 from django.utils import timezone
 
 from .models import CVRecord
@@ -80,6 +80,49 @@ class DjangoRepository:
         except Exception:
             pass
 
+    def store_qualifications(self, items: List[Dict[str, Any]]) -> int:
+        """
+        Store qualification data and ranks for many CVs in one bulk update.
+
+        Each item: {"record_id", "qualification", "rank" (optional),
+        "insights" (optional), "enriched" (optional)}.
+        Returns the number of records written.
+        """
+        # bulk_update writes the same columns for every row, so group rows by the columns they set
+        groups: Dict[tuple, List[CVRecord]] = {}
+        for item in items:
+            record_id = item.get("record_id")
+            if record_id is None:
+                continue
+            qualification = item.get("qualification") or {}
+            record = CVRecord(
+                id=record_id,
+                qualification_json=json.dumps(qualification, ensure_ascii=False),
+                qualification_decision=qualification.get("decision"),
+                qualification_confidence=qualification.get("confidence_score"),
+                qualification_priority=qualification.get("priority"),
+            )
+            fields = ["qualification_json", "qualification_decision", "qualification_confidence", "qualification_priority"]
+            if item.get("rank") is not None:
+                record.rank = item["rank"]
+                fields.append("rank")
+            if isinstance(item.get("insights"), dict):
+                record.insights_json = json.dumps(item["insights"], ensure_ascii=False)
+                record.role_fit_score = item["insights"].get("role_fit_score")
+                fields += ["insights_json", "role_fit_score"]
+            if item.get("enriched") is not None:
+                record.enriched_json = json.dumps(item["enriched"], ensure_ascii=False)
+                fields.append("enriched_json")
+            groups.setdefault(tuple(fields), []).append(record)
+        
+        written = 0
+        try:
+            for fields, records in groups.items():
+                written += CVRecord.objects.bulk_update(records, list(fields))
+        except Exception:
+            pass
+        return written
+
     def fetch_recent(self, limit: int = 20) -> list[Dict[str, Any]]:
         """Fetch recent CV records"""
         records = CVRecord.objects.all().order_by('-created_at')[:limit]
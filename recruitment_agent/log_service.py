@@ -1,13 +1,222 @@
+import atexit
 import json
 import os
+import threading
+from contextlib import contextmanager
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, List
+
+try:
+    import fcntl
+except ImportError:  # Windows: rotation is only coordinated within one process
+    fcntl = None
+
+# Buffered sink defaults (overridable via Django settings)
+DEFAULT_FLUSH_INTERVAL = 1.0  # seconds
+DEFAULT_FLUSH_BYTES = 64 * 1024
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 5
+DEFAULT_MAX_BUFFERED_LINES = 10000
+
+
+def _setting(name: str, default: Any) -> Any:
+    """Read a Django setting, falling back to default outside a configured project."""
+    try:
+        from django.conf import settings
+        return getattr(settings, name, default)
+    except Exception:
+        return default
+
+
+class _BufferedLogSink:
+    """
+    Append-only JSONL writer shared by every LogService pointing at the same file.
+
+    Callers only append a line to an in-memory buffer; a daemon thread writes
+    the buffer when it reaches flush_bytes or every flush_interval seconds.
+    The file is rotated by size (cv_parser_logs.jsonl.1 ... .N) and the buffer
+    is flushed at exit.
+
+    Web and Celery processes share the file: each flush holds an flock on
+    <file>.lock while it appends and rotates, and reopens the file when
+    another process has rotated it away (checked by inode, like
+    logging.handlers.WatchedFileHandler).
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.flush_interval = float(_setting("RECRUITMENT_LOG_FLUSH_INTERVAL", DEFAULT_FLUSH_INTERVAL))
+        self.flush_bytes = int(_setting("RECRUITMENT_LOG_FLUSH_BYTES", DEFAULT_FLUSH_BYTES))
+        self.max_bytes = int(_setting("RECRUITMENT_LOG_MAX_BYTES", DEFAULT_MAX_BYTES))
+        self.backup_count = int(_setting("RECRUITMENT_LOG_BACKUP_COUNT", DEFAULT_BACKUP_COUNT))
+        self.max_buffered_lines = int(_setting("RECRUITMENT_LOG_MAX_BUFFERED_LINES", DEFAULT_MAX_BUFFERED_LINES))
+        self.dropped = 0
+        self._start()
+
+    def _start(self) -> None:
+        # After a fork the inherited handles share the parent's open file
+        # descriptions (and so its flock); drop them and open our own
+        for handle in (getattr(self, "_file", None), getattr(self, "_lock_file", None)):
+            if handle is not None:
+                try:
+                    handle.close()
+                except Exception:
+                    pass
+        self._buffer: List[str] = []
+        self._buffered_bytes = 0
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()  # serializes file writes (flusher vs explicit flush)
+        self._file = None
+        self._file_id = None
+        self._lock_file = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="log-flusher", daemon=True)
+        self._thread.start()
+
+    def write(self, line: str) -> None:
+        with self._cond:
+            if len(self._buffer) >= self.max_buffered_lines:
+                # Never block the caller; drop the oldest line if the disk can't keep up
+                self._buffered_bytes -= len(self._buffer.pop(0))
+                self.dropped += 1
+            self._buffer.append(line)
+            self._buffered_bytes += len(line)
+            if self._buffered_bytes >= self.flush_bytes:
+                self._cond.notify()
+
+    def flush(self) -> None:
+        with self._cond:
+            lines = self._buffer
+            self._buffer = []
+            self._buffered_bytes = 0
+        if lines:
+            self._write_lines(lines)
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self.flush()
+        with self._write_lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            if self._lock_file is not None:
+                self._lock_file.close()
+                self._lock_file = None
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if not self._closed and self._buffered_bytes < self.flush_bytes:
+                    self._cond.wait(self.flush_interval)
+                if self._closed:
+                    return
+            self.flush()
+
+    def _write_lines(self, lines: List[str]) -> None:
+        data = "".join(lines)
+        with self._write_lock:
+            try:
+                with self._process_lock():
+                    self._open_current_file()
+                    self._file.write(data)
+                    self._file.flush()
+                    if self.max_bytes and os.fstat(self._file.fileno()).st_size >= self.max_bytes:
+                        self._rotate()
+            except Exception:
+                # Fallback to console if file write fails
+                for line in lines:
+                    print(f"[LOG FALLBACK] {line.rstrip()}")
+                self._file = None
+
+    @contextmanager
+    def _process_lock(self):
+        # Caller holds self._write_lock
+        if fcntl is None:
+            yield
+            return
+        if self._lock_file is None:
+            self._lock_file = self.path.with_name(f"{self.path.name}.lock").open("a")
+        fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _open_current_file(self) -> None:
+        # Caller holds the process lock
+        if self._file is not None:
+            try:
+                stat = os.stat(self.path)
+                current = (stat.st_dev, stat.st_ino)
+            except FileNotFoundError:
+                current = None
+            if current != self._file_id:
+                # Rotated (or removed) by another process: follow the path
+                self._file.close()
+                self._file = None
+        if self._file is None:
+            self._file = self.path.open("a", encoding="utf-8")
+            stat = os.fstat(self._file.fileno())
+            self._file_id = (stat.st_dev, stat.st_ino)
+
+    def _rotate(self) -> None:
+        # Caller holds self._write_lock and the process lock
+        self._file.close()
+        self._file = None
+        if self.backup_count <= 0:
+            self.path.unlink(missing_ok=True)
+            return
+        for i in range(self.backup_count - 1, 0, -1):
+            src = self.path.with_name(f"{self.path.name}.{i}")
+            if src.exists():
+                os.replace(src, self.path.with_name(f"{self.path.name}.{i + 1}"))
+        os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+
+_sinks: Dict[str, _BufferedLogSink] = {}
+_sinks_lock = threading.Lock()
+
+
+def _get_sink(path: Path) -> _BufferedLogSink:
+    key = str(path.resolve())
+    sink = _sinks.get(key)
+    if sink is None:
+        with _sinks_lock:
+            sink = _sinks.get(key)
+            if sink is None:
+                sink = _BufferedLogSink(path)
+                _sinks[key] = sink
+    return sink
+
+
+def flush_all() -> None:
+    """Flush every buffered log file (also runs at interpreter exit)."""
+    with _sinks_lock:
+        sinks = list(_sinks.values())
+    for sink in sinks:
+        sink.flush()
+
+
+def _restart_after_fork() -> None:
+    # Flusher threads don't survive fork (Celery prefork workers); restart them in the child.
+    # The parent flushed before forking, so the child starts with empty buffers.
+    global _sinks_lock
+    _sinks_lock = threading.Lock()
+    for sink in _sinks.values():
+        sink._start()
+
+
+atexit.register(flush_all)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(before=flush_all, after_in_child=_restart_after_fork)
 
 
 class LogService:
     """
     Minimal logging service that writes JSONL logs and echoes to stdout.
+    Writes are buffered and flushed by a background thread (see _BufferedLogSink).
     """
 
     def __init__(self, log_file: str = None) -> None:
@@ -19,6 +228,7 @@ class LogService:
         log_path = Path(log_file)
         log_path.parent.mkdir(parents=True, exist_ok=True)
         self.log_file = log_path
+        self._sink = _get_sink(log_path)
 
     def log_event(self, event_name: str, metadata: Dict[str, Any]) -> None:
         entry = self._build_entry("info", event_name, metadata)
@@ -27,16 +237,20 @@ class LogService:
     def log_error(self, error_message: str, metadata: Dict[str, Any]) -> None:
         entry = self._build_entry("error", error_message, metadata)
         self._write(entry)
-    
+
     def _log_step(self, step_name: str, metadata: Dict[str, Any]) -> None:
         """Alias for log_event for backward compatibility"""
         self.log_event(step_name, metadata)
-    
+
     def _log_error(self, error_message: str, exc: Exception, metadata: Dict[str, Any]) -> None:
         """Alias for log_error with exception"""
         error_metadata = {**metadata, "exception": str(exc), "exception_type": type(exc).__name__}
         self.log_error(error_message, error_metadata)
 
+    def flush(self) -> None:
+        """Write buffered entries to disk now."""
+        self._sink.flush()
+
     def _build_entry(self, level: str, event: str, metadata: Dict[str, Any]) -> Dict[str, Any]:
         return {
             "timestamp": datetime.now(timezone.utc).isoformat(),
@@ -47,9 +261,8 @@ class LogService:
 
     def _write(self, entry: Dict[str, Any]) -> None:
         try:
-            with self.log_file.open("a", encoding="utf-8") as f:
-                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            # Serialize now: metadata dicts may be mutated by the caller after logging
+            self._sink.write(json.dumps(entry, ensure_ascii=False) + "\n")
         except Exception:
-            # Fallback to console if file write fails
+            # Fallback to console if the entry can't be serialized
             print(f"[LOG FALLBACK] {entry}")
-
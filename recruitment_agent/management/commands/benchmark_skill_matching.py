@@ -0,0 +1,165 @@
+"""
+Django management command to benchmark CV skill matching.
+
+Ranks synthetic CVs against a job keyword list using
+LeadQualificationAgent._match_with_inference (match_matrix over the
+precompiled skill-equivalence index) and compares it with the linear
+scan it replaced (reproduced below as _legacy_*): each (skill, keyword)
+pair rescans SKILL_EQUIVALENCES and DATABASE_TYPES, nothing is cached.
+
+Usage:
+    python manage.py benchmark_skill_matching
+    python manage.py benchmark_skill_matching --cvs 1000 --keywords 30 --skills 25
+"""
+
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from recruitment_agent.agents.lead_qualification import LeadQualificationAgent
+from recruitment_agent.log_service import LogService
+from recruitment_agent.skill_equivalences import DATABASE_TYPES, SKILL_EQUIVALENCES, classify_match
+
+# Skills that are not in the equivalence tables (typical CV noise)
+EXTRA_SKILLS = [
+    "docker", "kubernetes", "aws", "azure", "gcp", "git", "jira", "agile", "scrum", "linux",
+    "ci/cd", "terraform", "microservices", "html", "css", "tailwind", "figma", "go", "rust",
+    "communication", "leadership", "problem solving", "unit testing", "pytest", "jest",
+]
+
+
+# Reference implementation: the per-pair matching used before the precompiled index
+
+def _legacy_database_type(db_name):
+    db_lower = db_name.lower().strip()
+    for db_type, databases in DATABASE_TYPES.items():
+        if db_lower in databases:
+            return db_type
+        for db in databases:
+            if db in db_lower or db_lower in db:
+                return db_type
+    return None
+
+
+def _legacy_databases_same_type(db1, db2):
+    type1 = _legacy_database_type(db1)
+    type2 = _legacy_database_type(db2)
+    return bool(type1 and type2 and type1 == type2)
+
+
+def _legacy_match_terms(keyword):
+    k = keyword.lower().strip()
+    if not k:
+        return set()
+    out = {k}
+    for canonical, variants in SKILL_EQUIVALENCES.items():
+        if k == canonical or k in variants:
+            out.add(canonical)
+            out.update(variants)
+            break
+    return out
+
+
+def _legacy_is_exact(skill_lower, keyword_lower):
+    if not skill_lower or not keyword_lower:
+        return False
+    if skill_lower == keyword_lower:
+        return True
+    if skill_lower in _legacy_match_terms(keyword_lower):
+        return False
+    if keyword_lower in _legacy_match_terms(skill_lower):
+        return False
+    return keyword_lower in skill_lower or skill_lower in keyword_lower
+
+
+def _legacy_is_related(skill_lower, keyword_lower):
+    if not skill_lower or not keyword_lower:
+        return False
+    if _legacy_is_exact(skill_lower, keyword_lower):
+        return False
+    if skill_lower in _legacy_match_terms(keyword_lower):
+        return True
+    if keyword_lower in _legacy_match_terms(skill_lower):
+        return True
+    return _legacy_databases_same_type(skill_lower, keyword_lower)
+
+
+def _legacy_match(skills, keywords):
+    """Old LeadQualificationAgent._match_with_inference loop. Returns (exact, related)."""
+    skills_lower = [s.lower() for s in skills]
+    exact, related = [], []
+    for kw in keywords:
+        kw_lower = kw.lower().strip()
+        if not kw_lower:
+            continue
+        has_exact = has_related = False
+        for sk in skills_lower:
+            if _legacy_is_exact(sk, kw_lower):
+                has_exact = True
+                break
+            elif _legacy_is_related(sk, kw_lower):
+                has_related = True
+        if has_exact:
+            exact.append(kw)
+        elif has_related:
+            related.append(kw)
+    return exact, related
+
+
+class Command(BaseCommand):
+    help = 'Benchmark ranking CVs against job keywords with the precompiled skill-equivalence index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cvs', type=int, default=1000, help='Number of synthetic CVs')
+        parser.add_argument('--keywords', type=int, default=30, help='Job keywords per job')
+        parser.add_argument('--skills', type=int, default=25, help='Skills per CV')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        vocabulary = sorted(
+            set(SKILL_EQUIVALENCES)
+            | {v for variants in SKILL_EQUIVALENCES.values() for v in variants}
+            | {db for databases in DATABASE_TYPES.values() for db in databases}
+            | set(EXTRA_SKILLS)
+        )
+        keywords = [kw.title() for kw in rng.sample(vocabulary, min(options['keywords'], len(vocabulary)))]
+        cvs = [
+            [sk.title() for sk in rng.sample(vocabulary, min(options['skills'], len(vocabulary)))]
+            for _ in range(options['cvs'])
+        ]
+        agent = LeadQualificationAgent(log_service=LogService())
+
+        self.stdout.write(
+            f"Ranking {len(cvs)} CVs x {len(keywords)} keywords ({options['skills']} skills per CV)"
+        )
+
+        # Linear scan (pre-index implementation)
+        started = time.perf_counter()
+        legacy_results = [_legacy_match(skills, keywords) for skills in cvs]
+        legacy_ms = (time.perf_counter() - started) * 1000
+
+        # match_matrix via the agent (cold classification cache)
+        classify_match.cache_clear()
+        started = time.perf_counter()
+        matrix_results = []
+        for skills in cvs:
+            exact, related, _missing = agent._match_with_inference(skills, [], keywords)
+            matrix_results.append((exact, related))
+        matrix_counts = [len(exact) + len(related) for exact, related in matrix_results]
+        ranked = sorted(range(len(cvs)), key=lambda i: matrix_counts[i], reverse=True)
+        matrix_ms = (time.perf_counter() - started) * 1000
+
+        # Consistency check against the old implementation
+        mismatches = sum(1 for old, new in zip(legacy_results, matrix_results) if old != new)
+
+        self.stdout.write(f"  linear scan:  {legacy_ms:9.1f} ms")
+        self.stdout.write(f"  match_matrix: {matrix_ms:9.1f} ms (incl. ranking)")
+        if matrix_ms:
+            self.stdout.write(f"  speedup:      {legacy_ms / matrix_ms:9.1f}x")
+        self.stdout.write(f"  top CV matches {matrix_counts[ranked[0]]}/{len(keywords)} keywords")
+        if mismatches:
+            self.stdout.write(self.style.ERROR(f"  {mismatches} CV(s) classified differently"))
+        else:
+            self.stdout.write(self.style.SUCCESS('  results identical to the linear scan'))
@@ -0,0 +1,62 @@
+# Background CV processing jobs (Celery chunked batches with per-CV progress)
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0034_update_userprofile_roles'),
+        ('recruitment_agent', '0022_add_ppp_table_prefix'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CVProcessingJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_id', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending - Queued for processing'), ('RUNNING', 'Running - Workers processing CVs'), ('COMPLETED', 'Completed'), ('FAILED', 'Failed')], default='PENDING', max_length=16)),
+                ('options_json', models.TextField(blank=True, help_text='Resolved keywords, thresholds, top_n and parse_only (JSON)', null=True)),
+                ('total_count', models.IntegerField(default=0)),
+                ('processed_count', models.IntegerField(default=0)),
+                ('failed_count', models.IntegerField(default=0)),
+                ('results_json', models.TextField(blank=True, help_text='Final ranked results once COMPLETED (JSON)', null=True)),
+                ('error_message', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('company_user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='cv_processing_jobs', to='core.companyuser')),
+                ('job_description', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='cv_processing_jobs', to='recruitment_agent.jobdescription')),
+            ],
+            options={
+                'verbose_name': 'CV Processing Job',
+                'verbose_name_plural': 'CV Processing Jobs',
+                'db_table': 'ppp_recruitment_agent_cvprocessingjob',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='CVProcessingJobItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.IntegerField(help_text='Upload order within the job')),
+                ('file_name', models.CharField(max_length=512)),
+                ('storage_path', models.CharField(help_text='Upload location in default storage', max_length=1024)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('RUNNING', 'Running'), ('DONE', 'Done'), ('FAILED', 'Failed')], default='PENDING', max_length=16)),
+                ('result_json', models.TextField(blank=True, help_text='Per-CV pipeline result (JSON)', null=True)),
+                ('error_message', models.TextField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('cv_record', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='processing_items', to='recruitment_agent.cvrecord')),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='recruitment_agent.cvprocessingjob')),
+            ],
+            options={
+                'db_table': 'ppp_recruitment_agent_cvprocessingjobitem',
+                'ordering': ['job', 'position'],
+                'indexes': [models.Index(fields=['job', 'status'], name='ppp_recruit_job_id_666d4a_idx')],
+            },
+        ),
+    ]
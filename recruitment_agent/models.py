@@ -1,3 +1,5 @@
+import uuid
+
 from django.db import models
 from django.utils import timezone
 from django.contrib.auth.models import User
@@ -406,4 +408,69 @@ class CareerApplication(models.Model):
         ordering = ['-created_at']
     
     def __str__(self):
-        return f"{self.applicant_name} - {self.position_title}"
\ No newline at end of file
+        return f"{self.applicant_name} - {self.position_title}"
+
+class CVProcessingJob(models.Model):
+    """
+    Background CV batch submitted via the process-cvs endpoint (run_async).
+    Celery workers process the items in chunks; the status endpoint polls this row.
+    """
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending - Queued for processing'),
+        ('RUNNING', 'Running - Workers processing CVs'),
+        ('COMPLETED', 'Completed'),
+        ('FAILED', 'Failed'),
+    ]
+    
+    job_id = models.UUIDField(unique=True, default=uuid.uuid4, editable=False)
+    company_user = models.ForeignKey('core.CompanyUser', on_delete=models.CASCADE, null=True, blank=True, related_name='cv_processing_jobs')
+    job_description = models.ForeignKey(JobDescription, on_delete=models.SET_NULL, null=True, blank=True, related_name='cv_processing_jobs')
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default='PENDING')
+    options_json = models.TextField(null=True, blank=True, help_text="Resolved keywords, thresholds, top_n and parse_only (JSON)")
+    total_count = models.IntegerField(default=0)
+    processed_count = models.IntegerField(default=0)
+    failed_count = models.IntegerField(default=0)
+    results_json = models.TextField(null=True, blank=True, help_text="Final ranked results once COMPLETED (JSON)")
+    error_message = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'ppp_recruitment_agent_cvprocessingjob'
+        ordering = ['-created_at']
+        verbose_name = 'CV Processing Job'
+        verbose_name_plural = 'CV Processing Jobs'
+    
+    def __str__(self):
+        return f"CV Job {self.job_id} ({self.status})"
+
+
+class CVProcessingJobItem(models.Model):
+    """One uploaded CV inside a CVProcessingJob, with its own progress and partial result."""
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('DONE', 'Done'),
+        ('FAILED', 'Failed'),
+    ]
+    
+    job = models.ForeignKey(CVProcessingJob, on_delete=models.CASCADE, related_name='items')
+    position = models.IntegerField(help_text="Upload order within the job")
+    file_name = models.CharField(max_length=512)
+    storage_path = models.CharField(max_length=1024, help_text="Upload location in default storage")
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default='PENDING')
+    cv_record = models.ForeignKey(CVRecord, on_delete=models.SET_NULL, null=True, blank=True, related_name='processing_items')
+    result_json = models.TextField(null=True, blank=True, help_text="Per-CV pipeline result (JSON)")
+    error_message = models.TextField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'ppp_recruitment_agent_cvprocessingjobitem'
+        ordering = ['job', 'position']
+        indexes = [
+            models.Index(fields=['job', 'status']),
+        ]
+    
+    def __str__(self):
+        return f"{self.file_name} ({self.status})"
@@ -1,9 +1,14 @@
 """
 Shared skill equivalences and related-terms for matching job keywords to CV skills.
 Node.js ↔ JavaScript, React ↔ ReactJS, etc. Used by Lead Qualification and Summarization.
+
+The tables below are compiled once at import into an inverted index
+(term → equivalence group) and a database-type lookup, so matching a CV
+against a job is a few dict lookups per (skill, keyword) pair instead of a
+scan of every table. match_matrix() classifies all pairs in one pass.
 """
-from typing import Optional
-from typing import Optional
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Sequence
 
 SKILL_EQUIVALENCES = {
     # LLM / AI
@@ -136,25 +141,49 @@ DATABASE_TYPES = {
     ]
 }
 
-def get_database_type(db_name: str) -> Optional[str]:
-    """
-    Get the database type category for a given database name.
-    Returns: "relational", "non-relational", "vector", "key-value", "graph", "time-series", "search", or None
-    """
-    if not db_name:
-        return None
-    db_lower = db_name.lower().strip()
-    
-    for db_type, databases in DATABASE_TYPES.items():
+# ------------------------
+# Compiled indexes (built once at import)
+# ------------------------
+MATCH_EXACT = "exact"
+MATCH_RELATED = "related"
+MATCH_NONE = "none"
+
+
+def _build_term_index() -> Dict[str, FrozenSet[str]]:
+    """term → its equivalence group (canonical + variants). The first group listing a term wins."""
+    index: Dict[str, FrozenSet[str]] = {}
+    for canonical, variants in SKILL_EQUIVALENCES.items():
+        group = frozenset([canonical, *variants])
+        for term in (canonical, *variants):
+            index.setdefault(term, group)
+    return index
+
+
+_TERM_INDEX = _build_term_index()
+_DATABASE_TYPE_ORDER = [(db_type, frozenset(databases)) for db_type, databases in DATABASE_TYPES.items()]
+
+
+@lru_cache(maxsize=4096)
+def _database_type(db_lower: str) -> Optional[str]:
+    for db_type, databases in _DATABASE_TYPE_ORDER:
         if db_lower in databases:
             return db_type
         # Also check if db_name contains any of the database names
         for db in databases:
             if db in db_lower or db_lower in db:
                 return db_type
-    
     return None
 
+
+def get_database_type(db_name: str) -> Optional[str]:
+    """
+    Get the database type category for a given database name.
+    Returns: "relational", "non-relational", "vector", "key-value", "graph", "time-series", "search", or None
+    """
+    if not db_name:
+        return None
+    return _database_type(db_name.lower().strip())
+
 def databases_same_type(db1: str, db2: str) -> bool:
     """
     Check if two databases are of the same type (e.g., both relational).
@@ -172,18 +201,61 @@ def databases_same_type(db1: str, db2: str) -> bool:
     return False
 
 
-def get_all_match_terms(keyword: str) -> set:
-    """Return keyword + all equivalents/related terms (lowercase) for matching."""
+def _match_terms(keyword: str) -> FrozenSet[str]:
     k = keyword.lower().strip()
     if not k:
-        return set()
-    out = {k}
-    for canonical, variants in SKILL_EQUIVALENCES.items():
-        if k == canonical or k in variants:
-            out.add(canonical)
-            out.update(variants)
-            break
-    return out
+        return frozenset()
+    group = _TERM_INDEX.get(k)
+    return group | {k} if group is not None else frozenset((k,))
+
+
+def get_all_match_terms(keyword: str) -> set:
+    """Return keyword + all equivalents/related terms (lowercase) for matching."""
+    return set(_match_terms(keyword))
+
+
+def _classify(skill_lower: str, keyword_lower: str, skill_terms: FrozenSet[str], kw_terms: FrozenSet[str]) -> str:
+    if not skill_lower or not keyword_lower:
+        return MATCH_NONE
+    if skill_lower == keyword_lower:
+        return MATCH_EXACT
+    # Related through equivalences takes precedence over substring matches ("C#" vs ".NET")
+    if skill_lower in kw_terms or keyword_lower in skill_terms:
+        return MATCH_RELATED
+    if keyword_lower in skill_lower or skill_lower in keyword_lower:
+        return MATCH_EXACT
+    if databases_same_type(skill_lower, keyword_lower):
+        return MATCH_RELATED
+    return MATCH_NONE
+
+
+@lru_cache(maxsize=65536)
+def classify_match(skill_lower: str, keyword_lower: str) -> str:
+    """
+    Classify a (skill, keyword) pair as MATCH_EXACT, MATCH_RELATED or MATCH_NONE.
+    Same rules as is_exact_match / is_related_match, evaluated once.
+    """
+    return _classify(skill_lower, keyword_lower, _match_terms(skill_lower), _match_terms(keyword_lower))
+
+
+def match_matrix(skills: Sequence[str], keywords: Sequence[str]) -> List[List[str]]:
+    """
+    Classify every (skill, keyword) pair in one pass.
+    Skills are lowercased and keywords lowercased/stripped, as in the per-pair helpers.
+
+    Returns:
+        list: matrix[i][j] is the classification of skills[i] against keywords[j]
+    """
+    keywords_lower = [kw.lower().strip() for kw in keywords]
+    kw_terms = [_match_terms(kw) for kw in keywords_lower]
+    matrix = []
+    for skill in skills:
+        sk = skill.lower()
+        sk_terms = _match_terms(sk)
+        matrix.append([
+            _classify(sk, kw, sk_terms, terms) for kw, terms in zip(keywords_lower, kw_terms)
+        ])
+    return matrix
 
 
 def skill_matches_keyword(skill_lower: str, keyword_lower: str) -> bool:
@@ -192,25 +264,7 @@ def skill_matches_keyword(skill_lower: str, keyword_lower: str) -> bool:
     E.g. job "Node.js" matches skill "JavaScript"; job "JavaScript" matches skill "Node.js".
     E.g. job "MS SQL" matches skill "MySQL" (both relational databases).
     """
-    if not skill_lower or not keyword_lower:
-        return False
-    if skill_lower == keyword_lower:
-        return True
-    # Keyword's match set: what skills satisfy this job keyword
-    kw_match = get_all_match_terms(keyword_lower)
-    if skill_lower in kw_match:
-        return True
-    # Also check: skill's match set (e.g. skill "javascript" → variants include "node.js")
-    skill_match = get_all_match_terms(skill_lower)
-    if keyword_lower in skill_match:
-        return True
-    # Database type matching: if both are databases of the same type, they match
-    if databases_same_type(skill_lower, keyword_lower):
-        return True
-    # Substring match
-    if keyword_lower in skill_lower or skill_lower in keyword_lower:
-        return True
-    return False
+    return classify_match(skill_lower, keyword_lower) != MATCH_NONE
 
 
 def is_exact_match(skill_lower: str, keyword_lower: str) -> bool:
@@ -223,31 +277,7 @@ def is_exact_match(skill_lower: str, keyword_lower: str) -> bool:
     - One is a substring of the other (e.g., "react" in "react.js")
     - But NOT related through skill equivalences (e.g., "C#" vs ".NET" is NOT exact)
     """
-    if not skill_lower or not keyword_lower:
-        return False
-    
-    # Exact match (case-insensitive)
-    if skill_lower == keyword_lower:
-        return True
-    
-    # First check if they're related through equivalences
-    # If they are, it's NOT an exact match (even if one is substring of other)
-    kw_match = get_all_match_terms(keyword_lower)
-    skill_match = get_all_match_terms(skill_lower)
-    
-    # If skill is in keyword's equivalence set (but not identical), it's related, not exact
-    if skill_lower in kw_match and skill_lower != keyword_lower:
-        return False
-    # If keyword is in skill's equivalence set (but not identical), it's related, not exact
-    if keyword_lower in skill_match and skill_lower != keyword_lower:
-        return False
-    
-    # If not related through equivalences, check substring match
-    # (e.g., "react" in "react.js" or "react.js" contains "react")
-    if keyword_lower in skill_lower or skill_lower in keyword_lower:
-        return True
-    
-    return False
+    return classify_match(skill_lower, keyword_lower) == MATCH_EXACT
 
 
 def is_related_match(skill_lower: str, keyword_lower: str) -> bool:
@@ -256,19 +286,4 @@ def is_related_match(skill_lower: str, keyword_lower: str) -> bool:
     Returns True for related matches, False for exact or no match.
     Includes database type matching (e.g., MS SQL and MySQL are related as both relational).
     """
-    if not skill_lower or not keyword_lower:
-        return False
-    # If it's an exact match, it's not a related match
-    if is_exact_match(skill_lower, keyword_lower):
-        return False
-    # Check if they're related through equivalences
-    kw_match = get_all_match_terms(keyword_lower)
-    if skill_lower in kw_match:
-        return True
-    skill_match = get_all_match_terms(skill_lower)
-    if keyword_lower in skill_match:
-        return True
-    # Database type matching: if both are databases of the same type (but not exact), they're related
-    if databases_same_type(skill_lower, keyword_lower):
-        return True
-    return False
+    return classify_match(skill_lower, keyword_lower) == MATCH_RELATED
@@ -2,7 +2,7 @@ import json
 import os
 import traceback
 from datetime import datetime, timezone
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 from sqlalchemy import (
     Column,
@@ -12,6 +12,7 @@ from sqlalchemy import (
     String,
     Table,
     Text,
+    bindparam,
     create_engine,
     select,
     update,
@@ -180,6 +181,47 @@ class SQLRepository:
         except SQLAlchemyError:
             return
 
+    def store_qualifications(self, items: List[Dict[str, Any]]) -> int:
+        """Bulk variant of store_qualification: one executemany per column set."""
+        groups: Dict[tuple, List[Dict[str, Any]]] = {}
+        for item in items:
+            record_id = item.get("record_id")
+            if record_id is None:
+                continue
+            qualification = item.get("qualification") or {}
+            row = {
+                "qualification_json": json.dumps(qualification, ensure_ascii=False),
+                "qualification_decision": qualification.get("decision"),
+                "qualification_confidence": qualification.get("confidence_score"),
+                "qualification_priority": qualification.get("priority"),
+            }
+            if item.get("rank") is not None:
+                row["rank"] = item["rank"]
+            if isinstance(item.get("insights"), dict):
+                row["insights_json"] = json.dumps(item["insights"], ensure_ascii=False)
+                row["role_fit_score"] = item["insights"].get("role_fit_score")
+            if item.get("enriched") is not None:
+                row["enriched_json"] = json.dumps(item["enriched"], ensure_ascii=False)
+            # Bind names must differ from column names in an UPDATE .. SET
+            params = {f"b_{col}": value for col, value in row.items()}
+            params["b_id"] = record_id
+            groups.setdefault(tuple(sorted(row)), []).append(params)
+        
+        written = 0
+        try:
+            with self.engine.begin() as conn:
+                for columns, rows in groups.items():
+                    stmt = (
+                        update(self.cv_records)
+                        .where(self.cv_records.c.id == bindparam("b_id"))
+                        .values({col: bindparam(f"b_{col}") for col in columns})
+                    )
+                    conn.execute(stmt, rows)
+                    written += len(rows)
+        except SQLAlchemyError:
+            return 0
+        return written
+
     def fetch_recent(self, limit: int = 20) -> list[Dict[str, Any]]:
         stmt = (
             select(self.cv_records)
@@ -1,13 +1,25 @@
 """
 Background tasks for automatic interview follow-up email checking.
 This runs periodically to check for interviews that need follow-up emails.
+
+Also hosts the Celery tasks for background CV processing jobs
+(process-cvs with run_async=true).
 """
 
+import json
+import shutil
+import tempfile
+from pathlib import Path
+
+from celery import chord, group, shared_task
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db.models import F
 from django.utils import timezone
 from django.db import connection, close_old_connections
 from django.db.utils import OperationalError
 from datetime import timedelta
-from .models import Interview
+from .models import CVProcessingJob, CVProcessingJobItem, Interview
 from .agents.interview_scheduling.interview_scheduling_agent import InterviewSchedulingAgent
 from .log_service import LogService
 import logging
@@ -159,3 +171,154 @@ def check_and_send_followup_emails():
         logger.error(f"Error in check_and_send_followup_emails: {str(e)}", exc_info=True)
         return {'followups_sent': 0, 'reminders_sent': 0, 'errors': 1}
 
+
+# ------------------------
+# Background CV processing jobs
+# ------------------------
+def _mark_job_failed(job_id, message):
+    CVProcessingJob.objects.filter(job_id=job_id).update(
+        status='FAILED', error_message=message, completed_at=timezone.now()
+    )
+
+
+@shared_task(bind=True)
+def process_cv_job_task(self, job_id):
+    """
+    Fan a CVProcessingJob out into chunk tasks and finalize once all chunks finish.
+    Chunk size: settings.RECRUITMENT_JOB_CHUNK_SIZE.
+    """
+    try:
+        job = CVProcessingJob.objects.get(job_id=job_id)
+    except CVProcessingJob.DoesNotExist:
+        logger.error(f"CV job {job_id} not found")
+        return {'status': 'error', 'error': 'job not found'}
+    
+    job.status = 'RUNNING'
+    job.started_at = timezone.now()
+    job.save(update_fields=['status', 'started_at'])
+    
+    item_ids = list(job.items.order_by('position').values_list('id', flat=True))
+    chunk_size = max(1, int(getattr(settings, 'RECRUITMENT_JOB_CHUNK_SIZE', 10)))
+    chunks = [item_ids[i:i + chunk_size] for i in range(0, len(item_ids), chunk_size)]
+    if not chunks:
+        return finalize_cv_job_task(None, job_id)
+    
+    # If a chunk (or the finalizer) raises, the chord body never runs; the errback fails the job
+    chord(
+        group(process_cv_job_chunk_task.s(job_id, chunk) for chunk in chunks)
+    )(finalize_cv_job_task.s(job_id).on_error(fail_cv_job_task.s(job_id)))
+    return {'status': 'queued', 'chunks': len(chunks)}
+
+
+@shared_task
+def fail_cv_job_task(request, exc, traceback, job_id):
+    """Chord errback: mark a job FAILED when one of its tasks raised, instead of leaving it RUNNING."""
+    logger.error(f"CV job {job_id} failed in task {getattr(request, 'id', None)}: {exc}")
+    CVProcessingJob.objects.filter(job_id=job_id, status__in=['PENDING', 'RUNNING']).update(
+        status='FAILED', error_message=f'Processing failed: {exc}', completed_at=timezone.now()
+    )
+
+
+@shared_task(bind=True)
+def process_cv_job_chunk_task(self, job_id, item_ids):
+    """
+    Process one chunk of CVs with the bounded-concurrency batch runner.
+    Each item is saved as soon as it finishes, so the status endpoint shows partial results.
+    """
+    from .batch import run_batch
+    from .cv_pipeline import get_agents, process_cv_file
+    
+    try:
+        job = CVProcessingJob.objects.select_related('job_description').get(job_id=job_id)
+    except CVProcessingJob.DoesNotExist:
+        return {'status': 'error', 'error': 'job not found'}
+    options = json.loads(job.options_json or '{}')
+    agents = get_agents()
+    items = list(CVProcessingJobItem.objects.filter(id__in=item_ids).order_by('position'))
+    
+    def process_item(item):
+        CVProcessingJobItem.objects.filter(id=item.id).update(status='RUNNING')
+        tmp_dir = tempfile.mkdtemp(prefix='cv_job_')
+        try:
+            local_path = Path(tmp_dir) / Path(item.file_name).name
+            with default_storage.open(item.storage_path, 'rb') as src, open(local_path, 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+            result = process_cv_file(
+                agents, item.file_name, local_path, job.job_description,
+                options.get('job_kw_list'),
+                options.get('interview_threshold'), options.get('hold_threshold'),
+                options.get('parse_only', False),
+            )
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        CVProcessingJobItem.objects.filter(id=item.id).update(
+            status='DONE',
+            cv_record_id=result.get('record_id'),
+            result_json=json.dumps(result, ensure_ascii=False, default=str),
+            updated_at=timezone.now(),
+        )
+        CVProcessingJob.objects.filter(id=job.id).update(processed_count=F('processed_count') + 1)
+        return result
+    
+    outcomes = run_batch(items, process_item, log_service=agents['log_service'])
+    failed = 0
+    for outcome in outcomes:
+        if outcome['ok']:
+            continue
+        failed += 1
+        item = items[outcome['index']]
+        CVProcessingJobItem.objects.filter(id=item.id).update(
+            status='FAILED', error_message=outcome['error'], updated_at=timezone.now()
+        )
+    if failed:
+        CVProcessingJob.objects.filter(id=job.id).update(
+            processed_count=F('processed_count') + failed,
+            failed_count=F('failed_count') + failed,
+        )
+    if any(outcome['is_auth_error'] for outcome in outcomes):
+        _mark_job_failed(job_id, 'Groq API key expired or invalid. Please update GROQ_REC_API_KEY.')
+    return {'status': 'success', 'processed': len(outcomes), 'failed': failed}
+
+
+@shared_task(bind=True)
+def finalize_cv_job_task(self, chunk_results, job_id):
+    """Rank all successfully processed CVs, schedule interviews and store the final results."""
+    from .cv_pipeline import get_agents, rank_and_schedule
+    
+    try:
+        job = CVProcessingJob.objects.select_related('company_user', 'job_description').get(job_id=job_id)
+    except CVProcessingJob.DoesNotExist:
+        return {'status': 'error', 'error': 'job not found'}
+    
+    options = json.loads(job.options_json or '{}')
+    items = list(job.items.order_by('position'))
+    results = [json.loads(item.result_json) for item in items if item.status == 'DONE' and item.result_json]
+    try:
+        if job.status == 'FAILED':
+            pass
+        elif not results and job.failed_count:
+            job.status = 'FAILED'
+            job.error_message = 'All CVs failed to process'
+        else:
+            if not options.get('parse_only'):
+                results = rank_and_schedule(
+                    get_agents(), results, job.company_user, job.job_description,
+                    options.get('job_description_text', ''), options.get('job_kw_list'), options.get('top_n'),
+                )
+            job.results_json = json.dumps(results, ensure_ascii=False, default=str)
+            job.status = 'COMPLETED'
+    except Exception as e:
+        logger.error(f"Error finalizing CV job {job_id}: {str(e)}", exc_info=True)
+        job.status = 'FAILED'
+        job.error_message = str(e)
+    
+    job.completed_at = timezone.now()
+    job.save(update_fields=['status', 'results_json', 'error_message', 'completed_at'])
+    
+    # Uploaded files are no longer needed once the job is finished
+    for item in items:
+        try:
+            default_storage.delete(item.storage_path)
+        except Exception:
+            pass
+    return {'status': job.status, 'results': len(results)}
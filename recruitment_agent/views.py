@@ -378,7 +378,7 @@ def process_cvs(request):
                 insights_with_id = {**item["insights"], "record_id": item.get("record_id")}
                 enriched_data = item.get("enrichment")
                 qual = qualify_agent.qualify(
-                    item["parsed"], insights_with_id, job_keywords=job_kw_list, enriched_data=enriched_data
+                    item["parsed"], insights_with_id, job_keywords=job_kw_list, enriched_data=enriched_data, persist=False
                 )
                 qualified.append({**item, "qualification": qual})
             
@@ -413,9 +413,12 @@ def process_cvs(request):
             interview_agent = agents['interview_agent']
             for rank, item in enumerate(qualified_sorted, start=1):
                 item["rank"] = rank
-                if django_repo and item.get("record_id"):
-                    django_repo.store_qualification(item["record_id"], item["qualification"], rank=rank)
-                
+            if django_repo:
+                django_repo.store_qualifications([
+                    {"record_id": item["record_id"], "qualification": item["qualification"], "rank": item["rank"]}
+                    for item in qualified_sorted if item.get("record_id")
+                ])
+            for item in qualified_sorted:
                 # Auto-schedule interview if decision is INTERVIEW
                 qual_decision = item.get("qualification", {}).get("decision", "")
                 if qual_decision == "INTERVIEW":